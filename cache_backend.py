@@ -0,0 +1,328 @@
+"""
+Caché Compartida
+Reemplaza los diccionarios con TTL de cada módulo por un subsistema con dos backends:
+- 'memory': LRU acotada en memoria con invalidación O(1) por prefijo o etiqueta
+- 'sqlite': archivo SQLite compartido por todos los workers de gunicorn, para que una
+  invalidación hecha en un worker llegue a los demás
+El backend se elige con CACHE_BACKEND (y CACHE_PATH para el archivo compartido).
+El archivo compartido guarda objetos serializados con pickle: solo se usa si su directorio
+y el archivo pertenecen al usuario del proceso y nadie más puede escribirlos.
+"""
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Directorio propio del usuario (0700) dentro del temporal: nadie más puede crear el archivo antes
+_OWNER = os.geteuid() if hasattr(os, 'geteuid') else os.environ.get('USERNAME', 'user')
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_PATH = os.environ.get('CACHE_PATH', os.path.join(tempfile.gettempdir(), f'aspers_cache-{_OWNER}', 'cache.sqlite'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 4096))
+CACHE_TTL = 30  # segundos por defecto
+
+# Prefijos con generación propia en MemoryCache; a partir de aquí se invalidan recorriendo las claves
+CACHE_MAX_PREFIXES = 64
+
+# Mayor que cualquier carácter: límite superior de un rango de claves por prefijo
+_PREFIX_END = '\U0010ffff'
+
+
+class MemoryCache:
+    """
+    LRU en memoria con TTL por entrada
+
+    Invalidación por prefijo / etiqueta en O(1): cada prefijo invalidado alguna vez y cada
+    etiqueta tienen un contador de generación; la entrada guarda las generaciones vigentes
+    al guardarse y deja de ser válida cuando alguna cambia. La primera invalidación de un
+    prefijo nuevo recorre las claves una vez; a partir de ahí solo incrementa el contador.
+    El registro de prefijos está acotado (CACHE_MAX_PREFIXES): pensado para los espacios fijos
+    ('scan_', 'statistics', 'learned'...); para una sola clave usar delete().
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL, max_prefixes=CACHE_MAX_PREFIXES):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_prefixes = max_prefixes
+        self._data = OrderedDict()      # clave -> (valor, expira, generaciones)
+        self._generations = {}          # ('p', prefijo) / ('t', etiqueta) -> int
+        self._prefix_lengths = {}       # longitud -> prefijos registrados con esa longitud
+        self._lock = threading.RLock()
+
+    def _stamps(self, key, tags):
+        stamps = []
+        for length, prefixes in self._prefix_lengths.items():
+            prefix = key[:length]
+            if len(prefix) == length and prefix in prefixes:
+                name = ('p', prefix)
+                stamps.append((name, self._generations[name]))
+        for tag in tags:
+            name = ('t', tag)
+            stamps.append((name, self._generations.setdefault(name, 0)))
+        return tuple(stamps)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at, stamps = entry
+            generations = self._generations
+            if time.time() >= expires_at or any(generations[name] != gen for name, gen in stamps):
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl, self._stamps(key, tags))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            name = ('p', prefix)
+            if name in self._generations:
+                self._generations[name] += 1
+                return
+            # Prefijo nuevo: las entradas existentes no llevan su generación, se borran una vez
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+            if sum(len(prefixes) for prefixes in self._prefix_lengths.values()) >= self.max_prefixes:
+                return  # Registro lleno: este prefijo se seguirá invalidando recorriendo las claves
+            self._generations[name] = 0
+            self._prefix_lengths.setdefault(len(prefix), set()).add(prefix)
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            name = ('t', tag)
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    Caché en un archivo SQLite compartido entre procesos
+
+    Las claves son la clave primaria: la invalidación por prefijo es un DELETE por rango
+    sobre el índice y la de etiquetas usa una tabla (etiqueta, clave) indexada.
+    Un fallo del archivo de caché nunca rompe la petición: se trata como un fallo de caché.
+    """
+
+    # Cada cuántas escrituras se comprueba el tamaño máximo
+    EVICT_EVERY = 64
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._init_schema()
+
+    def _conn(self):
+        # Una conexión por hilo y por proceso (tras el fork de gunicorn se abre otra)
+        conn = getattr(self._local, 'connection', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        try:
+            conn = self._conn()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB,
+                    expires_at REAL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_tags_key ON cache_tags(key)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries(expires_at)')
+        except sqlite3.Error as e:
+            print(f"⚠️ Error inicializando caché compartida en {self.path}: {e}")
+
+    def get(self, key):
+        try:
+            row = self._conn().execute(
+                'SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() >= row[1]:
+                self.delete(key)
+                return None
+            return pickle.loads(row[0])
+        except Exception as e:
+            print(f"⚠️ Error leyendo caché compartida: {e}")
+            return None
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            conn = self._conn()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                             (key, data, time.time() + ttl))
+                conn.execute('DELETE FROM cache_tags WHERE key = ?', (key,))
+                if tags:
+                    conn.executemany('INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)',
+                                     [(tag, key) for tag in tags])
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict()
+        except Exception as e:
+            print(f"⚠️ Error escribiendo caché compartida: {e}")
+
+    def _evict(self):
+        """Borra lo expirado y, si sigue sobrando, lo que antes expira"""
+        conn = self._conn()
+        conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+        count = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        if count > self.max_entries:
+            conn.execute('''
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?
+                )
+            ''', (count - self.max_entries,))
+        conn.execute('DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)')
+
+    def _execute(self, *statements):
+        try:
+            conn = self._conn()
+            for sql, params in statements:
+                conn.execute(sql, params)
+        except sqlite3.Error as e:
+            print(f"⚠️ Error invalidando caché compartida: {e}")
+
+    def delete(self, key):
+        self._execute(('DELETE FROM cache_entries WHERE key = ?', (key,)),
+                      ('DELETE FROM cache_tags WHERE key = ?', (key,)))
+
+    def invalidate_prefix(self, prefix):
+        self._execute(('DELETE FROM cache_entries WHERE key >= ? AND key < ?', (prefix, prefix + _PREFIX_END)),
+                      ('DELETE FROM cache_tags WHERE key >= ? AND key < ?', (prefix, prefix + _PREFIX_END)))
+
+    def invalidate_tag(self, tag):
+        self._execute(('DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_tags WHERE tag = ?)', (tag,)),
+                      ('DELETE FROM cache_tags WHERE tag = ?', (tag,)))
+
+    def clear(self):
+        self._execute(('DELETE FROM cache_entries', ()), ('DELETE FROM cache_tags', ()))
+
+
+class CacheNamespace:
+    """Vista de un backend con las claves y etiquetas bajo 'namespace:' (api, web...)"""
+
+    def __init__(self, backend, namespace):
+        self.backend = backend
+        self.prefix = f'{namespace}:'
+
+    def get(self, key):
+        return self.backend.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None, tags=()):
+        self.backend.set(self.prefix + key, value, ttl=ttl, tags=[self.prefix + tag for tag in tags])
+
+    def delete(self, key):
+        self.backend.delete(self.prefix + key)
+
+    def invalidate_prefix(self, prefix):
+        self.backend.invalidate_prefix(self.prefix + prefix)
+
+    def invalidate_tag(self, tag):
+        self.backend.invalidate_tag(self.prefix + tag)
+
+    def clear(self):
+        self.backend.invalidate_prefix(self.prefix)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _prepare_cache_file(path):
+    """
+    Crea el directorio (0700) y el archivo (0600) de la caché compartida
+
+    Returns:
+        True si el directorio y el archivo son del usuario actual y nadie más puede escribirlos
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+    try:
+        if not hasattr(os, 'geteuid'):
+            return True
+        uid = os.geteuid()
+        directory_stat = os.stat(directory)
+        if directory_stat.st_uid != uid or directory_stat.st_mode & 0o022:
+            return False
+        if os.fstat(fd).st_uid != uid:
+            return False
+        os.fchmod(fd, 0o600)
+        return True
+    finally:
+        os.close(fd)
+
+
+def create_backend(kind=None):
+    """Crea el backend indicado ('memory' o 'sqlite'); por defecto el de CACHE_BACKEND"""
+    kind = (kind or os.environ.get('CACHE_BACKEND', CACHE_BACKEND)).lower()
+    if kind == 'sqlite':
+        path = os.environ.get('CACHE_PATH', CACHE_PATH)
+        try:
+            owned = _prepare_cache_file(path)
+        except OSError as e:
+            print(f"⚠️ No se pudo preparar la caché compartida en {path}: {e}")
+            owned = False
+        if owned:
+            return SQLiteCache(path)
+        print(f"⚠️ La caché compartida {path} no es privada de este usuario, usando memoria")
+        return MemoryCache()
+    if kind != 'memory':
+        print(f"⚠️ CACHE_BACKEND desconocido '{kind}', usando memoria")
+    return MemoryCache()
+
+
+def get_cache(namespace='default'):
+    """Caché del proceso para un espacio de nombres (el backend es común a todos)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+            print(f"✅ Caché: backend {type(_backend).__name__}")
+    return CacheNamespace(_backend, namespace)
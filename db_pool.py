@@ -0,0 +1,406 @@
+"""
+Pool de Conexiones a Base de Datos
+Capa común para SQLite, MySQL y PostgreSQL: las conexiones se crean una vez y se reutilizan
+entre peticiones, con tamaño mínimo/máximo, comprobación previa (pre-ping), reciclado por
+antigüedad y métricas de espera por petición
+"""
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# Configuración (variables de entorno)
+POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN', 1))
+POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX', 10))
+POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800))   # segundos
+POOL_CHECKOUT_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))      # segundos esperando conexión libre
+POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') != '0'
+
+# Una conexión usada hace menos de esto no se vuelve a comprobar antes de prestarla
+PRE_PING_IDLE = 1.0
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+)
+
+# Errores tras los que la conexión se descarta en lugar de volver al pool
+DISCONNECT_ERRORS = ('OperationalError', 'InterfaceError')
+
+
+class PoolTimeout(Exception):
+    """No se liberó ninguna conexión dentro del tiempo de espera"""
+
+
+class _PoolEntry:
+    __slots__ = ('connection', 'created_at', 'last_used', 'checked_out_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.checked_out_at = None
+
+
+# Métricas de la petición en curso (un hilo = una petición en Flask/gunicorn)
+_request_local = threading.local()
+
+
+def reset_request_metrics():
+    """Pone a cero las métricas de la petición actual"""
+    _request_local.metrics = {'checkouts': 0, 'wait': 0.0, 'hold': 0.0}
+
+
+def request_metrics():
+    """Préstamos de conexión de la petición actual: cantidad, espera y tiempo retenido (segundos)"""
+    metrics = getattr(_request_local, 'metrics', None)
+    if metrics is None:
+        reset_request_metrics()
+        metrics = _request_local.metrics
+    return metrics
+
+
+def install_request_metrics(app):
+    """Registra en una app Flask las métricas por petición (cabecera Server-Timing)"""
+    @app.before_request
+    def _db_pool_reset_metrics():
+        reset_request_metrics()
+
+    @app.after_request
+    def _db_pool_report_metrics(response):
+        metrics = request_metrics()
+        if metrics['checkouts']:
+            response.headers.add(
+                'Server-Timing',
+                f"db-wait;dur={metrics['wait'] * 1000:.1f}, "
+                f"db;desc=\"{metrics['checkouts']} checkouts\";dur={metrics['hold'] * 1000:.1f}"
+            )
+        return response
+
+
+class PooledConnection:
+    """
+    Conexión prestada por el pool con la interfaz de la conexión real
+
+    close() la devuelve al pool en lugar de cerrarla, así el código que hace
+    conn = connect(...) / conn.close() funciona sin cambios.
+    """
+
+    __slots__ = ('_pool', '_entry', '_released')
+
+    def __init__(self, pool, entry):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_entry', entry)
+        object.__setattr__(self, '_released', False)
+
+    def __getattr__(self, name):
+        return getattr(self._entry.connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._entry.connection, name, value)
+
+    def __enter__(self):
+        self._entry.connection.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._entry.connection.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        if not self._released:
+            object.__setattr__(self, '_released', True)
+            self._pool._release(self._entry)
+
+    def __del__(self):
+        # Red de seguridad para rutas de error que no llegan a close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe
+
+    Uso:
+        pool = ConnectionPool(connect)                # connect() -> conexión DB-API nueva
+        with pool.cursor() as cursor:                 # commit / rollback automático
+            cursor.execute('SELECT 1')
+        conn = pool.acquire(); ...; conn.close()      # estilo conexión clásica
+        pool.stats()
+
+    - min_size conexiones se abren por adelantado; nunca hay más de max_size
+    - pre_ping: una conexión inactiva se comprueba (SELECT 1) antes de prestarla
+    - max_lifetime: las conexiones más antiguas se cierran y se reemplazan
+    """
+
+    def __init__(self, connect, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 max_lifetime=POOL_MAX_LIFETIME, pre_ping=POOL_PRE_PING,
+                 checkout_timeout=POOL_CHECKOUT_TIMEOUT, reset=None, name='db'):
+        self.connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max(1, max_size)
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+        self.checkout_timeout = checkout_timeout
+        self.reset = reset
+        self.name = name
+
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'created': 0, 'closed': 0, 'recycled': 0, 'ping_failures': 0,
+            'checkouts': 0, 'timeouts': 0, 'wait_total': 0.0, 'wait_max': 0.0, 'hold_total': 0.0
+        }
+        _pools.add(self)
+
+    # ---------- ciclo de vida de las conexiones ----------
+
+    def fill(self):
+        """Abre conexiones hasta min_size (calentamiento al arrancar)"""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._new_entry()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def _count(self, key, value=1):
+        with self._cond:
+            self._stats[key] += value
+
+    def _new_entry(self):
+        entry = _PoolEntry(self.connect())
+        self._count('created')
+        return entry
+
+    def _close_entry(self, entry):
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+        self._count('closed')
+
+    def _expired(self, entry, now):
+        return self.max_lifetime and now - entry.created_at > self.max_lifetime
+
+    def _ping(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+            cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _checkout(self):
+        started = time.time()
+        deadline = started + self.checkout_timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()    # LIFO: la conexión más reciente sigue "caliente"
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    entry = None
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"Pool '{self.name}': sin conexiones libres tras {self.checkout_timeout}s "
+                                      f"({self.max_size} en uso)")
+                self._cond.wait(remaining)
+
+        try:
+            now = time.time()
+            if entry is not None and self._expired(entry, now):
+                self._close_entry(entry)
+                self._count('recycled')
+                entry = None
+            elif entry is not None and self.pre_ping and now - entry.last_used > PRE_PING_IDLE:
+                try:
+                    self._ping(entry.connection)
+                except Exception:
+                    self._close_entry(entry)
+                    self._count('ping_failures')
+                    entry = None
+            if entry is None:
+                entry = self._new_entry()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        checked_out_at = time.time()
+        entry.checked_out_at = checked_out_at
+        wait = checked_out_at - started
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['wait_total'] += wait
+            if wait > self._stats['wait_max']:
+                self._stats['wait_max'] = wait
+        metrics = request_metrics()
+        metrics['checkouts'] += 1
+        metrics['wait'] += wait
+        return entry
+
+    def _release(self, entry, discard=False):
+        now = time.time()
+        hold = now - (entry.checked_out_at or now)
+        self._count('hold_total', hold)
+        request_metrics()['hold'] += hold
+
+        if not discard:
+            try:
+                # Ninguna transacción abierta vuelve al pool
+                entry.connection.rollback()
+                if self.reset is not None:
+                    self.reset(entry.connection)
+            except Exception:
+                discard = True
+
+        if discard or self._expired(entry, now):
+            self._close_entry(entry)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+
+        entry.last_used = now
+        entry.checked_out_at = None
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    # ---------- API pública ----------
+
+    @contextmanager
+    def connection(self):
+        """Presta una conexión durante el bloque with"""
+        entry = self._checkout()
+        discard = False
+        try:
+            yield entry.connection
+        except Exception as e:
+            discard = type(e).__name__ in DISCONNECT_ERRORS
+            raise
+        finally:
+            self._release(entry, discard=discard)
+
+    @contextmanager
+    def cursor(self):
+        """Cursor con commit al salir del bloque y rollback si hay excepción"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def acquire(self):
+        """Presta una conexión que se devuelve con close()"""
+        return PooledConnection(self, self._checkout())
+
+    def stats(self):
+        """Tamaño actual y métricas acumuladas del pool"""
+        with self._cond:
+            size = self._size
+            idle = len(self._idle)
+            stats = dict(self._stats)
+        checkouts = stats['checkouts'] or 1
+        stats.update({
+            'name': self.name,
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'wait_avg': stats['wait_total'] / checkouts,
+            'hold_avg': stats['hold_total'] / checkouts,
+        })
+        return stats
+
+    def _after_fork(self):
+        """
+        En el proceso hijo (workers de gunicorn con preload_app) las conexiones heredadas
+        pertenecen al padre: se olvidan sin cerrarlas, porque cerrarlas desde el hijo
+        terminaría también la sesión del padre
+        """
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+
+    def close_all(self):
+        """Cierra las conexiones inactivas (las prestadas se cierran al devolverse)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for entry in idle:
+            self._close_entry(entry)
+
+
+_pools = weakref.WeakSet()
+
+
+def _reset_pools_after_fork():
+    for pool in list(_pools):
+        pool._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+# ============================================================
+# SQLITE
+# ============================================================
+
+def sqlite_connector(path, row_factory=None, timeout=10.0, pragmas=SQLITE_PRAGMAS):
+    """Función de conexión SQLite: los PRAGMA se aplican una vez por conexión, no por petición"""
+    def connect():
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=timeout)
+        for pragma in pragmas:
+            conn.execute(pragma)
+        conn.row_factory = row_factory
+        return conn
+    return connect
+
+
+_sqlite_pools = {}
+_sqlite_pools_lock = threading.Lock()
+
+
+def get_sqlite_pool(path, row_factory=None, **kwargs):
+    """Pool compartido por archivo SQLite (y row_factory) dentro del proceso"""
+    key = (os.path.abspath(path), row_factory)
+    with _sqlite_pools_lock:
+        pool = _sqlite_pools.get(key)
+        if pool is None:
+            def reset(conn):
+                # El código que cambia row_factory en una conexión prestada no afecta al siguiente
+                conn.row_factory = row_factory
+            pool = ConnectionPool(sqlite_connector(path, row_factory=row_factory), reset=reset,
+                                  name=os.path.basename(path), **kwargs)
+            _sqlite_pools[key] = pool
+        return pool
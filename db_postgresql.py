@@ -10,6 +10,13 @@ from functools import wraps
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from cache_backend import get_cache
+from db_pool import ConnectionPool
+import model_feed
+import release_index
+import scan_listing
+import stats_counters
+
 # Configuración desde variables de entorno
 POSTGRES_HOST = os.environ.get('POSTGRES_HOST') or os.environ.get('DATABASE_URL', '').split('@')[1].split('/')[0].split(':')[0] if os.environ.get('DATABASE_URL') else None
 POSTGRES_PORT = int(os.environ.get('POSTGRES_PORT', 5432))
@@ -23,51 +30,56 @@ if os.environ.get('DATABASE_URL'):
 else:
     DATABASE_URL = None
 
-# Pool de conexiones thread-local
-_local = threading.local()
+# Pool de conexiones compartido por todos los hilos
+_pool = None
+_pool_lock = threading.Lock()
 
-def get_db_connection():
-    """Obtiene una conexión PostgreSQL thread-local (reutilizable)"""
-    if not hasattr(_local, 'connection') or _local.connection.closed:
-        try:
-            if DATABASE_URL:
-                # Usar connection string de Render
-                _local.connection = psycopg2.connect(
-                    DATABASE_URL,
-                    cursor_factory=RealDictCursor,
-                    connect_timeout=10
-                )
-            else:
-                # Usar variables individuales
-                _local.connection = psycopg2.connect(
-                    host=POSTGRES_HOST,
-                    port=POSTGRES_PORT,
-                    user=POSTGRES_USER,
-                    password=POSTGRES_PASSWORD,
-                    database=POSTGRES_DATABASE,
-                    cursor_factory=RealDictCursor,
-                    connect_timeout=10
-                )
-            print(f"✅ Conexión PostgreSQL establecida: {POSTGRES_HOST or 'via DATABASE_URL'}:{POSTGRES_PORT}/{POSTGRES_DATABASE or 'via URL'}")
-        except Exception as e:
-            print(f"❌ Error conectando a PostgreSQL: {e}")
-            raise
+def _connect():
+    """Abre una conexión PostgreSQL nueva (el pool decide cuándo)"""
+    try:
+        if DATABASE_URL:
+            # Usar connection string de Render
+            connection = psycopg2.connect(
+                DATABASE_URL,
+                cursor_factory=RealDictCursor,
+                connect_timeout=10
+            )
+        else:
+            # Usar variables individuales
+            connection = psycopg2.connect(
+                host=POSTGRES_HOST,
+                port=POSTGRES_PORT,
+                user=POSTGRES_USER,
+                password=POSTGRES_PASSWORD,
+                database=POSTGRES_DATABASE,
+                cursor_factory=RealDictCursor,
+                connect_timeout=10
+            )
+        print(f"✅ Conexión PostgreSQL establecida: {POSTGRES_HOST or 'via DATABASE_URL'}:{POSTGRES_PORT}/{POSTGRES_DATABASE or 'via URL'}")
+    except Exception as e:
+        print(f"❌ Error conectando a PostgreSQL: {e}")
+        raise
     
-    return _local.connection
+    return connection
+
+def get_pool():
+    """Pool de conexiones PostgreSQL"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect, name='postgresql')
+    return _pool
+
+def get_db_connection():
+    """Conexión PostgreSQL prestada por el pool (close() la devuelve)"""
+    return get_pool().acquire()
 
 @contextmanager
 def get_db_cursor():
     """Context manager para operaciones de base de datos PostgreSQL"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
+    with get_pool().cursor() as cursor:
         yield cursor
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cursor.close()
 
 def execute_query(query, params=None, fetch_one=False, fetch_all=False):
     """Ejecuta una consulta SQL y retorna resultados"""
@@ -174,6 +186,19 @@ def init_postgresql_db():
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_issue_type ON scan_results(issue_type)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_level ON scan_results(alert_level)')
         
+        # Tabla de bloques recibidos por streaming (idempotencia y reanudación de subidas)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scan_result_chunks (
+                id SERIAL PRIMARY KEY,
+                scan_id INTEGER NOT NULL,
+                chunk_seq INTEGER NOT NULL,
+                result_count INTEGER DEFAULT 0,
+                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (scan_id) REFERENCES scans(id) ON DELETE CASCADE,
+                UNIQUE (scan_id, chunk_seq)
+            )
+        ''')
+        
         # Tabla de análisis de IA
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS ai_analyses (
@@ -416,6 +441,18 @@ def init_postgresql_db():
             conn.commit()
             print("✅ Empresa default 'arefy' creada")
         
+        # Contadores de estadísticas (tablas, triggers y relleno inicial)
+        stats_counters.ensure_schema(cursor)
+        
+        # Resumen de severidad e índices de paginación del listado de escaneos
+        scan_listing.ensure_schema(cursor)
+        
+        # Registro de cambios del modelo de IA (feed versionado con deltas)
+        model_feed.ensure_schema(cursor)
+        
+        # Índice de releases conocidas de mods y resource packs
+        release_index.ensure_schema(cursor)
+        
     except Exception as e:
         conn.rollback()
         print(f"❌ Error inicializando base de datos PostgreSQL: {e}")
@@ -424,35 +461,28 @@ def init_postgresql_db():
         raise
     finally:
         cursor.close()
+        conn.close()
 
-# Cache en memoria (similar al sistema SQLite)
-_cache = {}
-_cache_timeout = {}
+# Caché compartida (memoria o archivo SQLite común a todos los workers, según CACHE_BACKEND)
+_cache = get_cache('api')
 CACHE_TTL = 30  # 30 segundos TTL
 
 def get_cached(key):
     """Obtiene un valor del caché si no ha expirado"""
-    if key in _cache:
-        if time.time() - _cache_timeout.get(key, 0) < CACHE_TTL:
-            return _cache[key]
-        else:
-            del _cache[key]
-            del _cache_timeout[key]
-    return None
+    return _cache.get(key)
 
 def set_cached(key, value):
     """Guarda un valor en el caché"""
-    _cache[key] = value
-    _cache_timeout[key] = time.time()
+    _cache.set(key, value, ttl=CACHE_TTL)
+
+def delete_cached(key):
+    """Borra una sola clave del caché"""
+    _cache.delete(key)
 
 def clear_cache(pattern=None):
-    """Limpia el caché (opcionalmente por patrón)"""
+    """Limpia el caché (opcionalmente las claves que empiezan por pattern)"""
     if pattern:
-        keys_to_delete = [k for k in _cache.keys() if pattern in k]
-        for k in keys_to_delete:
-            _cache.pop(k, None)
-            _cache_timeout.pop(k, None)
+        _cache.invalidate_prefix(pattern)
     else:
         _cache.clear()
-        _cache_timeout.clear()
 
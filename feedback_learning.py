@@ -0,0 +1,321 @@
+"""
+Aprendizaje a partir del Feedback del Staff (por lotes)
+Marcar cientos de resultados cuesta unas pocas sentencias: una consulta para leer los
+resultados, inserción multi-fila del feedback, y patrones y hashes agregados en memoria
+que se aplican con un UPSERT por tabla. Así la transacción (y el bloqueo de escritura
+de SQLite) dura milisegundos en lugar de segundos.
+Funciona con cursores SQLite, MySQL (pymysql) y PostgreSQL (psycopg2)
+"""
+import json
+import re
+from collections import Counter
+
+from stats_counters import dialect
+
+# Palabras clave de hacks conocidos (se guarda la palabra clave, no la palabra completa)
+HACK_KEYWORDS_RE = re.compile(
+    r'\b(vape|entropy|inject|bypass|killaura|aimbot|reach|velocity|scaffold|fly|xray|ghost|stealth|'
+    r'undetected|sigma|flux|future|astolfo|whiteout|liquidbounce|wurst|impact)\w*\b',
+    re.IGNORECASE
+)
+LEGITIMATE_WORD_RE = re.compile(r'\b\w{4,}\b')
+LEGITIMATE_STOPWORDS = ['file', 'path', 'name', 'minecraft', 'mod']
+SUSPICIOUS_LOCATIONS = ['temp', 'downloads', 'desktop', 'appdata']
+
+# Filas por sentencia multi-fila (10 columnas * 90 < 999 variables de SQLite antiguo)
+INSERT_ROWS = 90
+# Ids por consulta IN (...)
+SELECT_IDS = 500
+
+RESULT_COLUMNS = ('id', 'scan_id', 'issue_name', 'issue_path', 'file_hash', 'obfuscation_detected', 'confidence')
+
+
+def _placeholder(cursor):
+    return '?' if dialect(cursor) == 'sqlite' else '%s'
+
+
+def _row_values(row, columns):
+    if isinstance(row, dict):
+        return tuple(row[column] for column in columns)
+    return tuple(row)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# ============================================================
+# EXTRACCIÓN (EN MEMORIA)
+# ============================================================
+
+def extract_hack_patterns(issue_name, issue_path):
+    """Palabras clave de hacks presentes en el nombre o la ruta (sin repetir)"""
+    text = (issue_name or '').lower() + ' ' + (issue_path or '').lower()
+    return list(set(HACK_KEYWORDS_RE.findall(text)))
+
+
+def legitimate_words(issue_name):
+    """Hasta 5 palabras del nombre que se aprenden como patrones legítimos"""
+    words = LEGITIMATE_WORD_RE.findall((issue_name or '').lower())[:5]
+    return [word for word in words if len(word) > 3 and word not in LEGITIMATE_STOPWORDS]
+
+
+def hack_features(issue_path, obfuscation, confidence):
+    """Características guardadas con el feedback de un hack confirmado"""
+    path_lower = (issue_path or '').lower()
+    return {
+        'obfuscation': bool(obfuscation),
+        'confidence': confidence or 0,
+        'location_suspicious': any(x in path_lower for x in SUSPICIOUS_LOCATIONS)
+    }
+
+
+# ============================================================
+# ACCESO A BD POR LOTES
+# ============================================================
+
+def fetch_results(cursor, result_ids):
+    """Resultados de scan_results por id, leídos con una consulta IN (...) por cada SELECT_IDS ids"""
+    ph = _placeholder(cursor)
+    found = {}
+    for chunk in _chunks(sorted(set(result_ids)), SELECT_IDS):
+        cursor.execute(f'''
+            SELECT {', '.join(RESULT_COLUMNS)}
+            FROM scan_results
+            WHERE id IN ({', '.join([ph] * len(chunk))})
+        ''', chunk)
+        for row in cursor.fetchall():
+            values = _row_values(row, RESULT_COLUMNS)
+            found[values[0]] = values
+    return found
+
+
+def _execute_isolated(cursor, kind, sql, params):
+    """
+    Ejecuta una sentencia; si falla solo se deshace ella y el resto del lote sigue
+    (PostgreSQL aborta la transacción entera salvo que se use un SAVEPOINT)
+    """
+    if kind != 'postgresql':
+        cursor.execute(sql, params)
+        return
+    cursor.execute('SAVEPOINT feedback_insert')
+    try:
+        cursor.execute(sql, params)
+    except Exception:
+        cursor.execute('ROLLBACK TO SAVEPOINT feedback_insert')
+        raise
+    cursor.execute('RELEASE SAVEPOINT feedback_insert')
+
+
+def _insert_row(cursor, kind, table, columns, row):
+    """INSERT de una fila; devuelve su id"""
+    ph = _placeholder(cursor)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([ph] * len(columns))})"
+    if kind == 'postgresql':
+        _execute_isolated(cursor, kind, sql + ' RETURNING id', row)
+        return _row_values(cursor.fetchone(), ('id',))[0]
+    _execute_isolated(cursor, kind, sql, row)
+    return cursor.lastrowid
+
+
+def _insert_returning_ids(cursor, table, columns, rows):
+    """
+    Inserta las filas y devuelve (ids en el orden de rows, {posición: error}); una fila
+    que falla queda con id None y no impide guardar las demás
+
+    SQLite y PostgreSQL: INSERT multi-fila (si un bloque falla se repite fila a fila para
+    saber cuál es). MySQL: fila a fila, porque con innodb_autoinc_lock_mode=2 (el valor por
+    defecto en MySQL 8) los ids de un INSERT multi-fila no tienen por qué ser consecutivos
+    """
+    kind = dialect(cursor)
+    ph = _placeholder(cursor)
+    row_sql = f"({', '.join([ph] * len(columns))})"
+    ids = []
+    errors = {}
+    for chunk in _chunks(rows, INSERT_ROWS):
+        if kind != 'mysql':
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_sql] * len(chunk))}"
+            params = [value for row in chunk for value in row]
+            try:
+                if kind == 'postgresql':
+                    _execute_isolated(cursor, kind, sql + ' RETURNING id', params)
+                    ids.extend(_row_values(row, ('id',))[0] for row in cursor.fetchall())
+                else:
+                    # SQLite: lastrowid es el de la última fila; las de una misma sentencia son consecutivas
+                    _execute_isolated(cursor, kind, sql, params)
+                    ids.extend(range(cursor.lastrowid - len(chunk) + 1, cursor.lastrowid + 1))
+                continue
+            except Exception:
+                pass   # Fila a fila para aislar la que falla
+        for row in chunk:
+            try:
+                ids.append(_insert_row(cursor, kind, table, columns, row))
+            except Exception as e:
+                errors[len(ids)] = str(e)
+                ids.append(None)
+    return ids, errors
+
+
+def _upsert_hashes(cursor, is_hack, counts, last_feedback):
+    """Un UPSERT para todos los hashes del lote: confirmed_count suma las veces que aparecen"""
+    if not counts:
+        return
+    kind = dialect(cursor)
+    ph = _placeholder(cursor)
+    rows = [(file_hash, is_hack, count, last_feedback[file_hash]) for file_hash, count in counts.items()]
+    insert = f'''
+        INSERT INTO learned_hashes (file_hash, is_hack, confirmed_count, last_confirmed_at, source_feedback_id)
+        VALUES ({ph}, {ph}, {ph}, CURRENT_TIMESTAMP, {ph})
+    '''
+    if kind == 'mysql':
+        cursor.executemany(insert + '''
+            ON DUPLICATE KEY UPDATE
+                is_hack = VALUES(is_hack),
+                confirmed_count = confirmed_count + VALUES(confirmed_count),
+                last_confirmed_at = CURRENT_TIMESTAMP,
+                source_feedback_id = VALUES(source_feedback_id)
+        ''', rows)
+    else:
+        cursor.executemany(insert + '''
+            ON CONFLICT (file_hash) DO UPDATE SET
+                is_hack = excluded.is_hack,
+                confirmed_count = learned_hashes.confirmed_count + excluded.confirmed_count,
+                last_confirmed_at = CURRENT_TIMESTAMP,
+                source_feedback_id = excluded.source_feedback_id
+        ''', rows)
+
+
+def _existing_patterns(cursor, pattern_type, values):
+    ph = _placeholder(cursor)
+    existing = set()
+    for chunk in _chunks(sorted(values), SELECT_IDS):
+        cursor.execute(f'''
+            SELECT DISTINCT pattern_value FROM learned_patterns
+            WHERE pattern_type = {ph} AND pattern_value IN ({', '.join([ph] * len(chunk))})
+        ''', [pattern_type] + chunk)
+        existing.update(_row_values(row, ('pattern_value',))[0] for row in cursor.fetchall())
+    return existing
+
+
+def _upsert_keyword_patterns(cursor, counts, last_feedback):
+    """
+    Patrones de hack del lote: los que ya existen suman learned_from_count, los nuevos se
+    insertan (learned_patterns no tiene clave única por valor, así que el UPSERT son dos pasos)
+    """
+    if not counts:
+        return
+    ph = _placeholder(cursor)
+    existing = _existing_patterns(cursor, 'keyword', counts)
+    updates = [(counts[value], last_feedback[value], value) for value in counts if value in existing]
+    if updates:
+        cursor.executemany(f'''
+            UPDATE learned_patterns
+            SET learned_from_count = learned_from_count + {ph}, source_feedback_id = {ph},
+                last_updated_at = CURRENT_TIMESTAMP, is_active = TRUE
+            WHERE pattern_type = 'keyword' AND pattern_value = {ph}
+        ''', updates)
+    inserts = [(value, last_feedback[value], counts[value]) for value in counts if value not in existing]
+    if inserts:
+        cursor.executemany(f'''
+            INSERT INTO learned_patterns (
+                pattern_type, pattern_value, pattern_category, source_feedback_id,
+                learned_from_count, last_updated_at, is_active
+            ) VALUES ('keyword', {ph}, 'high_risk', {ph}, {ph}, CURRENT_TIMESTAMP, TRUE)
+        ''', inserts)
+
+
+def _insert_legitimate_patterns(cursor, words):
+    """Palabras legítimas del lote que aún no estaban aprendidas"""
+    if not words:
+        return
+    ph = _placeholder(cursor)
+    existing = _existing_patterns(cursor, 'legitimate_keyword', words)
+    new_words = [(word,) for word in sorted(words) if word not in existing]
+    if new_words:
+        cursor.executemany(f'''
+            INSERT INTO learned_patterns (
+                pattern_type, pattern_value, pattern_category, is_active, learned_from_count
+            ) VALUES ('legitimate_keyword', {ph}, 'legitimate', TRUE, 1)
+        ''', new_words)
+
+
+# ============================================================
+# LOTE COMPLETO
+# ============================================================
+
+def apply_feedback_batch(cursor, result_ids, verification, notes, verified_by, learn_legitimate_words=True):
+    """
+    Registra el mismo veredicto del staff ('hack' o 'legitimate') para muchos resultados
+
+    Returns:
+        {'feedback': [(result_id, feedback_id), ...] en el orden recibido,
+         'missing': result_ids que no existen,
+         'errors': [(result_id, mensaje), ...] de los que no se pudieron guardar,
+         'patterns': palabras clave de hack extraídas (sin repetir)}
+    """
+    is_hack = verification == 'hack'
+    found = {}
+    valid_ids = []
+    for result_id in result_ids:
+        try:
+            valid_ids.append(int(result_id))
+        except (TypeError, ValueError):
+            pass
+    if valid_ids:
+        found = fetch_results(cursor, valid_ids)
+
+    entries = []        # (result_id, patterns, info)
+    missing = []
+    feedback_rows = []
+    for result_id in result_ids:
+        try:
+            info = found.get(int(result_id))
+        except (TypeError, ValueError):
+            info = None
+        if info is None:
+            missing.append(result_id)
+            continue
+        _, scan_id, issue_name, issue_path, file_hash, obfuscation, confidence = info
+        if is_hack:
+            patterns = extract_hack_patterns(issue_name, issue_path)
+            features = hack_features(issue_path, obfuscation, confidence)
+        else:
+            patterns, features = [], {}
+        entries.append((result_id, patterns, info))
+        feedback_rows.append((info[0], scan_id, verification, notes, verified_by, file_hash, issue_name, issue_path,
+                              json.dumps(patterns), json.dumps(features)))
+
+    feedback_ids, insert_errors = _insert_returning_ids(cursor, 'staff_feedback', (
+        'result_id', 'scan_id', 'staff_verification', 'staff_notes', 'verified_by',
+        'file_hash', 'issue_name', 'issue_path', 'extracted_patterns', 'extracted_features'
+    ), feedback_rows)
+    errors = [(entries[position][0], message) for position, message in sorted(insert_errors.items())]
+    # Solo el feedback guardado cuenta para hashes y patrones
+    saved = [(entry, feedback_id) for entry, feedback_id in zip(entries, feedback_ids) if feedback_id is not None]
+
+    # Agregados del lote: cuántas veces aparece cada hash / patrón y el último feedback que lo aportó
+    hash_counts, hash_feedback = Counter(), {}
+    pattern_counts, pattern_feedback = Counter(), {}
+    legitimate = set()
+    for (result_id, patterns, info), feedback_id in saved:
+        file_hash = info[4]
+        if file_hash:
+            hash_counts[file_hash] += 1
+            hash_feedback[file_hash] = feedback_id
+        for pattern in patterns:
+            pattern_counts[pattern] += 1
+            pattern_feedback[pattern] = feedback_id
+        if not is_hack and learn_legitimate_words:
+            legitimate.update(legitimate_words(info[2]))
+
+    _upsert_hashes(cursor, is_hack, hash_counts, hash_feedback)
+    _upsert_keyword_patterns(cursor, pattern_counts, pattern_feedback)
+    _insert_legitimate_patterns(cursor, legitimate)
+
+    return {
+        'feedback': [(entry[0], feedback_id) for entry, feedback_id in saved],
+        'missing': missing,
+        'errors': errors,
+        'patterns': sorted(pattern_counts),
+    }
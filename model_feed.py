@@ -0,0 +1,428 @@
+"""
+Feed Versionado del Modelo de IA
+/api/ai-model/latest deja de ser una descarga completa en cada arranque del cliente:
+- model_changes: registro de cambios que mantienen triggers en learned_patterns y
+  learned_hashes; la versión del feed es el último id del registro
+- ?since=<versión>: solo los patrones y hashes añadidos/eliminados desde esa versión
+- ETag / If-None-Match: 304 sin cuerpo si el cliente ya tiene la versión actual
+- ?format=compact: patrones como listas de valores y hashes como array ordenado de hex
+  (sin metadatos por hash), que el cliente consulta con búsqueda binaria
+- clean_hashes: hashes confirmados como legítimos (is_hack = FALSE); el cliente los usa
+  para no volver a analizar contenido ya revisado (texturas de packs populares)
+Funciona con cursores SQLite, MySQL (pymysql) y PostgreSQL (psycopg2)
+"""
+from stats_counters import dialect
+
+FORMATS = ('full', 'compact')
+PATTERN_CATEGORIES = ('high_risk', 'medium_risk', 'low_risk')
+
+# Cambios que se conservan en model_changes; un since más antiguo recibe el modelo completo
+MAX_CHANGES = 100000
+
+# Ids por debajo de since que se vuelven a enviar: en MySQL/PostgreSQL un id menor puede
+# confirmarse después de uno mayor. Reenviar un cambio es inocuo (el cliente lo aplica igual)
+FEED_OVERLAP = 50
+
+# Valores por consulta IN (...)
+SELECT_VALUES = 500
+
+# Tabla -> (tipo de elemento, columna del valor, columnas que cambian la pertenencia al modelo)
+TRACKED_TABLES = {
+    'learned_patterns': ('pattern', 'pattern_value', ('pattern_value', 'pattern_category', 'is_active')),
+    'learned_hashes': ('hash', 'file_hash', ('file_hash', 'is_hack')),
+}
+
+# True cuando ensure_schema() dejó la tabla y los triggers listos en este proceso
+_ready = False
+
+
+def _placeholder(cursor):
+    return '?' if dialect(cursor) == 'sqlite' else '%s'
+
+
+def _row_values(row, columns):
+    if isinstance(row, dict):
+        return tuple(row[column] for column in columns)
+    return tuple(row)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# ============================================================
+# ESQUEMA Y TRIGGERS
+# ============================================================
+
+def _distinct(kind, column):
+    """Condición 'NEW.columna cambió respecto a OLD.columna' (comparación que admite NULL)"""
+    if kind == 'sqlite':
+        return f"NEW.{column} IS NOT OLD.{column}"
+    if kind == 'mysql':
+        return f"NOT (NEW.{column} <=> OLD.{column})"
+    return f"NEW.{column} IS DISTINCT FROM OLD.{column}"
+
+
+def _log_statement(kind, item_type, value, condition=None):
+    """INSERT en model_changes del valor (NEW.x u OLD.x), opcionalmente solo si se cumple condition"""
+    if not condition:
+        return f"INSERT INTO model_changes (item_type, item_value) VALUES ('{item_type}', {value})"
+    source = ' FROM DUAL' if kind == 'mysql' else ''
+    return (f"INSERT INTO model_changes (item_type, item_value) "
+            f"SELECT '{item_type}', {value}{source} WHERE {condition}")
+
+
+def _triggers(kind):
+    """(nombre, tabla, evento, [sentencias]) de los triggers del registro de cambios"""
+    triggers = []
+    for table, (item_type, value_column, columns) in TRACKED_TABLES.items():
+        changed = ' OR '.join(_distinct(kind, column) for column in columns)
+        triggers.append((f"trg_feed_{table}_insert", table, 'INSERT',
+                         [_log_statement(kind, item_type, f"NEW.{value_column}")]))
+        # Un UPDATE que cambia el valor afecta a dos elementos: el antiguo y el nuevo
+        triggers.append((f"trg_feed_{table}_update", table, 'UPDATE', [
+            _log_statement(kind, item_type, f"NEW.{value_column}", changed),
+            _log_statement(kind, item_type, f"OLD.{value_column}", _distinct(kind, value_column)),
+        ]))
+        triggers.append((f"trg_feed_{table}_delete", table, 'DELETE',
+                         [_log_statement(kind, item_type, f"OLD.{value_column}")]))
+    return triggers
+
+
+def _schema_statement(kind):
+    if kind == 'sqlite':
+        return ("CREATE TABLE IF NOT EXISTS model_changes (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "item_type TEXT NOT NULL, item_value TEXT)")
+    if kind == 'mysql':
+        return ("CREATE TABLE IF NOT EXISTS model_changes (id BIGINT AUTO_INCREMENT PRIMARY KEY, "
+                "item_type VARCHAR(16) NOT NULL, item_value TEXT) ENGINE=InnoDB")
+    return ("CREATE TABLE IF NOT EXISTS model_changes (id BIGSERIAL PRIMARY KEY, "
+            "item_type VARCHAR(16) NOT NULL, item_value TEXT)")
+
+
+def _trigger_ddl(kind, existing):
+    statements = []
+    for name, table, event, body in _triggers(kind):
+        if kind == 'sqlite':
+            statements.append(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} "
+                              f"FOR EACH ROW BEGIN {'; '.join(body)}; END")
+        elif kind == 'mysql':
+            # MySQL < 8.0.29 no tiene CREATE TRIGGER IF NOT EXISTS
+            if name not in existing:
+                statements.append(f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+                                  f"FOR EACH ROW BEGIN {'; '.join(body)}; END")
+        else:
+            statements.append(f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$ "
+                              f"BEGIN {'; '.join(body)}; RETURN NULL; END $$ LANGUAGE plpgsql")
+            statements.append(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+            statements.append(f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+                              f"FOR EACH ROW EXECUTE PROCEDURE {name}()")
+    return statements
+
+
+def ensure_schema(cursor):
+    """
+    Crea model_changes y los triggers, y recorta el registro a MAX_CHANGES cambios.
+    Hace commit (o rollback si falla) sobre la conexión del cursor.
+
+    Returns:
+        True si el feed versionado queda disponible
+    """
+    global _ready
+    kind = dialect(cursor)
+    conn = cursor.connection
+    try:
+        cursor.execute(_schema_statement(kind))
+        existing = set()
+        if kind == 'mysql':
+            cursor.execute("SELECT TRIGGER_NAME AS name FROM information_schema.TRIGGERS "
+                           "WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME LIKE 'trg_feed_%'")
+            existing = {_row_values(row, ('name',))[0] for row in cursor.fetchall()}
+        for statement in _trigger_ddl(kind, existing):
+            cursor.execute(statement)
+        conn.commit()
+
+        pruned = prune(cursor)
+        conn.commit()
+        if pruned:
+            print(f"🧹 {pruned} cambios antiguos del modelo eliminados del feed")
+        _ready = True
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ No se pudo crear el feed versionado del modelo (se enviará siempre completo): {e}")
+        return False
+
+
+def is_ready():
+    """True si este proceso puede usar el feed versionado (ensure_schema terminó bien)"""
+    return _ready
+
+
+def prune(cursor, keep=MAX_CHANGES):
+    """Elimina los cambios más antiguos que los últimos keep. No hace commit."""
+    ph = _placeholder(cursor)
+    version, _ = current_version(cursor)
+    if version <= keep:
+        return 0
+    cursor.execute(f"DELETE FROM model_changes WHERE id <= {ph}", (version - keep,))
+    return cursor.rowcount
+
+
+# ============================================================
+# VERSIÓN, ETAG Y PARÁMETROS
+# ============================================================
+
+def current_version(cursor):
+    """
+    (versión actual, id más antiguo conservado) del registro de cambios
+
+    Con el registro vacío la versión es 0: el modelo no ha cambiado desde que existen los triggers
+    """
+    cursor.execute("SELECT MAX(id) AS newest, MIN(id) AS oldest FROM model_changes")
+    newest, oldest = _row_values(cursor.fetchone(), ('newest', 'oldest'))
+    return int(newest or 0), int(oldest or 0)
+
+
+def published_version(cursor):
+    """
+    (version, created_at) del modelo publicado activo en ai_model_versions (/api/update-model)
+
+    Returns:
+        ('1.0.0', None) si todavía no se publicó ninguno
+    """
+    cursor.execute('''
+        SELECT version, created_at
+        FROM ai_model_versions
+        WHERE is_active = 1
+        ORDER BY created_at DESC
+        LIMIT 1
+    ''')
+    row = cursor.fetchone()
+    if not row:
+        return '1.0.0', None
+    return _row_values(row, ('version', 'created_at'))
+
+
+def etag(version, fmt, model_version=None):
+    """ETag débil del estado del modelo: la misma versión sirve como completo o como delta
+
+    model_version (la versión publicada) entra en el ETag: publicar un modelo sin cambios
+    en patrones ni hashes también invalida lo que tienen los clientes
+    """
+    if model_version is None:
+        return f'W/"model-{version}-{fmt}"'
+    return f'W/"model-{version}-{model_version}-{fmt}"'
+
+
+def etag_matches(if_none_match, tag):
+    """True si la cabecera If-None-Match contiene tag (comparación débil, admite '*')"""
+    if not if_none_match:
+        return False
+    wanted = tag[2:] if tag.startswith('W/') else tag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def parse_args(args):
+    """
+    Parámetros del feed desde request.args (since y format)
+
+    Raises:
+        ValueError: si since no es un entero o format no es 'full' ni 'compact'
+    """
+    fmt = (args.get('format') or 'full').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"format desconocido: {fmt} (válidos: {', '.join(FORMATS)})")
+    since = args.get('since')
+    if since in (None, ''):
+        since = None
+    else:
+        try:
+            since = int(since)
+        except (TypeError, ValueError):
+            raise ValueError("since debe ser la versión del feed (entero) recibida anteriormente")
+        if since < 0:
+            raise ValueError("since no puede ser negativo")
+    return {'since': since, 'format': fmt}
+
+
+def cache_key(params, version, oldest=None, model_version=None):
+    """Clave de caché (prefijo 'ai_model' para invalidarla junto al resto del modelo)"""
+    suffix = '' if model_version is None else f'_{model_version}'
+    if version is None:
+        return f"ai_model_latest_{params['format']}{suffix}"
+    if params['since'] is None or not delta_available(params['since'], version, oldest):
+        return f"ai_model_latest_{params['format']}_{version}{suffix}"
+    return f"ai_model_delta_{params['format']}_{params['since']}_{version}{suffix}"
+
+
+def delta_available(since, version, oldest=None):
+    """True si los cambios posteriores a since siguen en el registro"""
+    if since > version:
+        return False   # Versión de otra base de datos (restaurada o reiniciada)
+    return oldest is None or not oldest or since >= oldest - 1
+
+
+# ============================================================
+# CONSULTAS
+# ============================================================
+
+def _pattern_entry(values, fmt):
+    value, _, confidence, count = values
+    if fmt == 'compact':
+        return value
+    return {'value': value, 'confidence': confidence, 'learned_from_count': count}
+
+
+def _hash_entry(values, fmt):
+    file_hash, is_hack, count = values
+    if fmt == 'compact':
+        return file_hash
+    return {'hash': file_hash, 'is_hack': bool(is_hack), 'confirmed_count': count}
+
+
+def _collect_patterns(rows, fmt):
+    patterns = {category: [] for category in PATTERN_CATEGORIES}
+    seen = set()
+    for values in rows:
+        category = values[1]
+        if category not in patterns:
+            continue
+        if fmt == 'compact':
+            if (category, values[0]) in seen:
+                continue   # learned_patterns no tiene clave única por valor
+            seen.add((category, values[0]))
+        patterns[category].append(_pattern_entry(values, fmt))
+    if fmt == 'compact':
+        for values in patterns.values():
+            values.sort()
+    return patterns
+
+
+def _collect_hashes(rows, fmt):
+    hashes = [_hash_entry(values, fmt) for values in rows if values[0]]
+    if fmt == 'compact':
+        hashes.sort()
+    return hashes
+
+
+PATTERN_COLUMNS = ('pattern_value', 'pattern_category', 'confidence', 'learned_from_count')
+HASH_COLUMNS = ('file_hash', 'is_hack', 'confirmed_count')
+
+
+def fetch_full(cursor, fmt):
+    """Modelo completo: patrones activos por categoría, hashes de hacks y hashes legítimos"""
+    cursor.execute(f'''
+        SELECT {', '.join(PATTERN_COLUMNS)}
+        FROM learned_patterns
+        WHERE is_active = TRUE
+        ORDER BY learned_from_count DESC
+    ''')
+    patterns = _collect_patterns((_row_values(row, PATTERN_COLUMNS) for row in cursor.fetchall()), fmt)
+    cursor.execute(f'''
+        SELECT {', '.join(HASH_COLUMNS)}
+        FROM learned_hashes
+        WHERE is_hack = TRUE
+        ORDER BY confirmed_count DESC
+    ''')
+    hashes = _collect_hashes([_row_values(row, HASH_COLUMNS) for row in cursor.fetchall()], fmt)
+    cursor.execute(f'''
+        SELECT {', '.join(HASH_COLUMNS)}
+        FROM learned_hashes
+        WHERE is_hack = FALSE
+        ORDER BY confirmed_count DESC
+    ''')
+    clean_hashes = _collect_hashes([_row_values(row, HASH_COLUMNS) for row in cursor.fetchall()], fmt)
+    return {
+        'patterns': patterns,
+        'hashes': hashes,
+        'clean_hashes': clean_hashes,
+        'patterns_count': sum(len(p) for p in patterns.values()),
+        'hashes_count': len(hashes),
+    }
+
+
+def _current_rows(cursor, query, values, columns):
+    ph = _placeholder(cursor)
+    rows = []
+    for chunk in _chunks(sorted(values), SELECT_VALUES):
+        cursor.execute(query.format(values=', '.join([ph] * len(chunk))), chunk)
+        rows.extend(_row_values(row, columns) for row in cursor.fetchall())
+    return rows
+
+
+def fetch_delta(cursor, since, fmt):
+    """
+    Cambios desde since: el estado actual de cada patrón/hash que cambió después
+
+    Returns:
+        {'added': {'patterns': {categoría: [...]}, 'hashes': [...], 'clean_hashes': [...]},
+         'removed': {'patterns': [valores], 'hashes': [hashes], 'clean_hashes': [hashes]}}
+        Un patrón en added reemplaza sus categorías anteriores en el cliente
+    """
+    ph = _placeholder(cursor)
+    cursor.execute(f'''
+        SELECT DISTINCT item_type, item_value
+        FROM model_changes
+        WHERE id > {ph}
+    ''', (max(since - FEED_OVERLAP, 0),))
+    changed = {'pattern': set(), 'hash': set()}
+    for item_type, item_value in (_row_values(row, ('item_type', 'item_value')) for row in cursor.fetchall()):
+        if item_type in changed and item_value:
+            changed[item_type].add(item_value)
+
+    pattern_rows = _current_rows(cursor, f'''
+        SELECT {', '.join(PATTERN_COLUMNS)}
+        FROM learned_patterns
+        WHERE is_active = TRUE AND pattern_value IN ({{values}})
+        ORDER BY learned_from_count DESC
+    ''', changed['pattern'], PATTERN_COLUMNS)
+    hash_rows = _current_rows(cursor, f'''
+        SELECT {', '.join(HASH_COLUMNS)}
+        FROM learned_hashes
+        WHERE file_hash IN ({{values}})
+        ORDER BY confirmed_count DESC
+    ''', changed['hash'], HASH_COLUMNS)
+    clean_rows = [values for values in hash_rows if not values[1]]
+    hash_rows = [values for values in hash_rows if values[1]]
+
+    patterns = _collect_patterns(pattern_rows, fmt)
+    hashes = _collect_hashes(hash_rows, fmt)
+    active_patterns = {values[0] for values in pattern_rows if values[1] in PATTERN_CATEGORIES}
+    active_hashes = {values[0] for values in hash_rows}
+    active_clean = {values[0] for values in clean_rows}
+    return {
+        'added': {'patterns': patterns, 'hashes': hashes, 'clean_hashes': _collect_hashes(clean_rows, fmt)},
+        'removed': {
+            'patterns': sorted(changed['pattern'] - active_patterns),
+            'hashes': sorted(changed['hash'] - active_hashes),
+            'clean_hashes': sorted(changed['hash'] - active_clean),
+        },
+    }
+
+
+def fetch_feed(cursor, params, version=None, oldest=None):
+    """
+    Respuesta del feed para params (parse_args): delta si since sigue en el registro,
+    modelo completo en otro caso. version None = feed no disponible (siempre completo)
+    """
+    since = params['since']
+    if version is not None and since is not None and delta_available(since, version, oldest):
+        result = fetch_delta(cursor, since, params['format'])
+        result['delta'] = True
+        result['since'] = since
+    else:
+        result = fetch_full(cursor, params['format'])
+        result['delta'] = False
+    result['feed_version'] = version
+    result['format'] = params['format']
+    return result
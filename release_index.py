@@ -0,0 +1,203 @@
+"""
+Índice de Releases Conocidas (mods y resource packs)
+Tabla known_archives con las releases que el staff registra (POST /api/known-archives):
+SHA-256 del archivo completo, digest del manifiesto de entradas y el manifiesto en sí.
+Los clientes descargan solo los SHA-256 de archivo (GET /api/known-archives/index, con
+ETag) y con una búsqueda por archivo saben si un mod o resource pack necesita análisis
+completo. El manifiesto y su digest (archive_fingerprint.manifest_digest) se validan y
+guardan como referencia, pero no se publican: los declara el propio zip y no prueban que
+el contenido sea el de la release
+Funciona con cursores SQLite, MySQL (pymysql) y PostgreSQL (psycopg2)
+"""
+import json
+
+from stats_counters import dialect
+
+KINDS = ('mod', 'resourcepack')
+
+# Releases por petición de registro y filas por sentencia
+MAX_RELEASES_PER_REQUEST = 5000
+INSERT_ROWS = 100
+
+# Sube cuando cambia el contenido del índice publicado (v2: solo hashes de archivo),
+# para que los clientes con un ETag anterior lo descarguen de nuevo
+INDEX_FORMAT = 2
+
+
+def _placeholder(cursor):
+    return '?' if dialect(cursor) == 'sqlite' else '%s'
+
+
+def _row_values(row, columns):
+    if isinstance(row, dict):
+        return tuple(row[column] for column in columns)
+    return tuple(row)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _is_sha256(value):
+    if not isinstance(value, str) or len(value) != 64:
+        return False
+    try:
+        bytes.fromhex(value)
+    except ValueError:
+        return False
+    return True
+
+
+# ============================================================
+# ESQUEMA
+# ============================================================
+
+def _schema_statements(kind):
+    if kind == 'sqlite':
+        return [
+            "CREATE TABLE IF NOT EXISTS known_archives (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "archive_hash TEXT NOT NULL UNIQUE, manifest_digest TEXT NOT NULL, kind TEXT NOT NULL, "
+            "name TEXT, version TEXT, entry_count INTEGER DEFAULT 0, entries TEXT, "
+            "is_active BOOLEAN DEFAULT 1, revision INTEGER DEFAULT 1, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+            "CREATE INDEX IF NOT EXISTS idx_known_archives_manifest ON known_archives(manifest_digest)",
+        ]
+    if kind == 'mysql':
+        return [
+            "CREATE TABLE IF NOT EXISTS known_archives (id INT AUTO_INCREMENT PRIMARY KEY, "
+            "archive_hash VARCHAR(64) NOT NULL UNIQUE, manifest_digest VARCHAR(64) NOT NULL, "
+            "kind VARCHAR(16) NOT NULL, name VARCHAR(255), version VARCHAR(64), entry_count INT DEFAULT 0, "
+            "entries LONGTEXT, is_active BOOLEAN DEFAULT TRUE, revision INT DEFAULT 1, "
+            "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, "
+            "INDEX idx_known_archives_manifest (manifest_digest)) ENGINE=InnoDB",
+        ]
+    return [
+        "CREATE TABLE IF NOT EXISTS known_archives (id SERIAL PRIMARY KEY, "
+        "archive_hash VARCHAR(64) NOT NULL UNIQUE, manifest_digest VARCHAR(64) NOT NULL, "
+        "kind VARCHAR(16) NOT NULL, name VARCHAR(255), version VARCHAR(64), entry_count INTEGER DEFAULT 0, "
+        "entries TEXT, is_active BOOLEAN DEFAULT TRUE, revision INTEGER DEFAULT 1, "
+        "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+        "CREATE INDEX IF NOT EXISTS idx_known_archives_manifest ON known_archives(manifest_digest)",
+    ]
+
+
+def ensure_schema(cursor):
+    """Crea known_archives. Hace commit (o rollback si falla) sobre la conexión del cursor"""
+    conn = cursor.connection
+    try:
+        for statement in _schema_statements(dialect(cursor)):
+            cursor.execute(statement)
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ No se pudo crear el índice de releases conocidas: {e}")
+        return False
+
+
+# ============================================================
+# REGISTRO
+# ============================================================
+
+def parse_releases(data, digest_function):
+    """
+    Valida las releases de una petición ({'releases': [...]}) y calcula el digest de
+    cada manifiesto con digest_function(entries)
+
+    Raises:
+        ValueError: si falta un campo o algún valor no es válido
+    """
+    releases = (data or {}).get('releases')
+    if not isinstance(releases, list) or not releases:
+        raise ValueError("Se esperaba {'releases': [...]} con al menos una release")
+    if len(releases) > MAX_RELEASES_PER_REQUEST:
+        raise ValueError(f"Máximo {MAX_RELEASES_PER_REQUEST} releases por petición")
+
+    parsed = {}
+    for position, release in enumerate(releases):
+        if not isinstance(release, dict):
+            raise ValueError(f"Release {position}: debe ser un objeto")
+        archive_hash = (release.get('archive_hash') or '').lower()
+        if not _is_sha256(archive_hash):
+            raise ValueError(f"Release {position}: archive_hash debe ser un SHA-256 en hex")
+        kind = release.get('kind') or 'mod'
+        if kind not in KINDS:
+            raise ValueError(f"Release {position}: kind debe ser uno de {', '.join(KINDS)}")
+        entries = release.get('entries')
+        if not isinstance(entries, list) or not entries:
+            raise ValueError(f"Release {position}: falta el manifiesto de entradas (entries)")
+        try:
+            entries = sorted((str(name), int(crc), int(size)) for name, crc, size in entries)
+        except (TypeError, ValueError):
+            raise ValueError(f"Release {position}: cada entrada debe ser [nombre, crc32, tamaño]")
+        digest = digest_function(entries)
+        if release.get('manifest_digest') and release['manifest_digest'].lower() != digest:
+            raise ValueError(f"Release {position}: manifest_digest no coincide con las entradas")
+        # Una release repetida en la misma petición: vale la última (un UPSERT no puede tocar dos veces la fila)
+        parsed[archive_hash] = (archive_hash, digest, kind, release.get('name'), release.get('version'),
+                                len(entries), json.dumps(entries))
+    return list(parsed.values())
+
+
+def register(cursor, releases):
+    """UPSERT de releases ya validadas (parse_releases); devuelve cuántas se guardaron"""
+    kind = dialect(cursor)
+    ph = _placeholder(cursor)
+    columns = '(archive_hash, manifest_digest, kind, name, version, entry_count, entries, is_active, updated_at)'
+    row_sql = f"({', '.join([ph] * 7)}, TRUE, CURRENT_TIMESTAMP)"
+    for chunk in _chunks(releases, INSERT_ROWS):
+        sql = f"INSERT INTO known_archives {columns} VALUES {', '.join([row_sql] * len(chunk))}"
+        if kind == 'mysql':
+            sql += '''
+                ON DUPLICATE KEY UPDATE
+                    manifest_digest = VALUES(manifest_digest), kind = VALUES(kind), name = VALUES(name),
+                    version = VALUES(version), entry_count = VALUES(entry_count), entries = VALUES(entries),
+                    is_active = TRUE, revision = revision + 1, updated_at = CURRENT_TIMESTAMP
+            '''
+        else:
+            sql += '''
+                ON CONFLICT (archive_hash) DO UPDATE SET
+                    manifest_digest = excluded.manifest_digest, kind = excluded.kind, name = excluded.name,
+                    version = excluded.version, entry_count = excluded.entry_count, entries = excluded.entries,
+                    is_active = TRUE, revision = known_archives.revision + 1, updated_at = CURRENT_TIMESTAMP
+            '''
+        cursor.execute(sql, [value for row in chunk for value in row])
+    return len(releases)
+
+
+def deactivate(cursor, archive_hashes):
+    """Retira releases del índice (siguen guardadas); devuelve cuántas cambiaron"""
+    ph = _placeholder(cursor)
+    changed = 0
+    for chunk in _chunks(sorted({value.lower() for value in archive_hashes if _is_sha256(value)}), INSERT_ROWS):
+        cursor.execute(f'''
+            UPDATE known_archives SET is_active = FALSE, revision = revision + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE is_active = TRUE AND archive_hash IN ({', '.join([ph] * len(chunk))})
+        ''', chunk)
+        changed += cursor.rowcount
+    return changed
+
+
+# ============================================================
+# ÍNDICE PARA LOS CLIENTES
+# ============================================================
+
+def index_version(cursor):
+    """
+    Huella del estado del índice: cada alta, modificación o baja suma una revisión a su
+    fila, así que el total de revisiones solo crece
+    """
+    cursor.execute("SELECT COUNT(*) AS total, SUM(revision) AS revisions FROM known_archives")
+    total, revisions = _row_values(cursor.fetchone(), ('total', 'revisions'))
+    return f"{int(total or 0)}-{int(revisions or 0)}"
+
+
+def etag(version):
+    return f'W/"archives-v{INDEX_FORMAT}-{version}"'
+
+
+def fetch_index(cursor):
+    """SHA-256 de archivo de las releases activas (array ordenado)"""
+    cursor.execute("SELECT archive_hash FROM known_archives WHERE is_active = TRUE")
+    hashes = sorted({_row_values(row, ('archive_hash',))[0] for row in cursor.fetchall()})
+    return {'archives': len(hashes), 'hashes': hashes}
@@ -0,0 +1,306 @@
+"""
+Listado de Escaneos
+Paginación por cursor (keyset) sobre (started_at, id) en lugar de OFFSET, filtros por estado,
+máquina, token y severidad, y un resumen de severidad guardado en scans.severity_rank al
+recibir los resultados (el listado ya no agrega scan_results en cada página)
+Funciona con cursores SQLite, MySQL (pymysql) y PostgreSQL (psycopg2)
+"""
+import datetime
+
+from stats_counters import dialect
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Resumen de severidad: el índice es el valor de scans.severity_rank
+SEVERITY_LEVELS = ['LIMPIO', 'NORMAL', 'POCO_SOSPECHOSO', 'SOSPECHOSO', 'CRITICO']
+SEVERITY_BADGES = {
+    'LIMPIO': 'success',
+    'NORMAL': 'secondary',
+    'POCO_SOSPECHOSO': 'info',
+    'SOSPECHOSO': 'warning',
+    'CRITICO': 'danger',
+}
+RANK_NORMAL = SEVERITY_LEVELS.index('NORMAL')
+RANK_SUSPICIOUS = SEVERITY_LEVELS.index('SOSPECHOSO')
+
+# alert_level de un resultado -> rango de severidad del escaneo
+ALERT_RANKS = {
+    'CRITICAL': SEVERITY_LEVELS.index('CRITICO'),
+    'SOSPECHOSO': RANK_SUSPICIOUS,
+    'HACKS': RANK_SUSPICIOUS,
+    'POCO_SOSPECHOSO': SEVERITY_LEVELS.index('POCO_SOSPECHOSO'),
+}
+
+LIST_COLUMNS = ('id', 'scan_token', 'started_at', 'completed_at', 'status', 'total_files_scanned',
+                'issues_found', 'scan_duration', 'machine_name', 'severity_rank')
+
+# Filtro de la URL -> columna
+FILTER_COLUMNS = {
+    'status': 'status',
+    'machine_id': 'machine_id',
+    'machine_name': 'machine_name',
+    'token': 'scan_token',
+}
+
+# Índices compuestos que terminan en (started_at, id): cada filtro recorre su índice ya ordenado
+KEYSET_INDEXES = {
+    'idx_scans_keyset': ('started_at', 'id'),
+    'idx_scans_status_keyset': ('status', 'started_at', 'id'),
+    'idx_scans_machine_keyset': ('machine_id', 'started_at', 'id'),
+    'idx_scans_machine_name_keyset': ('machine_name', 'started_at', 'id'),
+    'idx_scans_token_keyset': ('scan_token', 'started_at', 'id'),
+    'idx_scans_severity_keyset': ('severity_rank', 'started_at', 'id'),
+}
+
+
+def _placeholder(cursor):
+    return '?' if dialect(cursor) == 'sqlite' else '%s'
+
+
+def _row_values(row, columns):
+    if isinstance(row, dict):
+        return tuple(row[column] for column in columns)
+    return tuple(row)
+
+
+# ============================================================
+# ESQUEMA
+# ============================================================
+
+def ensure_schema(cursor):
+    """
+    Añade scans.severity_rank y los índices de paginación, y calcula el resumen de los
+    escaneos antiguos que aún no lo tienen. Hace commit (o rollback si falla).
+    """
+    kind = dialect(cursor)
+    conn = cursor.connection
+    try:
+        if kind == 'sqlite':
+            cursor.execute('PRAGMA table_info(scans)')
+            columns = {row[1] for row in cursor.fetchall()}
+            if 'severity_rank' not in columns:
+                cursor.execute('ALTER TABLE scans ADD COLUMN severity_rank INTEGER')
+        elif kind == 'mysql':
+            cursor.execute("SELECT COUNT(*) AS total FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+                           "AND TABLE_NAME = 'scans' AND COLUMN_NAME = 'severity_rank'")
+            if not _row_values(cursor.fetchone(), ('total',))[0]:
+                cursor.execute('ALTER TABLE scans ADD COLUMN severity_rank TINYINT NULL')
+        else:
+            cursor.execute('ALTER TABLE scans ADD COLUMN IF NOT EXISTS severity_rank SMALLINT')
+
+        existing = set()
+        if kind == 'mysql':
+            # MySQL no tiene CREATE INDEX IF NOT EXISTS
+            cursor.execute("SELECT DISTINCT INDEX_NAME AS name FROM information_schema.STATISTICS "
+                           "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'scans'")
+            existing = {_row_values(row, ('name',))[0] for row in cursor.fetchall()}
+        for name, columns in KEYSET_INDEXES.items():
+            if kind == 'mysql':
+                if name not in existing:
+                    cursor.execute(f"CREATE INDEX {name} ON scans ({', '.join(columns)})")
+            else:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON scans ({', '.join(columns)})")
+        conn.commit()
+
+        updated = backfill_severity(cursor)
+        conn.commit()
+        if updated:
+            print(f"✅ Resumen de severidad calculado para {updated} escaneos existentes")
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ Error preparando el listado de escaneos: {e}")
+        return False
+
+
+def backfill_severity(cursor):
+    """
+    Calcula severity_rank de los escaneos que todavía no lo tienen: por sus resultados y,
+    los terminados sin resultados, por issues_found (misma regla que finalize_severity)
+    """
+    ph = _placeholder(cursor)
+    cursor.execute('''
+        SELECT scan_id,
+               SUM(CASE WHEN alert_level = 'CRITICAL' THEN 1 ELSE 0 END) AS critical,
+               SUM(CASE WHEN alert_level IN ('SOSPECHOSO', 'HACKS') THEN 1 ELSE 0 END) AS suspicious,
+               SUM(CASE WHEN alert_level = 'POCO_SOSPECHOSO' THEN 1 ELSE 0 END) AS low
+        FROM scan_results
+        WHERE scan_id IN (SELECT id FROM scans WHERE severity_rank IS NULL)
+        GROUP BY scan_id
+    ''')
+    updates = []
+    for row in cursor.fetchall():
+        scan_id, critical, suspicious, low = _row_values(row, ('scan_id', 'critical', 'suspicious', 'low'))
+        if critical:
+            rank = ALERT_RANKS['CRITICAL']
+        elif suspicious:
+            rank = RANK_SUSPICIOUS
+        elif low:
+            rank = ALERT_RANKS['POCO_SOSPECHOSO']
+        else:
+            rank = RANK_NORMAL
+        updates.append((rank, scan_id))
+    if updates:
+        cursor.executemany(f'UPDATE scans SET severity_rank = {ph} WHERE id = {ph}', updates)
+
+    # Terminados sin ningún resultado (cerrados antes de la migración)
+    cursor.execute(f'''
+        UPDATE scans
+        SET severity_rank = CASE WHEN COALESCE(issues_found, 0) = 0 THEN {ph} ELSE {ph} END
+        WHERE severity_rank IS NULL AND status <> 'running'
+          AND NOT EXISTS (SELECT 1 FROM scan_results WHERE scan_results.scan_id = scans.id)
+    ''', (SEVERITY_LEVELS.index('LIMPIO'), RANK_SUSPICIOUS))
+    return len(updates) + max(cursor.rowcount, 0)
+
+
+# ============================================================
+# RESUMEN DE SEVERIDAD EN LA INGESTA
+# ============================================================
+
+def alert_rank(alert_level):
+    """Rango de severidad que aporta un resultado con ese alert_level"""
+    return ALERT_RANKS.get(alert_level, RANK_NORMAL)
+
+
+def record_severity(cursor, scan_id, rank):
+    """Sube severity_rank del escaneo a rank si es mayor (cada bloque de resultados aporta el suyo)"""
+    ph = _placeholder(cursor)
+    cursor.execute(f'''
+        UPDATE scans SET severity_rank = {ph}
+        WHERE id = {ph} AND (severity_rank IS NULL OR severity_rank < {ph})
+    ''', (rank, scan_id, rank))
+
+
+def finalize_severity(cursor, scan_id, issues_found):
+    """Al cerrar un escaneo sin resultados: LIMPIO si no hubo issues, SOSPECHOSO si los hubo"""
+    ph = _placeholder(cursor)
+    rank = SEVERITY_LEVELS.index('LIMPIO') if not issues_found else RANK_SUSPICIOUS
+    cursor.execute(f'UPDATE scans SET severity_rank = {ph} WHERE id = {ph} AND severity_rank IS NULL',
+                   (rank, scan_id))
+
+
+# ============================================================
+# CONSULTA PAGINADA
+# ============================================================
+
+def _cursor_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')   # Conserva los microsegundos de PostgreSQL
+    return str(value)
+
+
+def encode_after(started_at, scan_id):
+    """Cursor de la página siguiente: '<started_at>,<id>' del último escaneo devuelto"""
+    return f"{_cursor_value(started_at)},{scan_id}"
+
+
+def parse_after(after):
+    """'<started_at>,<id>' -> (started_at, id); ValueError si no tiene ese formato"""
+    started_at, _, scan_id = (after or '').rpartition(',')
+    if not started_at:
+        raise ValueError("after debe tener el formato <started_at>,<id>")
+    return started_at, int(scan_id)
+
+
+def parse_args(args):
+    """
+    Parámetros del listado desde request.args (limit, offset, after y filtros)
+
+    Raises:
+        ValueError: si after, limit o severity no son válidos
+    """
+    limit = args.get('limit', DEFAULT_LIMIT, type=int)
+    if limit is None or limit <= 0:
+        raise ValueError("limit debe ser un entero positivo")
+    params = {
+        'limit': min(limit, MAX_LIMIT),
+        'offset': max(args.get('offset', 0, type=int) or 0, 0),
+        'after': None,
+        'filters': {},
+        'severity': [],
+    }
+    if args.get('after'):
+        params['after'] = parse_after(args.get('after'))
+        params['offset'] = 0
+    for name in FILTER_COLUMNS:
+        value = args.get(name)
+        if value:
+            params['filters'][name] = value
+    for level in (args.get('severity') or '').upper().split(','):
+        level = level.strip()
+        if not level:
+            continue
+        if level not in SEVERITY_LEVELS:
+            raise ValueError(f"severity desconocida: {level} (válidas: {', '.join(SEVERITY_LEVELS)})")
+        params['severity'].append(SEVERITY_LEVELS.index(level))
+    return params
+
+
+def cache_key(params):
+    """Clave de caché del listado (siempre con prefijo 'scans_list' para invalidarla junta)"""
+    filters = ','.join(f"{name}={value}" for name, value in sorted(params['filters'].items()))
+    severity = ','.join(str(rank) for rank in sorted(params['severity']))
+    after = encode_after(*params['after']) if params['after'] else ''
+    return f"scans_list_{params['limit']}_{params['offset']}_{after}_{filters}_{severity}"
+
+
+def _scan_dict(values):
+    scan = dict(zip(LIST_COLUMNS, values))
+    rank = scan.pop('severity_rank')
+    if rank is None:
+        # Escaneo sin resultados todavía (en curso o cerrado antes de la migración)
+        summary = 'LIMPIO' if not scan['issues_found'] else 'SOSPECHOSO'
+    else:
+        summary = SEVERITY_LEVELS[rank]
+    scan['severity_summary'] = summary
+    scan['severity_badge'] = SEVERITY_BADGES[summary]
+    return scan
+
+
+def fetch_page(cursor, params):
+    """
+    Una página de escaneos, del más reciente al más antiguo
+
+    Returns:
+        {'scans': [...], 'has_more': bool, 'next_after': cursor de la página siguiente o None}
+    """
+    ph = _placeholder(cursor)
+    conditions, values = [], []
+    for name, value in params['filters'].items():
+        conditions.append(f"{FILTER_COLUMNS[name]} = {ph}")
+        values.append(value)
+    if params['severity']:
+        severity = [f"severity_rank IN ({', '.join([ph] * len(params['severity']))})"]
+        values.extend(params['severity'])
+        # Sin severity_rank (escaneo en curso): se filtra por el resumen que muestra _scan_dict
+        if SEVERITY_LEVELS.index('LIMPIO') in params['severity']:
+            severity.append("(severity_rank IS NULL AND COALESCE(issues_found, 0) = 0)")
+        if RANK_SUSPICIOUS in params['severity']:
+            severity.append("(severity_rank IS NULL AND issues_found > 0)")
+        conditions.append(f"({' OR '.join(severity)})")
+    if params['after']:
+        started_at, scan_id = params['after']
+        conditions.append(f"(started_at < {ph} OR (started_at = {ph} AND id < {ph}))")
+        values.extend([started_at, started_at, scan_id])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    # Se pide una fila de más para saber si hay página siguiente
+    query = f'''
+        SELECT {', '.join(LIST_COLUMNS)}
+        FROM scans
+        {where}
+        ORDER BY started_at DESC, id DESC
+        LIMIT {ph}
+    '''
+    values.append(params['limit'] + 1)
+    if params['offset']:
+        query += f' OFFSET {ph}'
+        values.append(params['offset'])
+    cursor.execute(query, values)
+
+    scans = [_scan_dict(_row_values(row, LIST_COLUMNS)) for row in cursor.fetchall()]
+    has_more = len(scans) > params['limit']
+    scans = scans[:params['limit']]
+    next_after = encode_after(scans[-1]['started_at'], scans[-1]['id']) if has_more else None
+    return {'scans': scans, 'has_more': has_more, 'next_after': next_after}
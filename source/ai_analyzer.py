@@ -9,6 +9,10 @@ import os
 import sqlite3
 from typing import Dict, List, Tuple
 
+from hash_index import HACK_FLAGS, LOCAL_HACK, get_hash_index
+from keyword_matcher import KeywordMatcher
+from learned_model import get_learned_model
+
 class AIAnalyzer:
     """Analizador de IA para resultados de escaneo con aprendizaje progresivo"""
     
@@ -33,6 +37,10 @@ class AIAnalyzer:
             ]
         }
         
+        # Buscadores precompilados por categoría (se reconstruyen al llegar patrones aprendidos)
+        self.pattern_matchers = {}
+        self._rebuild_pattern_matchers()
+        
         # Cargar patrones aprendidos (primero de BD local, luego de API si está disponible)
         self.load_learned_patterns()
         
@@ -48,14 +56,21 @@ class AIAnalyzer:
             'encrypted_strings'
         ]
         
-        # Hashes aprendidos (se cargan dinámicamente)
-        self.learned_hashes = set()
+        # Hashes aprendidos (se cargan dinámicamente): vista del índice compartido de hashes
+        self.learned_hashes = get_hash_index().view(HACK_FLAGS)
         self.load_learned_hashes()
         
         # Intentar cargar hashes desde API si está configurada
         if self.api_url:
             self.load_hashes_from_api()
     
+    def _rebuild_pattern_matchers(self):
+        """Recompila los buscadores multi-patrón a partir de suspicious_patterns"""
+        self.pattern_matchers = {
+            category: KeywordMatcher(patterns)
+            for category, patterns in self.suspicious_patterns.items()
+        }
+    
     def load_learned_patterns(self):
         """Carga patrones aprendidos de la base de datos"""
         try:
@@ -78,6 +93,7 @@ class AIAnalyzer:
                         print(f"✅ Patrón aprendido cargado: {pattern} ({category})")
             
             conn.close()
+            self._rebuild_pattern_matchers()
         except Exception as e:
             print(f"⚠️ Error cargando patrones aprendidos: {e}")
     
@@ -94,115 +110,55 @@ class AIAnalyzer:
                 SELECT file_hash FROM learned_hashes WHERE is_hack = 1
             ''')
             
-            self.learned_hashes = {row[0] for row in cursor.fetchall()}
-            if self.learned_hashes:
-                print(f"✅ {len(self.learned_hashes)} hashes aprendidos cargados")
+            hashes = [row[0] for row in cursor.fetchall() if row[0]]
+            get_hash_index().replace(LOCAL_HACK, hashes)
+            if hashes:
+                print(f"✅ {len(hashes)} hashes aprendidos cargados")
             
             conn.close()
         except Exception as e:
             print(f"⚠️ Error cargando hashes aprendidos: {e}")
     
+    def _add_model_patterns(self, model):
+        """Agrega los patrones del modelo compartido a los de cada categoría"""
+        for category in ['high_risk', 'medium_risk', 'low_risk']:
+            for pattern_value in model.patterns.get(category, []):
+                if pattern_value and pattern_value not in self.suspicious_patterns[category]:
+                    self.suspicious_patterns[category].append(pattern_value)
+        self._rebuild_pattern_matchers()
+    
     def load_patterns_from_api(self):
-        """Carga patrones aprendidos desde la API (actualización dinámica)"""
+        """Carga patrones aprendidos desde la API (descarga compartida con los hashes y la app)"""
         try:
-            import requests
-            
             if not self.api_url:
                 return
             
-            response = requests.get(
-                f"{self.api_url}/api/ai-model/latest",
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                patterns = data.get('patterns', {})
-                
-                # Agregar patrones desde API
-                for category in ['high_risk', 'medium_risk', 'low_risk']:
-                    if category in patterns:
-                        for pattern_data in patterns[category]:
-                            pattern_value = pattern_data.get('value', '')
-                            if pattern_value and pattern_value not in self.suspicious_patterns[category]:
-                                self.suspicious_patterns[category].append(pattern_value)
-                
-                print(f"✅ {data.get('patterns_count', 0)} patrones cargados desde API")
-                
-                # Guardar en archivo local para uso offline
-                self.save_model_to_file(data)
+            model = get_learned_model(self.api_url)
+            self._add_model_patterns(model)
+            print(f"✅ {model.patterns_count} patrones cargados desde el modelo de la API")
                 
         except Exception as e:
             print(f"⚠️ Error cargando patrones desde API: {e}")
     
     def load_hashes_from_api(self):
-        """Carga hashes aprendidos desde la API (actualización dinámica)"""
+        """Carga hashes aprendidos desde la API (misma descarga que los patrones)"""
         try:
-            import requests
-            
             if not self.api_url:
                 return
             
-            response = requests.get(
-                f"{self.api_url}/api/ai-model/latest",
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                hashes = data.get('hashes', [])
-                
-                # Agregar hashes desde API
-                for hash_data in hashes:
-                    if hash_data.get('is_hack'):
-                        self.learned_hashes.add(hash_data.get('hash'))
-                
-                print(f"✅ {len(hashes)} hashes cargados desde API")
+            # Los hashes del modelo ya están en el índice compartido (self.learned_hashes)
+            model = get_learned_model(self.api_url)
+            print(f"✅ {model.hashes_count} hashes cargados desde el modelo de la API")
                 
         except Exception as e:
             print(f"⚠️ Error cargando hashes desde API: {e}")
     
-    def save_model_to_file(self, model_data):
-        """Guarda el modelo en un archivo JSON local para uso offline"""
-        try:
-            import json
-            import os
-            
-            models_dir = 'models'
-            os.makedirs(models_dir, exist_ok=True)
-            
-            model_file = os.path.join(models_dir, 'ai_model_latest.json')
-            with open(model_file, 'w', encoding='utf-8') as f:
-                json.dump(model_data, f, indent=2)
-            
-        except Exception as e:
-            print(f"⚠️ Error guardando modelo local: {e}")
-    
     def load_model_from_file(self):
         """Carga el modelo desde archivo local (si no hay conexión a API)"""
         try:
-            import json
-            import os
-            
-            model_file = os.path.join('models', 'ai_model_latest.json')
-            if os.path.exists(model_file):
-                with open(model_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                patterns = data.get('patterns', {})
-                for category in ['high_risk', 'medium_risk', 'low_risk']:
-                    if category in patterns:
-                        for pattern_data in patterns[category]:
-                            pattern_value = pattern_data.get('value', '')
-                            if pattern_value and pattern_value not in self.suspicious_patterns[category]:
-                                self.suspicious_patterns[category].append(pattern_value)
-                
-                hashes = data.get('hashes', [])
-                for hash_data in hashes:
-                    if hash_data.get('is_hack'):
-                        self.learned_hashes.add(hash_data.get('hash'))
-                
-                print(f"✅ Modelo cargado desde archivo local")
+            model = get_learned_model(None)
+            if model.source == 'cache':
+                self._add_model_patterns(model)
                 
         except Exception as e:
             print(f"⚠️ Error cargando modelo local: {e}")
@@ -212,8 +168,9 @@ class AIAnalyzer:
         self.load_learned_patterns()
         self.load_learned_hashes()
         
-        # Intentar actualizar desde API
+        # Intentar actualizar desde API (una descarga nueva para patrones y hashes)
         if self.api_url:
+            get_learned_model(self.api_url, refresh=True)
             self.load_patterns_from_api()
             self.load_hashes_from_api()
         else:
@@ -262,16 +219,14 @@ class AIAnalyzer:
             return analysis
         
         # 1. Verificar patrones de alto riesgo (incluyendo aprendidos)
-        for pattern in self.suspicious_patterns['high_risk']:
-            if pattern in issue_name or pattern in issue_path:
-                risk_score += 0.4
-                risk_factors.append(f"Patrón de alto riesgo detectado: {pattern}")
+        for pattern in self.pattern_matchers['high_risk'].find_ordered(issue_name, issue_path):
+            risk_score += 0.4
+            risk_factors.append(f"Patrón de alto riesgo detectado: {pattern}")
         
         # 2. Verificar patrones de riesgo medio
-        for pattern in self.suspicious_patterns['medium_risk']:
-            if pattern in issue_name or pattern in issue_path:
-                risk_score += 0.2
-                risk_factors.append(f"Patrón de riesgo medio detectado: {pattern}")
+        for pattern in self.pattern_matchers['medium_risk'].find_ordered(issue_name, issue_path):
+            risk_score += 0.2
+            risk_factors.append(f"Patrón de riesgo medio detectado: {pattern}")
         
         # 3. Verificar ofuscación
         if obfuscation:
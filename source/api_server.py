@@ -7,11 +7,20 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import json
 import hashlib
+import hmac
 import secrets
 import datetime
 from functools import wraps
 import os
 import time
+import threading
+import gzip
+import io
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Importar módulo MySQL
 try:
@@ -23,6 +32,7 @@ try:
         init_mysql_db,
         get_cached,
         set_cached,
+        delete_cached,
         clear_cache
     )
     USE_MYSQL = True
@@ -34,59 +44,60 @@ except ImportError as e:
     from contextlib import contextmanager
     import threading
     
-    # Fallback a SQLite
+    # Fallback a SQLite (conexiones reutilizadas desde el pool, PRAGMAs una vez por conexión)
+    from db_pool import get_sqlite_pool
     DATABASE = 'scanner_db.sqlite'
-    _local = threading.local()
     
     def get_db():
-        if not hasattr(_local, 'connection'):
-            _local.connection = sqlite3.connect(DATABASE, check_same_thread=False, timeout=5.0)
-            _local.connection.execute('PRAGMA journal_mode=WAL')
-            _local.connection.execute('PRAGMA synchronous=NORMAL')
-            _local.connection.row_factory = sqlite3.Row
-        return _local.connection
+        """Conexión SQLite prestada por el pool (close() la devuelve)"""
+        return get_sqlite_pool(DATABASE, row_factory=sqlite3.Row).acquire()
     
     @contextmanager
     def get_db_cursor():
-        conn = get_db()
-        cursor = conn.cursor()
-        try:
+        with get_sqlite_pool(DATABASE, row_factory=sqlite3.Row).cursor() as cursor:
             yield cursor
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
     
-    _cache = {}
-    _cache_timeout = {}
+    # Caché compartida (memoria o archivo SQLite común a todos los workers, según CACHE_BACKEND)
+    from cache_backend import get_cache
+    _cache = get_cache('api')
     CACHE_TTL = 30
     
     def get_cached(key):
-        if key in _cache:
-            if time.time() - _cache_timeout.get(key, 0) < CACHE_TTL:
-                return _cache[key]
-            else:
-                del _cache[key]
-                del _cache_timeout[key]
-        return None
+        return _cache.get(key)
     
     def set_cached(key, value):
-        _cache[key] = value
-        _cache_timeout[key] = time.time()
+        _cache.set(key, value, ttl=CACHE_TTL)
+    
+    def delete_cached(key):
+        _cache.delete(key)
     
     def clear_cache(pattern=None):
         if pattern:
-            keys_to_delete = [k for k in _cache.keys() if pattern in k]
-            for k in keys_to_delete:
-                _cache.pop(k, None)
-                _cache_timeout.pop(k, None)
+            _cache.invalidate_prefix(pattern)
         else:
             _cache.clear()
-            _cache_timeout.clear()
 
 app = Flask(__name__)
 CORS(app)
 
+# Métricas de préstamo de conexiones por petición (cabecera Server-Timing)
+from db_pool import install_request_metrics
+install_request_metrics(app)
+
+# Contadores de estadísticas mantenidos por triggers, listado paginado por cursor, feedback por lotes
+# feed versionado del modelo de IA e índice de releases conocidas
+import feedback_learning
+import model_feed
+import release_index
+import scan_listing
+import stats_counters
+
+# Formato columnar de los bloques de resultados (negociado por Content-Type)
+import result_columns
+
+# Digest canónico de manifiestos de mods/resource packs (el mismo que calcula el cliente)
+import archive_fingerprint
+
 # Configuración
 API_SECRET_KEY = os.environ.get('API_SECRET_KEY', secrets.token_hex(32))
 
@@ -192,6 +203,19 @@ def init_db():
         )
     ''')
     
+    # Tabla de bloques recibidos por streaming (idempotencia y reanudación de subidas)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scan_result_chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scan_id INTEGER NOT NULL,
+            chunk_seq INTEGER NOT NULL,
+            result_count INTEGER DEFAULT 0,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (scan_id, chunk_seq),
+            FOREIGN KEY (scan_id) REFERENCES scans(id)
+        )
+    ''')
+    
     # Tabla de análisis de IA
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS ai_analyses (
@@ -376,6 +400,18 @@ def init_db():
     except Exception as e:
         print(f"⚠️ Error en migración: {e}")
     
+    # Contadores de estadísticas (tablas, triggers y relleno inicial)
+    stats_counters.ensure_schema(cursor)
+    
+    # Resumen de severidad e índices de paginación del listado de escaneos
+    scan_listing.ensure_schema(cursor)
+    
+    # Registro de cambios del modelo de IA (feed versionado con deltas)
+    model_feed.ensure_schema(cursor)
+    
+    # Índice de releases conocidas de mods y resource packs
+    release_index.ensure_schema(cursor)
+    
     # Crear índices para ban_history
     try:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_ban_machine ON ban_history(machine_id)')
@@ -416,6 +452,19 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def require_admin_key(f):
+    """
+    Decorador estricto para endpoints que modifican datos en los que confían todos los
+    clientes (p. ej. la lista de releases conocidas): sin API key válida no hay acceso
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
+        if not api_key or not hmac.compare_digest(api_key, API_SECRET_KEY):
+            return jsonify({'error': 'API key requerida'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
 def _get_result_value(result, key_or_index):
     """Helper para obtener valores de resultados (compatible SQLite/MySQL)"""
     if USE_MYSQL:
@@ -570,71 +619,82 @@ def get_statistics():
                 'total_bans': 0
             }
             
-            # Consulta optimizada: obtener múltiples conteos en una sola query usando subconsultas
-            # Esto es MUCHO más rápido que hacer 7 consultas separadas
-            try:
-                cursor.execute('''
-                    SELECT 
-                        (SELECT COUNT(*) FROM scans) as total_scans,
-                        (SELECT COUNT(*) FROM scans WHERE status = "running") as active_scans,
-                        (SELECT COUNT(DISTINCT machine_id) FROM scans WHERE machine_id IS NOT NULL AND machine_id != "") as unique_machines,
-                        (SELECT COUNT(*) FROM scan_results WHERE alert_level = "CRITICAL") as severe_detections,
-                        (SELECT COUNT(*) FROM scan_results) as total_results,
-                        (SELECT COUNT(*) FROM scan_tokens WHERE is_active = 1) as active_tokens,
-                        (SELECT COUNT(*) FROM ban_history) as total_bans
-                ''')
-                row = cursor.fetchone()
-                if row:
-                    stats['total_scans'] = row[0] or 0
-                    stats['active_scans'] = row[1] or 0
-                    stats['unique_machines'] = row[2] or 0
-                    stats['severe_detections'] = row[3] or 0
-                    stats['total_results'] = row[4] or 0
-                    stats['active_tokens'] = row[5] or 0
-                    stats['total_bans'] = row[6] or 0
-            except sqlite3.OperationalError as e:
-                # Si alguna tabla no existe, intentar consultas individuales como fallback
+            # Contadores mantenidos por triggers: dos lecturas pequeñas en lugar de siete COUNT(*)
+            counters = stats_counters.read_statistics(cursor) if stats_counters.is_ready() else None
+            if counters:
+                # Solo los contadores públicos: reconciled_at es interno
+                stats.update({name: counters[name] for name in stats_counters.COUNTER_QUERIES})
+                stats['unique_machines'] = counters['unique_machines']
+            else:
+                # Consulta optimizada: obtener múltiples conteos en una sola query usando subconsultas
+                # Esto es MUCHO más rápido que hacer 7 consultas separadas
                 try:
-                    cursor.execute('SELECT COUNT(*) FROM scans')
-                    stats['total_scans'] = cursor.fetchone()[0] or 0
-                except sqlite3.OperationalError:
-                    pass
+                    cursor.execute('''
+                        SELECT 
+                            (SELECT COUNT(*) FROM scans) as total_scans,
+                            (SELECT COUNT(*) FROM scans WHERE status = "running") as active_scans,
+                            (SELECT COUNT(DISTINCT machine_id) FROM scans WHERE machine_id IS NOT NULL AND machine_id != "") as unique_machines,
+                            (SELECT COUNT(*) FROM scan_results WHERE alert_level = "CRITICAL") as severe_detections,
+                            (SELECT COUNT(*) FROM scan_results) as total_results,
+                            (SELECT COUNT(*) FROM scan_tokens WHERE is_active = 1) as active_tokens,
+                            (SELECT COUNT(*) FROM ban_history) as total_bans
+                    ''')
+                    row = cursor.fetchone()
+                    if row:
+                        stats['total_scans'] = row[0] or 0
+                        stats['active_scans'] = row[1] or 0
+                        stats['unique_machines'] = row[2] or 0
+                        stats['severe_detections'] = row[3] or 0
+                        stats['total_results'] = row[4] or 0
+                        stats['active_tokens'] = row[5] or 0
+                        stats['total_bans'] = row[6] or 0
+                except sqlite3.OperationalError as e:
+                    # Si alguna tabla no existe, intentar consultas individuales como fallback
+                    try:
+                        cursor.execute('SELECT COUNT(*) FROM scans')
+                        stats['total_scans'] = cursor.fetchone()[0] or 0
+                    except sqlite3.OperationalError:
+                        pass
                 
-                try:
-                    cursor.execute('SELECT COUNT(*) FROM scans WHERE status = "running"')
-                    stats['active_scans'] = cursor.fetchone()[0] or 0
-                except sqlite3.OperationalError:
-                    pass
+                    try:
+                        cursor.execute('SELECT COUNT(*) FROM scans WHERE status = "running"')
+                        stats['active_scans'] = cursor.fetchone()[0] or 0
+                    except sqlite3.OperationalError:
+                        pass
                 
-                try:
-                    cursor.execute('SELECT COUNT(DISTINCT machine_id) FROM scans WHERE machine_id IS NOT NULL AND machine_id != ""')
-                    stats['unique_machines'] = cursor.fetchone()[0] or 0
-                except sqlite3.OperationalError:
-                    pass
+                    try:
+                        cursor.execute('SELECT COUNT(DISTINCT machine_id) FROM scans WHERE machine_id IS NOT NULL AND machine_id != ""')
+                        stats['unique_machines'] = cursor.fetchone()[0] or 0
+                    except sqlite3.OperationalError:
+                        pass
                 
-                try:
-                    cursor.execute('SELECT COUNT(*) FROM scan_results WHERE alert_level = "CRITICAL"')
-                    stats['severe_detections'] = cursor.fetchone()[0] or 0
-                except sqlite3.OperationalError:
-                    pass
+                    try:
+                        cursor.execute('SELECT COUNT(*) FROM scan_results WHERE alert_level = "CRITICAL"')
+                        stats['severe_detections'] = cursor.fetchone()[0] or 0
+                    except sqlite3.OperationalError:
+                        pass
                 
-                try:
-                    cursor.execute('SELECT COUNT(*) FROM scan_results')
-                    stats['total_results'] = cursor.fetchone()[0] or 0
-                except sqlite3.OperationalError:
-                    pass
+                    try:
+                        cursor.execute('SELECT COUNT(*) FROM scan_results')
+                        stats['total_results'] = cursor.fetchone()[0] or 0
+                    except sqlite3.OperationalError:
+                        pass
                 
-                try:
-                    cursor.execute('SELECT COUNT(*) FROM scan_tokens WHERE is_active = 1')
-                    stats['active_tokens'] = cursor.fetchone()[0] or 0
-                except sqlite3.OperationalError:
-                    pass
+                    try:
+                        cursor.execute('SELECT COUNT(*) FROM scan_tokens WHERE is_active = 1')
+                        stats['active_tokens'] = cursor.fetchone()[0] or 0
+                    except sqlite3.OperationalError:
+                        pass
                 
-                try:
-                    cursor.execute('SELECT COUNT(*) FROM ban_history')
-                    stats['total_bans'] = cursor.fetchone()[0] or 0
-                except sqlite3.OperationalError:
-                    pass
+                    try:
+                        cursor.execute('SELECT COUNT(*) FROM ban_history')
+                        stats['total_bans'] = cursor.fetchone()[0] or 0
+                    except sqlite3.OperationalError:
+                        pass
+        
+        # Reconciliación periódica con las tablas, fuera de la petición
+        if counters and stats_counters.reconcile_due(counters):
+            threading.Thread(target=_reconcile_statistics, daemon=True, name='stats-reconcile').start()
         
         # Agregar timestamp
         stats['timestamp'] = datetime.datetime.now().isoformat()
@@ -649,6 +709,36 @@ def get_statistics():
             'status': 'error'
         }), 500
 
+def _reconcile_statistics(force=False):
+    """
+    Reconcilia los contadores de estadísticas con las tablas
+    Sin force solo lo hace si toca y ningún otro worker lo ha reservado ya
+    """
+    try:
+        with get_db_cursor() as cursor:
+            if not force and not stats_counters.claim_reconcile(cursor):
+                return None
+            result = stats_counters.reconcile(cursor)
+        clear_cache('statistics')
+        return result
+    except Exception as e:
+        print(f"⚠️ Error reconciliando contadores de estadísticas: {e}")
+        if force:
+            raise
+        return None
+
+@app.route('/api/statistics/reconcile', methods=['POST'])
+@require_api_key
+def reconcile_statistics():
+    """Recalcula los contadores de estadísticas desde las tablas y devuelve la deriva corregida"""
+    if not stats_counters.is_ready():
+        return jsonify({'error': 'Contadores de estadísticas no disponibles'}), 503
+    try:
+        result = _reconcile_statistics(force=True)
+        return jsonify({'success': True, **result}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ============================================================
 # ENDPOINTS DE TOKENS
 # ============================================================
@@ -685,6 +775,18 @@ def debug_list_tokens():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/debug/db-pool', methods=['GET'])
+@require_api_key
+def debug_db_pool():
+    """Métricas del pool de conexiones (tamaño, préstamos, esperas, reciclados)"""
+    try:
+        if USE_MYSQL:
+            from db_mysql import get_pool_stats
+            return jsonify(get_pool_stats())
+        return jsonify(get_sqlite_pool(DATABASE, row_factory=sqlite3.Row).stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/validate-token', methods=['POST'])
 def validate_token_endpoint():
     """Endpoint público para validar tokens de escaneo (usado por el cliente)"""
@@ -904,6 +1006,152 @@ def delete_token(token_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ============================================================
+# INSERCIÓN DE RESULTADOS (LOTES Y STREAMING NDJSON)
+# ============================================================
+
+# Filas por executemany: la memoria del worker no crece con el tamaño del escaneo
+RESULT_INSERT_BATCH_SIZE = 500
+
+def _scan_result_row(scan_id, result):
+    """Mapea un resultado del scanner ('tipo', 'nombre', 'ruta', 'archivo'...) a una fila de scan_results"""
+    return (
+        scan_id,
+        result.get('tipo', ''),
+        result.get('nombre', '') or result.get('archivo', ''),
+        result.get('ruta', ''),
+        result.get('categoria', ''),
+        result.get('alerta', ''),
+        result.get('confidence', 0),
+        json.dumps(result.get('detected_patterns', [])),
+        result.get('obfuscation', False),
+        result.get('file_hash', ''),
+        result.get('ai_analysis', ''),
+        result.get('ai_confidence', 0)
+    )
+
+def _columnar_result_rows(scan_id, payload):
+    """
+    Filas de scan_results directamente desde un bloque columnar (mismo mapeo que
+    _scan_result_row, sin pasar por un dict por resultado)
+    """
+    columns = result_columns.decode_columns(payload)
+    strings = columns['strings']
+    patterns_json = {}
+    for position in range(len(columns['tipo'])):
+        indexes = columns['detected_patterns'][position]
+        patterns = patterns_json.get(indexes)
+        if patterns is None:
+            patterns = patterns_json[indexes] = json.dumps([strings[index] for index in indexes])
+        yield (
+            scan_id,
+            columns['tipo'][position],
+            columns['nombre'][position] or columns['archivo'][position],
+            columns['ruta'][position],
+            columns['categoria'][position],
+            columns['alerta'][position],
+            columns['confidence'][position],
+            patterns,
+            columns['obfuscation'][position],
+            columns['file_hash'][position],
+            columns['ai_analysis'][position],
+            columns['ai_confidence'][position]
+        )
+
+def _insert_scan_results(cursor, scan_id, results, batch_size=RESULT_INSERT_BATCH_SIZE):
+    """Inserta resultados (lista o iterador de dicts) en lotes; devuelve cuántos se insertaron"""
+    return _insert_scan_rows(cursor, scan_id, (_scan_result_row(scan_id, result) for result in results), batch_size)
+
+def _insert_scan_rows(cursor, scan_id, rows, batch_size=RESULT_INSERT_BATCH_SIZE):
+    """
+    Inserta filas ya mapeadas de scan_results en lotes de batch_size; devuelve cuántas se insertaron
+    De paso actualiza el resumen de severidad del escaneo (scans.severity_rank)
+    """
+    placeholder = '%s' if USE_MYSQL else '?'
+    query = f'''
+        INSERT INTO scan_results (
+            scan_id, issue_type, issue_name, issue_path, issue_category,
+            alert_level, confidence, detected_patterns, obfuscation_detected,
+            file_hash, ai_analysis, ai_confidence
+        ) VALUES ({', '.join([placeholder] * 12)})
+    '''
+    inserted = 0
+    severity = None
+    batch = []
+    for row in rows:
+        rank = scan_listing.alert_rank(row[5])
+        if severity is None or rank > severity:
+            severity = rank
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cursor.executemany(query, batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+        inserted += len(batch)
+    if severity is not None:
+        scan_listing.record_severity(cursor, scan_id, severity)
+    return inserted
+
+def _iter_ndjson(stream):
+    """Lee resultados NDJSON (un objeto JSON por línea) sin cargar el cuerpo entero en memoria"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ValueError(f"Línea {line_number} no es JSON válido")
+        if not isinstance(record, dict):
+            raise ValueError(f"Línea {line_number} no es un objeto JSON")
+        yield record
+
+# Compresiones aceptadas en los bloques (Content-Encoding)
+STREAM_ENCODINGS = ['gzip'] + (['zstd'] if zstandard is not None else [])
+
+# Formatos de resultados aceptados: NDJSON (por defecto) y columnar (Content-Type propio)
+RESULT_FORMATS = ['ndjson', result_columns.FORMAT_NAME]
+
+def _is_columnar_request():
+    """True si el cuerpo viene en formato columnar (result_columns)"""
+    return request.mimetype == result_columns.CONTENT_TYPE
+
+def _decoded_request_stream():
+    """Cuerpo de la petición descomprimido al vuelo según Content-Encoding"""
+    encoding = (request.headers.get('Content-Encoding') or '').strip().lower()
+    if encoding in ('', 'identity'):
+        return request.stream
+    if encoding == 'gzip':
+        return gzip.GzipFile(fileobj=request.stream, mode='rb')
+    if encoding == 'zstd' and zstandard is not None:
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(request.stream))
+    raise ValueError(f"Content-Encoding no soportado: {encoding}")
+
+def _received_chunks(cursor, scan_id):
+    """Bloques ya recibidos de un escaneo: {chunk_seq: result_count}"""
+    placeholder = '%s' if USE_MYSQL else '?'
+    cursor.execute(f'''
+        SELECT chunk_seq, result_count FROM scan_result_chunks
+        WHERE scan_id = {placeholder}
+        ORDER BY chunk_seq
+    ''', (scan_id,))
+    chunks = {}
+    for row in cursor.fetchall():
+        if USE_MYSQL:
+            chunks[_get_result_value(row, 'chunk_seq')] = _get_result_value(row, 'result_count') or 0
+        else:
+            chunks[row[0]] = row[1] or 0
+    return chunks
+
+def _next_chunk_seq(chunks):
+    """Primer número de bloque que falta (los bloques empiezan en 0)"""
+    seq = 0
+    while seq in chunks:
+        seq += 1
+    return seq
+
 # ============================================================
 # ENDPOINTS DE ESCANEOS
 # ============================================================
@@ -994,6 +1242,9 @@ def start_scan():
             scan_id = cursor.lastrowid
             print(f"✅ Escaneo creado con ID: {scan_id}")
             
+            # Máquinas únicas (HyperLogLog, misma transacción que el escaneo)
+            stats_counters.record_machine(cursor, machine_id)
+            
             # Verificar que el escaneo se guardó correctamente
             cursor.execute('SELECT id, status FROM scans WHERE id = ?', (scan_id,))
             scan_check = cursor.fetchone()
@@ -1035,7 +1286,12 @@ def submit_scan_results(scan_id):
     print(f"   - Total archivos escaneados: {data.get('total_files_scanned', 0)}")
     print(f"   - Issues encontrados: {data.get('issues_found', 0)}")
     print(f"   - Duración: {data.get('scan_duration', 0)}s")
-    print(f"   - Cantidad de resultados: {len(data.get('results', []))}")
+    columnar = _is_columnar_request()
+    results = data.get('results') or []
+    if columnar:
+        print(f"   - Cantidad de resultados: {results.get('count', 0) if isinstance(results, dict) else 0} (columnar)")
+    else:
+        print(f"   - Cantidad de resultados: {len(results)}")
     
     try:
         with get_db_cursor() as cursor:
@@ -1063,70 +1319,34 @@ def submit_scan_results(scan_id):
             ))
             print(f"✅ Estado del escaneo actualizado")
             
-            # Insertar resultados en batch (mucho más rápido)
-            results = data.get('results', [])
-            if results:
+            # Insertar resultados en lotes acotados (mucho más rápido que inserts individuales)
+            if columnar and results:
+                # Las columnas se convierten directamente en filas para executemany
+                inserted = _insert_scan_rows(cursor, scan_id, _columnar_result_rows(scan_id, results))
+                print(f"✅ Batch insert completado para {inserted} resultados (columnar)")
+            elif results:
                 print(f"📥 Preparando {len(results)} resultados para insertar...")
-                # Preparar datos para batch insert
-                batch_data = []
-                for idx, result in enumerate(results):
-                    # Mapear campos: el scanner envía 'tipo', 'nombre', 'ruta', 'archivo', etc.
-                    # La BD espera: issue_type, issue_name, issue_path, etc.
-                    issue_type = result.get('tipo', '')
-                    issue_name = result.get('nombre', '') or result.get('archivo', '')
-                    issue_path = result.get('ruta', '')
-                    issue_category = result.get('categoria', '')
-                    alert_level = result.get('alerta', '')
-                    
-                    batch_data.append((
-                        scan_id,
-                        issue_type,
-                        issue_name,
-                        issue_path,
-                        issue_category,
-                        alert_level,
-                        result.get('confidence', 0),
-                        json.dumps(result.get('detected_patterns', [])),
-                        result.get('obfuscation', False),
-                        result.get('file_hash', ''),
-                        result.get('ai_analysis', ''),
-                        result.get('ai_confidence', 0)
-                    ))
-                    if idx < 3:  # Mostrar primeros 3 resultados como ejemplo
-                        print(f"   Resultado {idx+1}: {result.get('nombre', 'N/A')} - {result.get('tipo', 'N/A')}")
-                
-                # Batch insert (mucho más rápido que inserts individuales)
-                cursor.executemany('''
-                    INSERT INTO scan_results (
-                        scan_id, issue_type, issue_name, issue_path, issue_category,
-                        alert_level, confidence, detected_patterns, obfuscation_detected,
-                        file_hash, ai_analysis, ai_confidence
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', batch_data)
-                
-                print(f"✅ Batch insert completado para {len(results)} resultados")
+                for idx, result in enumerate(results[:3]):  # Mostrar primeros 3 resultados como ejemplo
+                    print(f"   Resultado {idx+1}: {result.get('nombre', 'N/A')} - {result.get('tipo', 'N/A')}")
                 
-                # El commit se hace automáticamente por el context manager
-                # Verificar cuántos resultados se insertaron DESPUÉS del commit
-                cursor.execute('SELECT COUNT(*) FROM scan_results WHERE scan_id = ?', (scan_id,))
-                total_inserted = cursor.fetchone()[0]
-                print(f"✅ Verificación después del commit: {total_inserted} resultados en BD para este scan")
-                
-                if total_inserted < len(results):
-                    print(f"⚠️ ADVERTENCIA: Se insertaron {len(results)} resultados pero solo {total_inserted} están en BD")
-                else:
-                    print(f"✅ Todos los resultados fueron insertados correctamente")
+                inserted = _insert_scan_results(cursor, scan_id, results)
+                print(f"✅ Batch insert completado para {inserted} resultados")
             else:
                 print(f"⚠️ No hay resultados para insertar (lista vacía)")
+            scan_listing.finalize_severity(cursor, scan_id, data.get('issues_found', 0))
             
             # Limpiar caché relacionado
             clear_cache('statistics')
-            clear_cache(f'scan_{scan_id}')
+            delete_cached(f'scan_{scan_id}')
             clear_cache('scans_list')
             print(f"✅ Caché limpiado")
         
         print(f"✅ ===== RESULTADOS ALMACENADOS EXITOSAMENTE ======\n")
         return jsonify({'success': True, 'message': 'Resultados almacenados'})
+    except ValueError as e:
+        # Bloque columnar inválido: no se guarda nada (rollback)
+        print(f"❌ Resultados columnares inválidos: {e}")
+        return jsonify({'error': f'Resultados inválidos: {str(e)}'}), 400
     except Exception as e:
         import traceback
         print(f"\n❌ ===== ERROR ALMACENANDO RESULTADOS ======")
@@ -1136,6 +1356,153 @@ def submit_scan_results(scan_id):
         print(f"{'='*60}\n")
         return jsonify({'error': f'Error almacenando resultados: {str(e)}'}), 500
 
+@app.route('/api/scans/<int:scan_id>/results/stream', methods=['POST'])
+def stream_scan_results(scan_id):
+    """
+    Recibe un bloque de resultados en NDJSON (Content-Type: application/x-ndjson)
+    
+    El número de bloque va en la cabecera X-Chunk-Seq (o ?seq=) y el cuerpo puede venir
+    comprimido (Content-Encoding: gzip / zstd). Con Content-Type result_columns.CONTENT_TYPE
+    el bloque es un único objeto columnar. La respuesta 200 es la confirmación del
+    bloque; reenviar uno ya recibido no duplica resultados: responde duplicate=true.
+    Los resultados se insertan en lotes mientras se lee el cuerpo.
+    """
+    seq_value = request.headers.get('X-Chunk-Seq', request.args.get('seq'))
+    try:
+        chunk_seq = int(seq_value)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Falta X-Chunk-Seq o no es un número'}), 400
+    if chunk_seq < 0:
+        return jsonify({'error': 'X-Chunk-Seq debe ser >= 0'}), 400
+    
+    placeholder = '%s' if USE_MYSQL else '?'
+    try:
+        with get_db_cursor() as cursor:
+            cursor.execute(f'SELECT id FROM scans WHERE id = {placeholder}', (scan_id,))
+            if not cursor.fetchone():
+                return jsonify({'error': f'Escaneo {scan_id} no encontrado'}), 404
+            
+            chunks = _received_chunks(cursor, scan_id)
+            if chunk_seq in chunks:
+                return jsonify({
+                    'success': True,
+                    'duplicate': True,
+                    'chunk_seq': chunk_seq,
+                    'results_received': chunks[chunk_seq],
+                    'next_seq': _next_chunk_seq(chunks)
+                })
+            
+            # Reservar el bloque antes de insertar: la restricción UNIQUE frena reintentos simultáneos
+            cursor.execute(f'''
+                INSERT INTO scan_result_chunks (scan_id, chunk_seq, result_count)
+                VALUES ({placeholder}, {placeholder}, 0)
+            ''', (scan_id, chunk_seq))
+            
+            if _is_columnar_request():
+                payload = json.load(_decoded_request_stream())
+                inserted = _insert_scan_rows(cursor, scan_id, _columnar_result_rows(scan_id, payload))
+            else:
+                inserted = _insert_scan_results(cursor, scan_id, _iter_ndjson(_decoded_request_stream()))
+            
+            cursor.execute(f'''
+                UPDATE scan_result_chunks SET result_count = {placeholder}
+                WHERE scan_id = {placeholder} AND chunk_seq = {placeholder}
+            ''', (inserted, scan_id, chunk_seq))
+            chunks[chunk_seq] = inserted
+    except (ValueError, OSError, EOFError) as e:
+        # Cuerpo corrupto o truncado: el bloque entero se descarta (rollback) y el cliente puede reenviarlo
+        return jsonify({'error': f'Bloque inválido: {str(e)}'}), 400
+    except Exception as e:
+        if type(e).__name__ == 'IntegrityError':
+            # Otro intento del mismo bloque se confirmó primero
+            return jsonify({'success': True, 'duplicate': True, 'chunk_seq': chunk_seq})
+        print(f"❌ Error almacenando bloque {chunk_seq} del escaneo {scan_id}: {e}")
+        return jsonify({'error': f'Error almacenando resultados: {str(e)}'}), 500
+    
+    delete_cached(f'scan_{scan_id}')
+    clear_cache('scans_list')
+    print(f"📥 Escaneo {scan_id}: bloque {chunk_seq} con {inserted} resultados")
+    return jsonify({
+        'success': True,
+        'duplicate': False,
+        'chunk_seq': chunk_seq,
+        'results_received': inserted,
+        'next_seq': _next_chunk_seq(chunks)
+    })
+
+@app.route('/api/scans/<int:scan_id>/results/stream', methods=['GET'])
+def get_scan_results_stream_cursor(scan_id):
+    """Cursor de reanudación: bloques ya recibidos y siguiente número de bloque esperado"""
+    try:
+        with get_db_cursor() as cursor:
+            chunks = _received_chunks(cursor, scan_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'scan_id': scan_id,
+        'received_chunks': sorted(chunks),
+        'results_received': sum(chunks.values()),
+        'next_seq': _next_chunk_seq(chunks),
+        'encodings': STREAM_ENCODINGS,
+        'formats': RESULT_FORMATS
+    })
+
+@app.route('/api/scans/<int:scan_id>/results/complete', methods=['POST'])
+def complete_scan_results(scan_id):
+    """
+    Cierra una subida por streaming: actualiza el escaneo con el resumen final
+    
+    Si se indica total_chunks y falta alguno, responde 409 con los bloques que faltan.
+    """
+    data = request.json or {}
+    placeholder = '%s' if USE_MYSQL else '?'
+    
+    try:
+        with get_db_cursor() as cursor:
+            cursor.execute(f'SELECT id FROM scans WHERE id = {placeholder}', (scan_id,))
+            if not cursor.fetchone():
+                return jsonify({'error': f'Escaneo {scan_id} no encontrado'}), 404
+            
+            chunks = _received_chunks(cursor, scan_id)
+            total_chunks = data.get('total_chunks')
+            if total_chunks is not None:
+                missing = [seq for seq in range(int(total_chunks)) if seq not in chunks]
+                if missing:
+                    return jsonify({
+                        'error': 'Faltan bloques de resultados',
+                        'missing_chunks': missing,
+                        'next_seq': _next_chunk_seq(chunks)
+                    }), 409
+            
+            cursor.execute(f'''
+                UPDATE scans 
+                SET status = {placeholder}, completed_at = CURRENT_TIMESTAMP, 
+                    total_files_scanned = {placeholder}, issues_found = {placeholder}, scan_duration = {placeholder}
+                WHERE id = {placeholder}
+            ''', (
+                data.get('status', 'completed'),
+                data.get('total_files_scanned', 0),
+                data.get('issues_found', sum(chunks.values())),
+                data.get('scan_duration', 0),
+                scan_id
+            ))
+            scan_listing.finalize_severity(cursor, scan_id, data.get('issues_found', sum(chunks.values())))
+    except Exception as e:
+        print(f"❌ Error cerrando escaneo {scan_id}: {e}")
+        return jsonify({'error': f'Error almacenando resultados: {str(e)}'}), 500
+    
+    clear_cache('statistics')
+    delete_cached(f'scan_{scan_id}')
+    clear_cache('scans_list')
+    print(f"✅ Escaneo {scan_id} cerrado: {len(chunks)} bloques, {sum(chunks.values())} resultados")
+    return jsonify({
+        'success': True,
+        'message': 'Resultados almacenados',
+        'chunks': len(chunks),
+        'results_received': sum(chunks.values())
+    })
+
 @app.route('/api/scans/<int:scan_id>', methods=['GET'])
 def get_scan(scan_id):
     """Obtiene información de un escaneo - OPTIMIZADO CON CACHÉ"""
@@ -1620,83 +1987,27 @@ def generate_scan_report_html(scan_id):
 @app.route('/api/scans', methods=['GET'])
 @require_api_key
 def list_scans():
-    """Lista todos los escaneos - OPTIMIZADO CON CACHÉ Y QUERY ÚNICA"""
-    limit = request.args.get('limit', 50, type=int)
-    offset = request.args.get('offset', 0, type=int)
+    """
+    Lista escaneos del más reciente al más antiguo - PAGINACIÓN POR CURSOR
     
-    cache_key = f'scans_list_{limit}_{offset}'
+    Parámetros: limit, after=<started_at>,<id> (cursor devuelto en next_after), offset (compatibilidad)
+    y filtros status, machine_id, machine_name, token, severity (lista separada por comas)
+    """
+    try:
+        params = scan_listing.parse_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    cache_key = scan_listing.cache_key(params)
     cached = get_cached(cache_key)
     if cached:
         return jsonify(cached)
     
     try:
         with get_db_cursor() as cursor:
-            cursor.execute('''
-                SELECT id, scan_token, started_at, completed_at, status,
-                       total_files_scanned, issues_found, scan_duration, machine_name
-                FROM scans
-                ORDER BY started_at DESC
-                LIMIT ? OFFSET ?
-            ''', (limit, offset))
-            
-            scans = []
-            scan_ids = []
-            for row in cursor.fetchall():
-                scan_id = row[0]
-                scan_ids.append(scan_id)
-                scans.append({
-                    'id': scan_id,
-                    'scan_token': row[1],
-                    'started_at': row[2],
-                    'completed_at': row[3],
-                    'status': row[4],
-                    'total_files_scanned': row[5],
-                    'issues_found': row[6],
-                    'scan_duration': row[7],
-                    'machine_name': row[8]
-                })
-            
-            # Calcular preview de severidad para cada scan (una sola query optimizada)
-            if scan_ids:
-                placeholders = ','.join(['?'] * len(scan_ids))
-                cursor.execute(f'''
-                    SELECT scan_id, 
-                           SUM(CASE WHEN alert_level = 'CRITICAL' THEN 1 ELSE 0 END) as critical,
-                           SUM(CASE WHEN alert_level IN ('SOSPECHOSO', 'HACKS') THEN 1 ELSE 0 END) as suspicious,
-                           SUM(CASE WHEN alert_level = 'POCO_SOSPECHOSO' THEN 1 ELSE 0 END) as low,
-                           COUNT(*) as total
-                    FROM scan_results
-                    WHERE scan_id IN ({placeholders})
-                    GROUP BY scan_id
-                ''', scan_ids)
-                
-                severity_map = {}
-                for row in cursor.fetchall():
-                    scan_id, critical, suspicious, low, total = row
-                    if critical > 0:
-                        severity_map[scan_id] = {'summary': 'CRITICO', 'badge': 'danger'}
-                    elif suspicious > 0:
-                        severity_map[scan_id] = {'summary': 'SOSPECHOSO', 'badge': 'warning'}
-                    elif low > 0:
-                        severity_map[scan_id] = {'summary': 'POCO_SOSPECHOSO', 'badge': 'info'}
-                    elif total == 0:
-                        severity_map[scan_id] = {'summary': 'LIMPIO', 'badge': 'success'}
-                    else:
-                        severity_map[scan_id] = {'summary': 'NORMAL', 'badge': 'secondary'}
-                
-                # Agregar preview a cada scan
-                for scan in scans:
-                    if scan['id'] in severity_map:
-                        scan['severity_summary'] = severity_map[scan['id']]['summary']
-                        scan['severity_badge'] = severity_map[scan['id']]['badge']
-                    else:
-                        # Si no hay resultados, es limpio
-                        scan['severity_summary'] = 'LIMPIO' if scan['issues_found'] == 0 else 'SOSPECHOSO'
-                        scan['severity_badge'] = 'success' if scan['issues_found'] == 0 else 'warning'
-            
-            result = {'scans': scans}
-            set_cached(cache_key, result)
-            return jsonify(result)
+            result = scan_listing.fetch_page(cursor, params)
+        set_cached(cache_key, result)
+        return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2079,133 +2390,19 @@ def submit_feedback_batch():
         if staff_verification not in ['hack', 'legitimate']:
             return jsonify({'error': f'Verificación debe ser "hack" o "legitimate", recibido: "{staff_verification}"'}), 400
         
-        # Procesar cada resultado
-        results = []
-        errors = []
-        total_extracted_patterns = []
-        
+        # Procesar el lote completo: una lectura, inserción multi-fila y un UPSERT por tabla
         with get_db_cursor() as cursor:
-            for result_id in result_ids:
-                try:
-                    # Obtener información del resultado
-                    cursor.execute('''
-                        SELECT scan_id, issue_name, issue_path, file_hash, detected_patterns, 
-                               obfuscation_detected, confidence
-                        FROM scan_results
-                        WHERE id = ?
-                    ''', (result_id,))
-                    
-                    result = cursor.fetchone()
-                    if not result:
-                        errors.append(f'Resultado {result_id} no encontrado')
-                        continue
-                    
-                    scan_id, issue_name, issue_path, file_hash, detected_patterns_json, obfuscation, confidence = result
-                    
-                    # Guardar feedback
-                    cursor.execute('''
-                        INSERT INTO staff_feedback (
-                            result_id, scan_id, staff_verification, staff_notes, verified_by,
-                            file_hash, issue_name, issue_path
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (result_id, scan_id, staff_verification, staff_notes, verified_by,
-                          file_hash, issue_name, issue_path))
-                    
-                    feedback_id = cursor.lastrowid
-                    
-                    # Extraer características y patrones
-                    extracted_patterns = []
-                    extracted_features = {}
-                    
-                    if staff_verification == 'hack':
-                        # Extraer patrones del nombre y ruta
-                        import re
-                        name_lower = (issue_name or '').lower()
-                        path_lower = (issue_path or '').lower()
-                        
-                        # Extraer palabras clave sospechosas
-                        hack_keywords = re.findall(r'\b(vape|entropy|inject|bypass|killaura|aimbot|reach|velocity|scaffold|fly|xray|ghost|stealth|undetected|sigma|flux|future|astolfo|whiteout|liquidbounce|wurst|impact)\w*\b', name_lower + ' ' + path_lower, re.IGNORECASE)
-                        extracted_patterns = list(set(hack_keywords))
-                        total_extracted_patterns.extend(extracted_patterns)
-                        
-                        # Guardar hash si existe
-                        if file_hash:
-                            cursor.execute('''
-                                INSERT OR REPLACE INTO learned_hashes (
-                                    file_hash, is_hack, confirmed_count, last_confirmed_at, source_feedback_id
-                                ) VALUES (?, 1, 
-                                    COALESCE((SELECT confirmed_count FROM learned_hashes WHERE file_hash = ?), 0) + 1,
-                                    CURRENT_TIMESTAMP, ?
-                                )
-                            ''', (file_hash, file_hash, feedback_id))
-                        
-                        # Guardar patrones aprendidos en batch
-                        if extracted_patterns:
-                            pattern_data = [(pattern, feedback_id, pattern) for pattern in extracted_patterns]
-                            cursor.executemany('''
-                                INSERT OR REPLACE INTO learned_patterns (
-                                    pattern_type, pattern_value, pattern_category, source_feedback_id,
-                                    learned_from_count, last_updated_at
-                                ) VALUES ('keyword', ?, 'high_risk',
-                                    ?,
-                                    COALESCE((SELECT learned_from_count FROM learned_patterns WHERE pattern_value = ?), 0) + 1,
-                                    CURRENT_TIMESTAMP
-                                )
-                            ''', pattern_data)
-                        
-                        extracted_features = {
-                            'obfuscation': bool(obfuscation),
-                            'confidence': confidence or 0,
-                            'location_suspicious': any(x in path_lower for x in ['temp', 'downloads', 'desktop', 'appdata'])
-                        }
-                    
-                    elif staff_verification == 'legitimate':
-                        # Si es legítimo, guardar hash en whitelist
-                        if file_hash:
-                            cursor.execute('''
-                                INSERT OR REPLACE INTO learned_hashes (
-                                    file_hash, is_hack, confirmed_count, last_confirmed_at, source_feedback_id
-                                ) VALUES (?, 0, 
-                                    COALESCE((SELECT confirmed_count FROM learned_hashes WHERE file_hash = ?), 0) + 1,
-                                    CURRENT_TIMESTAMP, ?
-                                )
-                            ''', (file_hash, file_hash, feedback_id))
-                        
-                        # Aprender patrones legítimos del nombre
-                        if issue_name:
-                            import re
-                            name_words = re.findall(r'\b\w{4,}\b', issue_name.lower())
-                            for word in name_words[:5]:
-                                if len(word) > 3 and word not in ['file', 'path', 'name', 'minecraft', 'mod']:
-                                    try:
-                                        cursor.execute('''
-                                            INSERT OR IGNORE INTO learned_patterns (
-                                                pattern_type, pattern_value, pattern_category, is_active, learned_from_count
-                                            ) VALUES ('legitimate_keyword', ?, 'legitimate', 1, 1)
-                                        ''', (word,))
-                                    except sqlite3.OperationalError:
-                                        cursor.execute('''
-                                            INSERT OR IGNORE INTO learned_patterns (
-                                                pattern_type, pattern_value, pattern_category, learned_from_count
-                                            ) VALUES ('legitimate_keyword', ?, 'legitimate', 1)
-                                        ''', (word,))
-                    
-                    # Actualizar feedback con características extraídas
-                    cursor.execute('''
-                        UPDATE staff_feedback
-                        SET extracted_patterns = ?, extracted_features = ?
-                        WHERE id = ?
-                    ''', (json.dumps(extracted_patterns), json.dumps(extracted_features), feedback_id))
-                    
-                    results.append({
-                        'result_id': result_id,
-                        'feedback_id': feedback_id,
-                        'success': True
-                    })
-                    
-                except Exception as e:
-                    errors.append(f'Error procesando resultado {result_id}: {str(e)}')
-                    continue
+            batch = feedback_learning.apply_feedback_batch(
+                cursor, result_ids, staff_verification, staff_notes, verified_by
+            )
+            results = [
+                {'result_id': result_id, 'feedback_id': feedback_id, 'success': True}
+                for result_id, feedback_id in batch['feedback']
+            ]
+            errors = [f'Resultado {result_id} no encontrado' for result_id in batch['missing']]
+            errors.extend(f'Error procesando resultado {result_id}: {message}'
+                          for result_id, message in batch['errors'])
+            total_extracted_patterns = batch['patterns']
             
             # Limpiar caché relacionado
             clear_cache('scan_')
@@ -2213,11 +2410,14 @@ def submit_feedback_batch():
             clear_cache('learned')
             
             # Verificar si hay suficientes feedbacks para actualizar el modelo
-            cursor.execute('SELECT COUNT(*) FROM staff_feedback WHERE staff_verification = "hack"')
-            hack_feedbacks = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT COUNT(*) FROM staff_feedback')
-            total_feedbacks = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT SUM(CASE WHEN staff_verification = 'hack' THEN 1 ELSE 0 END) AS hack_feedbacks,
+                       COUNT(*) AS total_feedbacks
+                FROM staff_feedback
+            ''')
+            counts = cursor.fetchone()
+            hack_feedbacks = _get_result_value(counts, 'hack_feedbacks') or 0
+            total_feedbacks = _get_result_value(counts, 'total_feedbacks') or 0
             
             should_update = hack_feedbacks >= 10 and total_feedbacks >= 15
             
@@ -2344,83 +2544,108 @@ def get_learned_hashes():
 
 @app.route('/api/ai-model/latest', methods=['GET'])
 def get_latest_ai_model():
-    """Obtiene el modelo de IA más reciente - OPTIMIZADO CON CACHÉ"""
-    cache_key = 'ai_model_latest'
-    cached = get_cached(cache_key)
-    if cached:
-        return jsonify(cached)
+    """
+    Obtiene el modelo de IA más reciente - FEED VERSIONADO CON CACHÉ
+    
+    Parámetros opcionales:
+        since: feed_version recibida antes -> solo patrones/hashes añadidos y eliminados
+        format: 'full' (por defecto) o 'compact' (valores y array ordenado de hashes)
+    Responde 304 si If-None-Match coincide con el ETag de la versión actual
+    """
+    try:
+        params = model_feed.parse_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
         with get_db_cursor() as cursor:
-            # Obtener patrones aprendidos
-            cursor.execute('''
-                SELECT pattern_value, pattern_category, confidence, learned_from_count
-                FROM learned_patterns
-                WHERE is_active = 1
-                ORDER BY learned_from_count DESC
-            ''')
-            
-            patterns = {
-                'high_risk': [],
-                'medium_risk': [],
-                'low_risk': []
-            }
-            
-            for row in cursor.fetchall():
-                pattern_value, category, confidence, count = row
-                if category in patterns:
-                    patterns[category].append({
-                        'value': pattern_value,
-                        'confidence': confidence,
-                        'learned_from_count': count
-                    })
+            version = oldest = None
+            if model_feed.is_ready():
+                version, oldest = model_feed.current_version(cursor)
             
-            # Obtener hashes aprendidos
-            cursor.execute('''
-                SELECT file_hash, is_hack, confirmed_count
-                FROM learned_hashes
-                WHERE is_hack = 1
-                ORDER BY confirmed_count DESC
-            ''')
-            
-            hashes = []
-            for row in cursor.fetchall():
-                hashes.append({
-                    'hash': row[0],
-                    'is_hack': bool(row[1]),
-                    'confirmed_count': row[2]
-                })
-            
-            # Obtener versión del modelo
-            cursor.execute('''
-                SELECT version, created_at, patterns_count, hashes_count
-                FROM ai_model_versions
-                WHERE is_active = 1
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''')
+            # Versión publicada del modelo (/api/update-model): forma parte del ETag y de la clave
+            model_version, updated_at = model_feed.published_version(cursor)
             
-            model_version = None
-            version_row = cursor.fetchone()
-            if version_row:
-                model_version = {
-                    'version': version_row[0],
-                    'created_at': version_row[1],
-                    'patterns_count': version_row[2],
-                    'hashes_count': version_row[3]
-                }
+            headers = {}
+            if version is not None:
+                headers['ETag'] = model_feed.etag(version, params['format'], model_version)
+                if model_feed.etag_matches(request.headers.get('If-None-Match'), headers['ETag']):
+                    return '', 304, headers
             
-            result = {
-                'version': model_version['version'] if model_version else '1.0.0',
-                'updated_at': model_version['created_at'] if model_version else None,
-                'patterns': patterns,
-                'hashes': hashes,
-                'patterns_count': sum(len(p) for p in patterns.values()),
-                'hashes_count': len(hashes)
-            }
+            cache_key = model_feed.cache_key(params, version, oldest, model_version)
+            result = get_cached(cache_key)
+            if not result:
+                result = model_feed.fetch_feed(cursor, params, version, oldest)
+                result['version'] = model_version
+                result['updated_at'] = updated_at
+                set_cached(cache_key, result)
+            
+            response = jsonify(result)
+            response.headers.update(headers)
+            return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================
+# ÍNDICE DE RELEASES CONOCIDAS (MODS Y RESOURCE PACKS)
+# ============================================================
+
+@app.route('/api/known-archives', methods=['POST'])
+@require_admin_key
+def register_known_archives():
+    """
+    Registra releases conocidas: {'releases': [{archive_hash, kind, name, version, entries}]}
+    entries es el manifiesto [[nombre, crc32, tamaño], ...] (archive_fingerprint.py lo genera)
+    """
+    try:
+        releases = release_index.parse_releases(request.json, archive_fingerprint.manifest_digest)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        with get_db_cursor() as cursor:
+            registered = release_index.register(cursor, releases)
+        clear_cache('known_archives')
+        return jsonify({'success': True, 'registered': registered})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/known-archives/<archive_hash>', methods=['DELETE'])
+@require_admin_key
+def deactivate_known_archive(archive_hash):
+    """Retira una release del índice que descargan los clientes"""
+    try:
+        with get_db_cursor() as cursor:
+            changed = release_index.deactivate(cursor, [archive_hash])
+        if not changed:
+            return jsonify({'error': 'Release no encontrada'}), 404
+        clear_cache('known_archives')
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/known-archives/index', methods=['GET'])
+def get_known_archives_index():
+    """
+    SHA-256 de archivo de las releases activas (array ordenado)
+    Responde 304 si If-None-Match coincide con el ETag del estado actual
+    """
+    try:
+        with get_db_cursor() as cursor:
+            version = release_index.index_version(cursor)
+            headers = {'ETag': release_index.etag(version)}
+            if model_feed.etag_matches(request.headers.get('If-None-Match'), headers['ETag']):
+                return '', 304, headers
             
-            set_cached(cache_key, result)
-            return jsonify(result)
+            cache_key = f'known_archives_{version}'
+            result = get_cached(cache_key)
+            if not result:
+                result = release_index.fetch_index(cursor)
+                set_cached(cache_key, result)
+        
+        response = jsonify(result)
+        response.headers.update(headers)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,183 @@
+"""
+Huella de Mods y Resource Packs (índice de releases conocidas)
+El servidor mantiene un índice de releases conocidas de mods (.jar) y resource packs (.zip):
+el SHA-256 del archivo completo y el digest de su manifiesto de entradas. El cliente lo
+descarga una vez (ETag / If-None-Match) al índice de hashes (flag KNOWN_ARCHIVE) y:
+- Un archivo cuyo SHA-256 está en el índice se da por conocido con una sola búsqueda
+- El manifiesto NO basta para aceptar un archivo: nombre, CRC-32 y tamaño los declara el
+  propio zip en su directorio central, y un jar modificado puede copiar la tabla de una
+  release conocida (y el CRC-32 se puede falsificar). El manifiesto solo lo valida y guarda
+  el servidor como referencia para el staff
+- Cualquier archivo que no está en el índice pasa por el análisis entrada por entrada
+
+Uso como script (staff): python archive_fingerprint.py mods/*.jar > releases.json
+genera las descripciones que acepta POST /api/known-archives
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import zipfile
+
+from hash_index import KNOWN_ARCHIVE, get_hash_index
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+INDEX_ENDPOINT = '/api/known-archives/index'
+REQUEST_TIMEOUT = 10
+READ_SIZE = 1024 * 1024
+
+# Extensión -> tipo de release
+ARCHIVE_KINDS = {'.jar': 'mod', '.zip': 'resourcepack'}
+
+
+def manifest_entries(archive):
+    """[(nombre, crc32, tamaño), ...] de las entradas de un ZipFile, ordenadas por nombre"""
+    return sorted((info.filename, info.CRC, info.file_size)
+                  for info in archive.infolist() if not info.is_dir())
+
+
+def manifest_digest(entries):
+    """SHA-256 (hex) canónico de un manifiesto; el servidor lo calcula igual desde la lista"""
+    h = hashlib.sha256()
+    for name, crc, size in sorted((str(name), int(crc), int(size)) for name, crc, size in entries):
+        h.update(f"{name}\0{crc:08x}\0{size}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def archive_manifest(path):
+    """(entradas, digest) leyendo solo el directorio central; None si no es un zip"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            entries = manifest_entries(archive)
+    except (OSError, zipfile.BadZipFile, ValueError):
+        return None
+    return entries, manifest_digest(entries)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def describe_archive(path, kind=None, name=None, version=None):
+    """Descripción de una release para registrarla en el servidor (None si no es un zip)"""
+    manifest = archive_manifest(path)
+    if manifest is None:
+        return None
+    entries, digest = manifest
+    return {
+        'archive_hash': file_sha256(path),
+        'manifest_digest': digest,
+        'kind': kind or ARCHIVE_KINDS.get(os.path.splitext(path)[1].lower(), 'mod'),
+        'name': name or os.path.basename(path),
+        'version': version,
+        'entries': [list(entry) for entry in entries],
+    }
+
+
+def is_known_archive(path, file_hash=None, index=None):
+    """
+    True si el SHA-256 del archivo completo (file_hash si ya se calculó) es el de una
+    release conocida. Solo el hash del contenido cuenta: el manifiesto lo declara el
+    propio archivo
+    """
+    index = index or get_hash_index()
+    if not index.meta.get('archives_count'):
+        return False   # Índice de releases vacío: no vale la pena leer el archivo
+    if not file_hash:
+        try:
+            file_hash = file_sha256(path)
+        except OSError:
+            return False
+    return index.contains(file_hash, KNOWN_ARCHIVE)
+
+
+class KnownArchives:
+    """Índice de releases conocidas descargado de la API (una vez por proceso)"""
+
+    def __init__(self, api_url=None):
+        self.api_url = api_url.rstrip('/') if api_url else None
+        self.index = get_hash_index()
+        self._fetched = False
+        self._lock = threading.Lock()
+
+    @property
+    def count(self):
+        """Releases en el índice local"""
+        return self.index.meta.get('archives_count', 0)
+
+    def refresh(self, force=True):
+        """
+        Actualiza el índice desde la API (304 si no cambió). Sin conexión se usa el guardado
+
+        Returns:
+            True si el índice quedó al día con la API
+        """
+        with self._lock:
+            if self._fetched and not force:
+                return True
+            self._fetched = True
+            if not self.api_url or requests is None:
+                return False
+
+            headers = {}
+            etag = self.index.meta.get('archives_etag')
+            if etag:
+                headers['If-None-Match'] = etag
+            try:
+                response = requests.get(f"{self.api_url}{INDEX_ENDPOINT}", headers=headers,
+                                        timeout=REQUEST_TIMEOUT)
+            except Exception as e:
+                print(f"⚠️ Error descargando índice de releases (se usa el guardado): {e}")
+                return False
+
+            if response.status_code == 304:
+                return True
+            if response.status_code != 200:
+                # API sin índice de releases (404) u otro error: se mantiene el guardado
+                return False
+            try:
+                data = response.json()
+            except ValueError as e:
+                print(f"⚠️ Respuesta del índice de releases no válida: {e}")
+                return False
+
+            self.index.replace(KNOWN_ARCHIVE, data.get('hashes') or [], meta={
+                'archives_etag': response.headers.get('ETag'),
+                'archives_count': data.get('archives', 0),
+            })
+            print(f"✅ Índice de releases conocidas actualizado: {self.count} mods/resource packs")
+            return True
+
+    def is_known(self, path, file_hash=None):
+        return is_known_archive(path, file_hash, self.index)
+
+
+# Una instancia por URL de API
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_known_archives(api_url=None, refresh=False):
+    """Índice compartido: la primera llamada (o refresh=True) lo actualiza desde la API"""
+    key = api_url.rstrip('/') if api_url else None
+    with _instances_lock:
+        known = _instances.get(key)
+        if known is None:
+            known = _instances[key] = KnownArchives(api_url)
+    known.refresh(force=refresh)
+    return known
+
+
+if __name__ == '__main__':
+    releases = [description for description in map(describe_archive, sys.argv[1:]) if description]
+    json.dump({'releases': releases}, sys.stdout, indent=2)
+    print()
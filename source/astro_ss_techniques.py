@@ -10,12 +10,71 @@ import requests
 import tempfile
 from typing import List, Dict
 
+from keyword_matcher import KeywordMatcher
+from memory_strings import Strings2StringSource, get_string_source
+from process_snapshot import get_process_snapshot
+
+# Patrones de hacks conocidos en memoria de javaw (versión expandida basada en config.py de AstroSS)
+IN_INSTANCE_PATTERNS = {
+    'net/impactclient': 'Impact Client',
+    '9HzN[Lnet/impactclient/6n;': 'Impact Client',
+    'SqtkUVg': 'Vape v3 #1',
+    'CABzZzJ)': 'Vape v3 #2',
+    'erouax/instavape': 'Wax Vape Mod',
+    'com/sun/jna/z/a/e/a/a/a/f': 'Vape Cracked #1',
+    'com/sun/jna/z/Main': 'Vape Cracked #2',
+    'manthe, aimassist': 'Vape Cracked #3',
+    'com.sun.jna.zagg': 'Vape Cracked #4',
+    '2.47-KILL': 'Vape Cracked #5',
+    'yCcADi': 'Vape Cracked #7',
+    '>KRTal': 'Vape Cracked #8',
+    '*YXY*[': 'Vape Cracked #9',
+    ',#I)!': 'Vape Cracked #10 [FORGE ONLY]',
+    'kcc((k': 'Vape Variation #2',
+    'C()[Lf/r;': 'Vape Variation #3',
+    '(ILjava/lang/Object;[S)V': 'Vape Variation #4',
+    'hakery.c': 'Latemod Injection Client #1',
+    'hakery.club': 'Latemod Injection Client #2',
+    'liquidbounce': 'LiquidBounce',
+    'net/wurstclient': 'Wurst Client',
+    'net/ccbluex/LiquidBounce': 'LiquidBounce Injection',
+    'future/api': 'Future Client',
+    'sigma': 'Sigma Client',
+    'flux': 'Flux Client',
+    'entropy': 'Entropy Client',
+    'whiteout': 'Whiteout Client',
+    'xray': 'XRay Mod',
+    'killaura': 'KillAura',
+    'aimbot': 'Aimbot',
+    'reach': 'Reach Mod',
+    'velocity': 'Velocity Mod',
+    'autoclicker': 'AutoClicker',
+    'triggerbot': 'Triggerbot',
+    'nofall': 'NoFall',
+    'scaffold': 'Scaffold',
+    'fly': 'Fly',
+    'speedhack': 'Speed Hack',
+    'esp': 'ESP',
+    'wallhack': 'Wallhack'
+}
+
+# Patrón en minúsculas -> patrón original (la búsqueda ignora mayúsculas como antes)
+_IN_INSTANCE_LOWER = {}
+for _pattern in IN_INSTANCE_PATTERNS:
+    _IN_INSTANCE_LOWER.setdefault(_pattern.lower(), _pattern)
+
 class AstroSSTechniques:
     """Técnicas de detección de AstroSS"""
     
     def __init__(self):
         self.strings2_path = None
-        self.download_strings2()
+        # Extractor de strings propio (lectura de memoria en streaming); strings2.exe solo si no hay lector nativo
+        self.string_source = get_string_source()
+        if self.string_source is None and self.download_strings2():
+            self.string_source = Strings2StringSource(self.strings2_path)
+        
+        # Autómata de patrones compilado una vez (una pasada por lote de strings)
+        self.in_instance_matcher = KeywordMatcher(_IN_INSTANCE_LOWER)
     
     def download_strings2(self):
         """Descarga strings2.exe si no está disponible"""
@@ -68,38 +127,28 @@ class AstroSSTechniques:
                                     pass
             else:
                 # Para procesos normales
-                for proc in psutil.process_iter(['pid', 'name']):
+                for proc in get_process_snapshot().process_iter(['pid', 'name']):
                     if proc.info['name'].lower() == name.lower():
                         return proc.info['pid']
         except Exception as e:
             print(f"Error obteniendo PID de {name}: {e}")
         return None
     
-    def dump_strings_from_pid(self, pid: int) -> List[str]:
-        """Extrae strings de un proceso usando strings2.exe"""
-        if not self.strings2_path or not os.path.exists(self.strings2_path):
-            return []
-        
+    def iter_string_batches(self, pid: int):
+        """Strings de la memoria de un proceso por lotes (memoria acotada)"""
+        if not self.string_source or not pid:
+            return
         try:
-            drive_letter = os.getcwd().split('\\')[0] + '\\'
-            cmd = f'{self.strings2_path} -pid {pid} -raw -nh'
-            
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                strings = result.stdout.replace("\\\\", "/")
-                strings = list(set(strings.split("\r\n")))
-                return strings
+            yield from self.string_source.iter_batches(pid)
         except Exception as e:
             print(f"Error haciendo dump de strings del PID {pid}: {e}")
-        
-        return []
+    
+    def dump_strings_from_pid(self, pid: int) -> List[str]:
+        """Extrae las strings (sin repetir) de un proceso; para procesos grandes usar iter_string_batches"""
+        strings = set()
+        for batch in self.iter_string_batches(pid):
+            strings.update(batch)
+        return list(strings)
     
     def detect_recording_software(self) -> List[Dict]:
         """Detecta software de grabación (técnica de AstroSS)"""
@@ -174,7 +223,7 @@ class AstroSSTechniques:
             explorer_pid = self.get_pid_by_name('explorer.exe')
             if explorer_pid:
                 try:
-                    proc = psutil.Process(explorer_pid)
+                    proc = get_process_snapshot().process(explorer_pid)
                     start_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(proc.create_time()))
                     # Verificar si fue iniciado recientemente
                     if time.time() - proc.create_time() < 3600:  # Última hora
@@ -190,7 +239,7 @@ class AstroSSTechniques:
                     pass
             
             # Verificar tiempo de inicio de Minecraft/Java
-            for proc in psutil.process_iter(['pid', 'name', 'create_time']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'create_time']):
                 try:
                     if proc.info['name'].lower() in ['javaw.exe', 'java.exe']:
                         start_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(proc.info['create_time']))
@@ -215,13 +264,13 @@ class AstroSSTechniques:
         """Checks dentro de la instancia de Minecraft (técnica de AstroSS)"""
         issues = []
         
-        if not self.strings2_path:
+        if not self.string_source:
             return issues
         
         try:
             # Buscar proceso javaw.exe
             javaw_pid = None
-            for proc in psutil.process_iter(['pid', 'name']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name']):
                 if proc.info['name'].lower() == 'javaw.exe':
                     javaw_pid = proc.info['pid']
                     break
@@ -229,69 +278,22 @@ class AstroSSTechniques:
             if not javaw_pid:
                 return issues
             
-            # Hacer dump de strings del proceso
-            javaw_strings = self.dump_strings_from_pid(javaw_pid)
-            
-            # Patrones de hacks conocidos (versión expandida basada en config.py de AstroSS)
-            hack_patterns = {
-                'net/impactclient': 'Impact Client',
-                '9HzN[Lnet/impactclient/6n;': 'Impact Client',
-                'SqtkUVg': 'Vape v3 #1',
-                'CABzZzJ)': 'Vape v3 #2',
-                'erouax/instavape': 'Wax Vape Mod',
-                'com/sun/jna/z/a/e/a/a/a/f': 'Vape Cracked #1',
-                'com/sun/jna/z/Main': 'Vape Cracked #2',
-                'manthe, aimassist': 'Vape Cracked #3',
-                'com.sun.jna.zagg': 'Vape Cracked #4',
-                '2.47-KILL': 'Vape Cracked #5',
-                'yCcADi': 'Vape Cracked #7',
-                '>KRTal': 'Vape Cracked #8',
-                '*YXY*[': 'Vape Cracked #9',
-                ',#I)!': 'Vape Cracked #10 [FORGE ONLY]',
-                'kcc((k': 'Vape Variation #2',
-                'C()[Lf/r;': 'Vape Variation #3',
-                '(ILjava/lang/Object;[S)V': 'Vape Variation #4',
-                'hakery.c': 'Latemod Injection Client #1',
-                'hakery.club': 'Latemod Injection Client #2',
-                'liquidbounce': 'LiquidBounce',
-                'net/wurstclient': 'Wurst Client',
-                'net/ccbluex/LiquidBounce': 'LiquidBounce Injection',
-                'future/api': 'Future Client',
-                'sigma': 'Sigma Client',
-                'flux': 'Flux Client',
-                'entropy': 'Entropy Client',
-                'whiteout': 'Whiteout Client',
-                'xray': 'XRay Mod',
-                'killaura': 'KillAura',
-                'aimbot': 'Aimbot',
-                'reach': 'Reach Mod',
-                'velocity': 'Velocity Mod',
-                'autoclicker': 'AutoClicker',
-                'triggerbot': 'Triggerbot',
-                'nofall': 'NoFall',
-                'scaffold': 'Scaffold',
-                'fly': 'Fly',
-                'speedhack': 'Speed Hack',
-                'esp': 'ESP',
-                'wallhack': 'Wallhack'
-            }
-            
-            # Buscar patrones en las strings
+            # Strings del proceso por lotes: cada lote se une en un texto y el autómata lo recorre una vez
             found_patterns = []
-            for string in javaw_strings:
-                string_lower = string.lower()
-                for pattern, hack_name in hack_patterns.items():
-                    if pattern.lower() in string_lower:
-                        if hack_name not in found_patterns:
-                            found_patterns.append(hack_name)
-                            issues.append({
-                                'tipo': 'in_instance_hack',
-                                'nombre': f"{hack_name} detectado en memoria",
-                                'ruta': f"PID: {javaw_pid}",
-                                'archivo': f"Patrón: {pattern}",
-                                'alerta': 'CRITICAL',
-                                'categoria': 'MEMORY_ANALYSIS'
-                            })
+            for batch in self.iter_string_batches(javaw_pid):
+                for pattern_lower in self.in_instance_matcher.find_ordered('\n'.join(batch).lower()):
+                    pattern = _IN_INSTANCE_LOWER[pattern_lower]
+                    hack_name = IN_INSTANCE_PATTERNS[pattern]
+                    if hack_name not in found_patterns:
+                        found_patterns.append(hack_name)
+                        issues.append({
+                            'tipo': 'in_instance_hack',
+                            'nombre': f"{hack_name} detectado en memoria",
+                            'ruta': f"PID: {javaw_pid}",
+                            'archivo': f"Patrón: {pattern}",
+                            'alerta': 'CRITICAL',
+                            'categoria': 'MEMORY_ANALYSIS'
+                        })
         except Exception as e:
             print(f"Error en in-instance checks: {e}")
         
@@ -301,7 +303,7 @@ class AstroSSTechniques:
         """Checks fuera de la instancia usando DPS (técnica de AstroSS)"""
         issues = []
         
-        if not self.strings2_path:
+        if not self.string_source:
             return issues
         
         try:
@@ -311,12 +313,14 @@ class AstroSSTechniques:
             if not dps_pid:
                 return issues
             
-            # Hacer dump de strings del proceso DPS
-            dps_strings = self.dump_strings_from_pid(dps_pid)
-            
-            # Filtrar strings que contengan .exe!
-            exe_strings = [x for x in dps_strings if '.exe!' in x and x.startswith('!!')]
-            exe_strings = ['.exe!' + x.split('!')[3] for x in exe_strings if len(x.split('!')) > 3]
+            # Strings del proceso DPS que contengan .exe! (solo se guardan esas)
+            exe_strings = set()
+            for batch in self.iter_string_batches(dps_pid):
+                for x in batch:
+                    if x.startswith('!!') and '.exe!' in x:
+                        parts = x.split('!')
+                        if len(parts) > 3:
+                            exe_strings.add('.exe!' + parts[3])
             
             # Patrones conocidos de autoclickers y hacks
             dps_patterns = {
@@ -379,7 +383,7 @@ class AstroSSTechniques:
         """Detecta archivos ejecutados y luego borrados (técnica de AstroSS)"""
         issues = []
         
-        if not self.strings2_path:
+        if not self.string_source:
             return issues
         
         try:
@@ -395,39 +399,51 @@ class AstroSSTechniques:
             if not explorer_pid:
                 return issues
             
-            # Hacer dump de strings de ambos procesos
-            pcasvc_strings = self.dump_strings_from_pid(pcasvc_pid)
-            explorer_strings = self.dump_strings_from_pid(explorer_pid)
-            
             deleted = {}
+            drive_lower = drive_letter.lower()
             
-            # Método 01: Comparar strings de PcaSvc con Explorer
-            for string in pcasvc_strings:
-                string_lower = string.lower()
-                if string_lower.startswith(drive_letter.lower()) and string_lower.endswith('.exe'):
-                    if not os.path.isfile(string):
-                        if string in explorer_strings:
-                            filename = string.split('/')[-1]
-                            deleted[string] = {
-                                'filename': filename,
-                                'method': '01'
-                            }
+            # Candidatos de PcaSvc: rutas .exe de la unidad actual (un set, no la lista completa)
+            pcasvc_candidates = set()
+            for batch in self.iter_string_batches(pcasvc_pid):
+                for string in batch:
+                    string_lower = string.lower()
+                    if string_lower.startswith(drive_lower) and string_lower.endswith('.exe'):
+                        pcasvc_candidates.add(string)
+            
+            # Explorer en streaming: búsquedas en el set de candidatos (Método 01) y
+            # strings con 'trace' y 'pcaclient' (Método 02)
+            in_explorer = set()
+            trace_strings = set()
+            for batch in self.iter_string_batches(explorer_pid):
+                for string in batch:
+                    if string in pcasvc_candidates:
+                        in_explorer.add(string)
+                    string_lower = string.lower()
+                    if 'trace' in string_lower and 'pcaclient' in string_lower:
+                        trace_strings.add(string)
+            
+            # Método 01: strings de PcaSvc también presentes en Explorer
+            for string in in_explorer:
+                if not os.path.isfile(string):
+                    filename = string.split('/')[-1]
+                    deleted[string] = {
+                        'filename': filename,
+                        'method': '01'
+                    }
             
             # Método 02: Buscar en Explorer strings con 'trace' y 'pcaclient'
-            for string in explorer_strings:
-                string_lower = string.lower()
-                if 'trace' in string_lower and 'pcaclient' in string_lower:
-                    # Extraer path del string
-                    parts = string.split(',')
-                    for part in parts:
-                        if '.exe' in part:
-                            path = part.strip()
-                            if not os.path.isfile(path):
-                                filename = path.split('/')[-1]
-                                deleted[path] = {
-                                    'filename': filename,
-                                    'method': '02'
-                                }
+            for string in trace_strings:
+                # Extraer path del string
+                parts = string.split(',')
+                for part in parts:
+                    if '.exe' in part:
+                        path = part.strip()
+                        if not os.path.isfile(path):
+                            filename = path.split('/')[-1]
+                            deleted[path] = {
+                                'filename': filename,
+                                'method': '02'
+                            }
             
             # Agregar issues para archivos borrados
             for path, info in deleted.items():
@@ -6,6 +6,8 @@ import psutil
 import re
 from typing import List, Dict
 
+from process_snapshot import get_process_snapshot
+
 class AutoclickerDetector:
     """Detector de autoclickers activos"""
     
@@ -31,7 +33,7 @@ class AutoclickerDetector:
         detected = []
         
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline', 'create_time']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe', 'cmdline', 'create_time']):
                 try:
                     proc_info = proc.info
                     proc_name = (proc_info.get('name') or '').lower()
@@ -112,7 +114,7 @@ class AutoclickerDetector:
         detected = []
         
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'cmdline']):
                 try:
                     proc_info = proc.info
                     proc_name = (proc_info.get('name') or '').lower()
@@ -6,8 +6,16 @@ import sqlite3
 import requests
 import json
 import os
+import gzip
+import hashlib
+import random
+import shutil
+import threading
+import time
 from datetime import datetime
 
+import result_columns
+
 try:
     from user_info_collector import UserInfoCollector
     USER_INFO_AVAILABLE = True
@@ -15,6 +23,235 @@ except ImportError:
     USER_INFO_AVAILABLE = False
     UserInfoCollector = None
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Resultados por bloque NDJSON en la subida por streaming
+RESULT_CHUNK_SIZE = 500
+# Reintentos por bloque (reenviar un bloque es seguro: el servidor lo deduplica por número)
+CHUNK_MAX_RETRIES = 6
+CHUNK_TIMEOUT = 30
+# Espera entre reintentos: exponencial con jitter, con tope
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+# Respuestas 4xx que sí se reintentan (el resto: el servidor rechazó el bloque para siempre)
+RETRYABLE_STATUS = (408, 429)
+
+# Bloques pendientes de enviar (sobreviven a un cierre o a una caída de red)
+SPOOL_DIR = os.path.join(os.environ.get('APPDATA') or os.path.expanduser('~'), 'ASPERSProjectsSS', 'upload_spool')
+
+def compress_chunk(body, encoding):
+    """Comprime un bloque NDJSON con la codificación negociada (None = sin comprimir)"""
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+def backoff_delay(attempt):
+    """Segundos de espera antes del reintento número attempt (0, 1, 2...)"""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+class UploadSpool:
+    """
+    Subida pendiente guardada en disco
+    
+    <SPOOL_DIR>/<host>_<scan_id>/meta.json   api_url, scan_id, codificación, formato y resumen final
+    <SPOOL_DIR>/<host>_<scan_id>/<seq>.chunk bloque comprimido aún sin confirmar
+    
+    Un bloque se borra cuando el servidor lo confirma; la carpeta entera, cuando el
+    escaneo queda cerrado en la API.
+    """
+    
+    META_FILE = 'meta.json'
+    CHUNK_SUFFIX = '.chunk'
+    
+    def __init__(self, path):
+        self.path = path
+    
+    @classmethod
+    def for_scan(cls, api_url, scan_id, spool_dir=SPOOL_DIR):
+        host_key = hashlib.sha256(api_url.encode('utf-8')).hexdigest()[:12]
+        return cls(os.path.join(spool_dir, f"{host_key}_{scan_id}"))
+    
+    @classmethod
+    def list_spools(cls, spool_dir=SPOOL_DIR):
+        """Subidas pendientes encontradas en disco"""
+        try:
+            names = sorted(os.listdir(spool_dir))
+        except OSError:
+            return []
+        spools = []
+        for name in names:
+            path = os.path.join(spool_dir, name)
+            if os.path.isfile(os.path.join(path, cls.META_FILE)):
+                spools.append(cls(path))
+        return spools
+    
+    def _write_atomic(self, filename, data):
+        os.makedirs(self.path, exist_ok=True)
+        target = os.path.join(self.path, filename)
+        temp = target + '.tmp'
+        with open(temp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, target)
+    
+    def load_meta(self):
+        try:
+            with open(os.path.join(self.path, self.META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_meta(self, **fields):
+        meta = self.load_meta()
+        meta.update(fields)
+        self._write_atomic(self.META_FILE, json.dumps(meta).encode('utf-8'))
+    
+    def write_chunk(self, seq, data):
+        self._write_atomic(f"{seq}{self.CHUNK_SUFFIX}", data)
+    
+    def read_chunk(self, seq):
+        with open(os.path.join(self.path, f"{seq}{self.CHUNK_SUFFIX}"), 'rb') as f:
+            return f.read()
+    
+    def pending_chunks(self):
+        """Números de bloque aún sin confirmar, en orden"""
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+        seqs = []
+        for name in names:
+            if name.endswith(self.CHUNK_SUFFIX):
+                try:
+                    seqs.append(int(name[:-len(self.CHUNK_SUFFIX)]))
+                except ValueError:
+                    pass
+        return sorted(seqs)
+    
+    def ack(self, seq):
+        """El servidor confirmó el bloque: ya no hace falta guardarlo"""
+        try:
+            os.remove(os.path.join(self.path, f"{seq}{self.CHUNK_SUFFIX}"))
+        except OSError:
+            pass
+    
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+def result_payload(issue):
+    """Campos de un issue que se envían a la API"""
+    return {
+        'tipo': issue.get('tipo', ''),
+        'nombre': issue.get('nombre', ''),
+        'ruta': issue.get('ruta', ''),
+        'archivo': issue.get('archivo', ''),
+        'categoria': issue.get('categoria', ''),
+        'alerta': issue.get('alerta', ''),
+        'confidence': issue.get('confidence', 0),
+        'detected_patterns': issue.get('detected_patterns', []),
+        'obfuscation': issue.get('obfuscation', False),
+        'file_hash': issue.get('file_hash', ''),
+        'ai_analysis': issue.get('ai_analysis', ''),
+        'ai_confidence': issue.get('ai_confidence', 0)
+    }
+
+def encode_chunk(results, payload_format):
+    """Cuerpo de un bloque: NDJSON (por defecto) o un objeto columnar (result_columns)"""
+    if payload_format == result_columns.FORMAT_NAME:
+        return json.dumps(result_columns.encode(results), separators=(',', ':')).encode('utf-8')
+    return '\n'.join(json.dumps(result) for result in results).encode('utf-8')
+
+def chunk_content_type(payload_format):
+    if payload_format == result_columns.FORMAT_NAME:
+        return result_columns.CONTENT_TYPE
+    return 'application/x-ndjson'
+
+class ResultStream:
+    """
+    Subida incremental de resultados en bloques numerados y comprimidos (NDJSON o columnar)
+    
+    Uso (durante el escaneo o al final):
+        stream = integration.open_result_stream()
+        stream.add(issue)                 # guarda y envía un bloque cada RESULT_CHUNK_SIZE issues
+        stream.close(total_files, dur)    # último bloque + resumen final
+    
+    Cada bloque se escribe primero en el spool de disco y se borra cuando el servidor lo
+    confirma; si la red cae o la aplicación se cierra, resume_spooled_uploads() lo reenvía.
+    Los bloques que el servidor ya tiene (subida anterior interrumpida) no se reenvían.
+    """
+    
+    def __init__(self, integration, received_chunks=(), chunk_size=RESULT_CHUNK_SIZE, encoding=None,
+                 payload_format=None):
+        self.integration = integration
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.payload_format = payload_format
+        self.received_chunks = set(received_chunks)
+        self.scan_id = integration.scan_id
+        self.spool = UploadSpool.for_scan(integration.api_url, self.scan_id)
+        self.spool.save_meta(api_url=integration.api_url, scan_id=self.scan_id, encoding=encoding,
+                             payload_format=payload_format)
+        self.next_seq = 0
+        self.results_sent = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+    
+    @property
+    def started(self):
+        """True si el servidor puede tener ya parte de los resultados"""
+        return self.next_seq > 0 or bool(self.received_chunks)
+    
+    def add(self, issue):
+        """Añade un issue; guarda y envía el bloque cuando se llena"""
+        with self._lock:
+            self._buffer.append(result_payload(issue))
+            if len(self._buffer) >= self.chunk_size:
+                self._flush_locked()
+    
+    def extend(self, issues):
+        for issue in issues:
+            self.add(issue)
+    
+    def flush(self):
+        """Guarda y envía lo pendiente aunque el bloque no esté lleno"""
+        with self._lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        seq = self.next_seq
+        if seq not in self.received_chunks:
+            body = encode_chunk(self._buffer, self.payload_format)
+            data = compress_chunk(body, self.encoding)
+            self.spool.write_chunk(seq, data)
+            # Un solo intento durante el escaneo: lo que falle se reintenta en close()
+            if self.integration._send_result_chunk(self.scan_id, seq, data, self.encoding, retries=1,
+                                                   payload_format=self.payload_format):
+                self.spool.ack(seq)
+        self.results_sent += len(self._buffer)
+        self.next_seq += 1
+        self._buffer = []
+    
+    def close(self, total_files_scanned, scan_duration, status='completed'):
+        """Guarda el último bloque y el resumen final, y vacía el spool contra la API"""
+        self.flush()
+        self.spool.save_meta(summary={
+            'status': status,
+            'total_files_scanned': total_files_scanned,
+            'issues_found': self.results_sent,
+            'scan_duration': scan_duration,
+            'total_chunks': self.next_seq
+        })
+        return self.integration._drain_spool(self.spool)
+
 class DatabaseIntegration:
     """Clase para integrar el scanner con la base de datos y API"""
     
@@ -128,24 +365,38 @@ class DatabaseIntegration:
                 return False
             print(f"✅ Escaneo iniciado - Scan ID: {self.scan_id}")
         
+        # Reenviar primero lo que quedó pendiente de escaneos anteriores
+        try:
+            self.resume_spooled_uploads()
+        except Exception as e:
+            print(f"⚠️ Error reenviando subidas pendientes: {e}")
+        
+        # Subida por bloques NDJSON (servidores antiguos o spool no disponible: un único POST con todo)
+        stream = None
+        try:
+            stream = self.open_result_stream()
+            if stream is not None:
+                print(f"📤 Enviando {len(issues_found)} resultados en bloques de {stream.chunk_size}")
+                stream.extend(issues_found)
+                if stream.close(total_files_scanned, scan_duration):
+                    print(f"✅ Resultados enviados exitosamente a API - {len(issues_found)} issues")
+                    print(f"{'='*60}\n")
+                    return True
+                print(f"⚠️ Subida por bloques incompleta - los bloques pendientes quedan en {stream.spool.path}")
+                print(f"{'='*60}\n")
+                return False
+        except Exception as e:
+            print(f"⚠️ Error en la subida por bloques: {e}")
+            if stream is not None and stream.started:
+                # El servidor ya puede tener parte de los bloques: un POST con todo los duplicaría
+                print(f"⚠️ Subida por bloques incompleta - los bloques pendientes quedan en {stream.spool.path}")
+                print(f"{'='*60}\n")
+                return False
+            print("📤 Se envían los resultados en un único POST")
+        
         try:
             # Preparar resultados para la API
-            results = []
-            for issue in issues_found:
-                results.append({
-                    'tipo': issue.get('tipo', ''),
-                    'nombre': issue.get('nombre', ''),
-                    'ruta': issue.get('ruta', ''),
-                    'archivo': issue.get('archivo', ''),
-                    'categoria': issue.get('categoria', ''),
-                    'alerta': issue.get('alerta', ''),
-                    'confidence': issue.get('confidence', 0),
-                    'detected_patterns': issue.get('detected_patterns', []),
-                    'obfuscation': issue.get('obfuscation', False),
-                    'file_hash': issue.get('file_hash', ''),
-                    'ai_analysis': issue.get('ai_analysis', ''),
-                    'ai_confidence': issue.get('ai_confidence', 0)
-                })
+            results = [result_payload(issue) for issue in issues_found]
             
             payload = {
                 'status': 'completed',
@@ -201,6 +452,149 @@ class DatabaseIntegration:
             print(f"{'='*60}\n")
             return False
     
+    def open_result_stream(self):
+        """
+        Abre una subida por streaming para el escaneo actual
+        
+        Consulta al servidor qué bloques tiene ya (reanudación), qué compresión acepta y si
+        acepta el formato columnar.
+        Devuelve None si no hay escaneo o si el servidor no soporta streaming.
+        """
+        if not self.scan_id and not self.start_scan():
+            return None
+        try:
+            response = requests.get(
+                f"{self.api_url}/api/scans/{self.scan_id}/results/stream",
+                timeout=10
+            )
+            if response.status_code != 200:
+                return None
+            cursor = response.json()
+        except Exception as e:
+            print(f"⚠️ Streaming de resultados no disponible: {e}")
+            return None
+        
+        received = cursor.get('received_chunks', [])
+        if received:
+            print(f"🔁 Reanudando subida: el servidor ya tiene {len(received)} bloque(s)")
+        
+        encodings = cursor.get('encodings', [])
+        if zstandard is not None and 'zstd' in encodings:
+            encoding = 'zstd'
+        elif 'gzip' in encodings:
+            encoding = 'gzip'
+        else:
+            encoding = None
+        payload_format = result_columns.FORMAT_NAME if result_columns.FORMAT_NAME in cursor.get('formats', []) else None
+        return ResultStream(self, received_chunks=received, encoding=encoding, payload_format=payload_format)
+    
+    def _send_result_chunk(self, scan_id, seq, data, encoding, retries=CHUNK_MAX_RETRIES, payload_format=None):
+        """
+        Envía un bloque; reintenta con espera exponencial ante errores de red o del servidor
+        
+        Returns:
+            True si el servidor lo confirmó, False si se puede reintentar más tarde y None
+            si lo rechazó para siempre (4xx)
+        """
+        url = f"{self.api_url}/api/scans/{scan_id}/results/stream"
+        headers = {'Content-Type': chunk_content_type(payload_format), 'X-Chunk-Seq': str(seq)}
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(backoff_delay(attempt - 1))
+            try:
+                response = requests.post(url, data=data, headers=headers, timeout=CHUNK_TIMEOUT)
+                if response.status_code == 200:
+                    return True
+                print(f"⚠️ Bloque {seq} rechazado: {response.status_code} {response.text[:200]}")
+                if response.status_code < 500 and response.status_code not in RETRYABLE_STATUS:
+                    return None
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Error de red enviando bloque {seq} (intento {attempt + 1}/{retries}): {e}")
+        return False
+    
+    def _complete_results(self, scan_id, summary):
+        """Cierra la subida por streaming con el resumen del escaneo (None: rechazado para siempre)"""
+        for attempt in range(CHUNK_MAX_RETRIES):
+            if attempt:
+                time.sleep(backoff_delay(attempt - 1))
+            try:
+                response = requests.post(
+                    f"{self.api_url}/api/scans/{scan_id}/results/complete",
+                    json=summary,
+                    timeout=CHUNK_TIMEOUT
+                )
+                if response.status_code == 200:
+                    return True
+                print(f"❌ Error cerrando la subida: {response.status_code} {response.text[:200]}")
+                if response.status_code < 500 and response.status_code not in RETRYABLE_STATUS:
+                    return None
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Error de red cerrando la subida (intento {attempt + 1}): {e}")
+        return False
+    
+    def _drain_spool(self, spool):
+        """
+        Envía los bloques pendientes de un spool y, si tiene resumen, cierra el escaneo.
+        Si el servidor rechaza la subida para siempre (4xx) el spool se descarta: reenviarlo
+        en cada escaneo no cambiaría la respuesta
+        """
+        meta = spool.load_meta()
+        scan_id = meta.get('scan_id')
+        encoding = meta.get('encoding')
+        payload_format = meta.get('payload_format')
+        for seq in spool.pending_chunks():
+            try:
+                data = spool.read_chunk(seq)
+            except OSError:
+                continue
+            sent = self._send_result_chunk(scan_id, seq, data, encoding, payload_format=payload_format)
+            if sent is None:
+                print(f"🗑️ Subida del escaneo {scan_id} rechazada por el servidor - se descarta el spool")
+                spool.remove()
+                return False
+            if not sent:
+                return False
+            spool.ack(seq)
+        
+        summary = meta.get('summary')
+        if summary is None:
+            return True  # Escaneo aún en curso: el cierre llegará con close()
+        completed = self._complete_results(scan_id, summary)
+        if completed is None:
+            print(f"🗑️ Cierre del escaneo {scan_id} rechazado por el servidor - se descarta el spool")
+            spool.remove()
+            return False
+        if not completed:
+            return False
+        spool.remove()
+        return True
+    
+    def resume_spooled_uploads(self):
+        """
+        Reenvía subidas que quedaron a medias (caída de red o cierre de la aplicación)
+        
+        Las subidas sin resumen final pertenecen a escaneos interrumpidos: se envían sus
+        bloques y se cierran con estado 'interrupted'.
+        """
+        resumed = 0
+        for spool in UploadSpool.list_spools():
+            meta = spool.load_meta()
+            if meta.get('api_url') != self.api_url or meta.get('scan_id') is None:
+                continue
+            if meta.get('scan_id') == self.scan_id:
+                continue  # Subida del escaneo en curso
+            print(f"🔁 Reanudando subida pendiente del escaneo {meta.get('scan_id')}...")
+            try:
+                if 'summary' not in meta:
+                    spool.save_meta(summary={'status': 'interrupted'})
+                if self._drain_spool(spool):
+                    resumed += 1
+            except Exception as e:
+                print(f"⚠️ Error reanudando la subida del escaneo {meta.get('scan_id')}: {e}")
+        return resumed
+    
     def get_ai_analysis(self, issue):
         """Obtiene análisis de IA para un issue específico"""
         # TODO: Implementar llamada a servicio de IA
@@ -4,20 +4,79 @@ Optimiza escaneos subsecuentes guardando hash y resultados de archivos ya escane
 """
 import sqlite3
 import hashlib
+import json
 import os
+import queue
+import random
+import threading
+import time
 from datetime import datetime
 
+# Escritura diferida: tamaño máximo de lote y espera máxima antes de volcar a la BD
+WRITE_BATCH_SIZE = 500
+WRITE_FLUSH_INTERVAL = 2.0
+
 class FileCache:
-    """Sistema de caché para archivos escaneados"""
+    """Sistema de caché para archivos escaneados
+    
+    Búsqueda en dos niveles:
+    1. Metadatos (ruta + tamaño + fecha + inode/file ID): no abre el archivo
+    2. Hash SHA256: solo si los metadatos cambiaron
+    
+    paranoid_sample_rate (0-1): fracción de aciertos por metadatos que se re-verifican
+    calculando el hash (detecta archivos alterados conservando fecha y tamaño).
+    
+    Conexiones: una conexión WAL persistente por hilo (no se abre/cierra por consulta);
+    close_connections() cierra las de los hilos que ya terminaron.
+    Escrituras: cache_result encola y un hilo escritor vuelca en lotes (una transacción
+    con executemany UPSERT). Llamar flush() (o usar `with FileCache(...) as cache:`)
+    al terminar el escaneo para que los resultados queden persistidos.
+    """
     
-    def __init__(self, database_path='scanner_db.sqlite'):
+    def __init__(self, database_path='scanner_db.sqlite', paranoid_sample_rate=0.0):
         self.database_path = database_path
+        self.paranoid_sample_rate = paranoid_sample_rate
+        
+        # Conexiones persistentes (una por hilo): [(hilo, conexión)]
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        
+        # Cola de escritura diferida (write-behind)
+        self._write_queue = queue.Queue()
+        self._writer_thread = None
+        self._writer_lock = threading.Lock()
+        
+        # Resultados encolados y aún no escritos (lectura de lo propio antes del volcado)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        
         self._init_cache_table()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def _get_connection(self):
+        """Devuelve la conexión persistente del hilo actual (WAL)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.database_path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append((threading.current_thread(), conn))
+        return conn
+    
     def _init_cache_table(self):
         """Inicializa la tabla de caché en la base de datos"""
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = self._get_connection()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -41,8 +100,13 @@ class FileCache:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_hash ON file_cache(file_hash)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_path ON file_cache(file_path)')
             
+            # Migración: Agregar columna file_inode si no existe (inode en Linux, file ID en NTFS)
+            try:
+                cursor.execute('ALTER TABLE file_cache ADD COLUMN file_inode INTEGER')
+            except sqlite3.OperationalError:
+                pass  # La columna ya existe
+            
             conn.commit()
-            conn.close()
         except Exception as e:
             print(f"⚠️ Error inicializando caché: {e}")
     
@@ -58,102 +122,305 @@ class FileCache:
             return None
     
     def get_file_info(self, file_path):
-        """Obtiene información de un archivo (tamaño, fecha de modificación)"""
+        """Obtiene información de un archivo (tamaño, fecha de modificación, inode/file ID)"""
         try:
             stat = os.stat(file_path)
             return {
                 'size': stat.st_size,
-                'modified': stat.st_mtime
+                'modified': stat.st_mtime,
+                'inode': stat.st_ino or None  # 0 = el sistema de archivos no lo soporta
             }
         except Exception:
             return None
     
-    def is_cached(self, file_path):
-        """Verifica si un archivo está en caché y si necesita re-escaneo"""
+    def _resolve_file_identity(self, file_path, fingerprint=None):
+        """Devuelve (file_info, file_hash) usando la huella si ya fue calculada"""
+        if fingerprint is not None:
+            file_info = {
+                'size': fingerprint.size,
+                'modified': fingerprint.mtime,
+                'inode': fingerprint.inode
+            }
+            return file_info, fingerprint.sha256
+        
+        file_info = self.get_file_info(file_path)
+        if not file_info:
+            return None, None
+        
+        return file_info, self.calculate_file_hash(file_path)
+    
+    def _row_to_result(self, row):
+        """Convierte una fila (scan_result, is_suspicious, confidence, detected_patterns, last_scanned)"""
+        return {
+            'cached': True,
+            'scan_result': row[0],
+            'is_suspicious': bool(row[1]),
+            'confidence': row[2],
+            'detected_patterns': row[3],
+            'last_scanned': row[4]
+        }
+    
+    def lookup_by_metadata(self, file_path, file_info=None):
+        """Búsqueda rápida por metadatos: NO abre ni hashea el archivo
+        
+        Coincide por ruta, tamaño, fecha de modificación e inode/file ID (si ambos lo tienen).
+        En modo paranoico, una muestra aleatoria de aciertos se re-verifica por hash.
+        """
         try:
-            file_info = self.get_file_info(file_path)
+            if file_info is None:
+                file_info = self.get_file_info(file_path)
             if not file_info:
                 return None
             
-            file_hash = self.calculate_file_hash(file_path)
-            if not file_hash:
-                return None
+            # Resultado guardado en este escaneo pero aún no volcado a la BD
+            with self._pending_lock:
+                pending = self._pending.get(file_path)
+            if pending is not None:
+                same_inode = pending[4] is None or file_info['inode'] is None or pending[4] == file_info['inode']
+                if (pending[2], pending[3]) == (file_info['size'], file_info['modified']) and same_inode:
+                    return self._row_to_result((pending[5], pending[6], pending[7], pending[8], None))
             
-            conn = sqlite3.connect(self.database_path)
-            cursor = conn.cursor()
+            cursor = self._get_connection().cursor()
             
             cursor.execute('''
                 SELECT scan_result, is_suspicious, confidence, detected_patterns,
-                       file_size, file_modified, last_scanned
+                       last_scanned, file_hash
                 FROM file_cache
-                WHERE file_path = ? AND file_hash = ? AND file_size = ? AND file_modified = ?
-            ''', (file_path, file_hash, file_info['size'], file_info['modified']))
+                WHERE file_path = ? AND file_size = ? AND file_modified = ?
+                  AND (file_inode IS NULL OR ? IS NULL OR file_inode = ?)
+                ORDER BY last_scanned DESC
+                LIMIT 1
+            ''', (file_path, file_info['size'], file_info['modified'],
+                  file_info['inode'], file_info['inode']))
             
             result = cursor.fetchone()
-            conn.close()
             
-            if result:
-                # Archivo en caché y no modificado
-                return {
-                    'cached': True,
-                    'scan_result': result[0],
-                    'is_suspicious': bool(result[1]),
-                    'confidence': result[2],
-                    'detected_patterns': result[3],
-                    'last_scanned': result[6]
-                }
-            else:
-                # Archivo no en caché o modificado
+            if not result:
                 return {'cached': False}
+            
+            # Modo paranoico: re-verificar una muestra por hash
+            if self.paranoid_sample_rate and random.random() < self.paranoid_sample_rate:
+                if self.calculate_file_hash(file_path) != result[5]:
+                    return {'cached': False}
+            
+            return self._row_to_result(result)
         except Exception as e:
             return None
     
-    def cache_result(self, file_path, is_suspicious=False, confidence=0, 
-                    detected_patterns=None, scan_result=None):
-        """Guarda el resultado de un escaneo en caché"""
+    def is_cached(self, file_path, fingerprint=None, metadata_result=None):
+        """Verifica si un archivo está en caché y si necesita re-escaneo
+        
+        Primero intenta por metadatos (sin I/O del contenido). Solo si cambiaron se usa el hash;
+        si se pasa un FileFingerprint (file_fingerprint.py) se reutiliza su hash en lugar de
+        volver a leer el archivo. Si el contenido es idéntico se actualizan los metadatos guardados.
+        metadata_result: resultado de un lookup_by_metadata ya hecho por el llamador (no se repite).
+        """
         try:
             file_info = self.get_file_info(file_path)
             if not file_info:
-                return False
+                return None
             
-            file_hash = self.calculate_file_hash(file_path)
+            # ========== NIVEL 1: METADATOS ==========
+            if metadata_result is None:
+                metadata_result = self.lookup_by_metadata(file_path, file_info=file_info)
+            if metadata_result and metadata_result.get('cached'):
+                return metadata_result
+            
+            # ========== NIVEL 2: HASH (metadatos cambiaron) ==========
+            if fingerprint is not None:
+                file_hash = fingerprint.sha256
+            else:
+                file_hash = self.calculate_file_hash(file_path)
             if not file_hash:
-                return False
+                return None
             
-            conn = sqlite3.connect(self.database_path)
-            cursor = conn.cursor()
+            cursor = self._get_connection().cursor()
+            
+            cursor.execute('''
+                SELECT scan_result, is_suspicious, confidence, detected_patterns,
+                       last_scanned
+                FROM file_cache
+                WHERE file_path = ? AND file_hash = ?
+            ''', (file_path, file_hash))
+            
+            result = cursor.fetchone()
+            
+            if result:
+                # Contenido idéntico (solo cambió la fecha/inode): refrescar metadatos (diferido)
+                self._enqueue_write('refresh', (file_info['size'], file_info['modified'],
+                                                file_info['inode'], file_path, file_hash))
+                return self._row_to_result(result)
+            
+            # Archivo no en caché o modificado
+            return {'cached': False}
+        except Exception as e:
+            return None
+    
+    def cache_result(self, file_path, is_suspicious=False, confidence=0, 
+                    detected_patterns=None, scan_result=None, fingerprint=None):
+        """Guarda el resultado de un escaneo en caché (reutiliza la huella si se pasa)
+        
+        La escritura es diferida: se encola y el hilo escritor la vuelca en lote.
+        """
+        try:
+            file_info, file_hash = self._resolve_file_identity(file_path, fingerprint)
+            if not file_info or not file_hash:
+                return False
             
             # Convertir detected_patterns a JSON si es una lista
             if detected_patterns and isinstance(detected_patterns, list):
-                import json
                 detected_patterns = json.dumps(detected_patterns)
             
             if scan_result and isinstance(scan_result, dict):
-                import json
                 scan_result = json.dumps(scan_result)
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO file_cache 
-                (file_path, file_hash, file_size, file_modified, scan_result,
-                 is_suspicious, confidence, detected_patterns, last_scanned, scan_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP,
-                        COALESCE((SELECT scan_count FROM file_cache WHERE file_path = ? AND file_hash = ?), 0) + 1)
-            ''', (file_path, file_hash, file_info['size'], file_info['modified'],
-                  scan_result, is_suspicious, confidence, detected_patterns,
-                  file_path, file_hash))
-            
-            conn.commit()
-            conn.close()
+            params = (file_path, file_hash, file_info['size'], file_info['modified'],
+                      file_info['inode'], scan_result, is_suspicious, confidence,
+                      detected_patterns)
+            with self._pending_lock:
+                self._pending[file_path] = params
+            self._enqueue_write('upsert', params)
             return True
         except Exception as e:
             print(f"⚠️ Error guardando en caché: {e}")
             return False
     
+    # ============================================================
+    # ESCRITURA DIFERIDA (WRITE-BEHIND)
+    # ============================================================
+    
+    def _enqueue_write(self, operation, params):
+        """Encola una escritura y arranca el hilo escritor si no está activo"""
+        self._write_queue.put((operation, params))
+        self._ensure_writer()
+    
+    def _ensure_writer(self):
+        """Arranca el hilo escritor (daemon) la primera vez que se necesita"""
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer_thread is None or not self._writer_thread.is_alive():
+                self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+                self._writer_thread.start()
+    
+    def _writer_loop(self):
+        """Hilo escritor: agrupa escrituras y las vuelca en una sola transacción"""
+        while True:
+            batch = [self._write_queue.get()]
+            
+            # Agrupar hasta WRITE_BATCH_SIZE o WRITE_FLUSH_INTERVAL segundos (flush/close cortan antes)
+            deadline = time.monotonic() + WRITE_FLUSH_INTERVAL
+            while len(batch) < WRITE_BATCH_SIZE and batch[-1] is not None and batch[-1][0] != 'flush':
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            stop = False
+            upserts, refreshes, flush_events = [], [], []
+            for entry in batch:
+                if entry is None:
+                    stop = True
+                elif entry[0] == 'upsert':
+                    upserts.append(entry[1])
+                elif entry[0] == 'refresh':
+                    refreshes.append(entry[1])
+                elif entry[0] == 'flush':
+                    flush_events.append(entry[1])
+            
+            self._write_batch(upserts, refreshes)
+            
+            # Ya escritos: dejar de servirlos desde memoria (salvo que haya uno más reciente)
+            with self._pending_lock:
+                for params in upserts:
+                    if self._pending.get(params[0]) is params:
+                        self._pending.pop(params[0], None)
+            
+            for event in flush_events:
+                event.set()
+            if stop:
+                return
+    
+    def _write_batch(self, upserts, refreshes):
+        """Vuelca un lote de escrituras en una transacción (executemany UPSERT)"""
+        if not upserts and not refreshes:
+            return
+        try:
+            conn = self._get_connection()
+            with conn:
+                if upserts:
+                    conn.executemany('''
+                        INSERT INTO file_cache 
+                        (file_path, file_hash, file_size, file_modified, file_inode, scan_result,
+                         is_suspicious, confidence, detected_patterns, last_scanned, scan_count)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, 1)
+                        ON CONFLICT(file_path, file_hash) DO UPDATE SET
+                            file_size = excluded.file_size,
+                            file_modified = excluded.file_modified,
+                            file_inode = excluded.file_inode,
+                            scan_result = excluded.scan_result,
+                            is_suspicious = excluded.is_suspicious,
+                            confidence = excluded.confidence,
+                            detected_patterns = excluded.detected_patterns,
+                            last_scanned = CURRENT_TIMESTAMP,
+                            scan_count = file_cache.scan_count + 1
+                    ''', upserts)
+                if refreshes:
+                    conn.executemany('''
+                        UPDATE file_cache SET file_size = ?, file_modified = ?, file_inode = ?
+                        WHERE file_path = ? AND file_hash = ?
+                    ''', refreshes)
+        except Exception as e:
+            print(f"⚠️ Error guardando lote en caché ({len(upserts) + len(refreshes)} entradas): {e}")
+    
+    def flush(self, timeout=None):
+        """Espera a que todas las escrituras pendientes queden guardadas en la BD"""
+        if self._writer_thread is None or not self._writer_thread.is_alive():
+            return True
+        done = threading.Event()
+        self._write_queue.put(('flush', done))
+        return done.wait(timeout)
+    
+    def close(self):
+        """Vuelca escrituras pendientes, detiene el hilo escritor y cierra conexiones"""
+        self.flush()
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join()
+        self._writer_thread = None
+        
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for _, conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
+    def close_connections(self):
+        """Cierra las conexiones de los hilos que ya terminaron (p. ej. los workers del escaneo)
+        
+        Las de hilos aún vivos (escritor, fases que siguen en curso) no se tocan: se cerrarán
+        en una llamada posterior, cuando esos hilos hayan terminado.
+        """
+        with self._connections_lock:
+            finished = [(thread, conn) for thread, conn in self._connections if not thread.is_alive()]
+            self._connections = [entry for entry in self._connections if entry[0].is_alive()]
+        for _, conn in finished:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
     def get_cache_stats(self):
         """Obtiene estadísticas del caché"""
         try:
-            conn = sqlite3.connect(self.database_path)
-            cursor = conn.cursor()
+            self.flush()
+            cursor = self._get_connection().cursor()
             
             cursor.execute('SELECT COUNT(*) FROM file_cache')
             total_cached = cursor.fetchone()[0]
@@ -164,7 +431,6 @@ class FileCache:
             cursor.execute('SELECT SUM(scan_count) FROM file_cache')
             total_scans = cursor.fetchone()[0] or 0
             
-            conn.close()
             
             return {
                 'total_cached': total_cached,
@@ -177,7 +443,8 @@ class FileCache:
     def clear_old_cache(self, days=30):
         """Limpia entradas de caché más antiguas que X días"""
         try:
-            conn = sqlite3.connect(self.database_path)
+            self.flush()
+            conn = self._get_connection()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -187,7 +454,6 @@ class FileCache:
             
             deleted = cursor.rowcount
             conn.commit()
-            conn.close()
             
             return deleted
         except Exception as e:
@@ -0,0 +1,74 @@
+"""
+Huella Única de Archivos (Fingerprint)
+Lee cada archivo UNA sola vez: calcula SHA256 y captura los primeros bytes en el mismo recorrido,
+para que caché, patrones legítimos y análisis de contenido reutilicen el mismo resultado
+"""
+import hashlib
+import os
+
+# Bytes iniciales que se conservan para el análisis de contenido (mismo límite que analyze_file_content)
+HEAD_SIZE = 1024 * 1024
+
+# Tamaño de bloque de lectura (streaming, sin cargar el archivo completo en memoria)
+CHUNK_SIZE = 1024 * 1024
+
+
+class FileFingerprint:
+    """Huella de un archivo: hash, tamaño, fecha de modificación, inode/file ID y primeros bytes"""
+
+    __slots__ = ('path', 'sha256', 'size', 'mtime', 'inode', 'head')
+
+    def __init__(self, path, sha256, size, mtime, head=b'', inode=None):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.mtime = mtime
+        self.inode = inode
+        self.head = head
+
+    def to_dict(self):
+        """Representación sin los bytes iniciales (para logs / JSON)"""
+        return {
+            'path': self.path,
+            'sha256': self.sha256,
+            'size': self.size,
+            'mtime': self.mtime,
+            'inode': self.inode
+        }
+
+
+def compute_fingerprint(file_path, head_size=HEAD_SIZE, chunk_callback=None):
+    """
+    Calcula la huella de un archivo leyéndolo una sola vez
+
+    Cada bloque leído pasa por SHA256 y, si se indica, por chunk_callback
+    (por ejemplo un buscador de patrones en streaming).
+
+    Returns:
+        FileFingerprint o None si el archivo no se puede leer
+    """
+    try:
+        stat = os.stat(file_path)
+        sha256_hash = hashlib.sha256()
+        head = bytearray()
+
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha256_hash.update(chunk)
+
+                if len(head) < head_size:
+                    head += chunk[:head_size - len(head)]
+
+                if chunk_callback:
+                    chunk_callback(chunk)
+
+        return FileFingerprint(
+            path=file_path,
+            sha256=sha256_hash.hexdigest(),
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            head=bytes(head),
+            inode=stat.st_ino or None
+        )
+    except Exception:
+        return None
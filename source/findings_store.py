@@ -0,0 +1,238 @@
+"""
+Almacén de Hallazgos
+Sustituye a la lista compartida issues_found, a la que escribían sin lock los hilos del
+planificador, los pools de secondary_scan_parallel y los módulos de detección:
+- Cada hilo añade a su propio búfer (threading.local): append/extend no toman ningún lock
+- Al leer (len, iterar...) los búferes se fusionan en una tabla indexada por ruta
+  normalizada + detector (tipo): el mismo archivo reportado por las pasadas críticas, de
+  usuario, generales y secundarias queda en UN solo hallazgo
+- La fusión combina la evidencia: patrones detectados (unión), confianza (la mayor),
+  hash (el primero conocido) y alerta (la más grave)
+- Los registros son objetos con __slots__ y se entregan como dicts con las mismas claves
+  que antes, así que filtros, IA, scoring, reporte HTML y subida no cambian
+- Los hilos de las fases del escaneo quedan asociados a su almacén (collecting): una fase
+  que supera su timeout sigue escribiendo en él y no en la lista ya filtrada. seal()
+  congela el almacén antes del filtrado y descarta lo que llegue después
+"""
+import contextlib
+import os
+import threading
+
+# Gravedad de cada alerta (la fusión se queda con la mayor)
+ALERT_SEVERITY = {
+    'INFO': 0,
+    'POCO_SOSPECHOSO': 1,
+    'SOSPECHOSO': 2,
+    'CRITICAL': 3,
+}
+
+# Claves con estructura propia en Finding; el resto se guarda tal cual en extra
+_CORE_KEYS = ('nombre', 'ruta', 'archivo', 'tipo', 'alerta', 'confidence', 'file_hash', 'detected_patterns')
+
+
+def normalize_path(path):
+    """Ruta comparable (separadores, '..' y mayúsculas en Windows)"""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def finding_key(issue):
+    """
+    Clave de deduplicación: ruta normalizada + detector. Los hallazgos que no son rutas
+    de archivo ('sc query dps', 'DNS Cache'...) también se distinguen por nombre
+    """
+    archivo = str(issue.get('archivo') or '')
+    tipo = issue.get('tipo')
+    if archivo and os.path.isabs(archivo):
+        return normalize_path(archivo), tipo
+    return archivo, tipo, issue.get('nombre')
+
+
+# Almacén al que escribe cada hilo de una fase del escaneo
+_bound = threading.local()
+
+
+def bind_store(store):
+    """Asocia el hilo actual a un almacén (None lo desasocia); sirve de initializer de pools"""
+    _bound.store = store
+
+
+def bound_store():
+    """Almacén asociado al hilo actual, o None"""
+    return getattr(_bound, 'store', None)
+
+
+class Finding:
+    """Un hallazgo con la evidencia de todos sus reportes"""
+
+    __slots__ = ('key', 'nombre', 'ruta', 'archivo', 'tipo', 'alerta',
+                 'confidence', 'file_hash', 'patterns', 'extra', 'reports')
+
+    def __init__(self, issue, key=None):
+        self.key = key if key is not None else finding_key(issue)
+        self.nombre = issue.get('nombre')
+        self.ruta = issue.get('ruta')
+        self.archivo = issue.get('archivo')
+        self.tipo = issue.get('tipo')
+        self.alerta = issue.get('alerta')
+        self.confidence = issue.get('confidence')
+        self.file_hash = issue.get('file_hash')
+        self.patterns = list(issue['detected_patterns']) if 'detected_patterns' in issue else None
+        self.extra = {name: value for name, value in issue.items() if name not in _CORE_KEYS}
+        self.reports = 1
+
+    def merge(self, issue):
+        """Suma la evidencia de otro reporte del mismo hallazgo"""
+        self.reports += 1
+        alerta = issue.get('alerta')
+        if ALERT_SEVERITY.get(alerta, -1) > ALERT_SEVERITY.get(self.alerta, -1):
+            self.alerta = alerta
+        confidence = issue.get('confidence')
+        if confidence is not None and (self.confidence is None or confidence > self.confidence):
+            self.confidence = confidence
+        if not self.file_hash and issue.get('file_hash'):
+            self.file_hash = issue['file_hash']
+        if 'detected_patterns' in issue:
+            if self.patterns is None:
+                self.patterns = []
+            for pattern in issue['detected_patterns'] or ():
+                if pattern not in self.patterns:
+                    self.patterns.append(pattern)
+        for name, value in issue.items():
+            if name not in _CORE_KEYS:
+                self.extra.setdefault(name, value)
+
+    def to_dict(self):
+        """Dict con las mismas claves que los reportes originales"""
+        issue = {
+            'nombre': self.nombre,
+            'ruta': self.ruta,
+            'archivo': self.archivo,
+            'tipo': self.tipo,
+            'alerta': self.alerta,
+        }
+        if self.confidence is not None:
+            issue['confidence'] = self.confidence
+        if self.file_hash is not None:
+            issue['file_hash'] = self.file_hash
+        if self.patterns is not None:
+            issue['detected_patterns'] = list(self.patterns)
+        issue.update(self.extra)
+        return issue
+
+
+class FindingsStore:
+    """
+    Hallazgos de un escaneo, deduplicados. Misma interfaz que la lista que reemplaza
+    (append, extend, len, iteración, bool)
+    """
+
+    def __init__(self, issues=None):
+        self._local = threading.local()
+        self._buffers = []             # Búferes de todos los hilos que han escrito
+        self._findings = {}            # clave -> Finding, en orden de primera aparición
+        self._reported = 0
+        self._late = 0                 # Reportes descartados por llegar tras seal()
+        self._sealed = False
+        self._lock = threading.Lock()  # Solo para registrar búferes y para la fusión
+        if issues:
+            self.extend(issues)
+
+    # ---------------- escritura (sin lock) ----------------
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = []
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+
+    def append(self, issue):
+        if self._sealed:
+            self._discard(1)
+            return
+        self._buffer().append(issue)
+
+    def extend(self, issues):
+        if self._sealed:
+            self._discard(len(issues))
+            return
+        self._buffer().extend(issues)
+
+    def _discard(self, count):
+        with self._lock:
+            self._late += count
+
+    @contextlib.contextmanager
+    def collecting(self):
+        """Asocia el hilo actual a este almacén mientras dura el bloque (una fase)"""
+        previous = bound_store()
+        bind_store(self)
+        try:
+            yield self
+        finally:
+            bind_store(previous)
+
+    # ---------------- fusión ----------------
+
+    def _merge(self, seal=False):
+        with self._lock:
+            for buffer in self._buffers:
+                # Solo se retiran los elementos vistos: el hilo dueño puede seguir añadiendo
+                pending = buffer[:]
+                del buffer[:len(pending)]
+                if self._sealed:
+                    # Añadidos que se cruzaron con seal(): llegan tarde igual que los demás
+                    self._late += len(pending)
+                    continue
+                for issue in pending:
+                    self._reported += 1
+                    key = finding_key(issue)
+                    finding = self._findings.get(key)
+                    if finding is None:
+                        self._findings[key] = Finding(issue, key)
+                    else:
+                        finding.merge(issue)
+            if seal:
+                self._sealed = True
+            return list(self._findings.values())
+
+    def records(self):
+        """Hallazgos fusionados (objetos Finding)"""
+        return self._merge()
+
+    def to_list(self):
+        """Hallazgos fusionados como lista de dicts"""
+        return [finding.to_dict() for finding in self._merge()]
+
+    def stats(self):
+        """(reportes recibidos, hallazgos únicos)"""
+        findings = self._merge()
+        return self._reported, len(findings)
+
+    def seal(self):
+        """
+        Fusiona lo recibido y congela el almacén: los reportes posteriores (fases vencidas
+        que siguen en segundo plano) se descartan
+
+        Returns:
+            Hallazgos fusionados como lista de dicts
+        """
+        return [finding.to_dict() for finding in self._merge(seal=True)]
+
+    @property
+    def late(self):
+        """Reportes descartados por llegar después de seal()"""
+        with self._lock:
+            return self._late
+
+    # ---------------- interfaz de lista ----------------
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __len__(self):
+        return len(self._merge())
+
+    def __bool__(self):
+        return len(self) > 0
@@ -4,8 +4,12 @@ Configuración de Gunicorn para Render - API Server
 import multiprocessing
 import os
 
-# Número de workers (para SQLite, usar 1 es más seguro)
-workers = 1  # SQLite no maneja bien múltiples workers simultáneos
+# Número de workers (para SQLite, 1 es lo más seguro; WEB_CONCURRENCY permite más)
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Con varios workers la caché tiene que ser compartida: una invalidación hecha en un
+# worker debe verse en los demás (se lee al importar la app, después de este archivo)
+os.environ.setdefault('CACHE_BACKEND', 'sqlite' if workers > 1 else 'memory')
 
 # Timeout (aumentado para operaciones de base de datos)
 timeout = 180  # 3 minutos
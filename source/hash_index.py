@@ -0,0 +1,315 @@
+"""
+Índice de Hashes Conocidos
+Un único archivo mapeado en memoria (models/known_hashes.idx) con los SHA-256 de hacks
+conocidos y de archivos legítimos, en lugar de un set de cadenas hex por cada consumidor:
+- Digests binarios de 32 bytes ordenados (búsqueda binaria sobre el mmap) y un byte de
+  flags por digest que indica de qué fuente viene (modelo de la API, BD local...)
+- Filtro de Bloom delante: la gran mayoría de archivos (no conocidos) se descartan con
+  7 lecturas de bits, sin tocar la tabla
+- replace() sustituye todos los hashes de una fuente (se omite si no cambió) y apply()
+  aplica un delta del modelo; ambos fusionan la tabla ordenada en un archivo nuevo que
+  reemplaza al anterior, sin cargar el índice como objetos Python
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+INDEX_FILE = os.path.join('models', 'known_hashes.idx')
+
+# Flags por digest (una fuente por bit para que cada una se actualice sin pisar a las demás)
+KNOWN_HACK = 0x01          # Modelo aprendido de la API (learned_model)
+LOCAL_HACK = 0x02          # learned_hashes de la BD local con is_hack = 1
+LOCAL_LEGITIMATE = 0x04    # Hashes legítimos de la BD local (LegitimatePatterns)
+KNOWN_GOOD = 0x08          # Hashes legítimos confirmados del modelo de la API (learned_model)
+CLEAN_TEXTURE = 0x10       # Texturas ya analizadas sin hallazgos (xray_texture_analyzer)
+KNOWN_ARCHIVE = 0x20       # Releases conocidas de mods/resource packs: SHA-256 del archivo (archive_fingerprint)
+HACK_FLAGS = KNOWN_HACK | LOCAL_HACK
+
+DIGEST_SIZE = 32
+
+# Cabecera: magia, versión de formato, funciones de Bloom, digests, bytes del Bloom, bytes de metadatos
+HEADER = struct.Struct('<4sHHIII')
+MAGIC = b'SSHI'
+FORMAT_VERSION = 1
+
+# Bloom: ~10 bits por hash y 7 funciones -> ~1% de falsos positivos
+BLOOM_BITS_PER_HASH = 10
+BLOOM_FUNCTIONS = 7
+
+
+def to_digest(value):
+    """Digest binario de un SHA-256 en hex (mayúsculas o minúsculas); None si no lo es"""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value) if len(value) == DIGEST_SIZE else None
+    if not value or len(value) != DIGEST_SIZE * 2:
+        return None
+    try:
+        return bytes.fromhex(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bloom_positions(digest, bits):
+    # Los SHA-256 ya son uniformes: cada función usa 4 bytes distintos del propio digest
+    for i in range(BLOOM_FUNCTIONS):
+        yield int.from_bytes(digest[i * 4:i * 4 + 4], 'little') % bits
+
+
+def _signature(digests):
+    """Huella del conjunto (ordenado) de digests de una fuente"""
+    h = hashlib.sha1()
+    for digest in digests:
+        h.update(digest)
+    return f"{len(digests)}:{h.hexdigest()}"
+
+
+class HashIndex:
+    """Tabla ordenada de digests con flags por fuente, leída desde un mmap"""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.meta = {}
+        self._file = None
+        self._map = None
+        self._count = 0
+        self._bloom_bits = 0
+        self._bloom_offset = 0
+        self._digests_offset = 0
+        self._flags_offset = 0
+        self._lock = threading.RLock()
+        self._open()
+
+    # ---------------- lectura ----------------
+
+    def _open(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            self._file = open(self.path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, functions, count, bloom_bytes, meta_bytes = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != FORMAT_VERSION or functions != BLOOM_FUNCTIONS:
+                raise ValueError("formato de índice desconocido")
+            offset = HEADER.size
+            self.meta = json.loads(self._map[offset:offset + meta_bytes].decode('utf-8')) if meta_bytes else {}
+            self._bloom_offset = offset + meta_bytes
+            self._bloom_bits = bloom_bytes * 8
+            self._digests_offset = self._bloom_offset + bloom_bytes
+            self._flags_offset = self._digests_offset + count * DIGEST_SIZE
+            if len(self._map) < self._flags_offset + count:
+                raise ValueError("índice truncado")
+            self._count = count
+        except Exception as e:
+            print(f"⚠️ Índice de hashes no válido, se reconstruirá: {e}")
+            self._close()
+
+    def _close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = None
+        self._count = 0
+        self.meta = {}
+
+    def _digest_at(self, position):
+        start = self._digests_offset + position * DIGEST_SIZE
+        return self._map[start:start + DIGEST_SIZE]
+
+    def _find(self, digest):
+        """Posición del digest en la tabla o -1"""
+        if not self._count:
+            return -1
+        for bit in _bloom_positions(digest, self._bloom_bits):
+            if not self._map[self._bloom_offset + (bit >> 3)] & (1 << (bit & 7)):
+                return -1
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._digest_at(middle) < digest:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._digest_at(low) == digest:
+            return low
+        return -1
+
+    def lookup(self, value):
+        """Flags del hash (0 si no está en el índice)"""
+        digest = to_digest(value)
+        if digest is None:
+            return 0
+        with self._lock:
+            position = self._find(digest)
+            return self._map[self._flags_offset + position] if position >= 0 else 0
+
+    def contains(self, value, flags=HACK_FLAGS):
+        """True si el hash tiene alguno de los flags"""
+        return bool(self.lookup(value) & flags)
+
+    def count(self, flags=HACK_FLAGS):
+        """Cuántos hashes tienen alguno de los flags"""
+        with self._lock:
+            if not self._count:
+                return 0
+            table = self._map[self._flags_offset:self._flags_offset + self._count]
+            return sum(table.count(bytes([value])) for value in range(1, 256) if value & flags)
+
+    def view(self, flags=HACK_FLAGS):
+        """Objeto con 'in' y len() para los hashes de esos flags (sustituye a los sets)"""
+        return HashIndexView(self, flags)
+
+    # ---------------- escritura ----------------
+
+    def _entries(self):
+        for position in range(self._count):
+            yield self._digest_at(position), self._map[self._flags_offset + position]
+
+    def _rewrite(self, flag, added, removed, reset, meta):
+        """
+        Fusiona la tabla actual con los cambios de una fuente y la reemplaza:
+        reset quita flag de todas las entradas antes de añadir added
+        """
+        changes = {}
+        for digest in removed:
+            changes[digest] = False
+        for digest in added:
+            changes[digest] = True
+        pending = sorted(changes.items())
+
+        digests = bytearray()
+        flags = bytearray()
+
+        def emit(digest, value):
+            if value:
+                digests.extend(digest)
+                flags.append(value)
+
+        index = 0
+        for digest, value in self._entries():
+            if reset:
+                value &= ~flag
+            while index < len(pending) and pending[index][0] < digest:
+                emit(pending[index][0], flag if pending[index][1] else 0)
+                index += 1
+            if index < len(pending) and pending[index][0] == digest:
+                value = (value | flag) if pending[index][1] else (value & ~flag)
+                index += 1
+            emit(digest, value)
+        for digest, present in pending[index:]:
+            emit(digest, flag if present else 0)
+
+        count = len(flags)
+        bloom_bits = max(64, count * BLOOM_BITS_PER_HASH)
+        bloom = bytearray((bloom_bits + 7) // 8)
+        bloom_bits = len(bloom) * 8
+        for position in range(count):
+            for bit in _bloom_positions(digests[position * DIGEST_SIZE:(position + 1) * DIGEST_SIZE], bloom_bits):
+                bloom[bit >> 3] |= 1 << (bit & 7)
+
+        new_meta = dict(self.meta)
+        new_meta.update(meta or {})
+        meta_bytes = json.dumps(new_meta).encode('utf-8')
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, BLOOM_FUNCTIONS, count, len(bloom), len(meta_bytes)))
+            f.write(meta_bytes)
+            f.write(bloom)
+            f.write(digests)
+            f.write(flags)
+        # En Windows no se puede reemplazar un archivo mapeado: se cierra antes y se vuelve
+        # a abrir pase lo que pase (si el reemplazo falla, el índice anterior sigue en uso)
+        self._close()
+        try:
+            os.replace(temp_path, self.path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        finally:
+            self._open()
+
+    def replace(self, flag, values, meta=None):
+        """
+        Sustituye todos los hashes de una fuente (flag) por values
+
+        Returns:
+            True si el índice cambió (False si la fuente ya tenía exactamente esos hashes)
+        """
+        digests = sorted({digest for digest in map(to_digest, values) if digest is not None})
+        signature = _signature(digests)
+        with self._lock:
+            signatures = dict(self.meta.get('sources', {}))
+            if signatures.get(str(flag)) == signature and not meta:
+                return False
+            signatures[str(flag)] = signature
+            new_meta = dict(meta or {})
+            new_meta['sources'] = signatures
+            try:
+                self._rewrite(flag, digests, (), True, new_meta)
+            except Exception as e:
+                print(f"⚠️ Error actualizando índice de hashes (flag {flag:#x}): se mantiene el anterior: {e}")
+                return False
+            return True
+
+    def apply(self, flag, added=(), removed=(), meta=None):
+        """Aplica un delta a una fuente (hashes añadidos y eliminados)"""
+        added = [digest for digest in map(to_digest, added) if digest is not None]
+        removed = [digest for digest in map(to_digest, removed) if digest is not None]
+        with self._lock:
+            if not added and not removed and not meta:
+                return False
+            signatures = dict(self.meta.get('sources', {}))
+            signatures.pop(str(flag), None)   # La firma completa ya no es conocida
+            new_meta = dict(meta or {})
+            new_meta['sources'] = signatures
+            try:
+                self._rewrite(flag, added, removed, False, new_meta)
+            except Exception as e:
+                print(f"⚠️ Error actualizando índice de hashes (flag {flag:#x}): se mantiene el anterior: {e}")
+                return False
+            return True
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+class HashIndexView:
+    """Vista de solo lectura del índice para unos flags: 'hash in vista' y len(vista)"""
+
+    __slots__ = ('index', 'flags')
+
+    def __init__(self, index, flags):
+        self.index = index
+        self.flags = flags
+
+    def __contains__(self, value):
+        return self.index.contains(value, self.flags)
+
+    def __len__(self):
+        return self.index.count(self.flags)
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+# Instancia compartida del proceso
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_hash_index():
+    """Índice compartido por la app, el analizador de IA y los patrones legítimos"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = HashIndex()
+        return _shared_index
@@ -0,0 +1,236 @@
+"""
+Inspector de JARs
+Un .jar es un zip: su contenido está comprimido (deflate), así que buscar b'killaura' en los
+bytes crudos casi nunca acierta. Este módulo mapea el archivo en memoria (mmap), lee solo el
+directorio central del zip (nombres de clases y recursos) y descomprime únicamente las
+entradas necesarias (MANIFEST.MF), con caché por (hash, entrada)
+"""
+import mmap
+import re
+import threading
+import zipfile
+
+MANIFEST_PATH = 'META-INF/MANIFEST.MF'
+
+# Atributos del MANIFEST que cargan un agente Java (inyección en el proceso de Minecraft)
+AGENT_ATTRIBUTES = ('Premain-Class', 'Agent-Class', 'Launcher-Agent-Class')
+
+# Atributos que se conservan del MANIFEST
+MANIFEST_ATTRIBUTES = AGENT_ATTRIBUTES + (
+    'Main-Class', 'Can-Redefine-Classes', 'Can-Retransform-Classes', 'Implementation-Title'
+)
+
+# Tamaño máximo de una entrada que se descomprime bajo demanda
+MAX_ENTRY_SIZE = 1024 * 1024
+
+# Resultados recordados (por hash del JAR y por (hash, entrada))
+INSPECTION_CACHE_SIZE = 4096
+ENTRY_CACHE_SIZE = 4096
+
+# Ofuscación: fracción de clases con nombre simple de 1-2 caracteres (a.class, aB.class)
+OBFUSCATION_MIN_CLASSES = 20
+OBFUSCATION_SHORT_NAME_RATIO = 0.5
+
+_SHORT_CLASS_NAME = re.compile(r'(?:^|/)[^/]{1,2}\.class$')
+
+
+class _MappedFile:
+    """Adaptador de mmap a archivo para zipfile (que además pide seekable())"""
+
+    def __init__(self, mapped):
+        self._mapped = mapped
+
+    def read(self, size=-1):
+        return self._mapped.read(size)
+
+    def seek(self, offset, whence=0):
+        self._mapped.seek(offset, whence)
+        return self._mapped.tell()
+
+    def tell(self):
+        return self._mapped.tell()
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self._mapped.close()
+
+
+class JarInspection:
+    """Resultado de inspeccionar un JAR sin descomprimirlo entero"""
+
+    __slots__ = ('path', 'file_hash', 'is_zip', 'entry_names', 'class_count',
+                 'manifest', 'agent_classes', 'obfuscated')
+
+    def __init__(self, path, file_hash=None):
+        self.path = path
+        self.file_hash = file_hash
+        self.is_zip = False
+        self.entry_names = []
+        self.class_count = 0
+        self.manifest = {}
+        self.agent_classes = []
+        self.obfuscated = False
+
+    @property
+    def is_java_agent(self):
+        return bool(self.agent_classes)
+
+    def names_text(self):
+        """Nombres de entradas en minúsculas, uno por línea (para buscar patrones en una pasada)"""
+        return '\n'.join(self.entry_names).lower()
+
+
+def parse_manifest(data):
+    """Atributos principales de un MANIFEST.MF (con líneas de continuación)"""
+    text = data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+    attributes = {}
+    last_key = None
+    for line in text.split('\n'):
+        if line.startswith(' ') and last_key:
+            attributes[last_key] += line[1:]
+            continue
+        if not line.strip():
+            # Fin de la sección principal: el resto son atributos por entrada
+            if attributes:
+                break
+            continue
+        key, sep, value = line.partition(':')
+        if sep:
+            last_key = key.strip()
+            attributes[last_key] = value.strip()
+    return {key: attributes[key] for key in MANIFEST_ATTRIBUTES if key in attributes}
+
+
+class JarInspector:
+    """
+    Motor de análisis de JARs compartido
+
+    inspect(path, file_hash) devuelve un JarInspection; si el hash ya se inspeccionó
+    (mismo JAR copiado en varias carpetas de mods) se reutiliza el resultado.
+    read_entry(path, entry, file_hash) descomprime una sola entrada bajo demanda.
+    """
+
+    def __init__(self, inspection_cache_size=INSPECTION_CACHE_SIZE, entry_cache_size=ENTRY_CACHE_SIZE):
+        self.inspection_cache_size = inspection_cache_size
+        self.entry_cache_size = entry_cache_size
+        self._inspections = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, cache, limit, key, value):
+        with self._lock:
+            if len(cache) >= limit:
+                cache.clear()
+            cache[key] = value
+
+    def _open(self, path):
+        """Abre el JAR mapeado en memoria: solo se leen las páginas que toca zipfile"""
+        f = open(path, 'rb')
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Archivo vacío o sin soporte de mmap
+            f.close()
+            raise zipfile.BadZipFile('no se puede mapear el archivo')
+        f.close()
+        try:
+            return mapped, zipfile.ZipFile(_MappedFile(mapped))
+        except Exception:
+            mapped.close()
+            raise
+
+    def _read_member(self, archive, info, file_hash):
+        """Descomprime una entrada (con caché por (hash, entrada))"""
+        key = (file_hash, info.filename) if file_hash else None
+        if key is not None:
+            cached = self._entries.get(key)
+            if cached is not None:
+                return cached
+        if info.file_size > MAX_ENTRY_SIZE:
+            return b''
+        data = archive.read(info)
+        if key is not None:
+            self._remember(self._entries, self.entry_cache_size, key, data)
+        return data
+
+    def inspect(self, path, file_hash=None):
+        """
+        Inspecciona un JAR leyendo solo el directorio central y el MANIFEST
+
+        Returns:
+            JarInspection (is_zip=False si el archivo no es un zip válido)
+        """
+        if file_hash:
+            cached = self._inspections.get(file_hash)
+            if cached is not None:
+                return cached
+
+        inspection = JarInspection(path, file_hash)
+        try:
+            mapped, archive = self._open(path)
+        except Exception:
+            return inspection
+
+        try:
+            with archive:
+                infos = archive.infolist()
+                inspection.is_zip = True
+                inspection.entry_names = [info.filename for info in infos]
+
+                class_names = [name for name in inspection.entry_names if name.endswith('.class')]
+                inspection.class_count = len(class_names)
+                if inspection.class_count >= OBFUSCATION_MIN_CLASSES:
+                    short = sum(1 for name in class_names if _SHORT_CLASS_NAME.search(name))
+                    inspection.obfuscated = short / inspection.class_count >= OBFUSCATION_SHORT_NAME_RATIO
+
+                manifest_info = next((info for info in infos if info.filename.upper() == MANIFEST_PATH), None)
+                if manifest_info is not None:
+                    try:
+                        inspection.manifest = parse_manifest(self._read_member(archive, manifest_info, file_hash))
+                    except Exception:
+                        inspection.manifest = {}
+                inspection.agent_classes = [
+                    inspection.manifest[attribute] for attribute in AGENT_ATTRIBUTES
+                    if inspection.manifest.get(attribute)
+                ]
+        except Exception:
+            inspection.is_zip = False
+        finally:
+            mapped.close()
+
+        if file_hash and inspection.is_zip:
+            self._remember(self._inspections, self.inspection_cache_size, file_hash, inspection)
+        return inspection
+
+    def read_entry(self, path, entry_name, file_hash=None):
+        """Descomprime una sola entrada del JAR (None si no existe o no se puede leer)"""
+        key = (file_hash, entry_name) if file_hash else None
+        if key is not None and key in self._entries:
+            return self._entries[key]
+        try:
+            mapped, archive = self._open(path)
+        except Exception:
+            return None
+        try:
+            with archive:
+                return self._read_member(archive, archive.getinfo(entry_name), file_hash)
+        except Exception:
+            return None
+        finally:
+            mapped.close()
+
+
+# Instancia compartida por todos los detectores del proceso
+_default_inspector = None
+_default_lock = threading.Lock()
+
+
+def get_jar_inspector():
+    """Inspector compartido (cachés comunes para todo el escaneo)"""
+    global _default_inspector
+    with _default_lock:
+        if _default_inspector is None:
+            _default_inspector = JarInspector()
+        return _default_inspector
@@ -6,6 +6,8 @@ import psutil
 import re
 from typing import List, Dict
 
+from process_snapshot import get_process_snapshot
+
 class JavaInjectionDetector:
     """Detector de inyección de código en procesos Java"""
     
@@ -29,7 +31,7 @@ class JavaInjectionDetector:
         detected = []
         
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'exe', 'memory_info']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'cmdline', 'exe', 'memory_info']):
                 try:
                     proc_info = proc.info
                     proc_name = (proc_info.get('name') or '').lower()
@@ -150,7 +152,7 @@ class JavaInjectionDetector:
         detected = []
         
         try:
-            proc = psutil.Process(pid)
+            proc = get_process_snapshot().process(pid)
             memory_maps = proc.memory_maps()
             
             # Strings de hacks conocidos para buscar en memoria
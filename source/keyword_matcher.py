@@ -0,0 +1,117 @@
+"""
+Buscador Multi-Patrón Precompilado
+Compila una lista de palabras clave UNA sola vez en una expresión regular combinada y
+devuelve todas las coincidencias en una sola pasada sobre el texto (str o bytes),
+en lugar de recorrer el texto una vez por patrón con `any(p in s for p in LISTA)`
+"""
+import re
+import threading
+
+
+class KeywordMatcher:
+    """
+    Conjunto de palabras clave compilado para búsqueda en una sola pasada
+
+    La expresión es una alternancia dentro de un lookahead, ordenada de mayor a menor
+    longitud: en cada posición del texto se obtiene el patrón más largo que empieza ahí.
+    Cada patrón encontrado arrastra además todos los patrones contenidos en él
+    (precalculado), así que el resultado es el mismo que comprobar cada patrón por separado.
+
+    Uso:
+        matcher = KeywordMatcher(['vape', 'entropy', 'kami blue', 'kami'])
+        matcher.find_all('c:\\mods\\kami blue.jar')   -> {'kami blue', 'kami'}
+        matcher.first_match(texto)                    -> primer patrón de la lista presente
+        matcher.contains_any(texto)                   -> True / False
+
+    Los patrones pueden ser str o bytes (no mezclados). La comparación distingue
+    mayúsculas igual que el operador `in`: el llamador normaliza el texto.
+    """
+
+    def __init__(self, patterns=()):
+        self._patterns = []
+        self._pattern_set = set()
+        self._order = {}
+        self._regex = None
+        self._contained = {}
+        self._lock = threading.Lock()
+        self.add(patterns)
+
+    @property
+    def patterns(self):
+        """Patrones en el orden en que se añadieron"""
+        return list(self._patterns)
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def add(self, patterns):
+        """Añade patrones; la expresión se recompila en la siguiente búsqueda"""
+        with self._lock:
+            for pattern in patterns:
+                if pattern and pattern not in self._pattern_set:
+                    self._order[pattern] = len(self._patterns)
+                    self._patterns.append(pattern)
+                    self._pattern_set.add(pattern)
+                    self._regex = None
+
+    def _compile(self):
+        """Construye la expresión combinada y la tabla de patrones contenidos"""
+        with self._lock:
+            if self._regex is not None:
+                return self._regex
+            patterns = list(self._patterns)
+            if not patterns:
+                regex = False
+                contained = {}
+            else:
+                by_length = sorted(patterns, key=len, reverse=True)
+                alternation = (b'|' if isinstance(patterns[0], bytes) else '|').join(re.escape(p) for p in by_length)
+                if isinstance(patterns[0], bytes):
+                    regex = re.compile(b'(?=(' + alternation + b'))')
+                else:
+                    regex = re.compile('(?=(' + alternation + '))')
+                # Patrones que aparecen dentro de cada patrón (incluido él mismo)
+                contained = {
+                    pattern: frozenset(other for other in patterns if other in pattern)
+                    for pattern in patterns
+                }
+            self._contained = contained
+            self._regex = regex
+            return regex
+
+    def find_all(self, *texts):
+        """Conjunto de patrones presentes en cualquiera de los textos (una pasada por texto)"""
+        regex = self._regex if self._regex is not None else self._compile()
+        if not regex:
+            return set()
+        contained = self._contained
+        found = set()
+        for text in texts:
+            if not text:
+                continue
+            seen = set()
+            for match in regex.finditer(text):
+                longest = match.group(1)
+                if longest not in seen:
+                    seen.add(longest)
+                    found.update(contained[longest])
+        return found
+
+    def find_ordered(self, *texts):
+        """Patrones presentes en el orden de la lista original"""
+        order = self._order
+        return sorted(self.find_all(*texts), key=order.__getitem__)
+
+    def first_match(self, *texts):
+        """Primer patrón de la lista (en su orden original) presente en los textos, o None"""
+        found = self.find_all(*texts)
+        if not found:
+            return None
+        return min(found, key=self._order.__getitem__)
+
+    def contains_any(self, *texts):
+        """True si algún patrón aparece en alguno de los textos"""
+        regex = self._regex if self._regex is not None else self._compile()
+        if not regex:
+            return False
+        return any(text and regex.search(text) for text in texts)
@@ -0,0 +1,234 @@
+"""
+Modelo Aprendido Compartido (cliente)
+AIAnalyzer (patrones y hashes) y la app (hashes de hacks conocidos) leen el modelo de la API
+de UNA sola descarga por proceso en lugar de pedir cada uno /api/ai-model/latest completo:
+- Los patrones de la última versión recibida se guardan en models/ai_model_feed.json junto
+  con su feed_version y su ETag; los hashes van al índice mapeado en memoria (hash_index,
+  flag KNOWN_HACK), que se actualiza con cada delta sin cargarse como set
+- Los hashes confirmados como legítimos (clean_hashes) van al mismo índice con el flag
+  KNOWN_GOOD: el analizador de texturas no vuelve a decodificar contenido ya revisado
+- Al arrancar se pide ?since=<feed_version>&format=compact con If-None-Match: la API
+  responde 304 (sin cambios) o solo los patrones y hashes añadidos/eliminados
+- Sin conexión se usa lo guardado (o el ai_model_latest.json antiguo)
+"""
+import json
+import os
+import threading
+
+from hash_index import KNOWN_GOOD, KNOWN_HACK, get_hash_index
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+MODELS_DIR = 'models'
+FEED_FILE = os.path.join(MODELS_DIR, 'ai_model_feed.json')
+LEGACY_FILE = os.path.join(MODELS_DIR, 'ai_model_latest.json')
+PATTERN_CATEGORIES = ('high_risk', 'medium_risk', 'low_risk')
+REQUEST_TIMEOUT = 10
+
+
+def _values(items, key, is_hack=True):
+    """Valores de una lista compacta (['x', ...]) o completa ([{key: 'x', ...}, ...])"""
+    values = []
+    for item in items or []:
+        value = item.get(key) if isinstance(item, dict) else item
+        if value and (not isinstance(item, dict) or bool(item.get('is_hack', True)) == is_hack):
+            values.append(value)
+    return values
+
+
+class LearnedModel:
+    """Patrones por categoría y hashes de hacks del modelo aprendido"""
+
+    def __init__(self, api_url=None):
+        self.api_url = api_url.rstrip('/') if api_url else None
+        self.version = None          # Versión publicada (/api/update-model)
+        self.feed_version = None     # Versión del registro de cambios (para ?since=)
+        self.etag = None
+        self.patterns = {category: [] for category in PATTERN_CATEGORIES}
+        self.index = get_hash_index()
+        self.source = None           # 'api', 'api_delta', 'api_304', 'cache' o None
+        self._fetched = False
+        self._lock = threading.Lock()
+
+    # ---------------- estado ----------------
+
+    def _apply_full(self, data, feed_version):
+        self.patterns = {
+            category: sorted(set(_values((data.get('patterns') or {}).get(category), 'value')))
+            for category in PATTERN_CATEGORIES
+        }
+        # KNOWN_GOOD primero: la feed_version se guarda con la última escritura
+        self.index.replace(KNOWN_GOOD, _values(data.get('clean_hashes'), 'hash', is_hack=False))
+        self.index.replace(KNOWN_HACK, _values(data.get('hashes'), 'hash'), meta={'feed_version': feed_version})
+
+    def _apply_delta(self, data, feed_version):
+        added = data.get('added') or {}
+        removed = data.get('removed') or {}
+        added_patterns = {category: set(_values((added.get('patterns') or {}).get(category), 'value'))
+                          for category in PATTERN_CATEGORIES}
+        # Un patrón añadido reemplaza sus categorías anteriores
+        changed = set(removed.get('patterns') or []).union(*added_patterns.values())
+        for category in PATTERN_CATEGORIES:
+            current = {value for value in self.patterns[category] if value not in changed}
+            self.patterns[category] = sorted(current | added_patterns[category])
+        self.index.apply(KNOWN_GOOD, added=_values(added.get('clean_hashes'), 'hash', is_hack=False),
+                         removed=removed.get('clean_hashes') or [])
+        self.index.apply(KNOWN_HACK, added=_values(added.get('hashes'), 'hash'),
+                         removed=removed.get('hashes') or [], meta={'feed_version': feed_version})
+
+    def _merge_legacy(self, data):
+        """Respuesta de una API sin feed versionado: se suma a lo que ya había"""
+        for category in PATTERN_CATEGORIES:
+            values = set(self.patterns[category])
+            values.update(_values((data.get('patterns') or {}).get(category), 'value'))
+            self.patterns[category] = sorted(values)
+        self.index.apply(KNOWN_HACK, added=_values(data.get('hashes'), 'hash'), meta={'feed_version': None})
+
+    def load_cached(self):
+        """
+        Carga los patrones guardados; los hashes ya están en el índice. Si el índice no
+        corresponde a la misma feed_version se pedirá el modelo completo
+        """
+        try:
+            if os.path.exists(FEED_FILE):
+                with open(FEED_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.patterns = {category: list((data.get('patterns') or {}).get(category) or [])
+                                 for category in PATTERN_CATEGORIES}
+                self.version = data.get('version')
+                if data.get('hashes'):
+                    # Archivo anterior al índice: sus hashes pasan al índice una vez
+                    self.index.replace(KNOWN_HACK, data['hashes'], meta={'feed_version': data.get('feed_version')})
+                if self.index.meta.get('feed_version') == data.get('feed_version'):
+                    self.feed_version = data.get('feed_version')
+                    self.etag = data.get('etag')
+                return True
+            if os.path.exists(LEGACY_FILE):
+                with open(LEGACY_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._apply_full(data, None)
+                self.version = data.get('version')
+                return True
+        except Exception as e:
+            print(f"⚠️ Error cargando modelo local: {e}")
+        return False
+
+    def save(self):
+        """Guarda los patrones y la versión (los hashes ya están en el índice)"""
+        try:
+            os.makedirs(MODELS_DIR, exist_ok=True)
+            temp_file = FEED_FILE + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.version,
+                    'feed_version': self.feed_version,
+                    'etag': self.etag,
+                    'patterns': self.patterns,
+                }, f)
+            os.replace(temp_file, FEED_FILE)
+        except Exception as e:
+            print(f"⚠️ Error guardando modelo local: {e}")
+
+    # ---------------- descarga ----------------
+
+    def refresh(self, force=True):
+        """
+        Actualiza el modelo desde la API (delta o 304 si ya se tenía una versión).
+        Con force=False no hace nada si este proceso ya lo descargó; los hilos que llegan
+        mientras otro descarga esperan a su resultado
+
+        Returns:
+            True si el modelo quedó actualizado desde la API
+        """
+        with self._lock:
+            if self._fetched and not force:
+                return self.source not in (None, 'cache')
+            self._fetched = True
+            if self.source is None:
+                self.source = 'cache' if self.load_cached() else None
+            if not self.api_url or requests is None:
+                if self.source == 'cache':
+                    print("✅ Modelo de IA cargado desde archivo local (modo offline)")
+                return False
+
+            params = {'format': 'compact'}
+            headers = {}
+            if self.feed_version is not None:
+                params['since'] = self.feed_version
+                if self.etag:
+                    headers['If-None-Match'] = self.etag
+            try:
+                response = requests.get(f"{self.api_url}/api/ai-model/latest", params=params,
+                                        headers=headers, timeout=REQUEST_TIMEOUT)
+            except Exception as e:
+                print(f"⚠️ Error descargando modelo desde API (se usa el guardado si existe): {e}")
+                return False
+
+            if response.status_code == 304:
+                self.source = 'api_304'
+                print(f"✅ Modelo de IA sin cambios desde la última descarga (versión {self.feed_version})")
+                return True
+            if response.status_code != 200:
+                print(f"⚠️ La API respondió {response.status_code} al pedir el modelo")
+                return False
+
+            try:
+                data = response.json()
+            except ValueError as e:
+                print(f"⚠️ Respuesta del modelo no válida: {e}")
+                return False
+
+            if 'feed_version' not in data:
+                self._merge_legacy(data)
+                self.feed_version = self.etag = None
+                self.source = 'api'
+            else:
+                if data.get('delta'):
+                    self._apply_delta(data, data.get('feed_version'))
+                    self.source = 'api_delta'
+                else:
+                    self._apply_full(data, data.get('feed_version'))
+                    self.source = 'api'
+                self.feed_version = data.get('feed_version')
+                self.etag = response.headers.get('ETag')
+            self.version = data.get('version', self.version)
+            self.save()
+            print(f"✅ Modelo de IA actualizado desde API ({'delta' if self.source == 'api_delta' else 'completo'}): "
+                  f"{self.patterns_count} patrones, {self.hashes_count} hashes")
+            return True
+
+    # ---------------- consulta ----------------
+
+    def has_hash(self, file_hash):
+        """True si file_hash es un hash de hack del modelo"""
+        return self.index.contains(file_hash, KNOWN_HACK)
+
+    @property
+    def hashes_count(self):
+        return self.index.count(KNOWN_HACK)
+
+    @property
+    def patterns_count(self):
+        return sum(len(values) for values in self.patterns.values())
+
+
+# Una instancia por URL de API, compartida por todos los consumidores del proceso
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_learned_model(api_url=None, refresh=False):
+    """
+    Modelo compartido: la primera llamada (o refresh=True) descarga de la API,
+    el resto reutiliza el resultado
+    """
+    key = api_url.rstrip('/') if api_url else None
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = LearnedModel(api_url)
+    model.refresh(force=refresh)
+    return model
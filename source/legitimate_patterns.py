@@ -9,6 +9,8 @@ import hashlib
 from typing import Dict, List, Set, Tuple
 from pathlib import Path
 
+from hash_index import LOCAL_LEGITIMATE, get_hash_index
+
 class LegitimatePatterns:
     """Sistema que aprende patrones de archivos legítimos para reducir falsos positivos"""
     
@@ -20,7 +22,7 @@ class LegitimatePatterns:
             'file_extensions': set(),
             'folder_names': set(),
             'process_names': set(),
-            'file_hashes': set(),
+            'file_hashes': get_hash_index().view(LOCAL_LEGITIMATE),  # Índice compartido de hashes
             'context_patterns': {}  # Patrones contextuales: {pattern: {count, confidence}}
         }
         
@@ -41,7 +43,7 @@ class LegitimatePatterns:
                 SELECT file_hash FROM learned_hashes 
                 WHERE is_hack = 0 AND is_active = 1
             ''')
-            self.legitimate_patterns['file_hashes'] = {row[0] for row in cursor.fetchall()}
+            legitimate_hashes = [row[0] for row in cursor.fetchall() if row[0]]
             
             # Cargar patrones legítimos de feedback
             cursor.execute('''
@@ -68,7 +70,10 @@ class LegitimatePatterns:
                             self.legitimate_patterns['folder_names'].add(part)
                 
                 if file_hash:
-                    self.legitimate_patterns['file_hashes'].add(file_hash)
+                    legitimate_hashes.append(file_hash)
+            
+            # Hashes legítimos al índice compartido (no se reescribe si no cambiaron)
+            get_hash_index().replace(LOCAL_LEGITIMATE, legitimate_hashes)
             
             # Cargar extensiones legítimas comunes
             cursor.execute('''
@@ -207,7 +212,7 @@ class LegitimatePatterns:
                 
                 # Agregar hash si existe
                 if file_hash:
-                    self.legitimate_patterns['file_hashes'].add(file_hash)
+                    get_hash_index().apply(LOCAL_LEGITIMATE, added=[file_hash])
                 
                 # Guardar en base de datos
                 if file_hash:
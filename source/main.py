@@ -34,6 +34,69 @@ try:
 except ImportError:
     requests = None
 
+from file_fingerprint import compute_fingerprint
+from findings_store import FindingsStore, bind_store, bound_store
+from hash_index import HACK_FLAGS, LOCAL_HACK, get_hash_index
+from jar_inspector import get_jar_inspector
+from keyword_matcher import KeywordMatcher
+from archive_fingerprint import get_known_archives
+from learned_model import get_learned_model
+from phase_scheduler import PhaseScheduler
+from process_snapshot import get_process_snapshot
+from scan_planner import ScanPlanner
+from whitelist_index import WhitelistIndex
+
+# PATRONES DE HACKS REALES (alta confianza)
+HIGH_CONFIDENCE_HACK_PATTERNS = [
+    # Clientes de hack conocidos
+    'vape', 'entropy', 'whiteout', 'liquidbounce', 'wurst', 'impact',
+    'sigma', 'flux', 'future', 'astolfo', 'exhibition', 'novoline',
+    'rise', 'moon', 'drip', 'phobos', 'tenacity', 'meteor', 'lambda',
+    'rusherhack', 'konas', 'kami blue', 'kami', 'weepcraft',
+    
+    # Módulos de hack específicos
+    'killaura', 'aimbot', 'triggerbot', 'reach', 'velocity', 'antiknockback',
+    'scaffold', 'fly', 'xray', 'fullbright', 'nofall', 'speed', 'step',
+    'autoclicker', 'bhop', 'bunnyhop', 'esp', 'tracers', 'nametags',
+    'traceline', 'boxesp', 'chams', 'wallhack', 'nuker', 'autotool',
+    'autosprint', 'sprint', 'sneak', 'sneaking', 'freecam', 'camera',
+    'baritone', 'pathfinder', 'auto', 'automation', 'macro',
+    
+    # Técnicas de evasión
+    'bypass', 'inject', 'ghost', 'stealth', 'undetected', 'incognito',
+    'spoof', 'spoofing', 'hook', 'hooking', 'patch', 'patching',
+    'obfuscate', 'obfuscation', 'pack', 'packed', 'encrypt', 'encrypted',
+    
+    # Carpetas sospechosas
+    'cheat', 'hack', 'client', 'mods\\vape', 'mods\\entropy',
+    'mods\\sigma', 'mods\\flux', 'mods\\future', 'mods\\astolfo',
+    'versions\\vape', 'versions\\entropy', 'versions\\sigma',
+]
+HIGH_CONFIDENCE_HACK_MATCHER = KeywordMatcher(HIGH_CONFIDENCE_HACK_PATTERNS)
+
+# Patrones de hacks en contenido
+HACK_CONTENT_PATTERNS = [
+    b'vape', b'entropy', b'whiteout', b'liquidbounce', b'wurst',
+    b'killaura', b'aimbot', b'triggerbot', b'reach', b'velocity',
+    b'scaffold', b'fly', b'xray', b'fullbright', b'bypass',
+    b'inject', b'ghost', b'stealth', b'undetected', b'incognito',
+    b'flux', b'sigma', b'future', b'astolfo', b'exhibition',
+    b'novoline', b'rise', b'moon', b'drip', b'phobos'
+]
+# Búsqueda en una sola pasada sobre el buffer (antes: una pasada por patrón)
+HACK_CONTENT_MATCHER = KeywordMatcher(HACK_CONTENT_PATTERNS)
+# Los mismos patrones sobre nombres de clases/recursos y MANIFEST de los JARs (texto sin comprimir)
+JAR_NAME_MATCHER = KeywordMatcher([p.decode('utf-8') for p in HACK_CONTENT_PATTERNS])
+
+# Patrones críticos confirmados (is_critical_finding)
+CRITICAL_KEYWORDS = [
+    'vape', 'entropy', 'ghost', 'inject', 'bypass', 'killaura', 'aimbot',
+    'triggerbot', 'reach', 'velocity', 'antiknockback', 'scaffold', 'fly',
+    'xray', 'fullbright', 'cheat', 'hack', 'wurst', 'liquid', 'sigma',
+    'astolfo', 'exhibition', 'flux', 'novoline', 'rise', 'moon', 'drip'
+]
+CRITICAL_KEYWORD_MATCHER = KeywordMatcher(CRITICAL_KEYWORDS)
+
 # Importar el sistema de estilos moderno
 try:
     from ui_style import ModernUI
@@ -487,7 +550,7 @@ class MinecraftSSApp:
         
         # Variables
         self.scanning = False
-        self.issues_found = []
+        self.issues_found = FindingsStore()
         self.detected_minecraft_username = None  # Username detectado desde conexiones activas
         
         # Variables de monitoreo temporal
@@ -501,6 +564,7 @@ class MinecraftSSApp:
         
         # Rutas y procesos legítimos a excluir (whitelist)
         self.whitelist_paths = self.load_whitelist()
+        self.whitelist_index = WhitelistIndex(self.whitelist_paths)
         
         # Integración con Base de Datos y API (DEBE inicializarse ANTES de legitimate_patterns)
         self.db_integration = None
@@ -595,7 +659,11 @@ class MinecraftSSApp:
         # Inicializar nuevos sistemas de detección avanzada
         try:
             from file_cache import FileCache
-            self.file_cache = FileCache(database_path='scanner_db.sqlite')
+            # cache_paranoid_sample_rate: fracción de aciertos por metadatos que se re-verifican por hash
+            self.file_cache = FileCache(
+                database_path='scanner_db.sqlite',
+                paranoid_sample_rate=float(self.config.get('cache_paranoid_sample_rate', 0.0) or 0.0)
+            )
             print("✅ Sistema de caché inteligente inicializado")
         except ImportError:
             print("⚠️ Módulo file_cache no disponible")
@@ -648,15 +716,26 @@ class MinecraftSSApp:
             print(f"⚠️ Error inicializando detector de inyección: {e}")
             self.java_injection_detector = None
     
+    @property
+    def issues_found(self):
+        """
+        Hallazgos del escaneo. Los hilos de una fase (PhaseScheduler) ven siempre el almacén
+        de su escaneo: si la fase supera su timeout no escribe en la lista ya filtrada
+        """
+        store = bound_store()
+        return store if store is not None else self._issues_found
+    
+    @issues_found.setter
+    def issues_found(self, value):
+        self._issues_found = value
+    
     def load_known_hack_hashes(self):
         """Carga base de datos de hashes SHA256 de hacks conocidos - SISTEMA DE APRENDIZAJE CON ACTUALIZACIÓN DINÁMICA"""
         import sqlite3
         import os
-        import json
-        import requests
         
-        # Hashes conocidos iniciales (ejemplos)
-        known_hashes = []
+        # Índice compartido (mapeado en memoria) con los hashes de la BD local y del modelo
+        index = get_hash_index()
         
         # Cargar hashes aprendidos de la base de datos local
         db_path = 'scanner_db.sqlite'
@@ -671,7 +750,7 @@ class MinecraftSSApp:
                 ''')
                 
                 learned_hashes = [row[0] for row in cursor.fetchall() if row[0]]
-                known_hashes.extend(learned_hashes)
+                index.replace(LOCAL_HACK, learned_hashes)
                 
                 conn.close()
                 
@@ -680,53 +759,26 @@ class MinecraftSSApp:
             except Exception as e:
                 print(f"⚠️ Error cargando hashes aprendidos: {e}")
         
-        # Intentar cargar hashes desde API (actualización dinámica)
+        # Hashes del modelo de la API (descarga compartida con el analizador de IA:
+        # delta desde la versión guardada, o lo guardado si no hay conexión)
         api_url = self.config.get('api_url', '')
         if api_url:
             try:
-                response = requests.get(
-                    f"{api_url}/api/ai-model/latest",
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    api_hashes = data.get('hashes', [])
-                    
-                    for hash_data in api_hashes:
-                        if hash_data.get('is_hack') and hash_data.get('hash'):
-                            hash_value = hash_data.get('hash')
-                            if hash_value not in known_hashes:
-                                known_hashes.append(hash_value)
-                    
-                    print(f"✅ {len(api_hashes)} hashes adicionales cargados desde API")
-                    
-                    # Guardar en archivo local para uso offline
-                    models_dir = 'models'
-                    os.makedirs(models_dir, exist_ok=True)
-                    model_file = os.path.join(models_dir, 'ai_model_latest.json')
-                    with open(model_file, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2)
-                    
+                model = get_learned_model(api_url)
+                print(f"✅ {model.hashes_count} hashes adicionales cargados desde el modelo de la API")
             except Exception as e:
                 print(f"⚠️ Error cargando hashes desde API: {e}")
-                # Intentar cargar desde archivo local como fallback
-                try:
-                    model_file = os.path.join('models', 'ai_model_latest.json')
-                    if os.path.exists(model_file):
-                        with open(model_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                        api_hashes = data.get('hashes', [])
-                        for hash_data in api_hashes:
-                            if hash_data.get('is_hack') and hash_data.get('hash'):
-                                hash_value = hash_data.get('hash')
-                                if hash_value not in known_hashes:
-                                    known_hashes.append(hash_value)
-                        print(f"✅ Hashes cargados desde archivo local (modo offline)")
-                except:
-                    pass
         
-        self.known_hack_hashes = set(known_hashes)
+        # Releases conocidas de mods y resource packs: no necesitan análisis por entradas
+        try:
+            self.known_archives = get_known_archives(api_url or None)
+            if self.known_archives.count:
+                print(f"✅ {self.known_archives.count} releases conocidas de mods/resource packs")
+        except Exception as e:
+            print(f"⚠️ Error cargando índice de releases conocidas: {e}")
+            self.known_archives = None
+        
+        self.known_hack_hashes = index.view(HACK_FLAGS)
     
     def load_whitelist(self):
         """Carga lista blanca EXPANDIDA al 200% - Rutas legítimas para evitar falsos positivos"""
@@ -825,49 +877,12 @@ class MinecraftSSApp:
         }
     
     def is_whitelisted(self, path):
-        """Verifica si una ruta está en la lista blanca - MEJORADO 200%"""
-        if not path:
-            return False
+        """Verifica si una ruta está en la lista blanca - MEJORADO 200%
         
-        path_lower = path.lower()
-        filename = os.path.basename(path_lower)
-        
-        # ========== EXCLUSIONES CRÍTICAS (prioridad máxima) ==========
-        # Excluir la carpeta de la aplicación SS y el ejecutable propio
-        if any(excl in path_lower for excl in [
-            'aplicación de ss', 'minecraft ss tool', 'minecraftsstool.exe',
-            'source\\dist', 'source\\build', 'aspers projects'
-        ]):
-            return True
-        
-        # Excluir el ejecutable propio por nombre exacto
-        if filename in ['minecraftsstool.exe', 'ss_tool.exe', 'aspers_scanner.exe']:
-            return True
-        
-        # ========== VERIFICACIÓN DE WHITELIST EXPANDIDA ==========
-        # Verificar whitelist con coincidencias exactas y parciales mejoradas
-        for item in self.whitelist_paths:
-            # Coincidencia exacta en nombre de archivo
-            if filename == item or filename.startswith(item) or filename.endswith(item):
-                return True
-            
-            # Coincidencia en ruta completa
-            if item in path_lower:
-                # Verificación adicional: no debe ser un hack disfrazado
-                # Si el path contiene palabras de hack conocidas, no whitelistear
-                hack_keywords = ['vape', 'entropy', 'ghost', 'inject', 'bypass', 'cheat', 'hack']
-                if not any(hack in path_lower for hack in hack_keywords):
-                    return True
-        
-        # ========== EXCLUSIONES POR EXTENSIÓN LEGÍTIMA ==========
-        # Archivos de sistema y configuración legítimos
-        legit_extensions = ['.sys', '.dll', '.drv', '.cpl', '.ocx', '.msc', '.mui']
-        if any(path_lower.endswith(ext) for ext in legit_extensions):
-            # Pero verificar que no esté en ubicación sospechosa
-            if 'temp' not in path_lower and 'downloads' not in path_lower:
-                return True
-        
-        return False
+        Usa el índice compilado (whitelist_index.py): nombres exactos en hash, subcadenas
+        en una sola pasada y resultado de la carpeta reutilizado entre sus archivos.
+        """
+        return self.whitelist_index.is_whitelisted(path)
     
     def is_critical_finding(self, item):
         """Determina si un hallazgo es REALMENTE crítico"""
@@ -875,20 +890,11 @@ class MinecraftSSApp:
         path = item.get('path', '').lower()
         tipo = item.get('type', '')
         
-        # Patrones críticos confirmados
-        critical_keywords = [
-            'vape', 'entropy', 'ghost', 'inject', 'bypass', 'killaura', 'aimbot',
-            'triggerbot', 'reach', 'velocity', 'antiknockback', 'scaffold', 'fly',
-            'xray', 'fullbright', 'cheat', 'hack', 'wurst', 'liquid', 'sigma',
-            'astolfo', 'exhibition', 'flux', 'novoline', 'rise', 'moon', 'drip'
-        ]
-        
-        # Si contiene palabra crítica
-        for keyword in critical_keywords:
-            if keyword in name or keyword in path:
-                # Verificar que no sea falso positivo
-                if not self.is_whitelisted(path):
-                    return True
+        # Si contiene palabra crítica (CRITICAL_KEYWORDS)
+        if CRITICAL_KEYWORD_MATCHER.contains_any(name, path):
+            # Verificar que no sea falso positivo (una sola vez, no depende de la palabra)
+            if not self.is_whitelisted(path):
+                return True
         
         return False
     
@@ -967,7 +973,7 @@ class MinecraftSSApp:
                 print(f"⚠️ Error detectando inyecciones: {e}")
         
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe', 'cmdline']):
                 try:
                     proc_info = proc.info
                     name = proc_info['name'].lower()
@@ -1044,6 +1050,7 @@ class MinecraftSSApp:
                         'alerta': issue.get('alert', 'SOSPECHOSO'),
                         'confidence': issue.get('confidence', 0.6),
                         'detected_patterns': ['xray_texture'],
+                        'file_hash': issue.get('file_hash', ''),
                         'transparency_ratio': issue.get('transparency_ratio', 0)
                     })
                 print(f"✅ Detectadas {len(xray_issues)} texturas X-ray")
@@ -1152,95 +1159,75 @@ class MinecraftSSApp:
                     "C:\\Windows\\Temp"
                 ]
                 
-                # Escanear ubicaciones prioritarias primero
-                for location in priority_locations:
-                    if os.path.exists(location):
-                        try:
-                            for root, dirs, files in os.walk(location):
-                                # Limitar profundidad
-                                if root.count(os.sep) - location.count(os.sep) > 10:
-                                    dirs[:] = []
-                                    continue
-                                
-                            for file in files:
-                                if file.lower().endswith('.jar'):
-                                        full_path = os.path.join(root, file)
-                                        
-                                        # Verificar whitelist primero
-                                        if self.is_whitelisted(full_path):
-                                            continue
-                                        
-                                        # Análisis avanzado de contenido
-                                        content_analysis = self.analyze_file_content(full_path)
-                                        
-                                        # Si el análisis de contenido indica hack con alta confianza
-                                        if content_analysis['is_hack'] and content_analysis['confidence'] >= 60:
-                                            issues.append({
-                                                'tipo': 'JAR_FILE',
-                                                'nombre': file,
-                                                'ruta': full_path,
-                                                'archivo': file,
-                                                'hash': content_analysis.get('file_hash', 'N/A'),
-                                                'alerta': 'CRITICAL' if content_analysis['confidence'] >= 80 else 'SOSPECHOSO',
-                                                'categoria': 'JAR_FILES',
-                                                'confidence': content_analysis['confidence'],
-                                                'detected_patterns': content_analysis.get('detected_patterns', []),
-                                                'obfuscation': content_analysis.get('obfuscation_detected', False)
-                                            })
-                                        # Si el nombre es sospechoso
-                                        elif self.is_suspicious_file(full_path):
-                                            issues.append({
-                                                'tipo': 'JAR_FILE',
-                                                'nombre': file,
-                                                'ruta': full_path,
-                                                'archivo': file,
-                                                'hash': content_analysis.get('file_hash', 'N/A'),
-                                            'alerta': 'SOSPECHOSO',
-                                                'categoria': 'JAR_FILES',
-                                                'confidence': content_analysis.get('confidence', 0)
-                                            })
-                        except (PermissionError, OSError):
-                            continue
-                        except Exception as e:
-                            print(f"Error escaneando {location}: {e}")
-                            continue
+                def check_priority_jar(file, root, full_path):
+                    # Verificar whitelist primero
+                    if self.is_whitelisted(full_path):
+                        return
+                    
+                    # Análisis avanzado de contenido
+                    content_analysis = self.analyze_file_content(full_path)
+                    
+                    # Si el análisis de contenido indica hack con alta confianza
+                    if content_analysis['is_hack'] and content_analysis['confidence'] >= 60:
+                        issues.append({
+                            'tipo': 'JAR_FILE',
+                            'nombre': file,
+                            'ruta': full_path,
+                            'archivo': file,
+                            'hash': content_analysis.get('file_hash', 'N/A'),
+                            'alerta': 'CRITICAL' if content_analysis['confidence'] >= 80 else 'SOSPECHOSO',
+                            'categoria': 'JAR_FILES',
+                            'confidence': content_analysis['confidence'],
+                            'detected_patterns': content_analysis.get('detected_patterns', []),
+                            'obfuscation': content_analysis.get('obfuscation_detected', False)
+                        })
+                    # Si el nombre es sospechoso
+                    elif self.is_suspicious_file(full_path):
+                        issues.append({
+                            'tipo': 'JAR_FILE',
+                            'nombre': file,
+                            'ruta': full_path,
+                            'archivo': file,
+                            'hash': content_analysis.get('file_hash', 'N/A'),
+                            'alerta': 'SOSPECHOSO',
+                            'categoria': 'JAR_FILES',
+                            'confidence': content_analysis.get('confidence', 0)
+                        })
                 
-                # Escanear otras unidades si hay tiempo
+                def check_drive_jar(file, root, full_path):
+                    if not self.is_whitelisted(full_path):
+                        content_analysis = self.analyze_file_content(full_path)
+                        if content_analysis['is_hack'] and content_analysis['confidence'] >= 70:
+                            issues.append({
+                                'tipo': 'JAR_FILE',
+                                'nombre': file,
+                                'ruta': full_path,
+                                'archivo': file,
+                                'hash': content_analysis.get('file_hash', 'N/A'),
+                                'alerta': 'CRITICAL',
+                                'categoria': 'JAR_FILES',
+                                'confidence': content_analysis['confidence']
+                            })
+                
+                planner = ScanPlanner()
+                # Limitar profundidad
+                planner.add('jars_priority', priority_locations, max_depth=10,
+                            extensions=('.jar',), file_handler=check_priority_jar)
+                
+                # Otras unidades: solo carpetas específicas (C ya se cubre con las ubicaciones prioritarias)
                 drives = ['C:\\', 'D:\\', 'E:\\', 'F:\\']
                 for drive in drives:
-                    if os.path.exists(drive) and drive not in ['C:\\']:  # Ya escaneamos C en ubicaciones prioritarias
-                        try:
-                            # Solo escanear carpetas específicas en otras unidades
-                            specific_folders = [
-                                os.path.join(drive, "Users"),
-                                os.path.join(drive, "Temp"),
-                                os.path.join(drive, "Downloads")
-                            ]
-                            for folder in specific_folders:
-                                if os.path.exists(folder):
-                                    for root, dirs, files in os.walk(folder):
-                                        if root.count(os.sep) - folder.count(os.sep) > 5:
-                                            dirs[:] = []
-                                            continue
-                                        
-                                        for file in files:
-                                            if file.lower().endswith('.jar'):
-                                                full_path = os.path.join(root, file)
-                                                if not self.is_whitelisted(full_path):
-                                                    content_analysis = self.analyze_file_content(full_path)
-                                                    if content_analysis['is_hack'] and content_analysis['confidence'] >= 70:
-                                                        issues.append({
-                                                            'tipo': 'JAR_FILE',
-                                                            'nombre': file,
-                                                            'ruta': full_path,
-                                                            'archivo': file,
-                                                            'hash': content_analysis.get('file_hash', 'N/A'),
-                                                            'alerta': 'CRITICAL',
-                                                            'categoria': 'JAR_FILES',
-                                                            'confidence': content_analysis['confidence']
-                                                        })
-                        except:
-                            continue
+                    if os.path.exists(drive) and drive not in ['C:\\']:
+                        specific_folders = [
+                            os.path.join(drive, "Users"),
+                            os.path.join(drive, "Temp"),
+                            os.path.join(drive, "Downloads")
+                        ]
+                        planner.add(f'jars_{drive}', specific_folders, max_depth=5,
+                                    extensions=('.jar',), file_handler=check_drive_jar)
+                
+                workers = os.cpu_count() or 4
+                planner.run(walker_threads=workers, analysis_threads=workers)
                                         
             except Exception as e:
                 print(f"Error escaneando JARs: {e}")
@@ -1695,7 +1682,7 @@ class MinecraftSSApp:
                         if any(suspicious_ip in str(conn.raddr) for suspicious_ip in ['127.0.0.1', 'localhost']):
                             # Verificar si es un proceso relacionado con Minecraft
                             try:
-                                process = psutil.Process(conn.pid)
+                                process = get_process_snapshot().process(conn.pid)
                                 process_name = process.name().lower()
                                 if 'minecraft' in process_name or 'java' in process_name:
                                     issues.append({
@@ -1760,7 +1747,7 @@ class MinecraftSSApp:
         
         def scan():
             try:
-                for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline', 'status']):
+                for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe', 'cmdline', 'status']):
                     try:
                         proc_info = proc.info
                         name = proc_info['name'].lower()
@@ -1803,7 +1790,7 @@ class MinecraftSSApp:
                 ]
                 
                 # Escanear procesos
-                for proc in psutil.process_iter(['pid', 'name', 'exe']):
+                for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe']):
                     try:
                         proc_info = proc.info
                         name = proc_info['name'].lower()
@@ -1849,9 +1836,12 @@ class MinecraftSSApp:
     def quick_scan(self):
         """Escaneo rápido de elementos críticos"""
         def scan_thread():
+            snapshot = get_process_snapshot()
             try:
                 self.scanning = True
-                self.issues_found = []
+                self.issues_found = FindingsStore()
+                # Procesos enumerados al empezar este escaneo (nunca los de uno anterior)
+                snapshot.begin_scan()
                 
                 print("⚡ INICIANDO ESCANEO RÁPIDO...")
                 
@@ -1887,6 +1877,7 @@ class MinecraftSSApp:
                 print(f"Error en escaneo rápido: {e}")
                 self._update_progress_safe(100, f"❌ Error: {str(e)}", "Error durante el escaneo")
             finally:
+                snapshot.end_scan()
                 self.scanning = False
         
         threading.Thread(target=scan_thread, daemon=True).start()
@@ -1894,9 +1885,11 @@ class MinecraftSSApp:
     def scan_processes_ui(self):
         """Escaneo de procesos desde la UI"""
         def scan_thread():
+            snapshot = get_process_snapshot()
             try:
                 self.scanning = True
-                self.issues_found = []
+                self.issues_found = FindingsStore()
+                snapshot.begin_scan()
                 
                 print("🔍 INICIANDO ESCANEO DE PROCESOS...")
                 
@@ -1912,6 +1905,7 @@ class MinecraftSSApp:
                 print(f"Error en escaneo de procesos: {e}")
                 self._update_progress_safe(100, f"❌ Error: {str(e)}", "Error durante el escaneo")
             finally:
+                snapshot.end_scan()
                 self.scanning = False
         
         threading.Thread(target=scan_thread, daemon=True).start()
@@ -1921,7 +1915,7 @@ class MinecraftSSApp:
         def scan_thread():
             try:
                 self.scanning = True
-                self.issues_found = []
+                self.issues_found = FindingsStore()
                 
                 print("📁 INICIANDO ESCANEO DE ARCHIVOS...")
                 
@@ -2063,6 +2057,11 @@ class MinecraftSSApp:
             'sklearn', 'tensorflow', 'pytorch', 'keras', 'theano', 'caffe'
         ]
         
+        # Compilar cada lista una vez para todo el lote de resultados
+        real_hack_matcher = KeywordMatcher(real_hack_patterns)
+        exclude_matcher = KeywordMatcher(exclude_patterns)
+        extra_false_positive_matcher = KeywordMatcher(['zomboid', 'shaders', 'textures', 'media', 'vscode', 'pylance', 'skimage', 'pyi', 'system32', 'program files', 'windows', 'microsoft', 'adobe'])
+        
         # ============================================================
         # FILTRADO MEJORADO
         # ============================================================
@@ -2094,18 +2093,12 @@ class MinecraftSSApp:
                     pass
             
             # Verificar patrones de exclusión tradicionales
-            if not is_false_positive:
-                for pattern in exclude_patterns:
-                    if pattern in ruta or pattern in archivo or pattern in nombre:
-                        is_false_positive = True
-                        break
+            if not is_false_positive and exclude_matcher.contains_any(ruta, archivo, nombre):
+                is_false_positive = True
             
             # Verificar falsos positivos específicos adicionales (menos estricto)
-            if not is_false_positive:
-                for false_positive in ['zomboid', 'shaders', 'textures', 'media', 'vscode', 'pylance', 'skimage', 'pyi', 'system32', 'program files', 'windows', 'microsoft', 'adobe']:
-                    if false_positive in ruta or false_positive in archivo or false_positive in nombre:
-                        is_false_positive = True
-                        break
+            if not is_false_positive and extra_false_positive_matcher.contains_any(ruta, archivo, nombre):
+                is_false_positive = True
             
             if is_false_positive:
                 continue
@@ -2128,11 +2121,7 @@ class MinecraftSSApp:
                     pass
             
             # 3. ACEPTAR SI CONTIENE PATRONES DE HACKS
-            is_potential_hack = False
-            for pattern in real_hack_patterns:
-                if pattern in archivo or pattern in nombre:
-                    is_potential_hack = True
-                    break
+            is_potential_hack = real_hack_matcher.contains_any(archivo, nombre)
             
             # 4. TAMBIÉN ACEPTAR SI ESTÁ EN CARPETAS SOSPECHOSAS
             suspicious_paths = [
@@ -2845,6 +2834,120 @@ class MinecraftSSApp:
         # Ejecutar todo en un hilo separado
         threading.Thread(target=scan_and_report, daemon=True).start()
     
+    def _register_scan_phases(self, scheduler):
+        """
+        Declara las fases de detección posteriores al recorrido de unidades
+        
+        Recursos: 'subprocess' (sc, ipconfig, tasklist, dir, fsutil, wevtutil...),
+        'disk' (recorridos de carpetas) y 'cpu' (procesos, ventanas, registro).
+        Los detectores de procesos dependen de la instantánea compartida.
+        """
+        def refresh_snapshot():
+            # Una sola enumeración de procesos para todos los detectores de procesos, tomada
+            # al terminar el recorrido de disco (no la del inicio del escaneo)
+            get_process_snapshot().refresh()
+        
+        def extend_issues(func):
+            def run():
+                issues = func()
+                if issues:
+                    self.issues_found.extend(issues)
+                return len(issues or [])
+            return run
+        
+        def silent_techniques():
+            try:
+                from silent_scanner_techniques import SilentScannerTechniques
+            except ImportError:
+                print("⚠️ Módulo silent_scanner_techniques no disponible - saltando técnicas avanzadas")
+                return 0
+            advanced_issues = SilentScannerTechniques.scan_all_advanced_techniques()
+            self.issues_found.extend(advanced_issues)
+            print(f"✅ Técnicas Silent-scanner: {len(advanced_issues)} detecciones")
+            return len(advanced_issues)
+        
+        def astro_techniques():
+            try:
+                from astro_ss_techniques import AstroSSTechniques
+            except ImportError:
+                print("⚠️ Módulo astro_ss_techniques no disponible - saltando técnicas de AstroSS")
+                return 0
+            astro_issues = AstroSSTechniques().scan_all_astro_techniques()
+            self.issues_found.extend(astro_issues)
+            print(f"✅ Técnicas AstroSS: {len(astro_issues)} detecciones")
+            return len(astro_issues)
+        
+        process_deps = ('process_snapshot',)
+        
+        # Procesos
+        scheduler.add('process_snapshot', refresh_snapshot, resource='cpu', timeout=60,
+                      label="🔍 Analizando procesos", detail="Enumerando procesos activos...")
+        scheduler.add('processes', self.scan_processes, resource='cpu', weight=2, timeout=120,
+                      depends_on=process_deps,
+                      label="🔍 Analizando procesos", detail="Escaneando procesos activos...")
+        scheduler.add('minecraft_processes', self.advanced_minecraft_process_analysis, resource='subprocess',
+                      weight=2, timeout=180, depends_on=process_deps,
+                      label="🔍 Segunda revisión de procesos de Minecraft", detail="Análisis profundo...")
+        scheduler.add('disabled_processes', self.scan_disabled_processes, resource='subprocess', timeout=60,
+                      label="🔍 Analizando procesos deshabilitados", detail="sc query dps...")
+        scheduler.add('dns_cache', self.scan_dns_cache, resource='subprocess', timeout=60,
+                      label="🔍 Analizando caché DNS", detail="ipconfig/displaydns...")
+        scheduler.add('running_processes', self.scan_running_processes, resource='subprocess', timeout=60,
+                      label="🔍 Analizando procesos ejecutados", detail="tasklist...")
+        scheduler.add('windows', self.scan_windows, resource='cpu', timeout=60,
+                      label="🔍 Analizando ventanas", detail="Detectando ventanas sospechosas...")
+        
+        # Archivos (comandos del sistema)
+        scheduler.add('exe_files', self.scan_exe_files, resource='subprocess', weight=3, timeout=300,
+                      label="🔍 Analizando archivos .exe", detail="dir /b/s *.exe...")
+        scheduler.add('jar_files', self.scan_jar_files, resource='subprocess', weight=3, timeout=300,
+                      label="🔍 Analizando archivos .jar", detail="dir /b/s *.jar...")
+        scheduler.add('files_by_date', self.scan_files_by_date, resource='subprocess', weight=2, timeout=180,
+                      label="🔍 Analizando archivos por fecha", detail="FORFILES...")
+        scheduler.add('deleted_files', self.scan_deleted_files, resource='subprocess', weight=2, timeout=180,
+                      label="🔍 Analizando archivos borrados", detail="fsutil usn...")
+        scheduler.add('created_files', self.scan_created_files, resource='subprocess', weight=2, timeout=180,
+                      label="🔍 Analizando archivos creados", detail="fsutil usn...")
+        scheduler.add('renamed_files', self.scan_renamed_files, resource='subprocess', weight=2, timeout=180,
+                      label="🔍 Analizando archivos renombrados", detail="fsutil usn...")
+        
+        # JNA, nombres exactos y archivos ocultos (recorridos de carpetas)
+        scheduler.add('prefetch_jna', self.scan_prefetch_jna, resource='disk', timeout=120,
+                      label="🔍 Analizando prefetch JNA", detail="Prefetch...")
+        scheduler.add('temp_jna', self.scan_temp_jna, resource='disk', timeout=120,
+                      label="🔍 Analizando temp JNA", detail="Temp...")
+        scheduler.add('exact_hack_names', self.scan_exact_hack_names, resource='disk', weight=2, timeout=300,
+                      label="🎯 Buscando nombres exactos de hacks", detail="Flux, Vape, Entropy, etc...")
+        scheduler.add('hidden_files', extend_issues(self.scan_hidden_files), resource='disk', weight=2,
+                      timeout=300, label="🔍 Analizando archivos ocultos", detail="Escaneando archivos ocultos...")
+        
+        # Registro, macros y logs
+        scheduler.add('registry_suspicious', self.scan_registry_suspicious, resource='cpu', timeout=120,
+                      label="🔍 Analizando registro Windows", detail="Registry...")
+        scheduler.add('registry', self.scan_registry, resource='cpu', timeout=120,
+                      label="🔍 Analizando registro", detail="Verificando entradas del registro...")
+        scheduler.add('logitech_macros', self.scan_logitech_macros, resource='disk', timeout=60,
+                      label="🔍 Analizando macros Logitech", detail="LGHUB...")
+        scheduler.add('razer_macros', self.scan_razer_macros, resource='disk', timeout=60,
+                      label="🔍 Analizando macros Razer", detail="Synapse...")
+        scheduler.add('event_logs', self.scan_event_logs, resource='subprocess', weight=2, timeout=180,
+                      label="🔍 Analizando logs de eventos", detail="Event Viewer...")
+        
+        # Dispositivos y red
+        scheduler.add('usb_devices', extend_issues(self.scan_usb_devices), resource='subprocess', timeout=120,
+                      label="🔍 Analizando USBs y pendrives", detail="Escaneando dispositivos USB...")
+        scheduler.add('network_connections', extend_issues(self.scan_network_connections), resource='cpu',
+                      timeout=60, depends_on=process_deps,
+                      label="🔍 Analizando conexiones de red", detail="Verificando IPs y conexiones...")
+        
+        # Técnicas avanzadas de Silent-scanner + AstroSS (usan la instantánea de procesos)
+        scheduler.add('silent_techniques', silent_techniques, resource='subprocess', weight=3, timeout=300,
+                      depends_on=process_deps,
+                      label="🔍 Técnicas avanzadas Silent-scanner + AstroSS", detail="Detección de evasión avanzada...")
+        scheduler.add('astro_techniques', astro_techniques, resource='subprocess', weight=3, timeout=300,
+                      depends_on=process_deps,
+                      label="🔍 Técnicas avanzadas Silent-scanner + AstroSS", detail="Detección de evasión avanzada...")
+    
     def execute_full_scan_silent(self):
         """Ejecuta escaneo ULTRA RÁPIDO sin limitaciones de recursos"""
         if self.scanning:
@@ -2854,14 +2957,19 @@ class MinecraftSSApp:
         import psutil
         
         self.scanning = True
-        self.issues_found = []
+        self.issues_found = FindingsStore()
         self.total_files_scanned = 0
         self.total_dirs_scanned = 0
+        self.whitelist_index.reset_cache()
         
         # Iniciar cronómetro
         self.start_scan_timer()
         
+        # Procesos de este escaneo: compartidos por sus detectores y nunca de un escaneo anterior
+        snapshot = get_process_snapshot()
         try:
+            snapshot.begin_scan()
+            
             # Configurar para uso MÁXIMO de recursos
             total_phases = 100
             current_progress = 0
@@ -2892,151 +3000,51 @@ class MinecraftSSApp:
             # Escanear cada unidad en paralelo con rendimiento optimizado
             max_workers = psutil.cpu_count() * 2  # Usar 2x más hilos para estabilidad
             print(f"⚡ Usando {max_workers} hilos para velocidad optimizada")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = []
-                progress_per_drive = 80 // len(drives) if drives else 80
-                
-                for i, drive in enumerate(drives):
-                    start_progress = i * progress_per_drive
-                    end_progress = (i + 1) * progress_per_drive
-                    
-                    # Buscar hacks específicos primero
-                    self._scan_for_specific_hacks(drive)
-                    
-                    future = executor.submit(self.scan_drive_exhaustive, drive, start_progress, end_progress)
-                    futures.append(future)
-                
-                # Esperar a que terminen todos con timeout aumentado
-                for future in concurrent.futures.as_completed(futures, timeout=600):  # 10 minutos timeout
-                    try:
-                        future.result()
-                        print(f"✅ Unidad escaneada exitosamente")
-                    except concurrent.futures.TimeoutError:
-                        print(f"⏰ Timeout en escaneo de unidad después de 10 minutos - continuando...")
-                    except Exception as e:
-                        print(f"⚠️ Error en escaneo de unidad: {e} - continuando...")
-            
-            # Fase 2: Segundo scan en paralelo para doble verificación
-            self._update_progress_safe(80, "🔍 Segundo scan en paralelo", "Doble verificación de hacks...")
-            self.secondary_scan_parallel()
-            
-            # Fase 3: Análisis de procesos (85-90%)
-            self._update_progress_safe(85, "🔍 Analizando procesos", "Escaneando procesos activos...")
-            self.scan_processes()
-            
-            # Fase 3.1: Segunda revisión avanzada de procesos de Minecraft
-            self._update_progress_safe(86, "🔍 Segunda revisión de procesos de Minecraft", "Análisis profundo...")
-            self.advanced_minecraft_process_analysis()
             
-            # Fase 2.1: Análisis avanzado de procesos
-            self._update_progress_safe(81, "🔍 Analizando procesos deshabilitados", "sc query dps...")
-            self.scan_disabled_processes()
-            
-            self._update_progress_safe(82, "🔍 Analizando caché DNS", "ipconfig/displaydns...")
-            self.scan_dns_cache()
-            
-            self._update_progress_safe(83, "🔍 Analizando procesos ejecutados", "tasklist...")
-            self.scan_running_processes()
-            
-            self._update_progress_safe(84, "🔍 Analizando archivos .exe", "dir /b/s *.exe...")
-            self.scan_exe_files()
-            
-            self._update_progress_safe(85, "🔍 Analizando archivos .jar", "dir /b/s *.jar...")
-            self.scan_jar_files()
-            
-            # Fase 3: Análisis de ventanas (85-87%)
-            self._update_progress_safe(85, "🔍 Analizando ventanas", "Detectando ventanas sospechosas...")
-            self.scan_windows()
-            
-            # Fase 3.1: Análisis avanzado de archivos
-            self._update_progress_safe(86, "🔍 Analizando archivos por fecha", "FORFILES...")
-            self.scan_files_by_date()
-            
-            self._update_progress_safe(87, "🔍 Analizando archivos borrados", "fsutil usn...")
-            self.scan_deleted_files()
-            
-            self._update_progress_safe(88, "🔍 Analizando archivos creados", "fsutil usn...")
-            self.scan_created_files()
-            
-            self._update_progress_safe(89, "🔍 Analizando archivos renombrados", "fsutil usn...")
-            self.scan_renamed_files()
-            
-            # Fase 3.2: Análisis de JNA
-            self._update_progress_safe(90, "🔍 Analizando prefetch JNA", "Prefetch...")
-            self.scan_prefetch_jna()
-            
-            self._update_progress_safe(91, "🔍 Analizando temp JNA", "Temp...")
-            self.scan_temp_jna()
-            
-            # Fase 3.3: Análisis de registro
-            self._update_progress_safe(92, "🔍 Analizando registro Windows", "Registry...")
-            self.scan_registry_suspicious()
-            
-            # Fase 3.4: Análisis de macros
-            self._update_progress_safe(93, "🔍 Analizando macros Logitech", "LGHUB...")
-            self.scan_logitech_macros()
-            
-            self._update_progress_safe(94, "🔍 Analizando macros Razer", "Synapse...")
-            self.scan_razer_macros()
-            
-            # Fase 3.5: Análisis de logs
-            self._update_progress_safe(95, "🔍 Analizando logs de eventos", "Event Viewer...")
-            self.scan_event_logs()
-            
-            # Fase 3.6: Análisis de ubicaciones comunes de hacks
-            self._update_progress_safe(96, "🔍 Analizando ubicaciones comunes de hacks", "Downloads, Desktop, Documents...")
-            self.scan_common_hack_locations()
-            
-            # Fase 3.7: Análisis de carpetas sospechosas
-            self._update_progress_safe(97, "🔍 Analizando carpetas sospechosas", "Buscando carpetas con nombres de hacks...")
-            self.scan_suspicious_folders()
-            
-            # Fase 3.8: Búsqueda de nombres exactos de hacks
-            self._update_progress_safe(97, "🎯 Buscando nombres exactos de hacks", "Flux, Vape, Entropy, etc...")
-            self.scan_exact_hack_names()
-            
-            # Fase 4: Análisis de registro (98-99%)
-            self._update_progress_safe(98, "🔍 Analizando registro", "Verificando entradas del registro...")
-            self.scan_registry()
-            
-            # Fase 5: Análisis de USBs y pendrives (99-100%)
-            self._update_progress_safe(99, "🔍 Analizando USBs y pendrives", "Escaneando dispositivos USB...")
-            usb_issues = self.scan_usb_devices()
-            self.issues_found.extend(usb_issues)
+            # Todos los detectores de archivos registran sus carpetas en un único plan:
+            # cada carpeta del disco se recorre una sola vez y cada archivo se entrega a
+            # todos los detectores que la pidieron
+            planner = ScanPlanner()
+            progress_per_drive = 80 // len(drives) if drives else 80
+            for i, drive in enumerate(drives):
+                start_progress = i * progress_per_drive
+                end_progress = (i + 1) * progress_per_drive
+                
+                # Buscar hacks específicos
+                self._scan_for_specific_hacks(drive, planner=planner)
+                self.scan_drive_exhaustive(drive, start_progress, end_progress, planner=planner)
             
-            # Fase 6: Análisis de archivos ocultos (100%)
-            self._update_progress_safe(100, "🔍 Analizando archivos ocultos", "Escaneando archivos ocultos...")
-            hidden_issues = self.scan_hidden_files()
-            self.issues_found.extend(hidden_issues)
+            # Fase 2: Segundo scan para doble verificación (carpetas en el plan, procesos ahora)
+            self._update_progress_safe(5, "🔍 Segundo scan en paralelo", "Doble verificación de hacks...")
+            self.secondary_scan_parallel(planner=planner)
             
-            # Fase 7: Análisis de conexiones de red (100%)
-            self._update_progress_safe(100, "🔍 Analizando conexiones de red", "Verificando IPs y conexiones...")
-            network_issues = self.scan_network_connections()
-            self.issues_found.extend(network_issues)
+            # Ubicaciones comunes de hacks y carpetas sospechosas
+            self.scan_common_hack_locations(planner=planner)
+            self.scan_suspicious_folders(planner=planner)
             
-            # Fase 8: Técnicas avanzadas de Silent-scanner + AstroSS (97-98%)
-            self._update_progress_safe(97, "🔍 Técnicas avanzadas Silent-scanner + AstroSS", "Detección de evasión avanzada...")
+            self._update_progress_safe(10, "🔍 Escaneo exhaustivo de unidades", "Recorrido compartido de carpetas...")
             try:
-                from silent_scanner_techniques import SilentScannerTechniques
-                advanced_issues = SilentScannerTechniques.scan_all_advanced_techniques()
-                self.issues_found.extend(advanced_issues)
-                print(f"✅ Técnicas Silent-scanner: {len(advanced_issues)} detecciones")
-            except ImportError:
-                print("⚠️ Módulo silent_scanner_techniques no disponible - saltando técnicas avanzadas")
+                walk_stats = planner.run(walker_threads=max_workers, analysis_threads=max_workers, total_timeout=600)
+                self.total_files_scanned += walk_stats['files_processed']
+                self.total_dirs_scanned += walk_stats['dirs_scanned']
+                print(f"✅ Recorrido compartido: {walk_stats['files_processed']} archivos, "
+                      f"{walk_stats['dirs_scanned']} carpetas en {walk_stats['elapsed']:.1f}s")
+                if walk_stats['timed_out']:
+                    print("⏰ Timeout en recorrido de unidades después de 10 minutos - continuando...")
             except Exception as e:
-                print(f"⚠️ Error en técnicas Silent-scanner: {e}")
-            
-            # Técnicas de AstroSS
-            try:
-                from astro_ss_techniques import AstroSSTechniques
-                astro = AstroSSTechniques()
-                astro_issues = astro.scan_all_astro_techniques()
-                self.issues_found.extend(astro_issues)
-                print(f"✅ Técnicas AstroSS: {len(astro_issues)} detecciones")
-            except ImportError:
-                print("⚠️ Módulo astro_ss_techniques no disponible - saltando técnicas de AstroSS")
-            except Exception as e:
-                print(f"⚠️ Error en técnicas AstroSS: {e}")
+                print(f"⚠️ Error en escaneo de unidades: {e} - continuando...")
+            self._update_progress_safe(80, "✅ Unidades escaneadas", f"Archivos analizados: {self.total_files_scanned}")
+            
+            # Fases 3-8: detectores independientes en paralelo (80-99%)
+            # Cada fase declara de qué depende, qué recurso consume y cuánto puede tardar
+            collector = self.issues_found
+            scheduler = PhaseScheduler(progress_callback=self._update_progress_safe, progress_range=(80, 99),
+                                       phase_context=collector.collecting)
+            self._register_scan_phases(scheduler)
+            phase_results = scheduler.run()
+            for name, result in phase_results.items():
+                if result['status'] == 'timeout':
+                    print(f"⏰ Fase {name} sin terminar - solo cuenta lo que reportó antes del timeout")
             
             # Fase 8.1: Configurar medidas de seguridad (DESACTIVADO)
             # self._update_progress_safe(98, "🛡️ Configurando medidas de seguridad", "Autodestrucción y limpieza...")
@@ -3046,9 +3054,15 @@ class MinecraftSSApp:
             # Fase 9: Filtrado y clasificación (100%)
             self._update_progress_safe(100, "🔍 Filtrando resultados", "Aplicando filtros ultra estrictos...")
             
+            # Fusionar los reportes de todos los hilos (un hallazgo por ruta y detector) y
+            # congelar el almacén: las fases vencidas no escriben durante el filtrado ni la subida
+            findings = collector.seal()
+            reported, unique = collector.stats()
+            print(f"🧹 Hallazgos fusionados: {reported} reportes -> {unique} únicos")
+
             # Aplicar filtro ultra inteligente
-            self.issues_found = self.filter_false_positives(self.issues_found)
-            
+            self.issues_found = self.filter_false_positives(findings)
+
             # Aplicar segundo filtro más inteligente
             self.issues_found = self.secondary_filter(self.issues_found)
             
@@ -3094,12 +3108,26 @@ class MinecraftSSApp:
             traceback.print_exc()
             self._update_progress_safe(100, f"❌ Error: {str(e)}", "Error durante el escaneo")
         finally:
+            # Volcar escrituras pendientes del caché y cerrar las conexiones de los workers terminados
+            if self.file_cache:
+                try:
+                    self.file_cache.flush()
+                    self.file_cache.close_connections()
+                except Exception as e:
+                    print(f"⚠️ Error guardando caché: {e}")
+            
+            snapshot.end_scan()
+            
             # Detener cronómetro
             self.stop_scan_timer()
             self.scanning = False
     
-    def scan_drive_exhaustive(self, drive, start_progress, end_progress):
-        """Escanea una unidad completa - VERSIÓN OPTIMIZADA CON LÍMITES"""
+    def scan_drive_exhaustive(self, drive, start_progress, end_progress, planner=None):
+        """Escanea una unidad completa - VERSIÓN OPTIMIZADA CON LÍMITES
+        
+        Si se pasa un ScanPlanner (scan_planner.py) solo registra sus carpetas y el recorrido
+        compartido lo ejecuta quien creó el planificador.
+        """
         import time
         
         try:
@@ -3137,9 +3165,6 @@ class MinecraftSSApp:
                 total_timeout = 300  # 5 minutos por defecto
                 print(f"⚠️ No se pudo detectar hardware, usando timeout estándar: {total_timeout//60} minutos")
             
-            scanned_files = 0
-            max_files_per_folder = None  # Sin límite de archivos por carpeta (solo timeout total)
-            
             # Actualizar contador global
             if not hasattr(self, 'total_files_scanned'):
                 self.total_files_scanned = 0
@@ -3153,6 +3178,20 @@ class MinecraftSSApp:
                 'Windows\\WinSxS',  # Solo WinSxS, no todo System32
             }
             
+            # Filtrar archivos por extensión
+            relevant_extensions = (
+                '.jar', '.exe', '.dll', '.bat', '.cmd', '.ps1', '.vbs', '.js', '.py', 
+                '.class', '.java', '.lua', '.txt', '.log', '.cfg', '.config', '.json', 
+                '.properties', '.yml', '.yaml', '.xml', '.dat', '.bin', '.cache',
+                '.tmp', '.temp', '.bak', '.backup', '.old', '.new', '.mod', '.minecraft',
+                '.zip', '.rar', '.7z', '.tar', '.gz', '.msi', '.msm', '.msp'
+            )
+            # Carpetas de usuario: MÁS EXTENSIONES
+            user_extensions = relevant_extensions + ('.scala', '.kt', '.groovy')
+            
+            suspicious_folder_patterns = ['flux', 'vape', 'entropy', 'liquidbounce', 'wurst', 'impact', 'sigma', 'future', 'ghost', 'hack', 'cheat', 'mod', 'client']
+            suspicious_folder_matcher = KeywordMatcher(suspicious_folder_patterns)
+            
             # Escanear TODAS las carpetas importantes
             critical_paths = [
                 os.path.join(drive, "Users"),
@@ -3166,99 +3205,6 @@ class MinecraftSSApp:
                 os.path.join(drive, "PerfLogs"),
             ]
             
-            # Primero escanear carpetas específicas con límites
-            for critical_path in critical_paths:
-                if not os.path.exists(critical_path):
-                    continue
-                    
-                folder_start_time = time.time()
-                folder_scanned = 0
-                print(f"📁 ESCANEANDO CARPETA CRÍTICA: {critical_path}")
-                
-                try:
-                    for root, dirs, files in os.walk(critical_path):
-                        # Verificar timeout total (no por carpeta)
-                        if time.time() - start_time > total_timeout:
-                            print(f"⏰ Timeout total alcanzado después de {total_timeout//60} minutos - finalizando escaneo...")
-                            break
-                        
-                        # Limitar profundidad
-                        depth = root.count(os.sep) - critical_path.count(os.sep)
-                        if depth > max_depth:
-                            dirs[:] = []  # No explorar más profundo
-                            continue
-                        
-                        # Saltar carpetas problemáticas
-                        dirs[:] = [d for d in dirs if not any(skip in os.path.join(root, d).lower() for skip in skip_folders)]
-                        
-                        # Sin límite de archivos (solo timeout total)
-                        # Verificar timeout total continuamente
-                        if time.time() - start_time > total_timeout:
-                            break
-                        
-                        # Filtrar archivos por extensión
-                        relevant_extensions = (
-                            '.jar', '.exe', '.dll', '.bat', '.cmd', '.ps1', '.vbs', '.js', '.py', 
-                            '.class', '.java', '.lua', '.txt', '.log', '.cfg', '.config', '.json', 
-                            '.properties', '.yml', '.yaml', '.xml', '.dat', '.bin', '.cache',
-                            '.tmp', '.temp', '.bak', '.backup', '.old', '.new', '.mod', '.minecraft',
-                            '.zip', '.rar', '.7z', '.tar', '.gz', '.msi', '.msm', '.msp'
-                        )
-                        relevant_files = [f for f in files if f.lower().endswith(relevant_extensions)]
-                        
-                        # Verificar carpetas sospechosas
-                        for dir_name in dirs:
-                            if any(pattern in dir_name.lower() for pattern in ['flux', 'vape', 'entropy', 'liquidbounce', 'wurst', 'impact', 'sigma', 'future', 'ghost', 'hack', 'cheat', 'mod', 'client']):
-                                self.issues_found.append({
-                                    'nombre': dir_name,
-                                    'ruta': root,
-                                    'archivo': os.path.join(root, dir_name),
-                                    'tipo': 'folder',
-                                    'alerta': 'SOSPECHOSO'
-                                })
-                            
-                        # Procesar TODOS los archivos (sin límite por lote)
-                        for file in relevant_files:
-                            try:
-                                file_path = os.path.join(root, file)
-                                
-                                if self.is_suspicious_file(file_path):
-                                    self.issues_found.append({
-                                        'nombre': file,
-                                        'ruta': root,
-                                        'archivo': file_path,
-                                        'tipo': 'file',
-                                        'alerta': 'SOSPECHOSO'
-                                    })
-                                
-                                scanned_files += 1
-                                folder_scanned += 1
-                                self.total_files_scanned += 1  # Actualizar contador global
-                                
-                                # Mostrar progreso cada 5000 archivos
-                                if scanned_files % 5000 == 0:
-                                    elapsed = time.time() - start_time
-                                    rate = scanned_files / elapsed if elapsed > 0 else 0
-                                    remaining = total_timeout - elapsed
-                                    print(f"📁 {drive}: {scanned_files} archivos ({rate:.0f} arch/s) - Tiempo restante: {remaining:.0f}s...")
-                                
-                                # Verificar timeout total (sin límite de archivos)
-                                if time.time() - start_time > total_timeout:
-                                    break
-                                    
-                            except (PermissionError, OSError):
-                                continue
-                            except Exception:
-                                continue
-                        
-                        # Verificar timeout total (sin límite de archivos)
-                        if time.time() - start_time > total_timeout:
-                            break
-                                
-                except Exception as e:
-                    print(f"⚠️ Error en {critical_path}: {e} - continuando...")
-                    continue
-            
             # Escanear TODAS las carpetas del usuario exhaustivamente
             user_home = os.path.expanduser("~")
             user_paths = [
@@ -3295,104 +3241,7 @@ class MinecraftSSApp:
                 except:
                     pass
             
-            for user_path in user_paths:
-                if not os.path.exists(user_path):
-                    continue
-                    
-                folder_start_time = time.time()
-                folder_scanned = 0
-                print(f"📁 ESCANEANDO: {user_path}")
-                
-                try:
-                    for root, dirs, files in os.walk(user_path):
-                        # Timeout por carpeta optimizado
-                        if time.time() - folder_start_time > 120:  # 2 minutos máximo
-                            print(f"⏰ Timeout en {user_path} - continuando...")
-                            break
-                        
-                        # Profundidad máxima optimizada
-                        depth = root.count(os.sep) - user_path.count(os.sep)
-                        if depth > 8:
-                                dirs[:] = []
-                                continue
-                            
-                        # Saltar solo carpetas realmente problemáticas
-                        dirs[:] = [d for d in dirs if not any(skip in os.path.join(root, d).lower() for skip in skip_folders)]
-                        
-                        # Verificar timeout total (sin límite de archivos)
-                        if time.time() - start_time > total_timeout:
-                            print(f"⏰ Timeout total alcanzado - finalizando escaneo...")
-                            break
-                        
-                        # Filtrar archivos relevantes (MÁS EXTENSIONES)
-                        relevant_extensions = (
-                            '.jar', '.exe', '.dll', '.bat', '.cmd', '.ps1', '.vbs', '.js', '.py', 
-                            '.class', '.java', '.lua', '.txt', '.log', '.cfg', '.config', '.json', 
-                            '.properties', '.yml', '.yaml', '.xml', '.dat', '.bin', '.cache',
-                            '.tmp', '.temp', '.bak', '.backup', '.old', '.new', '.mod', '.minecraft',
-                            '.zip', '.rar', '.7z', '.tar', '.gz', '.msi', '.msm', '.msp', '.jar',
-                            '.class', '.java', '.scala', '.kt', '.groovy'
-                        )
-                        relevant_files = [f for f in files if f.lower().endswith(relevant_extensions)]
-                        
-                        # Verificar carpetas sospechosas
-                        for dir_name in dirs:
-                            if any(pattern in dir_name.lower() for pattern in ['flux', 'vape', 'entropy', 'liquidbounce', 'wurst', 'impact', 'sigma', 'future', 'ghost', 'hack', 'cheat', 'mod', 'client']):
-                                self.issues_found.append({
-                                    'nombre': dir_name,
-                                    'ruta': root,
-                                    'archivo': os.path.join(root, dir_name),
-                                    'tipo': 'folder',
-                                    'alerta': 'SOSPECHOSO'
-                                })
-                        
-                        # Procesar TODOS los archivos relevantes (sin límite por iteración)
-                        for file in relevant_files:
-                            try:
-                                file_path = os.path.join(root, file)
-                                
-                                if self.is_suspicious_file(file_path):
-                                    self.issues_found.append({
-                                        'nombre': file,
-                                        'ruta': root,
-                                        'archivo': file_path,
-                                        'tipo': 'file',
-                                        'alerta': 'SOSPECHOSO'
-                                    })
-                                
-                                scanned_files += 1
-                                folder_scanned += 1
-                                self.total_files_scanned += 1  # Actualizar contador global
-                                
-                                if scanned_files % 5000 == 0:
-                                    elapsed = time.time() - start_time
-                                    rate = scanned_files / elapsed if elapsed > 0 else 0
-                                    print(f"📁 {drive}: {scanned_files} archivos ({rate:.0f} arch/s)...")
-                                
-                                # Verificar timeout total (sin límite de archivos)
-                                if time.time() - start_time > total_timeout:
-                                    break
-                                    
-                            except (PermissionError, OSError):
-                                continue
-                            except Exception:
-                                continue
-                        
-                        # Verificar timeout total (sin límite de archivos)
-                        if time.time() - start_time > total_timeout:
-                            break
-                            
-                except Exception as e:
-                    print(f"⚠️ Error en {user_path}: {e} - continuando...")
-                    continue
-            
-            # ESCANEO GENERAL DE TODA LA UNIDAD (OPTIMIZADO - solo ubicaciones críticas)
-            print(f"🔍 ESCANEANDO UBICACIONES CRÍTICAS DE {drive} (escaneo optimizado)...")
-            general_start_time = time.time()
-            general_scanned = 0
-            max_general_time = 180  # 3 minutos máximo para escaneo general (optimizado)
-            
-            # Solo escanear ubicaciones críticas en lugar de toda la unidad
+            # Ubicaciones generales (solo las que no cubren las rutas críticas / de usuario)
             critical_locations = [
                 os.path.join(drive, 'Users'),
                 os.path.join(drive, 'Program Files'),
@@ -3404,99 +3253,72 @@ class MinecraftSSApp:
                 os.path.join(drive, 'Documents'),
             ]
             
-            try:
-                # Escanear solo ubicaciones críticas con límites optimizados
-                for critical_location in critical_locations:
-                    if not os.path.exists(critical_location):
-                        continue
-                    
-                    if time.time() - general_start_time > max_general_time:
-                        print(f"⏰ Timeout en escaneo general después de {max_general_time}s - continuando...")
-                        break
-                    
-                    for root, dirs, files in os.walk(critical_location):
-                        # Verificar timeout general
-                        if time.time() - general_start_time > max_general_time:
-                            break
-                        
-                        # Profundidad máxima 6 para escaneo general (optimizado)
-                        depth = root.count(os.sep) - critical_location.count(os.sep)
-                        if depth > 6:
-                            dirs[:] = []
-                            continue
-                    
-                    # Saltar solo carpetas realmente problemáticas
-                    dirs[:] = [d for d in dirs if not any(skip in os.path.join(root, d).lower() for skip in skip_folders)]
-                    
-                    # Verificar si ya escaneamos esta carpeta en las rutas críticas
-                    is_critical = any(critical in root for critical in critical_paths)
-                    is_user = any(user in root for user in user_paths)
-                    
-                    # Si ya la escaneamos, saltar (pero verificar carpetas sospechosas)
-                    if is_critical or is_user:
-                        # Solo verificar nombres de carpetas sospechosas
-                        for dir_name in dirs:
-                            if any(pattern in dir_name.lower() for pattern in ['flux', 'vape', 'entropy', 'liquidbounce', 'wurst', 'impact', 'sigma', 'future', 'ghost', 'hack', 'cheat', 'mod', 'client']):
-                                self.issues_found.append({
-                                    'nombre': dir_name,
-                                    'ruta': root,
-                                    'archivo': os.path.join(root, dir_name),
-                                    'tipo': 'folder',
-                                    'alerta': 'SOSPECHOSO'
-                                })
-                        continue
-                    
-                    # Filtrar archivos relevantes
-                    relevant_extensions = (
-                        '.jar', '.exe', '.dll', '.bat', '.cmd', '.ps1', '.vbs', '.js', '.py', 
-                        '.class', '.java', '.lua', '.txt', '.log', '.cfg', '.config', '.json', 
-                        '.properties', '.yml', '.yaml', '.xml', '.dat', '.bin', '.cache',
-                        '.tmp', '.temp', '.bak', '.backup', '.old', '.new', '.mod', '.minecraft',
-                        '.zip', '.rar', '.7z', '.tar', '.gz', '.msi', '.msm', '.msp'
-                    )
-                    relevant_files = [f for f in files if f.lower().endswith(relevant_extensions)]
-                    
-                    # Verificar carpetas sospechosas
-                    for dir_name in dirs:
-                        if any(pattern in dir_name.lower() for pattern in ['flux', 'vape', 'entropy', 'liquidbounce', 'wurst', 'impact', 'sigma', 'future', 'ghost', 'hack', 'cheat', 'mod', 'client']):
-                            self.issues_found.append({
-                                'nombre': dir_name,
-                                'ruta': root,
-                                'archivo': os.path.join(root, dir_name),
-                                'tipo': 'folder',
-                                'alerta': 'SOSPECHOSO'
-                            })
-                    
-                    # Procesar archivos
-                    for file in relevant_files:
-                        try:
-                            file_path = os.path.join(root, file)
-                            
-                            if self.is_suspicious_file(file_path):
-                                self.issues_found.append({
-                                    'nombre': file,
-                                    'ruta': root,
-                                    'archivo': file_path,
-                                    'tipo': 'file',
-                                    'alerta': 'SOSPECHOSO'
-                                })
-                            
-                            scanned_files += 1
-                            general_scanned += 1
-                            self.total_files_scanned += 1  # Actualizar contador global
-                            
-                            if scanned_files % 10000 == 0:
-                                elapsed = time.time() - start_time
-                                rate = scanned_files / elapsed if elapsed > 0 else 0
-                                print(f"📁 {drive}: {scanned_files} archivos totales ({rate:.0f} arch/s)...")
-                            
-                        except (PermissionError, OSError):
-                            continue
-                        except Exception:
-                            continue
-                            
-            except Exception as e:
-                print(f"⚠️ Error en escaneo general: {e} - continuando...")
+            # ========== PETICIONES AL PLANIFICADOR (mismos límites que antes) ==========
+            # Críticas: profundidad 12 | Usuario: profundidad 8, 2 min | General: profundidad 6, 3 min
+            # Las tres usan el mismo handler: un archivo cubierto por varias raíces se analiza una vez
+            
+            general_locations = []
+            already_covered = [p.lower().rstrip('\\/') + os.sep for p in critical_paths + user_paths]
+            for critical_location in critical_locations:
+                location_key = critical_location.lower().rstrip('\\/') + os.sep
+                if not any(location_key.startswith(covered) for covered in already_covered):
+                    general_locations.append(critical_location)
+            
+            def on_folder(dir_name, parent_path):
+                """Verificar carpetas sospechosas"""
+                if suspicious_folder_matcher.contains_any(dir_name.lower()):
+                    self.issues_found.append({
+                        'nombre': dir_name,
+                        'ruta': parent_path,
+                        'archivo': os.path.join(parent_path, dir_name),
+                        'tipo': 'folder',
+                        'alerta': 'SOSPECHOSO'
+                    })
+            
+            def on_file(file_name, dir_path, file_path):
+                """Analizar archivo (hilos de análisis)"""
+                if self.is_suspicious_file(file_path):
+                    self.issues_found.append({
+                        'nombre': file_name,
+                        'ruta': dir_path,
+                        'archivo': file_path,
+                        'tipo': 'file',
+                        'alerta': 'SOSPECHOSO'
+                    })
+            
+            own_planner = planner is None
+            if own_planner:
+                planner = ScanPlanner()
+            
+            detector = f"drive_{drive}"
+            planner.add(detector, critical_paths, max_depth=max_depth, extensions=relevant_extensions,
+                        skip_folders=skip_folders, file_handler=on_file, dir_handler=on_folder,
+                        timeout=total_timeout)
+            planner.add(detector, user_paths, max_depth=8, extensions=user_extensions,
+                        skip_folders=skip_folders, file_handler=on_file, dir_handler=on_folder,
+                        timeout=min(120, total_timeout))
+            planner.add(detector, general_locations, max_depth=6, extensions=relevant_extensions,
+                        skip_folders=skip_folders, file_handler=on_file, dir_handler=on_folder,
+                        timeout=min(180, total_timeout))
+            
+            if not own_planner:
+                # El recorrido lo ejecuta quien creó el planificador (execute_full_scan_silent)
+                return
+            
+            cpu_count = psutil.cpu_count() or 2
+            print(f"📁 RECORRIDO PARALELO DE {drive}: {cpu_count} hilos de recorrido + {cpu_count} de análisis")
+            walk_stats = planner.run(
+                walker_threads=cpu_count,      # Recorrido: limitado por I/O
+                analysis_threads=cpu_count,    # Análisis: hash + patrones
+                total_timeout=total_timeout
+            )
+            
+            scanned_files = walk_stats['files_processed']
+            self.total_files_scanned += scanned_files  # Actualizar contador global
+            
+            if walk_stats['timed_out']:
+                print(f"⏰ Timeout total alcanzado después de {total_timeout//60} minutos - finalizando escaneo...")
+            print(f"📁 {drive}: {walk_stats['dirs_scanned']} carpetas recorridas")
             
             # Calcular estadísticas de velocidad
             end_time = time.time()
@@ -3532,8 +3354,12 @@ class MinecraftSSApp:
         except Exception as e:
             print(f"Error procesando lote de archivos: {e}")
     
-    def analyze_file_content(self, file_path):
-        """Análisis avanzado del contenido del archivo - Detecta hacks por contenido, no solo nombre"""
+    def analyze_file_content(self, file_path, fingerprint=None):
+        """Análisis avanzado del contenido del archivo - Detecta hacks por contenido, no solo nombre
+        
+        Reutiliza la huella (hash + primeros bytes) si ya fue calculada; si no, la calcula
+        leyendo el archivo una sola vez.
+        """
         try:
             # Verificar cache
             if file_path in self.file_analysis_cache:
@@ -3547,59 +3373,84 @@ class MinecraftSSApp:
                 'file_hash': None
             }
             
-            # Calcular hash SHA256
-            try:
-                with open(file_path, 'rb') as f:
-                    file_content = f.read()
-                    file_hash = hashlib.sha256(file_content).hexdigest()
-                    result['file_hash'] = file_hash
-                    
-                    # Verificar si el hash está en la base de datos de hacks conocidos
-                    if file_hash in self.known_hack_hashes:
-                        result['is_hack'] = True
-                        result['confidence'] = 100
-                        result['detected_patterns'].append('known_hash')
-                        self.file_analysis_cache[file_path] = result
-                        return result
-            except:
-                pass
+            # Calcular hash SHA256 (una sola lectura en streaming)
+            if fingerprint is None:
+                fingerprint = compute_fingerprint(file_path)
+            
+            if fingerprint is not None:
+                file_hash = fingerprint.sha256
+                result['file_hash'] = file_hash
+                
+                # Verificar si el hash está en la base de datos de hacks conocidos
+                if file_hash in self.known_hack_hashes:
+                    result['is_hack'] = True
+                    result['confidence'] = 100
+                    result['detected_patterns'].append('known_hash')
+                    self.file_analysis_cache[file_path] = result
+                    return result
+                
+                # Release conocida de un mod (mismo SHA-256 del archivo completo)
+                known_archives = getattr(self, 'known_archives', None)
+                if file_path.lower().endswith('.jar') and known_archives and known_archives.is_known(file_path, file_hash):
+                    result['known_archive'] = True
+                    self.file_analysis_cache[file_path] = result
+                    return result
             
             # Análisis de contenido para archivos de texto y JARs
             filename_lower = os.path.basename(file_path).lower()
             
-            # Patrones de hacks en contenido
-            hack_content_patterns = [
-                b'vape', b'entropy', b'whiteout', b'liquidbounce', b'wurst',
-                b'killaura', b'aimbot', b'triggerbot', b'reach', b'velocity',
-                b'scaffold', b'fly', b'xray', b'fullbright', b'bypass',
-                b'inject', b'ghost', b'stealth', b'undetected', b'incognito',
-                b'flux', b'sigma', b'future', b'astolfo', b'exhibition',
-                b'novoline', b'rise', b'moon', b'drip', b'phobos'
-            ]
+            # Análisis de JARs: directorio central del zip + MANIFEST (el contenido está comprimido)
+            jar = None
+            if filename_lower.endswith('.jar'):
+                try:
+                    jar = get_jar_inspector().inspect(file_path, result['file_hash'])
+                    if not jar.is_zip:
+                        jar = None  # No es un zip válido: analizar los bytes crudos
+                except Exception:
+                    jar = None
+            
+            if jar is not None:
+                manifest_text = ' '.join(jar.manifest.values()).lower()
+                detected = JAR_NAME_MATCHER.find_ordered(jar.names_text(), manifest_text)
+                result['detected_patterns'].extend(detected)
+                detected_count = len(detected)
+                
+                # Agente Java (Premain-Class / Agent-Class): se inyecta en el proceso de Minecraft
+                result['java_agent'] = jar.is_java_agent
+                if jar.is_java_agent:
+                    result['detected_patterns'].append('java_agent')
+                    detected_count += 1
+                
+                if detected_count >= 2:  # Si encuentra 2+ patrones, es muy sospechoso
+                    result['is_hack'] = True
+                    result['confidence'] = min(90, detected_count * 15)
+                
+                # Ofuscación: mayoría de clases con nombres de 1-2 caracteres (a.class, b.class...)
+                if jar.obfuscated:
+                    result['obfuscation_detected'] = True
+                    result['confidence'] += 20
             
             # Análisis de strings sospechosos
             try:
-                if filename_lower.endswith(('.jar', '.class', '.java', '.txt', '.lua', '.js', '.py')):
-                    with open(file_path, 'rb') as f:
-                        content = f.read(1024 * 1024)  # Leer primeros 1MB
-                        
-                        # Detectar patrones de hack en contenido
-                        detected_count = 0
-                        for pattern in hack_content_patterns:
-                            if pattern in content:
-                                detected_count += 1
-                                result['detected_patterns'].append(pattern.decode('utf-8', errors='ignore'))
-                        
-                        if detected_count >= 2:  # Si encuentra 2+ patrones, es muy sospechoso
-                            result['is_hack'] = True
-                            result['confidence'] = min(90, detected_count * 15)
-                        
-                        # Detección de ofuscación (alto ratio de caracteres no ASCII)
-                        if len(content) > 100:
-                            non_ascii_ratio = sum(1 for b in content[:1000] if b > 127) / min(1000, len(content))
-                            if non_ascii_ratio > 0.3:  # Más del 30% no ASCII = posible ofuscación
-                                result['obfuscation_detected'] = True
-                                result['confidence'] += 20
+                if jar is None and fingerprint is not None and filename_lower.endswith(('.jar', '.class', '.java', '.txt', '.lua', '.js', '.py')):
+                    content = fingerprint.head  # Primeros 1MB (ya leídos al calcular la huella)
+                    
+                    # Detectar patrones de hack en contenido
+                    detected = HACK_CONTENT_MATCHER.find_ordered(content)
+                    detected_count = len(detected)
+                    for pattern in detected:
+                        result['detected_patterns'].append(pattern.decode('utf-8', errors='ignore'))
+                    
+                    if detected_count >= 2:  # Si encuentra 2+ patrones, es muy sospechoso
+                        result['is_hack'] = True
+                        result['confidence'] = min(90, detected_count * 15)
+                    
+                    # Detección de ofuscación (alto ratio de caracteres no ASCII)
+                    if len(content) > 100:
+                        non_ascii_ratio = sum(1 for b in content[:1000] if b > 127) / min(1000, len(content))
+                        if non_ascii_ratio > 0.3:  # Más del 30% no ASCII = posible ofuscación
+                            result['obfuscation_detected'] = True
+                            result['confidence'] += 20
             except:
                 pass
             
@@ -3611,36 +3462,45 @@ class MinecraftSSApp:
             return {'is_hack': False, 'confidence': 0, 'detected_patterns': [], 'obfuscation_detected': False, 'file_hash': None}
     
     def is_suspicious_file(self, file_path):
-        """Verifica si un archivo es sospechoso - MEJORADO CON CACHÉ INTELIGENTE"""
+        """Verifica si un archivo es sospechoso - MEJORADO CON CACHÉ INTELIGENTE
+        
+        El archivo se lee UNA sola vez (compute_fingerprint) y la huella resultante
+        se pasa a caché, patrones legítimos y análisis de contenido.
+        """
         try:
-            # ========== PASO 0: VERIFICAR CACHÉ (optimización) ==========
-            if self.file_cache:
-                cached_result = self.file_cache.is_cached(file_path)
-                if cached_result and cached_result.get('cached'):
-                    # Archivo en caché y no modificado, usar resultado cacheado
-                    return cached_result.get('is_suspicious', False)
-            
             filename = os.path.basename(file_path).lower()
             file_dir = os.path.dirname(file_path).lower()
             full_path_lower = file_path.lower()
             
-            # ========== PASO 1: VERIFICACIÓN DE WHITELIST (prioridad máxima) ==========
+            # ========== PASO 0: VERIFICACIÓN DE WHITELIST (sin I/O, prioridad máxima) ==========
+            # Se comprueba una sola vez: los pasos siguientes ya saben que no está en whitelist
             if self.is_whitelisted(file_path):
-                # Guardar en caché como no sospechoso
-                if self.file_cache:
-                    self.file_cache.cache_result(file_path, is_suspicious=False, confidence=0)
                 return False
             
+            # ========== PASO 0.5: CACHÉ POR METADATOS (sin abrir el archivo) ==========
+            metadata_result = None
+            if self.file_cache:
+                metadata_result = self.file_cache.lookup_by_metadata(file_path)
+                if metadata_result and metadata_result.get('cached'):
+                    # Ruta, tamaño, fecha e inode sin cambios: usar resultado cacheado
+                    return metadata_result.get('is_suspicious', False)
+            
+            # ========== PASO 0.7: HUELLA ÚNICA (una lectura: hash + primeros bytes) ==========
+            fingerprint = compute_fingerprint(file_path)
+            
+            # ========== PASO 1: VERIFICAR CACHÉ POR HASH (metadatos cambiaron) ==========
+            if self.file_cache and fingerprint is not None:
+                # Los metadatos ya se consultaron en el paso 0.5: solo falta el nivel por hash
+                cached_result = self.file_cache.is_cached(file_path, fingerprint=fingerprint,
+                                                          metadata_result=metadata_result)
+                if cached_result and cached_result.get('cached'):
+                    # Archivo en caché y no modificado, usar resultado cacheado
+                    return cached_result.get('is_suspicious', False)
+            
             # ========== PASO 1.5: VERIFICACIÓN DE PATRONES LEGÍTIMOS APRENDIDOS ==========
             if self.legitimate_patterns:
                 try:
-                    file_hash = None
-                    if os.path.exists(file_path):
-                        try:
-                            with open(file_path, 'rb') as f:
-                                file_hash = hashlib.sha256(f.read()).hexdigest()
-                        except:
-                            pass
+                    file_hash = fingerprint.sha256 if fingerprint is not None else None
                     
                     is_legitimate, legit_confidence = self.legitimate_patterns.is_legitimate(
                         file_path=file_path,
@@ -3651,8 +3511,9 @@ class MinecraftSSApp:
                     
                     if is_legitimate and legit_confidence >= 0.6:
                         # Guardar en caché como no sospechoso
-                        if self.file_cache:
-                            self.file_cache.cache_result(file_path, is_suspicious=False, confidence=0)
+                        if self.file_cache and fingerprint is not None:
+                            self.file_cache.cache_result(file_path, is_suspicious=False, confidence=0,
+                                                         fingerprint=fingerprint)
                         print(f"✅ Archivo legítimo aprendido: {filename} (confianza: {legit_confidence:.2f})")
                         return False
                 except Exception as e:
@@ -3660,55 +3521,22 @@ class MinecraftSSApp:
                     pass
             
             # ========== PASO 2: ANÁLISIS AVANZADO DE CONTENIDO ==========
-            content_analysis = self.analyze_file_content(file_path)
+            content_analysis = self.analyze_file_content(file_path, fingerprint=fingerprint)
             if content_analysis['is_hack'] and content_analysis['confidence'] >= 70:
-                # Verificación adicional: no debe estar en whitelist incluso si el contenido es sospechoso
-                # (para evitar falsos positivos en software legítimo ofuscado)
-                if not self.is_whitelisted(file_path):
-                    return True
+                return True
             
             # ========== PASO 3: DETECCIÓN POR NOMBRE Y UBICACIÓN (MEJORADA 200%) ==========
             
-            # PATRONES DE HACKS REALES (alta confianza)
-            HIGH_CONFIDENCE_HACK_PATTERNS = [
-                # Clientes de hack conocidos
-                'vape', 'entropy', 'whiteout', 'liquidbounce', 'wurst', 'impact',
-                'sigma', 'flux', 'future', 'astolfo', 'exhibition', 'novoline',
-                'rise', 'moon', 'drip', 'phobos', 'tenacity', 'meteor', 'lambda',
-                'rusherhack', 'konas', 'kami blue', 'kami', 'weepcraft',
-                
-                # Módulos de hack específicos
-                'killaura', 'aimbot', 'triggerbot', 'reach', 'velocity', 'antiknockback',
-                'scaffold', 'fly', 'xray', 'fullbright', 'nofall', 'speed', 'step',
-                'autoclicker', 'bhop', 'bunnyhop', 'esp', 'tracers', 'nametags',
-                'traceline', 'boxesp', 'chams', 'wallhack', 'nuker', 'autotool',
-                'autosprint', 'sprint', 'sneak', 'sneaking', 'freecam', 'camera',
-                'baritone', 'pathfinder', 'auto', 'automation', 'macro',
-                
-                # Técnicas de evasión
-                'bypass', 'inject', 'ghost', 'stealth', 'undetected', 'incognito',
-                'spoof', 'spoofing', 'hook', 'hooking', 'patch', 'patching',
-                'obfuscate', 'obfuscation', 'pack', 'packed', 'encrypt', 'encrypted',
-                
-                # Carpetas sospechosas
-                'cheat', 'hack', 'client', 'mods\\vape', 'mods\\entropy',
-                'mods\\sigma', 'mods\\flux', 'mods\\future', 'mods\\astolfo',
-                'versions\\vape', 'versions\\entropy', 'versions\\sigma',
-            ]
-            
-            # Verificar patrones de alta confianza
+            # Verificar patrones de alta confianza (HIGH_CONFIDENCE_HACK_PATTERNS, una sola pasada)
             is_suspicious = False
             confidence = 0
             detected_patterns = []
             
-            for pattern in HIGH_CONFIDENCE_HACK_PATTERNS:
-                if pattern in filename or pattern in full_path_lower:
-                    # Verificación adicional: no debe estar en whitelist
-                    if not self.is_whitelisted(file_path):
-                        is_suspicious = True
-                        confidence = max(confidence, 80)
-                        detected_patterns.append(pattern)
-                        break  # Encontrado, no necesitamos seguir
+            pattern = HIGH_CONFIDENCE_HACK_MATCHER.first_match(filename, full_path_lower)
+            if pattern:
+                is_suspicious = True
+                confidence = max(confidence, 80)
+                detected_patterns.append(pattern)
             
             # ========== PASO 4: DETECCIÓN POR EXTENSIÓN Y CONTEXTO ==========
             # Archivos JAR en ubicaciones sospechosas
@@ -3717,15 +3545,14 @@ class MinecraftSSApp:
                 if 'mods' in file_dir or 'versions' in file_dir:
                     # Verificar si contiene palabras de hack en el nombre
                     if any(hack in filename for hack in ['vape', 'entropy', 'sigma', 'flux', 'future', 'astolfo', 'cheat', 'hack']):
-                        if not self.is_whitelisted(file_path):
-                            is_suspicious = True
-                            confidence = max(confidence, 75)
-                            detected_patterns.append('suspicious_jar_location')
+                        is_suspicious = True
+                        confidence = max(confidence, 75)
+                        detected_patterns.append('suspicious_jar_location')
             
             # ========== PASO 5: DETECCIÓN DE OFUSCACIÓN EXCESIVA ==========
             if content_analysis.get('obfuscation_detected', False):
-                # Si está muy ofuscado Y no está en whitelist, es sospechoso
-                if content_analysis['confidence'] >= 50 and not self.is_whitelisted(file_path):
+                # Si está muy ofuscado (ya sabemos que no está en whitelist), es sospechoso
+                if content_analysis['confidence'] >= 50:
                     # Pero solo si no es software conocido (launchers, etc.)
                     known_software = ['anydesk', 'teamviewer', 'gtavlauncher', 'rockstar', 'steam', 'epic']
                     if not any(sw in full_path_lower for sw in known_software):
@@ -3740,13 +3567,14 @@ class MinecraftSSApp:
                 detected_patterns.append('known_hash')
             
             # Guardar resultado en caché
-            if self.file_cache:
+            if self.file_cache and fingerprint is not None:
                 self.file_cache.cache_result(
                     file_path,
                     is_suspicious=is_suspicious,
                     confidence=confidence,
                     detected_patterns=detected_patterns if detected_patterns else None,
-                    scan_result=content_analysis
+                    scan_result=content_analysis,
+                    fingerprint=fingerprint
                 )
             
             return is_suspicious
@@ -3755,8 +3583,11 @@ class MinecraftSSApp:
             # En caso de error, no marcar como sospechoso para evitar falsos positivos
             return False
     
-    def _scan_for_specific_hacks(self, drive):
-        """Buscar específicamente carpetas con nombres de hacks conocidos - MEJORADO CON TÉCNICAS SILENT-SCANNER"""
+    def _scan_for_specific_hacks(self, drive, planner=None):
+        """Buscar específicamente carpetas con nombres de hacks conocidos - MEJORADO CON TÉCNICAS SILENT-SCANNER
+        
+        Con planner (ScanPlanner) se registra en el recorrido compartido en lugar de recorrer la unidad.
+        """
         try:
             print(f"🔍 BUSCANDO HACKS ESPECÍFICOS EN {drive}")
             
@@ -3835,49 +3666,58 @@ class MinecraftSSApp:
                 'athlon', 'phenom', 'fx', 'a', 'e', 'pro', 'threadripper', 'epyc'
             ]
             
+            # Cada nombre de archivo / carpeta de la unidad pasa por aquí: una sola pasada por lista
+            hack_matcher = KeywordMatcher(hack_patterns)
+            false_positive_matcher = KeywordMatcher(false_positives)
+            
+            def check_dir(dir_name, root):
+                """Buscar en nombres de carpetas"""
+                dir_lower = dir_name.lower()
+                if hack_matcher.contains_any(dir_lower):
+                    # Verificar si no es un falso positivo
+                    if not false_positive_matcher.contains_any(dir_lower, root.lower()):
+                        print(f"🎯 HACK DETECTADO: {dir_name} en {root}")
+                        self.issues_found.append({
+                            'nombre': dir_name,
+                            'ruta': root,
+                            'archivo': os.path.join(root, dir_name),
+                            'tipo': 'hack_folder',
+                            'alerta': 'CRITICAL'
+                        })
+            
+            def check_file(file_name, root, file_path):
+                """Buscar en nombres de archivos"""
+                file_lower = file_name.lower()
+                if hack_matcher.contains_any(file_lower):
+                    # Verificar si no es un falso positivo
+                    if not false_positive_matcher.contains_any(file_lower, root.lower()):
+                        print(f"🎯 HACK DETECTADO: {file_name} en {root}")
+                        self.issues_found.append({
+                            'nombre': file_name,
+                            'ruta': root,
+                            'archivo': file_path,
+                            'tipo': 'hack_file',
+                            'alerta': 'CRITICAL'
+                        })
+            
+            if planner is not None:
+                planner.add(f"specific_hacks_{drive}", [drive], file_handler=check_file, dir_handler=check_dir)
+                return
+            
             for root, dirs, files in os.walk(drive):
-                # Buscar en nombres de carpetas
                 for dir_name in dirs:
-                    dir_lower = dir_name.lower()
-                    for pattern in hack_patterns:
-                        if pattern in dir_lower:
-                            # Verificar si no es un falso positivo
-                            if not any(false_positive in dir_lower or false_positive in root.lower() 
-                                      for false_positive in false_positives):
-                                print(f"🎯 HACK DETECTADO: {dir_name} en {root}")
-                                self.issues_found.append({
-                                    'nombre': dir_name,
-                                    'ruta': root,
-                                    'archivo': os.path.join(root, dir_name),
-                                    'tipo': 'hack_folder',
-                                    'alerta': 'CRITICAL'
-                                })
-                                break  # Solo agregar una vez por carpeta
-                
-                # Buscar en nombres de archivos
+                    check_dir(dir_name, root)
                 for file_name in files:
-                    file_lower = file_name.lower()
-                    for pattern in hack_patterns:
-                        if pattern in file_lower:
-                            # Verificar si no es un falso positivo
-                            if not any(false_positive in file_lower or false_positive in root.lower() 
-                                      for false_positive in false_positives):
-                                file_path = os.path.join(root, file_name)
-                                print(f"🎯 HACK DETECTADO: {file_name} en {root}")
-                                self.issues_found.append({
-                                    'nombre': file_name,
-                                    'ruta': root,
-                                    'archivo': file_path,
-                                    'tipo': 'hack_file',
-                                    'alerta': 'CRITICAL'
-                                })
-                                break  # Solo agregar una vez por archivo
+                    check_file(file_name, root, os.path.join(root, file_name))
                                 
         except Exception as e:
             print(f"⚠️ Error en _scan_for_specific_hacks: {e}")
     
-    def scan_common_hack_locations(self):
-        """Escanea ubicaciones comunes donde se descargan hacks - MEJORADO CON MÁS UBICACIONES"""
+    def scan_common_hack_locations(self, planner=None):
+        """Escanea ubicaciones comunes donde se descargan hacks - MEJORADO CON MÁS UBICACIONES
+        
+        Con planner (ScanPlanner) se registra en el recorrido compartido en lugar de recorrer.
+        """
         try:
             print("🔍 ESCANEANDO UBICACIONES COMUNES DE HACKS...")
             import os
@@ -3922,35 +3762,45 @@ class MinecraftSSApp:
                 'undetected', 'incognito', 'minecraft', 'mc', 'jar', 'exe', 'dll'
             ]
             
+            def check_dir(dir_name, root):
+                """Buscar en nombres de carpetas"""
+                dir_lower = dir_name.lower()
+                for pattern in hack_patterns:
+                    if pattern in dir_lower:
+                        # Verificar si no es un falso positivo
+                        if not any(false_positive in dir_lower or false_positive in root.lower() 
+                                  for false_positive in ['zomboid', 'shaders', 'textures', 'media', 'vscode', 'pylance', 'skimage', 'pyi']):
+                            print(f"🎯 HACK DETECTADO EN UBICACIÓN COMÚN: {dir_name} en {root}")
+                            self.issues_found.append({
+                                'nombre': dir_name,
+                                'ruta': root,
+                                'archivo': os.path.join(root, dir_name),
+                                'tipo': 'hack_folder_common',
+                                'alerta': 'CRITICAL'
+                            })
+            
+            if planner is not None:
+                planner.add('common_hack_locations', common_locations, dir_handler=check_dir)
+                return
+            
             for location in common_locations:
                 if os.path.exists(location):
                     print(f"📁 ESCANEANDO: {location}")
                     try:
                         for root, dirs, files in os.walk(location):
-                            # Buscar en nombres de carpetas
                             for dir_name in dirs:
-                                dir_lower = dir_name.lower()
-                                for pattern in hack_patterns:
-                                    if pattern in dir_lower:
-                                        # Verificar si no es un falso positivo
-                                        if not any(false_positive in dir_lower or false_positive in root.lower() 
-                                                  for false_positive in ['zomboid', 'shaders', 'textures', 'media', 'vscode', 'pylance', 'skimage', 'pyi']):
-                                            print(f"🎯 HACK DETECTADO EN UBICACIÓN COMÚN: {dir_name} en {root}")
-                                            self.issues_found.append({
-                                                'nombre': dir_name,
-                                                'ruta': root,
-                                                'archivo': os.path.join(root, dir_name),
-                                                'tipo': 'hack_folder_common',
-                                                'alerta': 'CRITICAL'
-                                            })
+                                check_dir(dir_name, root)
                     except Exception as e:
                         print(f"Error escaneando {location}: {str(e)}")
                         continue
         except Exception as e:
             print(f"Error escaneando ubicaciones comunes: {str(e)}")
     
-    def scan_suspicious_folders(self):
-        """Escanea carpetas con nombres sospechosos en todo el sistema"""
+    def scan_suspicious_folders(self, planner=None):
+        """Escanea carpetas con nombres sospechosos en todo el sistema
+        
+        Con planner (ScanPlanner) se registra en el recorrido compartido en lugar de recorrer.
+        """
         try:
             print("🔍 ESCANEANDO CARPETAS SOSPECHOSAS EN TODO EL SISTEMA...")
             import os
@@ -3988,12 +3838,50 @@ class MinecraftSSApp:
                 'D:\\', 'E:\\', 'F:\\', 'G:\\', 'H:\\'
             ]
             
+            # Limitar profundidad para evitar cuelgues (se revisan subcarpetas de los 3 primeros niveles)
+            max_depth = 3
+            
+            def check_dir(dir_name, root):
+                """Buscar en nombres de carpetas"""
+                dir_lower = dir_name.lower()
+                for pattern in suspicious_folder_patterns:
+                    if pattern in dir_lower:
+                        # Verificar si no es un falso positivo
+                        if not any(false_positive in dir_lower or false_positive in root.lower() 
+                                  for false_positive in ['zomboid', 'shaders', 'textures', 'media', 'vscode', 'pylance', 'skimage', 'pyi', 'system32', 'program files', 'windows']):
+                            print(f"🎯 CARPETA SOSPECHOSA ENCONTRADA: {dir_name} en {root}")
+                            self.issues_found.append({
+                                'nombre': dir_name,
+                                'ruta': root,
+                                'archivo': os.path.join(root, dir_name),
+                                'tipo': 'suspicious_folder',
+                                'alerta': 'CRITICAL'
+                            })
+                            
+                            # También escanear archivos dentro de esta carpeta
+                            try:
+                                folder_path = os.path.join(root, dir_name)
+                                for file in os.listdir(folder_path):
+                                    if file.lower().endswith(('.jar', '.exe', '.dll')):
+                                        self.issues_found.append({
+                                            'nombre': file,
+                                            'ruta': folder_path,
+                                            'archivo': os.path.join(folder_path, file),
+                                            'tipo': 'hack_file',
+                                            'alerta': 'CRITICAL'
+                                        })
+                                        print(f"🎯 ARCHIVO DE HACK ENCONTRADO: {file} en {folder_path}")
+                            except:
+                                pass
+            
+            if planner is not None:
+                planner.add('suspicious_folders', search_locations, max_depth=max_depth - 1, dir_handler=check_dir)
+                return
+            
             for location in search_locations:
                 if os.path.exists(location):
                     print(f"📁 ESCANEANDO CARPETAS EN: {location}")
                     try:
-                        # Limitar profundidad para evitar cuelgues
-                        max_depth = 3
                         for root, dirs, files in os.walk(location):
                             # Controlar profundidad
                             depth = root[len(location):].count(os.sep)
@@ -4002,36 +3890,7 @@ class MinecraftSSApp:
                                 continue
                                 
                             for dir_name in dirs:
-                                dir_lower = dir_name.lower()
-                                for pattern in suspicious_folder_patterns:
-                                    if pattern in dir_lower:
-                                        # Verificar si no es un falso positivo
-                                        if not any(false_positive in dir_lower or false_positive in root.lower() 
-                                                  for false_positive in ['zomboid', 'shaders', 'textures', 'media', 'vscode', 'pylance', 'skimage', 'pyi', 'system32', 'program files', 'windows']):
-                                            print(f"🎯 CARPETA SOSPECHOSA ENCONTRADA: {dir_name} en {root}")
-                                            self.issues_found.append({
-                                                'nombre': dir_name,
-                                                'ruta': root,
-                                                'archivo': os.path.join(root, dir_name),
-                                                'tipo': 'suspicious_folder',
-                                                'alerta': 'CRITICAL'
-                                            })
-                                            
-                                            # También escanear archivos dentro de esta carpeta
-                                            try:
-                                                folder_path = os.path.join(root, dir_name)
-                                                for file in os.listdir(folder_path):
-                                                    if file.lower().endswith(('.jar', '.exe', '.dll')):
-                                                        self.issues_found.append({
-                                                            'nombre': file,
-                                                            'ruta': folder_path,
-                                                            'archivo': os.path.join(folder_path, file),
-                                                            'tipo': 'hack_file',
-                                                            'alerta': 'CRITICAL'
-                                                        })
-                                                        print(f"🎯 ARCHIVO DE HACK ENCONTRADO: {file} en {folder_path}")
-                                            except:
-                                                pass
+                                check_dir(dir_name, root)
                     except Exception as e:
                         print(f"Error escaneando {location}: {str(e)}")
                         continue
@@ -4233,8 +4092,12 @@ class MinecraftSSApp:
             print(f"Error aplicando segundo filtro: {e}")
             return issues
     
-    def secondary_scan_parallel(self):
-        """Segundo scan en paralelo para doble verificación"""
+    def secondary_scan_parallel(self, planner=None):
+        """Segundo scan en paralelo para doble verificación
+        
+        Con planner (ScanPlanner) los recorridos de carpetas se registran en el recorrido
+        compartido y aquí solo se revisan los procesos.
+        """
         try:
             print("🔍 INICIANDO SEGUNDO SCAN EN PARALELO...")
             import threading
@@ -4243,35 +4106,56 @@ class MinecraftSSApp:
             # Crear hilos para diferentes tipos de escaneo
             threads = []
             
+            critical_paths = [
+                os.path.join(os.environ.get('USERPROFILE', ''), 'Downloads'),
+                os.path.join(os.environ.get('USERPROFILE', ''), 'Desktop'),
+                os.path.join(os.environ.get('USERPROFILE', ''), 'Documents'),
+                os.path.join(os.environ.get('USERPROFILE', ''), 'AppData', 'Local'),
+                os.path.join(os.environ.get('USERPROFILE', ''), 'AppData', 'Roaming'),
+                'C:\\Temp',
+                'C:\\Windows\\Temp'
+            ]
+            critical_extensions = ('.jar', '.exe', '.dll')
+            
+            temp_paths = [
+                os.path.join(os.environ.get('TEMP', ''), ''),
+                os.path.join(os.environ.get('TMP', ''), ''),
+                'C:\\Windows\\Temp',
+                'C:\\Temp'
+            ]
+            
+            def check_critical_file(file, root, file_path):
+                if self.is_suspicious_file(file_path):
+                    self.issues_found.append({
+                        'nombre': file,
+                        'ruta': root,
+                        'archivo': file_path,
+                        'tipo': 'secondary_scan_file',
+                        'alerta': 'CRITICAL'
+                    })
+                    print(f"🔍 Segundo scan encontrado: {file}")
+            
+            def check_temp_file(file, root, file_path):
+                if any(hack in file.lower() for hack in ['flux', 'vape', 'entropy', 'hack', 'cheat']):
+                    self.issues_found.append({
+                        'nombre': file,
+                        'ruta': root,
+                        'archivo': file_path,
+                        'tipo': 'temp_hack_file',
+                        'alerta': 'CRITICAL'
+                    })
+                    print(f"🔍 Segundo scan: Archivo temporal sospechoso {file}")
+            
             # Hilo 1: Escaneo de ubicaciones críticas
             def scan_critical_locations():
                 print("🔍 Segundo scan: Ubicaciones críticas...")
-                critical_paths = [
-                    os.path.join(os.environ.get('USERPROFILE', ''), 'Downloads'),
-                    os.path.join(os.environ.get('USERPROFILE', ''), 'Desktop'),
-                    os.path.join(os.environ.get('USERPROFILE', ''), 'Documents'),
-                    os.path.join(os.environ.get('USERPROFILE', ''), 'AppData', 'Local'),
-                    os.path.join(os.environ.get('USERPROFILE', ''), 'AppData', 'Roaming'),
-                    'C:\\Temp',
-                    'C:\\Windows\\Temp'
-                ]
-                
                 for path in critical_paths:
                     if os.path.exists(path):
                         try:
                             for root, dirs, files in os.walk(path):
                                 for file in files:
-                                    if file.lower().endswith(('.jar', '.exe', '.dll')):
-                                        file_path = os.path.join(root, file)
-                                        if self.is_suspicious_file(file_path):
-                                            self.issues_found.append({
-                                                'nombre': file,
-                                                'ruta': root,
-                                                'archivo': file_path,
-                                                'tipo': 'secondary_scan_file',
-                                                'alerta': 'CRITICAL'
-                                            })
-                                            print(f"🔍 Segundo scan encontrado: {file}")
+                                    if file.lower().endswith(critical_extensions):
+                                        check_critical_file(file, root, os.path.join(root, file))
                         except Exception as e:
                             print(f"Error en segundo scan de {path}: {e}")
                             continue
@@ -4281,7 +4165,7 @@ class MinecraftSSApp:
                 print("🔍 Segundo scan: Procesos en segundo plano...")
                 try:
                     import psutil
-                    for proc in psutil.process_iter(['pid', 'name', 'exe']):
+                    for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe']):
                         try:
                             proc_name = proc.info['name'].lower()
                             if any(hack in proc_name for hack in ['flux', 'vape', 'entropy', 'wurst', 'impact']):
@@ -4301,32 +4185,25 @@ class MinecraftSSApp:
             # Hilo 3: Escaneo de archivos temporales
             def scan_temp_files():
                 print("🔍 Segundo scan: Archivos temporales...")
-                temp_paths = [
-                    os.path.join(os.environ.get('TEMP', ''), ''),
-                    os.path.join(os.environ.get('TMP', ''), ''),
-                    'C:\\Windows\\Temp',
-                    'C:\\Temp'
-                ]
-                
                 for temp_path in temp_paths:
                     if os.path.exists(temp_path):
                         try:
                             for root, dirs, files in os.walk(temp_path):
                                 for file in files:
-                                    if any(hack in file.lower() for hack in ['flux', 'vape', 'entropy', 'hack', 'cheat']):
-                                        file_path = os.path.join(root, file)
-                                        self.issues_found.append({
-                                            'nombre': file,
-                                            'ruta': root,
-                                            'archivo': file_path,
-                                            'tipo': 'temp_hack_file',
-                                            'alerta': 'CRITICAL'
-                                        })
-                                        print(f"🔍 Segundo scan: Archivo temporal sospechoso {file}")
+                                    check_temp_file(file, root, os.path.join(root, file))
                         except Exception as e:
                             print(f"Error escaneando temporales {temp_path}: {e}")
                             continue
             
+            if planner is not None:
+                # Las carpetas se recorren una sola vez junto al resto de detectores
+                planner.add('secondary_critical', critical_paths, extensions=critical_extensions,
+                            file_handler=check_critical_file)
+                planner.add('secondary_temp', [p for p in temp_paths if p.strip(os.sep)],
+                            file_handler=check_temp_file)
+                scan_background_processes()
+                return
+            
             # Ejecutar todos los hilos en paralelo
             with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
                 futures = [
@@ -4376,7 +4253,7 @@ class MinecraftSSApp:
             def scan_dll_injection():
                 print("🔍 Escaneando inyección de DLLs...")
                 try:
-                    for proc in psutil.process_iter(['pid', 'name', 'exe']):
+                    for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe']):
                         try:
                             if proc.info['name'].lower() in ['java.exe', 'javaw.exe', 'minecraft.exe']:
                                 # Obtener DLLs cargadas por el proceso
@@ -4401,7 +4278,7 @@ class MinecraftSSApp:
             def scan_memory_analysis():
                 print("🔍 Analizando memoria de procesos...")
                 try:
-                    for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
+                    for proc in get_process_snapshot().process_iter(['pid', 'name', 'memory_info']):
                         try:
                             if proc.info['name'].lower() in ['java.exe', 'javaw.exe']:
                                 # Verificar si el proceso tiene memoria sospechosa
@@ -4436,7 +4313,7 @@ class MinecraftSSApp:
                 try:
                     # Buscar procesos que usen APIs de hooking
                     hook_apis = ['SetWindowsHookEx', 'UnhookWindowsHookEx', 'CallNextHookEx']
-                    for proc in psutil.process_iter(['pid', 'name', 'exe']):
+                    for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe']):
                         try:
                             if proc.info['name'].lower() in ['java.exe', 'javaw.exe', 'minecraft.exe']:
                                 # Verificar si el proceso tiene hooks activos
@@ -4466,7 +4343,7 @@ class MinecraftSSApp:
             def scan_network_connections():
                 print("🔍 Analizando conexiones de red de Minecraft...")
                 try:
-                    for proc in psutil.process_iter(['pid', 'name', 'connections']):
+                    for proc in get_process_snapshot().process_iter(['pid', 'name', 'connections']):
                         try:
                             if proc.info['name'].lower() in ['java.exe', 'javaw.exe', 'minecraft.exe']:
                                 connections = proc.connections()
@@ -4491,7 +4368,9 @@ class MinecraftSSApp:
             
             # Ejecutar todos los análisis en paralelo
             import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            # Los hilos del pool escriben en el mismo almacén que la fase que los lanza
+            with concurrent.futures.ThreadPoolExecutor(max_workers=4, initializer=bind_store,
+                                                       initargs=(bound_store(),)) as executor:
                 futures = [
                     executor.submit(scan_dll_injection),
                     executor.submit(scan_memory_analysis),
@@ -5486,7 +5365,7 @@ class MinecraftSSApp:
         """Escanea procesos activos"""
         try:
             import psutil
-            for proc in psutil.process_iter(['pid', 'name', 'exe']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe']):
                 try:
                     proc_info = proc.info
                     if proc_info['name'] and self.is_suspicious_process(proc_info['name']):
@@ -6264,4 +6143,7 @@ def main():
             input("\nPresiona Enter para salir...")
 
 if __name__ == "__main__":
+    # Necesario para el pool de procesos (texturas X-ray) en el ejecutable de PyInstaller
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
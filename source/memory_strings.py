@@ -0,0 +1,301 @@
+"""
+Extracción de Strings de Memoria en Streaming
+Sustituye a strings2.exe (salida completa en un solo str partido en una lista): las regiones
+legibles del proceso se leen por bloques de tamaño fijo y las strings ASCII / UTF-16LE se
+entregan por lotes, así que la memoria usada no depende del tamaño del proceso (javaw con
+4 GB de heap incluido)
+
+Proveedores de memoria (misma interfaz: open / regions / read / close):
+    WindowsMemoryReader  -> VirtualQueryEx + ReadProcessMemory (producción)
+    ProcMemoryReader     -> /proc/<pid>/maps + /proc/<pid>/mem (Linux, pruebas)
+Fuentes de strings (iter_batches(pid)):
+    MemoryStringSource   -> extractor propio sobre un MemoryReader
+    Strings2StringSource -> strings2.exe leído línea a línea (solo si no hay lector nativo)
+"""
+import abc
+import ctypes
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Longitud mínima de string (igual que strings2) y máxima antes de cortarla
+MIN_LENGTH = 4
+MAX_STRING_LENGTH = 4096
+
+# Bytes leídos por llamada y strings por lote entregado
+CHUNK_SIZE = 1 << 20
+BATCH_STRINGS = 4096
+
+# Segundos máximos por proceso (el mismo límite que tenía strings2); al agotarse se usa lo leído
+READ_TIMEOUT = 30
+
+_STRING_RE = re.compile(
+    rb'[\x20-\x7e]{%d,}|(?:[\x20-\x7e]\x00){%d,}' % (MIN_LENGTH, MIN_LENGTH)
+)
+
+
+def normalize_string(text):
+    """Misma normalización que se aplicaba a la salida de strings2 (\\\\ -> /)"""
+    return text.replace('\\\\', '/')
+
+
+# ============================================================
+# LECTORES DE MEMORIA
+# ============================================================
+
+class MemoryReader(abc.ABC):
+    """Interfaz de un lector de memoria de procesos"""
+
+    @abc.abstractmethod
+    def open(self, pid):
+        """Abre el proceso; devuelve un handle o None si no se puede leer"""
+
+    @abc.abstractmethod
+    def regions(self, handle):
+        """(dirección, tamaño) de cada región legible"""
+
+    @abc.abstractmethod
+    def read(self, handle, address, size):
+        """Bytes leídos (pueden ser menos que size) o None si la región no se puede leer"""
+
+    def close(self, handle):
+        pass
+
+
+class ProcMemoryReader(MemoryReader):
+    """Linux: regiones de /proc/<pid>/maps leídas con pread sobre /proc/<pid>/mem"""
+
+    def open(self, pid):
+        try:
+            return (pid, os.open(f'/proc/{pid}/mem', os.O_RDONLY))
+        except OSError:
+            return None
+
+    def regions(self, handle):
+        pid, _ = handle
+        try:
+            with open(f'/proc/{pid}/maps', 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) < 2 or not parts[1].startswith('r'):
+                        continue
+                    if len(parts) > 5 and parts[5] in ('[vvar]', '[vsyscall]'):
+                        continue
+                    start, end = (int(value, 16) for value in parts[0].split('-'))
+                    yield start, end - start
+        except OSError:
+            return
+
+    def read(self, handle, address, size):
+        try:
+            return os.pread(handle[1], size, address)
+        except (OSError, OverflowError, ValueError):
+            return None
+
+    def close(self, handle):
+        try:
+            os.close(handle[1])
+        except OSError:
+            pass
+
+
+class WindowsMemoryReader(MemoryReader):
+    """Windows: regiones confirmadas y legibles (VirtualQueryEx) leídas con ReadProcessMemory"""
+
+    PROCESS_QUERY_INFORMATION = 0x0400
+    PROCESS_VM_READ = 0x0010
+    MEM_COMMIT = 0x1000
+    PAGE_NOACCESS = 0x01
+    PAGE_GUARD = 0x100
+
+    class MEMORY_BASIC_INFORMATION(ctypes.Structure):
+        # ctypes añade el relleno de 64 bits tras AllocationProtect
+        _fields_ = [
+            ('BaseAddress', ctypes.c_void_p),
+            ('AllocationBase', ctypes.c_void_p),
+            ('AllocationProtect', ctypes.c_uint32),
+            ('RegionSize', ctypes.c_size_t),
+            ('State', ctypes.c_uint32),
+            ('Protect', ctypes.c_uint32),
+            ('Type', ctypes.c_uint32),
+        ]
+
+    def __init__(self):
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self.kernel32.OpenProcess.restype = ctypes.c_void_p
+        self.kernel32.OpenProcess.argtypes = [ctypes.c_uint32, ctypes.c_int, ctypes.c_uint32]
+        self.kernel32.VirtualQueryEx.restype = ctypes.c_size_t
+        self.kernel32.VirtualQueryEx.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
+                                                 ctypes.c_void_p, ctypes.c_size_t]
+        self.kernel32.ReadProcessMemory.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
+                                                    ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)]
+        self.kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+        self._buffer = ctypes.create_string_buffer(CHUNK_SIZE)
+
+    def open(self, pid):
+        handle = self.kernel32.OpenProcess(self.PROCESS_QUERY_INFORMATION | self.PROCESS_VM_READ, False, pid)
+        return handle or None
+
+    def regions(self, handle):
+        info = self.MEMORY_BASIC_INFORMATION()
+        address = 0
+        while self.kernel32.VirtualQueryEx(handle, ctypes.c_void_p(address),
+                                           ctypes.byref(info), ctypes.sizeof(info)):
+            base = info.BaseAddress or 0
+            size = info.RegionSize
+            if not size:
+                break
+            if (info.State == self.MEM_COMMIT and not info.Protect & self.PAGE_NOACCESS
+                    and not info.Protect & self.PAGE_GUARD):
+                yield base, size
+            address = base + size
+
+    def read(self, handle, address, size):
+        size = min(size, CHUNK_SIZE)
+        read = ctypes.c_size_t(0)
+        ok = self.kernel32.ReadProcessMemory(handle, ctypes.c_void_p(address), self._buffer,
+                                             size, ctypes.byref(read))
+        if not ok and not read.value:
+            return None
+        return self._buffer.raw[:read.value]
+
+    def close(self, handle):
+        self.kernel32.CloseHandle(handle)
+
+
+def get_memory_reader():
+    """Lector nativo de la plataforma, o None si no hay ninguno"""
+    try:
+        if sys.platform == 'win32':
+            return WindowsMemoryReader()
+        if os.path.exists('/proc/self/mem'):
+            return ProcMemoryReader()
+    except Exception as e:
+        print(f"⚠️ Lector de memoria no disponible: {e}")
+    return None
+
+
+# ============================================================
+# EXTRACCIÓN
+# ============================================================
+
+def _decode(raw):
+    if len(raw) > 1 and raw[1] == 0:
+        return raw.decode('utf-16-le', 'ignore')
+    return raw.decode('ascii', 'ignore')
+
+
+def extract_strings(blocks):
+    """
+    Strings de una secuencia de bloques contiguos (una región): una string partida entre
+    dos bloques se une arrastrando su inicio al bloque siguiente
+    """
+    carry = b''
+    for block in blocks:
+        data = carry + block if carry else block
+        carry = None
+        end = len(data)
+        emitted_end = 0
+        for match in _STRING_RE.finditer(data):
+            # Puede continuar en el bloque siguiente (-1: el \x00 final de un UTF-16)
+            if match.end() >= end - 1 and end - match.start() < MAX_STRING_LENGTH:
+                carry = data[match.start():]
+                break
+            emitted_end = match.end()
+            yield normalize_string(_decode(match.group()))
+        if carry is None:
+            # Un inicio todavía más corto que MIN_LENGTH también puede seguir en el bloque siguiente
+            carry = data[max(end - 2 * MIN_LENGTH, emitted_end):]
+    if carry:
+        match = _STRING_RE.match(carry)
+        if match:
+            yield normalize_string(_decode(match.group()))
+
+
+class MemoryStringSource:
+    """Strings de la memoria de un proceso por lotes, con el extractor propio"""
+
+    def __init__(self, reader, chunk_size=CHUNK_SIZE, batch_size=BATCH_STRINGS, timeout=READ_TIMEOUT):
+        self.reader = reader
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+    def _blocks(self, handle, address, size, deadline):
+        offset = 0
+        while offset < size:
+            if time.monotonic() > deadline:
+                return
+            data = self.reader.read(handle, address + offset, min(self.chunk_size, size - offset))
+            if not data:
+                return
+            yield data
+            offset += len(data)
+
+    def iter_batches(self, pid):
+        """
+        Listas de como mucho batch_size strings; nunca se guarda el proceso entero.
+        Como strings2, deja de leer al superar timeout segundos y entrega lo leído
+        """
+        handle = self.reader.open(pid)
+        if handle is None:
+            return
+        deadline = time.monotonic() + self.timeout
+        try:
+            batch = []
+            for address, size in self.reader.regions(handle):
+                if time.monotonic() > deadline:
+                    print(f"⚠️ Lectura de memoria superó {self.timeout}s con el PID {pid}, se usa lo leído")
+                    break
+                for string in extract_strings(self._blocks(handle, address, size, deadline)):
+                    batch.append(string)
+                    if len(batch) >= self.batch_size:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+        finally:
+            self.reader.close(handle)
+
+
+class Strings2StringSource:
+    """Salida de strings2.exe leída en streaming (sin capturar todo stdout)"""
+
+    def __init__(self, strings2_path, batch_size=BATCH_STRINGS, timeout=READ_TIMEOUT):
+        self.strings2_path = strings2_path
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+    def iter_batches(self, pid):
+        process = subprocess.Popen(
+            [self.strings2_path, '-pid', str(pid), '-raw', '-nh'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + self.timeout
+        try:
+            batch = []
+            for line in process.stdout:
+                if time.monotonic() > deadline:
+                    print(f"⚠️ strings2 superó {self.timeout}s con el PID {pid}, se usa lo leído")
+                    break
+                string = line.rstrip(b'\r\n').decode('utf-8', 'ignore')
+                if string:
+                    batch.append(normalize_string(string))
+                    if len(batch) >= self.batch_size:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+
+
+def get_string_source():
+    """Fuente de strings con el lector nativo, o None (el llamador puede usar strings2)"""
+    reader = get_memory_reader()
+    return MemoryStringSource(reader) if reader is not None else None
@@ -9,6 +9,8 @@ import os
 import ctypes
 from ctypes import wintypes
 
+from process_snapshot import get_process_snapshot
+
 class MinecraftConnectionAnalyzer:
     """Analiza conexiones y procesos relacionados con Minecraft"""
     
@@ -23,7 +25,7 @@ class MinecraftConnectionAnalyzer:
         try:
             # Buscar todos los procesos relacionados con Java/Minecraft
             minecraft_pids = []
-            for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline', 'ppid', 'connections']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe', 'cmdline', 'ppid', 'connections']):
                 try:
                     name = proc.info['name'].lower()
                     if name in ['javaw.exe', 'java.exe', 'minecraft.exe']:
@@ -48,7 +50,7 @@ class MinecraftConnectionAnalyzer:
             # Buscar subprocesos hijos de procesos de Minecraft
             for pid in minecraft_pids:
                 try:
-                    parent = psutil.Process(pid)
+                    parent = get_process_snapshot().process(pid)
                     children = parent.children(recursive=True)
                     
                     for child in children:
@@ -76,7 +78,7 @@ class MinecraftConnectionAnalyzer:
             # Detectar DLLs inyectadas en procesos de Minecraft
             for pid in minecraft_pids:
                 try:
-                    proc = psutil.Process(pid)
+                    proc = get_process_snapshot().process(pid)
                     memory_maps = proc.memory_maps()
                     
                     for mem_map in memory_maps:
@@ -119,7 +121,7 @@ class MinecraftConnectionAnalyzer:
                 'svchost', 'services', 'dwm', 'csrss',  # Procesos del sistema comúnmente suplantados
             ]
             
-            for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe', 'cmdline']):
                 try:
                     name = proc.info['name'].lower()
                     exe = proc.info.get('exe', '').lower()
@@ -166,7 +168,7 @@ class MinecraftConnectionAnalyzer:
         """Extrae el username de Minecraft desde conexiones de red activas"""
         try:
             # Buscar procesos de Minecraft con conexiones activas
-            for proc in psutil.process_iter(['pid', 'name', 'connections']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'connections']):
                 try:
                     name = proc.info['name'].lower()
                     if name not in ['javaw.exe', 'java.exe', 'minecraft.exe']:
@@ -230,7 +232,7 @@ class MinecraftConnectionAnalyzer:
                 'opautoclicker', 'autoclicker', 'rapidclick'
             ]
             
-            for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe', 'cmdline']):
                 try:
                     name = proc.info['name'].lower()
                     exe = proc.info.get('exe', '').lower()
@@ -0,0 +1,188 @@
+"""
+Recorrido Paralelo de Directorios
+Divide el árbol de directorios entre varios hilos (os.scandir) y entrega los archivos
+a un grupo separado de hilos de análisis mediante una cola acotada
+"""
+import os
+import queue
+import threading
+import time
+
+# Tamaño máximo de la cola de archivos pendientes de análisis (contrapresión sobre los hilos que recorren)
+FILE_QUEUE_SIZE = 10000
+
+
+class ScanRoot:
+    """Carpeta raíz a recorrer con sus propios límites"""
+
+    __slots__ = ('path', 'max_depth', 'extensions', 'timeout')
+
+    def __init__(self, path, max_depth, extensions=None, timeout=None):
+        self.path = path
+        self.max_depth = max_depth      # Profundidad máxima (0 = solo la raíz, None = sin límite)
+        self.extensions = extensions    # Tupla de extensiones relevantes (None = todas, () = ninguna)
+        self.timeout = timeout          # Segundos máximos para esta raíz (None = solo timeout total)
+
+
+class ParallelDirectoryWalker:
+    """
+    Recorrido de directorios con robo de trabajo
+
+    Los hilos de recorrido comparten una pila (LIFO) de directorios pendientes: cada hilo
+    toma el siguiente directorio libre, lo lista con os.scandir y apila sus subcarpetas,
+    de modo que un subárbol grande se reparte automáticamente entre todos los hilos.
+    Los archivos relevantes pasan por una cola acotada a los hilos de análisis.
+
+    Callbacks:
+        file_callback(file_name, dir_path, file_path): se ejecuta en los hilos de análisis
+        dir_callback(dir_name, parent_path): se ejecuta en los hilos de recorrido por cada subcarpeta
+        skip_predicate(parent_path, dir_name): si se indica, reemplaza la poda por skip_folders;
+            la subcarpeta se notifica a dir_callback igualmente pero no se recorre si devuelve True
+    """
+
+    def __init__(self, file_callback, dir_callback=None, skip_folders=None,
+                 walker_threads=4, analysis_threads=4, total_timeout=None,
+                 queue_size=FILE_QUEUE_SIZE, skip_predicate=None):
+        self.file_callback = file_callback
+        self.dir_callback = dir_callback
+        self.skip_folders = skip_folders or set()
+        self.skip_predicate = skip_predicate
+        self.walker_threads = max(1, walker_threads)
+        self.analysis_threads = max(1, analysis_threads)
+        self.total_timeout = total_timeout
+        self.queue_size = queue_size
+
+        # Estadísticas
+        self.files_processed = 0
+        self.dirs_scanned = 0
+        self.timed_out = False
+        self._stats_lock = threading.Lock()
+
+    def _should_skip(self, parent_path, dir_name):
+        """Misma regla de poda que el recorrido con os.walk"""
+        full_path_lower = os.path.join(parent_path, dir_name).lower()
+        return any(skip in full_path_lower for skip in self.skip_folders)
+
+    def walk(self, roots):
+        """
+        Recorre todas las raíces en paralelo y espera a que termine el análisis
+
+        Returns:
+            Dict con files_processed, dirs_scanned, elapsed y timed_out
+        """
+        start_time = time.time()
+        deadline = start_time + self.total_timeout if self.total_timeout else None
+
+        dir_stack = queue.LifoQueue()
+        file_queue = queue.Queue(maxsize=self.queue_size)
+        stop_event = threading.Event()
+
+        # Directorios pendientes (en pila o en proceso); al llegar a 0 terminó el recorrido
+        pending = [0]
+        pending_lock = threading.Lock()
+        walk_done = threading.Event()
+
+        for root in roots:
+            if not os.path.isdir(root.path):
+                continue
+            root_deadline = start_time + root.timeout if root.timeout else None
+            with pending_lock:
+                pending[0] += 1
+            dir_stack.put((root.path, 0, root, root_deadline))
+
+        if pending[0] == 0:
+            return {'files_processed': 0, 'dirs_scanned': 0, 'elapsed': 0.0, 'timed_out': False}
+
+        def finish_dir():
+            with pending_lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    walk_done.set()
+
+        def walker_worker():
+            while not walk_done.is_set():
+                try:
+                    dir_path, depth, root, root_deadline = dir_stack.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+                try:
+                    now = time.time()
+                    if stop_event.is_set() or (deadline and now > deadline):
+                        self.timed_out = True
+                        stop_event.set()
+                        continue
+                    if root_deadline and now > root_deadline:
+                        continue
+
+                    try:
+                        with os.scandir(dir_path) as entries:
+                            entries = list(entries)
+                    except (PermissionError, OSError):
+                        continue
+
+                    with self._stats_lock:
+                        self.dirs_scanned += 1
+
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.skip_predicate is None and self._should_skip(dir_path, entry.name):
+                                    continue
+                                if self.dir_callback:
+                                    self.dir_callback(entry.name, dir_path)
+                                if self.skip_predicate is not None and self.skip_predicate(dir_path, entry.name):
+                                    continue
+                                if root.max_depth is None or depth + 1 <= root.max_depth:
+                                    with pending_lock:
+                                        pending[0] += 1
+                                    dir_stack.put((entry.path, depth + 1, root, root_deadline))
+                            elif entry.is_file(follow_symlinks=False):
+                                if root.extensions is not None and not entry.name.lower().endswith(root.extensions):
+                                    continue
+                                # Bloquea si la cola está llena (contrapresión), sin ignorar el timeout
+                                while not stop_event.is_set():
+                                    try:
+                                        file_queue.put((entry.name, dir_path, entry.path), timeout=0.5)
+                                        break
+                                    except queue.Full:
+                                        if deadline and time.time() > deadline:
+                                            self.timed_out = True
+                                            stop_event.set()
+                        except Exception:
+                            continue
+                finally:
+                    finish_dir()
+
+        def analysis_worker():
+            while True:
+                item = file_queue.get()
+                if item is None:
+                    return
+                if stop_event.is_set():
+                    continue  # Vaciar la cola sin analizar tras el timeout
+                try:
+                    self.file_callback(*item)
+                except Exception:
+                    pass
+                with self._stats_lock:
+                    self.files_processed += 1
+
+        walkers = [threading.Thread(target=walker_worker, daemon=True) for _ in range(self.walker_threads)]
+        analyzers = [threading.Thread(target=analysis_worker, daemon=True) for _ in range(self.analysis_threads)]
+        for thread in walkers + analyzers:
+            thread.start()
+
+        for thread in walkers:
+            thread.join()
+        for _ in analyzers:
+            file_queue.put(None)
+        for thread in analyzers:
+            thread.join()
+
+        return {
+            'files_processed': self.files_processed,
+            'dirs_scanned': self.dirs_scanned,
+            'elapsed': time.time() - start_time,
+            'timed_out': self.timed_out
+        }
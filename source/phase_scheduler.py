@@ -0,0 +1,202 @@
+"""
+Planificador de Fases del Escaneo
+Cada detector declara sus dependencias, su clase de recurso (cpu, disk o subprocess) y su
+timeout; las fases independientes se ejecutan en paralelo con un límite por clase, y el
+progreso se calcula a partir del peso de las fases terminadas
+"""
+import contextlib
+import os
+import threading
+import time
+
+# Fases simultáneas por clase de recurso
+RESOURCE_LIMITS = {
+    'cpu': max(2, os.cpu_count() or 2),
+    'disk': 2,          # Recorridos de carpetas: más hilos solo compiten por el mismo disco
+    'subprocess': 4,    # sc, ipconfig, tasklist, fsutil, wevtutil... pasan casi todo el tiempo esperando
+}
+
+# Cada cuánto se revisan timeouts aunque ninguna fase haya terminado (segundos)
+POLL_INTERVAL = 0.2
+
+
+class Phase:
+    """Fase del escaneo: función sin argumentos más sus restricciones"""
+
+    __slots__ = ('name', 'func', 'resource', 'weight', 'timeout', 'depends_on', 'label', 'detail',
+                 'status', 'started_at', 'elapsed', 'result', 'error')
+
+    def __init__(self, name, func, resource='cpu', weight=1, timeout=None, depends_on=(),
+                 label=None, detail=''):
+        self.name = name
+        self.func = func
+        self.resource = resource
+        self.weight = weight
+        self.timeout = timeout
+        self.depends_on = tuple(depends_on)
+        self.label = label or name
+        self.detail = detail
+        self.status = 'pending'     # pending -> running -> ok / error / timeout
+        self.started_at = None
+        self.elapsed = None
+        self.result = None
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.status in ('ok', 'error', 'timeout')
+
+
+class PhaseScheduler:
+    """
+    Ejecuta un grafo de fases
+
+    Uso:
+        scheduler = PhaseScheduler(progress_callback=cb, progress_range=(80, 99))
+        scheduler.add('snapshot', tomar_instantanea, resource='cpu')
+        scheduler.add('procesos', self.scan_processes, depends_on=['snapshot'])
+        scheduler.add('dns', self.scan_dns_cache, resource='subprocess', timeout=60)
+        results = scheduler.run()
+
+    Una fase que falla o supera su timeout cuenta como terminada para sus dependientes
+    (igual que antes, un detector con error no detiene el escaneo). Un hilo que supera
+    su timeout no se puede interrumpir: se deja terminar en segundo plano.
+
+    phase_context: fábrica de context managers con la que se envuelve cada fase en su
+    hilo (p. ej. FindingsStore.collecting, para que una fase vencida siga escribiendo en
+    el almacén de su escaneo)
+    """
+
+    def __init__(self, progress_callback=None, progress_range=(0, 100), limits=None, phase_context=None):
+        self.progress_callback = progress_callback
+        self.progress_range = progress_range
+        self.phase_context = phase_context
+        self.limits = dict(RESOURCE_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.phases = {}
+        self._order = []
+
+    def add(self, name, func, resource='cpu', weight=1, timeout=None, depends_on=(), label=None, detail=''):
+        """Declara una fase"""
+        if name in self.phases:
+            raise ValueError(f"Fase duplicada: {name}")
+        if resource not in self.limits:
+            raise ValueError(f"Clase de recurso desconocida: {resource}")
+        self.phases[name] = Phase(name, func, resource=resource, weight=weight, timeout=timeout,
+                                  depends_on=depends_on, label=label, detail=detail)
+        self._order.append(name)
+
+    def _validate(self):
+        """Dependencias existentes y sin ciclos"""
+        for phase in self.phases.values():
+            for dependency in phase.depends_on:
+                if dependency not in self.phases:
+                    raise ValueError(f"La fase {phase.name} depende de una fase inexistente: {dependency}")
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Ciclo de dependencias en la fase {name}")
+            visiting.add(name)
+            for dependency in self.phases[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self._order:
+            visit(name)
+
+    def _report_progress(self, phase):
+        if not self.progress_callback:
+            return
+        total = sum(p.weight for p in self.phases.values()) or 1
+        completed = sum(p.weight for p in self.phases.values() if p.finished)
+        start, end = self.progress_range
+        progress = start + (end - start) * completed / total
+        try:
+            self.progress_callback(int(progress), phase.label, phase.detail)
+        except Exception:
+            pass
+
+    def run(self):
+        """
+        Ejecuta todas las fases respetando dependencias y límites por recurso
+
+        Returns:
+            Dict nombre -> {'status', 'elapsed', 'result', 'error'}
+        """
+        self._validate()
+        condition = threading.Condition()
+        in_use = {resource: 0 for resource in self.limits}
+        run_start = time.time()
+
+        def worker(phase):
+            try:
+                with self.phase_context() if self.phase_context else contextlib.nullcontext():
+                    result = phase.func()
+                status, error = 'ok', None
+            except Exception as e:
+                result, status, error = None, 'error', e
+                print(f"⚠️ Error en fase {phase.name}: {e}")
+            with condition:
+                if phase.status == 'running':
+                    phase.result = result
+                    phase.error = error
+                    phase.status = status
+                    phase.elapsed = time.time() - phase.started_at
+                    in_use[phase.resource] -= 1
+                    finished_now = True
+                else:
+                    finished_now = False  # Ya se había dado por vencida (timeout)
+                condition.notify_all()
+            if finished_now:
+                self._report_progress(phase)
+
+        with condition:
+            while True:
+                # Lanzar en orden de declaración las fases listas con recurso libre
+                for name in self._order:
+                    phase = self.phases[name]
+                    if phase.status != 'pending':
+                        continue
+                    if not all(self.phases[d].finished for d in phase.depends_on):
+                        continue
+                    if in_use[phase.resource] >= self.limits[phase.resource]:
+                        continue
+                    phase.status = 'running'
+                    phase.started_at = time.time()
+                    in_use[phase.resource] += 1
+                    self._report_progress(phase)
+                    threading.Thread(target=worker, args=(phase,), daemon=True,
+                                     name=f"fase-{phase.name}").start()
+
+                if all(phase.finished for phase in self.phases.values()):
+                    break
+
+                condition.wait(timeout=POLL_INTERVAL)
+
+                # Timeouts: la fase se da por terminada y libera su plaza
+                now = time.time()
+                for phase in self.phases.values():
+                    if phase.status == 'running' and phase.timeout and now - phase.started_at > phase.timeout:
+                        phase.status = 'timeout'
+                        phase.elapsed = now - phase.started_at
+                        in_use[phase.resource] -= 1
+                        print(f"⏰ Timeout en fase {phase.name} después de {phase.timeout}s - continuando...")
+
+        elapsed = time.time() - run_start
+        busy = sum(phase.elapsed or 0 for phase in self.phases.values())
+        print(f"✅ {len(self.phases)} fases en {elapsed:.1f}s (suma secuencial: {busy:.1f}s)")
+
+        return {
+            name: {
+                'status': phase.status,
+                'elapsed': phase.elapsed,
+                'result': phase.result,
+                'error': phase.error
+            }
+            for name, phase in self.phases.items()
+        }
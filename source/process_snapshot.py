@@ -0,0 +1,286 @@
+"""
+Instantánea de Procesos Compartida
+Los detectores de procesos (inyección Java, autoclickers, conexiones de Minecraft, técnicas
+Silent-scanner / AstroSS, escaneo de procesos) consultan la MISMA lista de procesos en lugar
+de recorrer psutil.process_iter cada uno por su cuenta. Cada campo (cmdline, connections,
+memory_maps...) se pide al sistema una sola vez por proceso y solo si algún detector lo usa
+"""
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Antigüedad máxima de la instantánea fuera de un escaneo (segundos): un proceso abierto
+# después de tomarla no puede quedar oculto más de unos segundos
+SNAPSHOT_MAX_AGE = 5
+
+# Campos disponibles (mismos nombres que psutil)
+PROCESS_FIELDS = (
+    'pid', 'name', 'exe', 'cmdline', 'ppid', 'create_time', 'status',
+    'memory_info', 'memory_maps', 'connections'
+)
+
+
+def _no_such_process(pid):
+    if psutil is not None:
+        return psutil.NoSuchProcess(pid)
+    return LookupError(f"No existe el proceso {pid}")
+
+
+class PsutilProcessProvider:
+    """Proveedor real: enumera procesos con psutil y lee cada campo bajo demanda"""
+
+    def list_processes(self):
+        """Lista de (pid, handle) de los procesos actuales"""
+        return [(proc.pid, proc) for proc in psutil.process_iter()]
+
+    def fetch(self, handle, field):
+        """Lee un campo del proceso (puede lanzar NoSuchProcess / AccessDenied)"""
+        if field == 'pid':
+            return handle.pid
+        if field == 'connections':
+            # psutil >= 6 renombró connections() a net_connections()
+            method = getattr(handle, 'net_connections', None) or handle.connections
+            return method()
+        return getattr(handle, field)()
+
+
+class FakeProcessProvider:
+    """
+    Proveedor de prueba a partir de diccionarios
+
+    Ejemplo:
+        FakeProcessProvider([
+            {'pid': 10, 'name': 'javaw.exe', 'cmdline': ['javaw', '-javaagent:vape.jar'], 'ppid': 1},
+            {'pid': 11, 'name': 'inject.exe', 'ppid': 10, 'connections': psutil.AccessDenied(11)},
+        ])
+
+    Un campo ausente devuelve None; si el valor es una excepción, se lanza al leerlo.
+    """
+
+    def __init__(self, processes):
+        self.processes = [dict(proc) for proc in processes]
+        self.fetch_count = 0
+
+    def list_processes(self):
+        return [(proc['pid'], proc) for proc in self.processes]
+
+    def fetch(self, handle, field):
+        self.fetch_count += 1
+        value = handle.get(field)
+        if isinstance(value, BaseException):
+            raise value
+        return value
+
+
+class ProcessRecord:
+    """
+    Proceso de la instantánea, compatible con el uso habitual de psutil.Process:
+    proc.pid, proc.info[...] y proc.name() / exe() / cmdline() / connections() / children()...
+    """
+
+    __slots__ = ('pid', 'info', '_snapshot', '_handle', '_errors', '_lock')
+
+    def __init__(self, snapshot, pid, handle):
+        self.pid = pid
+        self.info = {'pid': pid}
+        self._snapshot = snapshot
+        self._handle = handle
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, fields):
+        """Carga los campos pedidos en info (None si no se pueden leer, como psutil)"""
+        for field in fields:
+            if field not in self.info and field not in self._errors:
+                self._load(field)
+
+    def _load(self, field):
+        with self._lock:
+            if field in self.info or field in self._errors:
+                return
+            try:
+                self.info[field] = self._snapshot.provider.fetch(self._handle, field)
+            except Exception as e:
+                self._errors[field] = e
+                self.info[field] = None
+
+    def _value(self, field):
+        self.prefetch((field,))
+        error = self._errors.get(field)
+        if error is not None:
+            raise error
+        return self.info[field]
+
+    def name(self):
+        return self._value('name')
+
+    def exe(self):
+        return self._value('exe')
+
+    def cmdline(self):
+        return self._value('cmdline')
+
+    def ppid(self):
+        return self._value('ppid')
+
+    def create_time(self):
+        return self._value('create_time')
+
+    def status(self):
+        return self._value('status')
+
+    def memory_info(self):
+        return self._value('memory_info')
+
+    def memory_maps(self):
+        return self._value('memory_maps')
+
+    def connections(self):
+        return self._value('connections')
+
+    net_connections = connections
+
+    def children(self, recursive=False):
+        return self._snapshot.children(self.pid, recursive=recursive)
+
+    def parent(self):
+        try:
+            return self._snapshot.get(self.ppid())
+        except Exception:
+            return None
+
+    def __repr__(self):
+        return f"ProcessRecord(pid={self.pid}, name={self.info.get('name')!r})"
+
+
+class ProcessSnapshot:
+    """
+    Lista de procesos tomada una vez y compartida por todos los detectores
+
+    Uso:
+        snapshot = get_process_snapshot()
+        for proc in snapshot.process_iter(['pid', 'name', 'cmdline']):
+            ...
+        snapshot.process(pid).memory_maps()
+
+    Cada escaneo la toma de nuevo al empezar (begin_scan) y la comparte hasta terminar
+    (end_scan); fuera de un escaneo caduca a los max_age segundos
+    """
+
+    def __init__(self, provider=None, max_age=SNAPSHOT_MAX_AGE):
+        if provider is None:
+            if psutil is None:
+                raise ImportError("psutil no está disponible")
+            provider = PsutilProcessProvider()
+        self.provider = provider
+        self.max_age = max_age
+        self.taken_at = None
+        self._records = {}
+        self._children = None
+        self._scans = 0     # Escaneos en curso: mientras haya alguno la instantánea no caduca
+        self._lock = threading.Lock()
+
+    def begin_scan(self):
+        """Enumera los procesos al empezar un escaneo y los comparte hasta end_scan()"""
+        self.refresh()
+        with self._lock:
+            self._scans += 1
+
+    def end_scan(self):
+        with self._lock:
+            self._scans = max(0, self._scans - 1)
+
+    def refresh(self):
+        """Vuelve a enumerar los procesos (los campos se leerán de nuevo bajo demanda)"""
+        records = {}
+        for pid, handle in self.provider.list_processes():
+            records[pid] = ProcessRecord(self, pid, handle)
+        with self._lock:
+            self._records = records
+            self._children = None
+            self.taken_at = time.time()
+
+    def _ensure_fresh(self):
+        if self.taken_at is None:
+            self.refresh()
+        elif not self._scans and self.max_age is not None and time.time() - self.taken_at > self.max_age:
+            self.refresh()
+
+    def records(self):
+        """Procesos de la instantánea (ordenados por pid)"""
+        self._ensure_fresh()
+        return [self._records[pid] for pid in sorted(self._records)]
+
+    def process_iter(self, attrs=None):
+        """Equivalente a psutil.process_iter(attrs) sobre la instantánea"""
+        for record in self.records():
+            if attrs:
+                record.prefetch(attrs)
+            yield record
+
+    def get(self, pid):
+        """Proceso por pid o None"""
+        self._ensure_fresh()
+        return self._records.get(pid)
+
+    def process(self, pid):
+        """Equivalente a psutil.Process(pid): lanza NoSuchProcess si no está en la instantánea"""
+        record = self.get(pid)
+        if record is None:
+            raise _no_such_process(pid)
+        return record
+
+    def children(self, pid, recursive=False):
+        """Hijos de un proceso según ppid (índice construido una vez por instantánea)"""
+        self._ensure_fresh()
+        with self._lock:
+            if self._children is None:
+                index = {}
+                for record in self._records.values():
+                    try:
+                        parent_pid = record.ppid()
+                    except Exception:
+                        continue
+                    if parent_pid is not None and parent_pid != record.pid:
+                        index.setdefault(parent_pid, []).append(record)
+                self._children = index
+            index = self._children
+
+        result = list(index.get(pid, []))
+        if recursive:
+            seen = {pid}
+            pending = list(result)
+            result = []
+            while pending:
+                child = pending.pop()
+                if child.pid in seen:
+                    continue
+                seen.add(child.pid)
+                result.append(child)
+                pending.extend(index.get(child.pid, []))
+        return result
+
+
+# Instancia compartida del proceso
+_shared_snapshot = None
+_shared_lock = threading.Lock()
+
+
+def get_process_snapshot():
+    """Instantánea compartida por todos los detectores"""
+    global _shared_snapshot
+    with _shared_lock:
+        if _shared_snapshot is None:
+            _shared_snapshot = ProcessSnapshot()
+        return _shared_snapshot
+
+
+def set_process_snapshot(snapshot):
+    """Reemplaza la instantánea compartida (por ejemplo con un FakeProcessProvider en pruebas)"""
+    global _shared_snapshot
+    with _shared_lock:
+        _shared_snapshot = snapshot
@@ -0,0 +1,150 @@
+"""
+Formato Columnar de Resultados
+Codificación compacta de un bloque de resultados para la subida a la API, en lugar de un
+objeto JSON por resultado con las mismas claves repetidas:
+- Una tabla de strings internadas ('strings'): rutas, tipos, alertas, categorías, patrones,
+  hashes y textos de ai_analysis aparecen una sola vez por bloque y las columnas guardan
+  su índice
+- 'archivo' no se envía cuando es ruta + separador + nombre (caso habitual)
+- Arrays paralelos para los campos numéricos (confidence, ai_confidence, obfuscation)
+
+Se negocia con la API: el cursor de /results/stream anuncia los formatos aceptados
+('formats') y el bloque declara el suyo en Content-Type
+"""
+
+CONTENT_TYPE = 'application/vnd.asperss.result-columns+json'
+FORMAT_NAME = 'columns'
+FORMAT_VERSION = 1
+
+# Columnas de strings (índices en la tabla) y columnas numéricas (valores tal cual)
+STRING_FIELDS = ('tipo', 'nombre', 'ruta', 'categoria', 'alerta', 'file_hash', 'ai_analysis')
+NUMBER_FIELDS = ('confidence', 'ai_confidence')
+
+# Valores especiales de la columna 'archivo'
+ARCHIVO_JOIN_BACKSLASH = -1   # ruta + '\\' + nombre
+ARCHIVO_JOIN_SLASH = -2       # ruta + '/' + nombre
+
+
+class _StringTable:
+    """Tabla de valores internados en orden de aparición"""
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def add(self, value):
+        # El tipo forma parte de la clave: True, 1 y 1.0 no se confunden
+        key = (type(value).__name__, value if isinstance(value, (str, int, float, bool, type(None)))
+               else repr(value))
+        position = self._index.get(key)
+        if position is None:
+            position = self._index[key] = len(self.values)
+            self.values.append(value)
+        return position
+
+
+def _archivo_code(result, table):
+    archivo = result.get('archivo')
+    ruta = result.get('ruta')
+    nombre = result.get('nombre')
+    if isinstance(archivo, str) and isinstance(ruta, str) and isinstance(nombre, str) and ruta and nombre:
+        if archivo == ruta + '\\' + nombre:
+            return ARCHIVO_JOIN_BACKSLASH
+        if archivo == ruta + '/' + nombre:
+            return ARCHIVO_JOIN_SLASH
+    return table.add(archivo)
+
+
+def encode(results):
+    """
+    Codifica una lista de resultados (dicts de result_payload) en un objeto columnar
+    listo para json.dumps
+    """
+    table = _StringTable()
+    columns = {field: [] for field in STRING_FIELDS + NUMBER_FIELDS}
+    columns['archivo'] = []
+    columns['obfuscation'] = []
+    columns['detected_patterns'] = []
+    for result in results:
+        for field in STRING_FIELDS:
+            columns[field].append(table.add(result.get(field, '')))
+        for field in NUMBER_FIELDS:
+            columns[field].append(result.get(field, 0))
+        columns['archivo'].append(_archivo_code(result, table))
+        columns['obfuscation'].append(1 if result.get('obfuscation') else 0)
+        columns['detected_patterns'].append([table.add(pattern) for pattern in result.get('detected_patterns') or []])
+    return {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'count': len(columns['tipo']),
+        'strings': table.values,
+        'columns': columns,
+    }
+
+
+def decode_columns(payload):
+    """
+    Valida un objeto columnar y devuelve sus columnas ya resueltas (listas paralelas de
+    valores, una por campo). Lanza ValueError si el objeto no es válido
+    """
+    if not isinstance(payload, dict) or payload.get('format') != FORMAT_NAME:
+        raise ValueError("No es un bloque en formato columnar")
+    if payload.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Versión de formato columnar no soportada: {payload.get('version')}")
+    count = payload.get('count')
+    strings = payload.get('strings')
+    columns = payload.get('columns')
+    if not isinstance(count, int) or count < 0 or not isinstance(strings, list) or not isinstance(columns, dict):
+        raise ValueError("Bloque columnar incompleto")
+
+    def column(field):
+        values = columns.get(field)
+        if not isinstance(values, list) or len(values) != count:
+            raise ValueError(f"Columna '{field}' ausente o con longitud distinta de {count}")
+        return values
+
+    def resolve(field, index):
+        if not isinstance(index, int) or not 0 <= index < len(strings):
+            raise ValueError(f"Índice de string fuera de rango en '{field}': {index}")
+        return strings[index]
+
+    decoded = {}
+    for field in STRING_FIELDS:
+        decoded[field] = [resolve(field, index) for index in column(field)]
+    for field in NUMBER_FIELDS:
+        decoded[field] = column(field)
+    decoded['obfuscation'] = [bool(value) for value in column('obfuscation')]
+
+    archivos = []
+    for code, ruta, nombre in zip(column('archivo'), decoded['ruta'], decoded['nombre']):
+        if code == ARCHIVO_JOIN_BACKSLASH:
+            archivos.append(f"{ruta}\\{nombre}")
+        elif code == ARCHIVO_JOIN_SLASH:
+            archivos.append(f"{ruta}/{nombre}")
+        else:
+            archivos.append(resolve('archivo', code))
+    decoded['archivo'] = archivos
+
+    patterns = []
+    for indexes in column('detected_patterns'):
+        if not isinstance(indexes, list):
+            raise ValueError("Columna 'detected_patterns' debe contener listas")
+        for index in indexes:
+            resolve('detected_patterns', index)
+        patterns.append(tuple(indexes))
+    # Se dejan como tuplas de índices: el servidor cachea su JSON por combinación
+    decoded['detected_patterns'] = patterns
+    decoded['strings'] = strings
+    return decoded
+
+
+def decode(payload):
+    """Resultados como dicts (mismas claves que result_payload)"""
+    columns = decode_columns(payload)
+    strings = columns['strings']
+    for position in range(len(columns['tipo'])):
+        result = {field: columns[field][position] for field in STRING_FIELDS + NUMBER_FIELDS}
+        result['archivo'] = columns['archivo'][position]
+        result['obfuscation'] = columns['obfuscation'][position]
+        result['detected_patterns'] = [strings[index] for index in columns['detected_patterns'][position]]
+        yield result
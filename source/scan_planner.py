@@ -0,0 +1,243 @@
+"""
+Planificador de Recorridos de Disco
+Los detectores registran qué carpetas quieren revisar; el planificador reduce todas las raíces
+a un conjunto mínimo sin solapamientos, recorre cada carpeta UNA sola vez (parallel_walker.py)
+y entrega cada archivo / subcarpeta a todos los detectores que la pidieron
+"""
+import os
+import threading
+import time
+
+from parallel_walker import ParallelDirectoryWalker, ScanRoot
+
+# Máximo de carpetas con detectores precalculados en memoria (se vacía al superarlo)
+DIR_MATCH_CACHE_SIZE = 50000
+
+
+def normalize_path(path):
+    """Clave de comparación de rutas (absoluta, normalizada, sin distinguir mayúsculas en Windows)"""
+    return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+
+def _path_prefix(key):
+    """Prefijo para comprobar si otra ruta está dentro de esta ('C:\\' ya termina en separador)"""
+    return key if key.endswith(os.sep) else key + os.sep
+
+
+class ScanRequest:
+    """Petición de un detector sobre una carpeta raíz"""
+
+    __slots__ = ('detector', 'path', 'key', 'max_depth', 'extensions', 'skip_folders',
+                 'file_handler', 'dir_handler', 'timeout', 'deadline')
+
+    def __init__(self, detector, path, max_depth=None, extensions=None, skip_folders=None,
+                 file_handler=None, dir_handler=None, timeout=None):
+        self.detector = detector
+        self.path = path
+        self.key = normalize_path(path)
+        self.max_depth = max_depth          # None = sin límite
+        self.extensions = extensions        # None = todos los archivos
+        self.skip_folders = skip_folders    # Misma regla que os.walk: subcadena en la ruta completa
+        self.file_handler = file_handler    # file_handler(file_name, dir_path, file_path)
+        self.dir_handler = dir_handler      # dir_handler(dir_name, parent_path)
+        self.timeout = timeout              # Segundos desde el inicio del recorrido (None = sin límite)
+        self.deadline = None
+
+    def is_expired(self, now):
+        return self.deadline is not None and now > self.deadline
+
+    def is_skipped(self, dir_path_lower):
+        return bool(self.skip_folders) and any(skip in dir_path_lower for skip in self.skip_folders)
+
+
+class ScanPlanner:
+    """
+    Planificador de recorridos compartidos
+
+    Uso:
+        planner = ScanPlanner()
+        planner.add('jars', [ruta1, ruta2], max_depth=10, extensions=('.jar',), file_handler=f)
+        planner.add('carpetas', [ruta1], dir_handler=g)
+        stats = planner.run(walker_threads=8, analysis_threads=8)
+
+    Si un mismo detector registra raíces solapadas con el mismo handler, el handler se
+    llama una sola vez por archivo.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.detector_counts = {}
+        self._dir_match_cache = {}
+        self._root_keys = set()
+        self._counts_lock = threading.Lock()
+
+    def add(self, detector, roots, max_depth=None, extensions=None, skip_folders=None,
+            file_handler=None, dir_handler=None, timeout=None):
+        """Registra las carpetas raíz que necesita un detector"""
+        for root in roots:
+            if not root:
+                continue
+            self.requests.append(ScanRequest(
+                detector, root, max_depth=max_depth, extensions=extensions,
+                skip_folders=skip_folders, file_handler=file_handler,
+                dir_handler=dir_handler, timeout=timeout
+            ))
+
+    def plan(self):
+        """
+        Reduce las raíces pedidas a un conjunto sin solapamientos
+
+        Cada raíz registrada se recorre por separado y la raíz que la contiene se poda en
+        ella: los límites de una petición menos profunda (max_depth, skip_folders, timeout)
+        nunca dejan sin recorrer la raíz anidada de otro detector
+
+        Returns:
+            Lista de ScanRoot: cada carpeta del disco queda bajo una sola raíz
+        """
+        existing = [r for r in self.requests if os.path.isdir(r.path)]
+        self._root_keys = {r.key for r in existing}
+
+        roots = {}
+        for request in existing:
+            roots.setdefault(request.key, request.path)
+
+        scan_roots = []
+        for key, path in sorted(roots.items(), key=lambda item: item[0].split(os.sep)):
+            key_lower = path.lower()
+            max_depth = 0
+            extensions = set()
+            timeout = 0
+            for request in existing:
+                # Peticiones que cubren esta raíz: la suya y las de carpetas superiores
+                if request.key == key:
+                    offset = 0
+                elif key.startswith(_path_prefix(request.key)):
+                    if request.is_skipped(key_lower):
+                        continue
+                    offset = key[len(_path_prefix(request.key)):].count(os.sep) + 1
+                    if request.max_depth is not None and offset > request.max_depth:
+                        continue
+                else:
+                    continue
+                # Profundidad necesaria bajo esta raíz = lo que le queda a la petición
+                if max_depth is not None:
+                    max_depth = None if request.max_depth is None else max(max_depth, request.max_depth - offset)
+                if request.file_handler and extensions is not None:
+                    extensions = None if request.extensions is None else extensions | set(request.extensions)
+                if timeout is not None:
+                    timeout = None if request.timeout is None else max(timeout, request.timeout)
+            scan_roots.append(ScanRoot(
+                path, max_depth,
+                tuple(extensions) if extensions is not None else None,
+                timeout=timeout
+            ))
+        return scan_roots
+
+    def _matching_requests(self, dir_path):
+        """Peticiones que cubren una carpeta: lista de (petición, profundidad relativa)"""
+        matches = self._dir_match_cache.get(dir_path)
+        if matches is not None:
+            return matches
+
+        key = normalize_path(dir_path)
+        dir_lower = dir_path.lower()
+        matches = []
+        for request in self.requests:
+            if key == request.key:
+                matches.append((request, 0))
+            elif key.startswith(_path_prefix(request.key)):
+                # Regla de poda original: la ruta completa de la carpeta contiene una carpeta a saltar
+                if request.is_skipped(dir_lower):
+                    continue
+                depth = key[len(_path_prefix(request.key)):].count(os.sep) + 1
+                if request.max_depth is None or depth <= request.max_depth:
+                    matches.append((request, depth))
+
+        if len(self._dir_match_cache) > DIR_MATCH_CACHE_SIZE:
+            self._dir_match_cache = {}
+        self._dir_match_cache[dir_path] = matches
+        return matches
+
+    def _dispatch_file(self, file_name, dir_path, file_path):
+        """Entrega el archivo a cada detector que lo pidió (una vez por handler)"""
+        now = time.time()
+        name_lower = file_name.lower()
+        called = []
+        for request, _depth in self._matching_requests(dir_path):
+            handler = request.file_handler
+            if handler is None or handler in called or request.is_expired(now):
+                continue
+            if request.extensions is not None and not name_lower.endswith(request.extensions):
+                continue
+            called.append(handler)
+            try:
+                handler(file_name, dir_path, file_path)
+            except (PermissionError, OSError):
+                continue
+            except Exception:
+                continue
+            with self._counts_lock:
+                self.detector_counts[request.detector] = self.detector_counts.get(request.detector, 0) + 1
+
+    def _dispatch_dir(self, dir_name, parent_path):
+        """Entrega la subcarpeta a cada detector que revisa carpetas en ese nivel"""
+        now = time.time()
+        child_lower = os.path.join(parent_path, dir_name).lower()
+        called = []
+        for request, _depth in self._matching_requests(parent_path):
+            handler = request.dir_handler
+            if handler is None or handler in called or request.is_expired(now):
+                continue
+            if request.is_skipped(child_lower):
+                continue
+            called.append(handler)
+            try:
+                handler(dir_name, parent_path)
+            except Exception:
+                continue
+
+    def _should_prune(self, parent_path, dir_name):
+        """No recorrer una subcarpeta si ningún detector vigente la necesita"""
+        child_path = os.path.join(parent_path, dir_name)
+        if normalize_path(child_path) in self._root_keys:
+            return True   # Raíz registrada: se recorre como raíz propia (plan)
+        now = time.time()
+        child_lower = child_path.lower()
+        for request, depth in self._matching_requests(parent_path):
+            if request.is_expired(now):
+                continue
+            if request.max_depth is not None and depth + 1 > request.max_depth:
+                continue
+            if request.is_skipped(child_lower):
+                continue
+            return False
+        return True
+
+    def run(self, walker_threads=4, analysis_threads=4, total_timeout=None):
+        """
+        Recorre el plan una sola vez y despacha a los detectores
+
+        Returns:
+            Dict con estadísticas del recorrido y archivos entregados por detector
+        """
+        scan_roots = self.plan()
+        requested = len({r.key for r in self.requests})
+        print(f"🗺️ Plan de escaneo: {requested} raíces pedidas → {len(scan_roots)} raíces sin solapamiento")
+
+        start_time = time.time()
+        for request in self.requests:
+            request.deadline = start_time + request.timeout if request.timeout else None
+
+        walker = ParallelDirectoryWalker(
+            file_callback=self._dispatch_file,
+            dir_callback=self._dispatch_dir,
+            skip_predicate=self._should_prune,
+            walker_threads=walker_threads,
+            analysis_threads=analysis_threads,
+            total_timeout=total_timeout
+        )
+        stats = walker.walk(scan_roots)
+        stats['roots_requested'] = requested
+        stats['roots_walked'] = len(scan_roots)
+        stats['detector_counts'] = dict(self.detector_counts)
+        return stats
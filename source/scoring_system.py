@@ -4,6 +4,8 @@ Asigna un score de 0-100 a cada detección basado en múltiples factores
 """
 from typing import Dict, List
 
+from keyword_matcher import KeywordMatcher
+
 class ScoringSystem:
     """Sistema de scoring para resultados de escaneo"""
     
@@ -15,6 +17,40 @@ class ScoringSystem:
             'behavior': 15,        # Comportamiento sospechoso (15 puntos)
             'obfuscation': 10      # Ofuscación detectada (10 puntos)
         }
+        
+        # Patrones de alta confianza (hacks conocidos específicos)
+        self.high_confidence_matcher = KeywordMatcher([
+            'vape', 'vapelite', 'vapev2', 'vapev4', 'entropy', 'entropyclient',
+            'killaura', 'aimbot', 'triggerbot', 'reach', 'velocity', 'antiknockback',
+            'autoclicker', 'xray', 'scaffold', 'fly', 'nofall', 'speedhack',
+            'whiteout', 'liquidbounce', 'wurst', 'impact', 'sigma', 'flux', 'future',
+            'astolfo', 'exhibition', 'novoline', 'rise', 'moon', 'drip'
+        ])
+        
+        # Patrones de media confianza (más genéricos)
+        self.medium_confidence_matcher = KeywordMatcher([
+            'bypass', 'inject', 'ghost', 'stealth', 'undetected', 'incognito',
+            'hackclient', 'cheatclient', 'injector', 'dllinject'
+        ])
+        
+        # Patrones de baja confianza (muy genéricos - solo si hay contexto adicional)
+        self.low_confidence_matcher = KeywordMatcher([
+            'hack', 'cheat', 'client', 'mod'
+        ])
+        
+        # PATRONES LEGÍTIMOS (reducen score significativamente)
+        self.legitimate_matcher = KeywordMatcher([
+            'optifine', 'forge', 'fabric', 'iris', 'sodium', 'lithium', 'phosphor',
+            'jei', 'rei', 'wthit', 'jade', 'worldedit', 'worldguard', 'essentials',
+            'luckperms', 'vault', 'curseforge', 'modrinth', 'minecraft launcher',
+            'lunar', 'badlion', 'tlauncher', 'prism', 'multimc'
+        ])
+        
+        # Contexto sospechoso adicional para patrones genéricos
+        self.medium_context_matcher = KeywordMatcher(['temp', 'downloads', 'desktop', 'appdata'])
+        self.low_context_matcher = KeywordMatcher([
+            'temp', 'downloads', 'desktop', 'appdata', 'mods\\vape', 'mods\\entropy'
+        ])
     
     def calculate_score(self, issue: Dict) -> Dict:
         """Calcula el score de confianza para un issue"""
@@ -66,64 +102,27 @@ class ScoringSystem:
         file_path = (issue.get('archivo', '') or '').lower()
         combined = f"{name} {file_path}"
         
-        # Patrones de alta confianza (hacks conocidos específicos)
-        high_confidence_patterns = [
-            'vape', 'vapelite', 'vapev2', 'vapev4', 'entropy', 'entropyclient',
-            'killaura', 'aimbot', 'triggerbot', 'reach', 'velocity', 'antiknockback',
-            'autoclicker', 'xray', 'scaffold', 'fly', 'nofall', 'speedhack',
-            'whiteout', 'liquidbounce', 'wurst', 'impact', 'sigma', 'flux', 'future',
-            'astolfo', 'exhibition', 'novoline', 'rise', 'moon', 'drip'
-        ]
-        
-        # Patrones de media confianza (más genéricos)
-        medium_confidence_patterns = [
-            'bypass', 'inject', 'ghost', 'stealth', 'undetected', 'incognito',
-            'hackclient', 'cheatclient', 'injector', 'dllinject'
-        ]
-        
-        # Patrones de baja confianza (muy genéricos - solo si hay contexto adicional)
-        low_confidence_patterns = [
-            'hack', 'cheat', 'client', 'mod'
-        ]
-        
-        # PATRONES LEGÍTIMOS (reducen score significativamente)
-        legitimate_patterns = [
-            'optifine', 'forge', 'fabric', 'iris', 'sodium', 'lithium', 'phosphor',
-            'jei', 'rei', 'wthit', 'jade', 'worldedit', 'worldguard', 'essentials',
-            'luckperms', 'vault', 'curseforge', 'modrinth', 'minecraft launcher',
-            'lunar', 'badlion', 'tlauncher', 'prism', 'multimc'
-        ]
-        
         # Verificar patrones legítimos primero (reducen score)
-        for pattern in legitimate_patterns:
-            if pattern in combined:
-                return -15  # Penalización fuerte para archivos legítimos conocidos
+        if self.legitimate_matcher.contains_any(combined):
+            return -15  # Penalización fuerte para archivos legítimos conocidos
         
-        # Verificar patrones de alta confianza
-        for pattern in high_confidence_patterns:
-            if pattern in combined:
-                # Verificar que no sea parte de un nombre legítimo más largo
-                if not any(legit in combined for legit in legitimate_patterns):
-                    return self.factors['name_match']  # 30 puntos
+        # Verificar patrones de alta confianza (ya descartados los nombres legítimos)
+        if self.high_confidence_matcher.contains_any(combined):
+            return self.factors['name_match']  # 30 puntos
         
         # Verificar patrones de media confianza
-        for pattern in medium_confidence_patterns:
-            if pattern in combined:
-                # Solo dar puntos si hay contexto adicional sospechoso
-                if any(ctx in combined for ctx in ['temp', 'downloads', 'desktop', 'appdata']):
-                    return self.factors['name_match'] * 0.6  # 18 puntos
-                return self.factors['name_match'] * 0.4  # 12 puntos (menos confianza)
+        if self.medium_confidence_matcher.contains_any(combined):
+            # Solo dar puntos si hay contexto adicional sospechoso
+            if self.medium_context_matcher.contains_any(combined):
+                return self.factors['name_match'] * 0.6  # 18 puntos
+            return self.factors['name_match'] * 0.4  # 12 puntos (menos confianza)
         
         # Verificar patrones de baja confianza (solo con contexto adicional)
-        for pattern in low_confidence_patterns:
-            if pattern in combined:
-                # Requiere contexto adicional para ser sospechoso
-                suspicious_context = any(ctx in combined for ctx in [
-                    'temp', 'downloads', 'desktop', 'appdata', 'mods\\vape', 'mods\\entropy'
-                ])
-                if suspicious_context:
-                    return self.factors['name_match'] * 0.2  # 6 puntos
-                return 0  # Sin contexto adicional, no es sospechoso
+        if self.low_confidence_matcher.contains_any(combined):
+            # Requiere contexto adicional para ser sospechoso
+            if self.low_context_matcher.contains_any(combined):
+                return self.factors['name_match'] * 0.2  # 6 puntos
+            return 0  # Sin contexto adicional, no es sospechoso
         
         return 0
     
@@ -9,6 +9,8 @@ import hashlib
 import ctypes
 from ctypes import wintypes
 
+from process_snapshot import get_process_snapshot
+
 class SilentScannerTechniques:
     """Técnicas avanzadas de detección del Silent-scanner"""
     
@@ -17,7 +19,7 @@ class SilentScannerTechniques:
         """Detecta Process Hollowing - técnica de evasión avanzada"""
         issues = []
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'exe', 'memory_info']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'exe', 'memory_info']):
                 try:
                     proc_info = proc.info
                     name = proc_info['name'].lower()
@@ -62,7 +64,7 @@ class SilentScannerTechniques:
                 'ws2_32.dll', 'wininet.dll', 'crypt32.dll'
             ]
             
-            for proc in psutil.process_iter(['pid', 'name']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name']):
                 try:
                     if proc.info['name'].lower() in ['java.exe', 'javaw.exe', 'minecraft.exe']:
                         # Verificar DLLs cargadas desde ubicaciones no estándar
@@ -97,7 +99,7 @@ class SilentScannerTechniques:
         """Detecta Code Cave Injection - inyección de código en espacios vacíos"""
         issues = []
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name', 'memory_info']):
                 try:
                     if proc.info['name'].lower() in ['java.exe', 'javaw.exe']:
                         memory_info = proc.memory_info()
@@ -145,7 +147,7 @@ class SilentScannerTechniques:
                 'LoadLibrary', 'GetProcAddress', 'VirtualAlloc', 'VirtualProtect'
             ]
             
-            for proc in psutil.process_iter(['pid', 'name']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name']):
                 try:
                     if proc.info['name'].lower() in ['java.exe', 'javaw.exe', 'minecraft.exe']:
                         # Verificar si el proceso tiene hooks activos
@@ -178,7 +180,7 @@ class SilentScannerTechniques:
         """Detecta técnicas anti-debugging"""
         issues = []
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
+            for proc in get_process_snapshot().process_iter(['pid', 'name']):
                 try:
                     if proc.info['name'].lower() in ['java.exe', 'javaw.exe']:
                         # Verificar si el proceso tiene flags anti-debugging
@@ -0,0 +1,120 @@
+"""
+Índice de Lista Blanca
+Compila la whitelist una sola vez (nombres exactos en hash, prefijos/sufijos por longitud y
+una expresión combinada para subcadenas) y guarda por carpeta el resultado de la parte de la
+ruta que comparten todos sus archivos, para no repetir ~400 comprobaciones por archivo
+"""
+import functools
+import os
+
+from keyword_matcher import KeywordMatcher
+
+# Carpeta de la aplicación SS y ejecutable propio (prioridad máxima)
+APP_EXCLUSIONS = [
+    'aplicación de ss', 'minecraft ss tool', 'minecraftsstool.exe',
+    'source\\dist', 'source\\build', 'aspers projects'
+]
+APP_EXECUTABLES = {'minecraftsstool.exe', 'ss_tool.exe', 'aspers_scanner.exe'}
+
+# Si la ruta contiene palabras de hack conocidas, una coincidencia parcial no whitelistea
+HACK_KEYWORDS = ['vape', 'entropy', 'ghost', 'inject', 'bypass', 'cheat', 'hack']
+
+# Archivos de sistema y configuración legítimos
+LEGIT_EXTENSIONS = ('.sys', '.dll', '.drv', '.cpl', '.ocx', '.msc', '.mui')
+
+# Carpetas distintas recordadas durante un escaneo
+DIR_CACHE_SIZE = 8192
+
+
+class WhitelistIndex:
+    """
+    Lista blanca compilada
+
+    Mismas reglas que la comprobación lineal original:
+        1. Exclusiones de la aplicación (subcadena en la ruta o nombre exacto del ejecutable)
+        2. Nombre de archivo igual, empieza o termina por un elemento de la whitelist
+        3. Elemento de la whitelist dentro de la ruta, si la ruta no contiene palabras de hack
+        4. Extensión de sistema fuera de temp / downloads
+    """
+
+    def __init__(self, whitelist_items, dir_cache_size=DIR_CACHE_SIZE):
+        items = [item for item in whitelist_items if item]
+        self.items = set(items)
+
+        # Prefijos / sufijos del nombre: una búsqueda en hash por cada longitud distinta
+        self._lengths = sorted({len(item) for item in items})
+
+        # Subcadenas: una expresión combinada por lista
+        self._item_matcher = KeywordMatcher(items)
+        self._exclusion_matcher = KeywordMatcher(APP_EXCLUSIONS)
+        self._hack_matcher = KeywordMatcher(HACK_KEYWORDS)
+
+        # Una coincidencia que no cabe entera en la carpeta termina en el nombre del archivo
+        # y empieza como mucho (longitud máxima - 1) caracteres antes del separador
+        self._max_item_length = max(
+            [len(p) for p in items] + [len(p) for p in APP_EXCLUSIONS] + [len(p) for p in HACK_KEYWORDS]
+        )
+
+        self._dir_cache_size = dir_cache_size
+        self.reset_cache()
+
+    def reset_cache(self):
+        """Vacía la caché por carpeta (al empezar cada escaneo)"""
+        self._dir_flags = functools.lru_cache(maxsize=self._dir_cache_size)(self._compute_dir_flags)
+
+    def _compute_dir_flags(self, dir_lower):
+        """(exclusión de la app, elemento de whitelist, palabra de hack) dentro de la carpeta"""
+        return (
+            self._exclusion_matcher.contains_any(dir_lower),
+            self._item_matcher.contains_any(dir_lower),
+            self._hack_matcher.contains_any(dir_lower)
+        )
+
+    def _filename_matches(self, filename):
+        """Nombre exacto, prefijo o sufijo presente en la whitelist"""
+        if filename in self.items:
+            return True
+        items = self.items
+        name_length = len(filename)
+        for length in self._lengths:
+            if length > name_length:
+                break
+            if filename[:length] in items or filename[-length:] in items:
+                return True
+        return False
+
+    def is_whitelisted(self, path):
+        """Verifica si una ruta está en la lista blanca"""
+        if not path:
+            return False
+
+        path_lower = path.lower()
+        dir_lower, filename = os.path.split(path_lower)
+
+        excluded, item_in_dir, hack_in_dir = self._dir_flags(dir_lower)
+
+        # Parte de la ruta no cubierta por la caché de la carpeta (cruce del separador + nombre)
+        tail = path_lower[max(0, len(dir_lower) - self._max_item_length + 1):]
+
+        # ========== EXCLUSIONES CRÍTICAS (prioridad máxima) ==========
+        if excluded or self._exclusion_matcher.contains_any(tail):
+            return True
+        if filename in APP_EXECUTABLES:
+            return True
+
+        # ========== WHITELIST ==========
+        if self._filename_matches(filename):
+            return True
+
+        if item_in_dir or self._item_matcher.contains_any(tail):
+            # Verificación adicional: no debe ser un hack disfrazado
+            if not (hack_in_dir or self._hack_matcher.contains_any(tail)):
+                return True
+
+        # ========== EXCLUSIONES POR EXTENSIÓN LEGÍTIMA ==========
+        if path_lower.endswith(LEGIT_EXTENSIONS):
+            # Pero verificar que no esté en ubicación sospechosa
+            if 'temp' not in path_lower and 'downloads' not in path_lower:
+                return True
+
+        return False
@@ -1,22 +1,274 @@
 """
 Análisis de Texturas X-ray y Resource Packs Modificados
 Detecta texturas modificadas que permiten ver a través de bloques
+
+- Las estadísticas de cada textura (transparencia, brillo, rango de rojo) se calculan con
+  operaciones de NumPy sobre el buffer de la imagen; sin NumPy se usan los histogramas de
+  PIL (también en C), nunca listas de píxeles en Python
+- Los resource packs .zip se leen directamente (sin extraer) y solo se abren las texturas
+  críticas
+- Cada pack (carpeta o .zip) es un lote que analiza un proceso del pool
+- Los .zip que son releases conocidas (SHA-256 del archivo, archive_fingerprint) se saltan
+  enteros
+- Caché de veredictos por contenido: el SHA-256 de cada PNG se busca en el índice de
+  hashes (hash_index) antes de decodificarlo. Las texturas ya analizadas sin hallazgos
+  (CLEAN_TEXTURE) y las confirmadas como legítimas por la API (KNOWN_GOOD) o la BD local
+  no se vuelven a abrir: los packs populares se comprueban con una búsqueda por textura
 """
+import hashlib
+import io
 import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 import json
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional
+
+from archive_fingerprint import is_known_archive
+from hash_index import CLEAN_TEXTURE, HACK_FLAGS, KNOWN_GOOD, LOCAL_LEGITIMATE, get_hash_index
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Texturas críticas que comúnmente se modifican para X-ray
+CRITICAL_TEXTURES = [
+    'stone', 'dirt', 'grass', 'cobblestone', 'gravel',
+    'coal_ore', 'iron_ore', 'gold_ore', 'diamond_ore',
+    'emerald_ore', 'lapis_ore', 'redstone_ore',
+    'netherrack', 'end_stone'
+]
+
+# Umbrales de detección
+TRANSPARENT_ALPHA = 128          # Alpha por debajo = píxel transparente
+TRANSPARENCY_THRESHOLD = 0.1     # > 10% transparente es sospechoso para texturas de bloques
+BRIGHTNESS_THRESHOLD = 200
+SATURATION_THRESHOLD = 150
+
+# Texturas más grandes se ignoran (protección contra imágenes/zips maliciosos)
+MAX_TEXTURE_PIXELS = 4096 * 4096
+MAX_TEXTURE_BYTES = 32 * 1024 * 1024
+
+# Versión de las reglas de análisis: al cambiar umbrales se sube y los veredictos
+# CLEAN_TEXTURE guardados se descartan
+TEXTURE_RULES_VERSION = 1
+
+# Flags del índice con los que una textura se da por limpia sin decodificarla
+CLEAN_VERDICT_FLAGS = CLEAN_TEXTURE | KNOWN_GOOD | LOCAL_LEGITIMATE
+
+# Pool de procesos: solo compensa con varios packs
+MIN_PACKS_FOR_POOL = 2
+MAX_WORKERS = max(1, min(8, os.cpu_count() or 1))
+
+
+def is_critical_texture(file_name: str) -> bool:
+    """True si el nombre corresponde a una textura de bloque que se modifica para X-ray"""
+    file_name = file_name.lower()
+    return any(texture in file_name for texture in CRITICAL_TEXTURES)
+
+
+def texture_stats(img) -> Dict:
+    """
+    Píxeles transparentes, total, brillo medio (R, G, B) y rango del canal rojo de una
+    imagen RGBA
+    """
+    total_pixels = img.width * img.height
+    if np is not None:
+        pixels = np.asarray(img)
+        red = pixels[..., 0]
+        return {
+            'transparent_pixels': int(np.count_nonzero(pixels[..., 3] < TRANSPARENT_ALPHA)),
+            'total_pixels': total_pixels,
+            'brightness': float(pixels[..., :3].mean(dtype=np.float64)) if total_pixels else 0.0,
+            'saturation': int(red.max()) - int(red.min()) if total_pixels else 0,
+        }
+    # Sin NumPy: histogramas por canal (R, G, B, A -> 4 x 256 valores)
+    histogram = img.histogram()
+    red, green, blue, alpha = (histogram[i * 256:(i + 1) * 256] for i in range(4))
+    weighted = sum(value * (red[value] + green[value] + blue[value]) for value in range(256))
+    present = [value for value in range(256) if red[value]]
+    return {
+        'transparent_pixels': sum(alpha[:TRANSPARENT_ALPHA]),
+        'total_pixels': total_pixels,
+        'brightness': weighted / (3 * total_pixels) if total_pixels else 0.0,
+        'saturation': present[-1] - present[0] if present else 0,
+    }
+
+
+def analyze_image(img, file_path: str, source_type: str) -> Optional[Dict]:
+    """Veredicto de una textura crítica ya abierta (None si no es sospechosa)"""
+    if img.width * img.height > MAX_TEXTURE_PIXELS:
+        return None
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    stats = texture_stats(img)
+    total_pixels = stats['total_pixels']
+    if not total_pixels:
+        return None
+
+    transparency_ratio = stats['transparent_pixels'] / total_pixels
+    if transparency_ratio > TRANSPARENCY_THRESHOLD:
+        return {
+            'type': 'xray_texture',
+            'name': os.path.basename(file_path),
+            'path': file_path,
+            'source_type': source_type,
+            'transparency_ratio': transparency_ratio,
+            'transparent_pixels': stats['transparent_pixels'],
+            'total_pixels': total_pixels,
+            'confidence': min(0.9, transparency_ratio * 5),  # Más transparencia = más confianza
+            'alert': 'SOSPECHOSO' if transparency_ratio < 0.5 else 'CRITICAL'
+        }
+
+    # Texturas X-ray suelen tener colores muy brillantes o saturados
+    if stats['brightness'] > BRIGHTNESS_THRESHOLD or stats['saturation'] > SATURATION_THRESHOLD:
+        return {
+            'type': 'xray_texture',
+            'name': os.path.basename(file_path),
+            'path': file_path,
+            'source_type': source_type,
+            'brightness': stats['brightness'],
+            'saturation': stats['saturation'],
+            'confidence': 0.6,
+            'alert': 'POCO_SOSPECHOSO'
+        }
+    return None
+
+
+def _analyze_bytes(data: bytes, file_path: str, source_type: str, index, clean: List[bytes]) -> Optional[Dict]:
+    """
+    Analiza el contenido de un PNG salvo que su hash ya tenga veredicto limpio; los
+    digests analizados sin hallazgos se añaden a clean
+    """
+    digest = hashlib.sha256(data).digest()
+    flags = index.lookup(digest)
+    if flags & CLEAN_VERDICT_FLAGS and not flags & HACK_FLAGS:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            result = analyze_image(img, file_path, source_type)
+    except Exception:
+        # Error al analizar, no reportar (ni guardar veredicto)
+        return None
+    if result:
+        result['file_hash'] = digest.hex()
+    else:
+        clean.append(digest)
+    return result
+
+
+def _analyze_file(file_path: str, source_type: str, index, clean: List[bytes]) -> Optional[Dict]:
+    try:
+        if os.path.getsize(file_path) > MAX_TEXTURE_BYTES:
+            return None
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return _analyze_bytes(data, file_path, source_type, index, clean)
+
+
+def _scan_zip(pack_path: str, source_type: str, index, clean: List[bytes]) -> List[Dict]:
+    """Texturas críticas de un pack .zip, leídas sin extraer"""
+    detected = []
+    with zipfile.ZipFile(pack_path) as pack:
+        for info in pack.infolist():
+            member = info.filename
+            if info.is_dir() or not member.lower().endswith('.png') or info.file_size > MAX_TEXTURE_BYTES:
+                continue
+            if not is_critical_texture(member.rsplit('/', 1)[-1]):
+                continue
+            # Ruta mostrada como si el zip fuera una carpeta: ...\pack.zip\assets\...\stone.png
+            file_path = os.path.join(pack_path, *member.split('/'))
+            try:
+                data = pack.read(info)
+            except Exception:
+                continue
+            result = _analyze_bytes(data, file_path, source_type, index, clean)
+            if result:
+                detected.append(result)
+    return detected
+
+
+def _scan_folder(directory: str, source_type: str, index, clean: List[bytes]) -> List[Dict]:
+    detected = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.lower().endswith('.png') and is_critical_texture(file):
+                result = _analyze_file(os.path.join(root, file), source_type, index, clean)
+                if result:
+                    detected.append(result)
+    return detected
+
+
+def scan_pack(pack_path: str, source_type: str) -> tuple:
+    """
+    Analiza un pack completo (carpeta o .zip); función de módulo para el pool de procesos
+
+    Returns:
+        (hallazgos, digests de texturas analizadas sin hallazgos)
+    """
+    index = get_hash_index()
+    clean = []
+    try:
+        if zipfile.is_zipfile(pack_path):
+            # Release conocida (mismo SHA-256 que en el índice del servidor): no se abren sus texturas
+            if is_known_archive(pack_path, index=index):
+                return [], clean
+            return _scan_zip(pack_path, source_type, index, clean), clean
+        if os.path.isdir(pack_path):
+            return _scan_folder(pack_path, source_type, index, clean), clean
+    except Exception as e:
+        print(f"⚠️ Error escaneando pack {pack_path}: {e}")
+    return [], clean
+
+
+def prepare_verdict_cache():
+    """Descarta los veredictos guardados con otras reglas de análisis"""
+    index = get_hash_index()
+    if index.meta.get('texture_rules') != TEXTURE_RULES_VERSION:
+        index.replace(CLEAN_TEXTURE, [], meta={'texture_rules': TEXTURE_RULES_VERSION})
+
+
+def record_clean_textures(digests: List[bytes]):
+    """Guarda en el índice las texturas analizadas sin hallazgos (una escritura por escaneo)"""
+    if digests:
+        get_hash_index().apply(CLEAN_TEXTURE, added=digests)
+
+
+def scan_packs(packs: List[tuple]) -> List[Dict]:
+    """Analiza varios packs [(ruta, source_type), ...], repartidos entre procesos si compensa"""
+    # Antes de arrancar el pool: los procesos leen el índice tal como quede aquí
+    prepare_verdict_cache()
+    detected = []
+    clean = []
+    workers = min(MAX_WORKERS, len(packs))
+    if len(packs) >= MIN_PACKS_FOR_POOL and workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for results, pack_clean in pool.map(scan_pack, *zip(*packs)):
+                    detected.extend(results)
+                    clean.extend(pack_clean)
+            # El índice se reescribe cuando los procesos ya lo han soltado
+            record_clean_textures(clean)
+            return detected
+        except Exception as e:
+            print(f"⚠️ Pool de procesos no disponible para texturas, se analiza en serie: {e}")
+            detected = []
+            clean = []
+    for pack_path, source_type in packs:
+        results, pack_clean = scan_pack(pack_path, source_type)
+        detected.extend(results)
+        clean.extend(pack_clean)
+    record_clean_textures(clean)
+    return detected
+
 
 class XRayTextureAnalyzer:
     """Analizador de texturas X-ray"""
     
-    # Texturas críticas que comúnmente se modifican para X-ray
-    CRITICAL_TEXTURES = [
-        'stone', 'dirt', 'grass', 'cobblestone', 'gravel',
-        'coal_ore', 'iron_ore', 'gold_ore', 'diamond_ore',
-        'emerald_ore', 'lapis_ore', 'redstone_ore',
-        'netherrack', 'end_stone'
-    ]
+    CRITICAL_TEXTURES = CRITICAL_TEXTURES
     
     def __init__(self):
         self.minecraft_paths = []
@@ -35,115 +287,54 @@ class XRayTextureAnalyzer:
                 self.minecraft_paths.append(path)
     
     def scan_resource_packs(self) -> List[Dict]:
-        """Escanea resource packs buscando texturas X-ray"""
+        """Escanea resource packs (carpetas y .zip) buscando texturas X-ray"""
         detected = []
+        packs = []
+        clean = []
+        prepare_verdict_cache()
+        index = get_hash_index()
         
         for minecraft_path in self.minecraft_paths:
             resourcepacks_path = os.path.join(minecraft_path, "resourcepacks")
             textures_path = os.path.join(minecraft_path, "textures")
             
-            # Escanear resource packs
+            # Cada carpeta o .zip dentro de resourcepacks es un pack
             if os.path.exists(resourcepacks_path):
-                detected.extend(self._scan_directory(resourcepacks_path, "resourcepack"))
+                try:
+                    for entry in os.scandir(resourcepacks_path):
+                        if entry.is_dir() or entry.name.lower().endswith('.zip'):
+                            packs.append((entry.path, "resourcepack"))
+                        elif entry.name.lower().endswith('.png') and is_critical_texture(entry.name):
+                            result = _analyze_file(entry.path, "resourcepack", index, clean)
+                            if result:
+                                detected.append(result)
+                except OSError as e:
+                    print(f"⚠️ Error escaneando directorio {resourcepacks_path}: {e}")
             
             # Escanear texturas directas
             if os.path.exists(textures_path):
-                detected.extend(self._scan_directory(textures_path, "texture"))
+                packs.append((textures_path, "texture"))
         
+        detected.extend(scan_packs(packs))
+        record_clean_textures(clean)
         return detected
     
     def _scan_directory(self, directory: str, source_type: str) -> List[Dict]:
-        """Escanea un directorio buscando texturas modificadas"""
-        detected = []
-        
-        try:
-            for root, dirs, files in os.walk(directory):
-                for file in files:
-                    if file.lower().endswith('.png'):
-                        file_path = os.path.join(root, file)
-                        result = self._analyze_texture(file_path, source_type)
-                        if result:
-                            detected.append(result)
-        except Exception as e:
-            print(f"⚠️ Error escaneando directorio {directory}: {e}")
-        
+        """Escanea un directorio (o un pack .zip) buscando texturas modificadas"""
+        prepare_verdict_cache()
+        detected, clean = scan_pack(directory, source_type)
+        record_clean_textures(clean)
         return detected
     
     def _analyze_texture(self, file_path: str, source_type: str) -> Dict:
         """Analiza una textura individual buscando modificaciones X-ray"""
-        try:
-            # Verificar si es una textura crítica
-            file_name = os.path.basename(file_path).lower()
-            is_critical = any(texture in file_name for texture in self.CRITICAL_TEXTURES)
-            
-            if not is_critical:
-                return None
-            
-            # Abrir imagen
-            img = Image.open(file_path)
-            
-            # Convertir a RGBA si no lo es
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
-            
-            # Analizar transparencia
-            alpha_channel = img.split()[3]  # Canal alpha
-            alpha_data = list(alpha_channel.getdata())
-            
-            # Contar píxeles transparentes
-            transparent_pixels = sum(1 for alpha in alpha_data if alpha < 128)
-            total_pixels = len(alpha_data)
-            transparency_ratio = transparent_pixels / total_pixels if total_pixels > 0 else 0
-            
-            # Analizar si tiene transparencia sospechosa (> 10% transparente es sospechoso para texturas de bloques)
-            if transparency_ratio > 0.1:
-                return {
-                    'type': 'xray_texture',
-                    'name': os.path.basename(file_path),
-                    'path': file_path,
-                    'source_type': source_type,
-                    'transparency_ratio': transparency_ratio,
-                    'transparent_pixels': transparent_pixels,
-                    'total_pixels': total_pixels,
-                    'confidence': min(0.9, transparency_ratio * 5),  # Más transparencia = más confianza
-                    'alert': 'SOSPECHOSO' if transparency_ratio < 0.5 else 'CRITICAL'
-                }
-            
-            # Analizar colores (texturas X-ray suelen tener colores muy saturados o modificados)
-            pixels = list(img.getdata())
-            if len(pixels) > 0:
-                # Calcular estadísticas de color
-                r_values = [p[0] for p in pixels if len(p) >= 3]
-                g_values = [p[1] for p in pixels if len(p) >= 3]
-                b_values = [p[2] for p in pixels if len(p) >= 3]
-                
-                if r_values and g_values and b_values:
-                    avg_r = sum(r_values) / len(r_values)
-                    avg_g = sum(g_values) / len(g_values)
-                    avg_b = sum(b_values) / len(b_values)
-                    
-                    # Texturas X-ray suelen tener colores muy brillantes o saturados
-                    brightness = (avg_r + avg_g + avg_b) / 3
-                    saturation = max(r_values) - min(r_values) if r_values else 0
-                    
-                    # Si es muy brillante o muy saturado, podría ser X-ray
-                    if brightness > 200 or saturation > 150:
-                        return {
-                            'type': 'xray_texture',
-                            'name': os.path.basename(file_path),
-                            'path': file_path,
-                            'source_type': source_type,
-                            'brightness': brightness,
-                            'saturation': saturation,
-                            'confidence': 0.6,
-                            'alert': 'POCO_SOSPECHOSO'
-                        }
-        
-        except Exception as e:
-            # Error al analizar, no reportar
-            pass
-        
-        return None
+        if not is_critical_texture(os.path.basename(file_path)):
+            return None
+        prepare_verdict_cache()
+        clean = []
+        result = _analyze_file(file_path, source_type, get_hash_index(), clean)
+        record_clean_textures(clean)
+        return result
     
     def check_mcmeta_files(self) -> List[Dict]:
         """Verifica archivos .mcmeta que podrían modificar texturas"""
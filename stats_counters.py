@@ -0,0 +1,329 @@
+"""
+Contadores de Estadísticas
+Las estadísticas del panel se leen de una tabla de contadores en lugar de siete COUNT(*)
+sobre las tablas más grandes:
+- stats_counters: triggers en scans, scan_results, scan_tokens y ban_history la mantienen
+  al día dentro de la misma transacción que la escritura
+- stats_hll: registros HyperLogLog para estimar las máquinas únicas; se actualizan al
+  iniciar un escaneo (record_machine)
+- reconcile(): recalcula todo desde las tablas y corrige la deriva (escrituras anteriores
+  a los triggers, borrados en cascada de MySQL que no disparan triggers...)
+Funciona con cursores SQLite, MySQL (pymysql) y PostgreSQL (psycopg2)
+"""
+import hashlib
+import math
+import os
+import time
+
+# Cada cuánto se reconcilian los contadores con las tablas (segundos)
+RECONCILE_INTERVAL = int(os.environ.get('STATS_RECONCILE_INTERVAL', 3600))
+
+# HyperLogLog: 2^11 registros -> error típico ~2.3%
+HLL_PRECISION = 11
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+# Contador -> consulta exacta (solo la usa reconcile)
+COUNTER_QUERIES = {
+    'total_scans': "SELECT COUNT(*) FROM scans",
+    'active_scans': "SELECT COUNT(*) FROM scans WHERE status = 'running'",
+    'severe_detections': "SELECT COUNT(*) FROM scan_results WHERE alert_level = 'CRITICAL'",
+    'total_results': "SELECT COUNT(*) FROM scan_results",
+    'active_tokens': "SELECT COUNT(*) FROM scan_tokens WHERE is_active = TRUE",
+    'total_bans': "SELECT COUNT(*) FROM ban_history",
+}
+
+# Tabla -> [(contador, condición sobre la fila o None si cuenta todas)]
+# {row} se sustituye por NEW u OLD en el cuerpo del trigger
+TABLE_COUNTERS = {
+    'scans': [('total_scans', None), ('active_scans', "{row}.status = 'running'")],
+    'scan_results': [('total_results', None), ('severe_detections', "{row}.alert_level = 'CRITICAL'")],
+    'scan_tokens': [('active_tokens', "{row}.is_active = TRUE")],
+    'ban_history': [('total_bans', None)],
+}
+
+# Fila especial con la fecha (epoch) de la última reconciliación
+RECONCILED_AT = 'reconciled_at'
+
+# True cuando ensure_schema() dejó tablas y triggers listos en este proceso
+_ready = False
+
+
+def dialect(cursor):
+    """'sqlite', 'mysql' o 'postgresql' según el driver del cursor"""
+    module = type(cursor).__module__
+    if module.startswith('sqlite3'):
+        return 'sqlite'
+    if module.startswith('psycopg'):
+        return 'postgresql'
+    return 'mysql'
+
+
+def _placeholder(cursor):
+    return '?' if dialect(cursor) == 'sqlite' else '%s'
+
+
+def _values(row):
+    """Columnas de una fila como tupla (tuplas, sqlite3.Row o filas dict de pymysql/psycopg2)"""
+    if isinstance(row, dict):
+        return tuple(row.values())
+    return tuple(row)
+
+
+# ============================================================
+# ESQUEMA Y TRIGGERS
+# ============================================================
+
+def _flag(condition, row):
+    return f"(CASE WHEN {condition.format(row=row)} THEN 1 ELSE 0 END)"
+
+
+def _trigger_statements(table, event):
+    """Sentencia UPDATE de stats_counters para un evento ('INSERT', 'UPDATE' o 'DELETE')"""
+    deltas = []
+    changed = []
+    for counter, condition in TABLE_COUNTERS[table]:
+        if event == 'INSERT':
+            deltas.append((counter, _flag(condition, 'NEW') if condition else '1'))
+        elif event == 'DELETE':
+            deltas.append((counter, f"-{_flag(condition, 'OLD')}" if condition else '-1'))
+        elif condition:
+            # En un UPDATE solo cambian los contadores condicionales
+            deltas.append((counter, f"{_flag(condition, 'NEW')} - {_flag(condition, 'OLD')}"))
+            changed.append(f"{_flag(condition, 'NEW')} <> {_flag(condition, 'OLD')}")
+    if not deltas:
+        return None
+    cases = ' '.join(f"WHEN '{counter}' THEN {delta}" for counter, delta in deltas)
+    names = ', '.join(f"'{counter}'" for counter, _ in deltas)
+    sql = f"UPDATE stats_counters SET value = value + (CASE name {cases} ELSE 0 END) WHERE name IN ({names})"
+    if changed:
+        sql += f" AND ({' OR '.join(changed)})"
+    return sql
+
+
+def _triggers():
+    """(nombre, tabla, evento, sentencia) de todos los triggers de contadores"""
+    triggers = []
+    for table in TABLE_COUNTERS:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            statement = _trigger_statements(table, event)
+            if statement:
+                triggers.append((f"trg_stats_{table}_{event.lower()}", table, event, statement))
+    return triggers
+
+
+def _schema_statements(kind):
+    if kind == 'mysql':
+        suffix = ' ENGINE=InnoDB'
+        name_type, value_type = 'VARCHAR(64)', 'BIGINT'
+    else:
+        suffix = ''
+        name_type, value_type = ('TEXT', 'INTEGER') if kind == 'sqlite' else ('VARCHAR(64)', 'BIGINT')
+    return [
+        f"CREATE TABLE IF NOT EXISTS stats_counters (name {name_type} PRIMARY KEY, "
+        f"value {value_type} NOT NULL DEFAULT 0){suffix}",
+        f"CREATE TABLE IF NOT EXISTS stats_hll (bucket INTEGER PRIMARY KEY, rho INTEGER NOT NULL){suffix}",
+    ]
+
+
+def _trigger_ddl(kind, existing):
+    statements = []
+    for name, table, event, statement in _triggers():
+        if kind == 'sqlite':
+            statements.append(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} "
+                              f"FOR EACH ROW BEGIN {statement}; END")
+        elif kind == 'mysql':
+            # MySQL < 8.0.29 no tiene CREATE TRIGGER IF NOT EXISTS
+            if name not in existing:
+                statements.append(f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW {statement}")
+        else:
+            statements.append(f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$ "
+                              f"BEGIN {statement}; RETURN NULL; END $$ LANGUAGE plpgsql")
+            statements.append(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+            statements.append(f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+                              f"FOR EACH ROW EXECUTE PROCEDURE {name}()")
+    return statements
+
+
+def ensure_schema(cursor):
+    """
+    Crea las tablas de contadores y los triggers; la primera vez rellena los contadores
+    con reconcile(). Hace commit (o rollback si falla) sobre la conexión del cursor.
+
+    Returns:
+        True si los contadores quedan mantenidos por triggers
+    """
+    global _ready
+    kind = dialect(cursor)
+    conn = cursor.connection
+    try:
+        for statement in _schema_statements(kind):
+            cursor.execute(statement)
+        existing = set()
+        if kind == 'mysql':
+            cursor.execute("SELECT TRIGGER_NAME FROM information_schema.TRIGGERS "
+                           "WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME LIKE 'trg_stats_%'")
+            existing = {_values(row)[0] for row in cursor.fetchall()}
+        for statement in _trigger_ddl(kind, existing):
+            cursor.execute(statement)
+        conn.commit()
+
+        ph = _placeholder(cursor)
+        cursor.execute(f"SELECT value FROM stats_counters WHERE name = {ph}", (RECONCILED_AT,))
+        if cursor.fetchone() is None:
+            drift = reconcile(cursor)
+            conn.commit()
+            print(f"✅ Contadores de estadísticas inicializados: {drift['counters']}")
+        _ready = True
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ No se pudieron crear los contadores de estadísticas (se usará COUNT(*)): {e}")
+        return False
+
+
+def is_ready():
+    """True si este proceso puede usar los contadores (ensure_schema terminó bien)"""
+    return _ready
+
+
+# ============================================================
+# HYPERLOGLOG DE MÁQUINAS ÚNICAS
+# ============================================================
+
+def hll_register(value):
+    """(registro, rango) de un valor: los primeros bits del hash eligen el registro"""
+    x = int.from_bytes(hashlib.sha1(value.encode('utf-8', 'replace')).digest()[:8], 'big')
+    remaining_bits = 64 - HLL_PRECISION
+    bucket = x >> remaining_bits
+    rest = x & ((1 << remaining_bits) - 1)
+    return bucket, remaining_bits - rest.bit_length() + 1
+
+
+def hll_estimate(registers):
+    """Estimación de cardinalidad a partir de {registro: rango} (los ausentes valen 0)"""
+    m = HLL_REGISTERS
+    if not registers:
+        return 0
+    alpha = 0.7213 / (1 + 1.079 / m)
+    zeros = m - len(registers)
+    total = zeros + sum(2.0 ** -rho for rho in registers.values())
+    estimate = alpha * m * m / total
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)   # Corrección para cardinalidades pequeñas
+    return int(round(estimate))
+
+
+def _insert_ignore(kind, table, columns):
+    values = ', '.join(['?' if kind == 'sqlite' else '%s'] * len(columns))
+    columns = ', '.join(columns)
+    if kind == 'sqlite':
+        return f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({values})"
+    if kind == 'mysql':
+        return f"INSERT IGNORE INTO {table} ({columns}) VALUES ({values})"
+    return f"INSERT INTO {table} ({columns}) VALUES ({values}) ON CONFLICT DO NOTHING"
+
+
+def record_machine(cursor, machine_id):
+    """Añade un machine_id al HyperLogLog (en la transacción del escaneo que lo registra)"""
+    if not machine_id or not _ready:
+        return
+    kind = dialect(cursor)
+    ph = _placeholder(cursor)
+    bucket, rho = hll_register(str(machine_id))
+    # Casi siempre la máquina ya se había visto: el UPDATE no toca ninguna fila
+    cursor.execute(f"UPDATE stats_hll SET rho = {ph} WHERE bucket = {ph} AND rho < {ph}", (rho, bucket, rho))
+    if cursor.rowcount == 0:
+        cursor.execute(_insert_ignore(kind, 'stats_hll', ('bucket', 'rho')), (bucket, 0))
+        cursor.execute(f"UPDATE stats_hll SET rho = {ph} WHERE bucket = {ph} AND rho < {ph}", (rho, bucket, rho))
+
+
+# ============================================================
+# LECTURA Y RECONCILIACIÓN
+# ============================================================
+
+def read_statistics(cursor):
+    """
+    Estadísticas desde los contadores (dos lecturas pequeñas)
+
+    Returns:
+        Dict con los contadores, unique_machines y reconciled_at, o None si los contadores
+        todavía no existen (el llamador usa entonces los COUNT(*) de siempre)
+    """
+    cursor.execute("SELECT name, value FROM stats_counters")
+    counters = {name: value for name, value in (_values(row) for row in cursor.fetchall())}
+    if RECONCILED_AT not in counters:
+        return None
+    cursor.execute("SELECT bucket, rho FROM stats_hll WHERE rho > 0")
+    registers = {bucket: rho for bucket, rho in (_values(row) for row in cursor.fetchall())}
+    stats = {name: int(counters.get(name) or 0) for name in COUNTER_QUERIES}
+    stats['unique_machines'] = hll_estimate(registers)
+    stats['reconciled_at'] = int(counters[RECONCILED_AT] or 0)
+    return stats
+
+
+def reconcile_due(stats, interval=RECONCILE_INTERVAL):
+    """True si la última reconciliación es más antigua que interval"""
+    return bool(stats) and time.time() - stats.get('reconciled_at', 0) >= interval
+
+
+def claim_reconcile(cursor, interval=RECONCILE_INTERVAL):
+    """Reserva la próxima reconciliación: solo un worker/hilo la obtiene por intervalo"""
+    ph = _placeholder(cursor)
+    now = int(time.time())
+    cursor.execute(f"UPDATE stats_counters SET value = {ph} WHERE name = {ph} AND value <= {ph}",
+                   (now, RECONCILED_AT, now - interval))
+    return cursor.rowcount == 1
+
+
+def reconcile(cursor):
+    """
+    Recalcula los contadores y el HyperLogLog desde las tablas y corrige la deriva
+
+    Primero bloquea las filas de contadores (UPDATE sin cambios): las escrituras
+    concurrentes esperan a que termine en sus triggers y se suman después, así que
+    ningún incremento se pierde ni se cuenta dos veces. No hace commit.
+
+    Returns:
+        {'counters': {contador: valor}, 'drift': {contador: diferencia corregida}}
+    """
+    kind = dialect(cursor)
+    ph = _placeholder(cursor)
+    names = list(COUNTER_QUERIES) + [RECONCILED_AT]
+    insert = _insert_ignore(kind, 'stats_counters', ('name', 'value'))
+    for name in names:
+        cursor.execute(insert, (name, 0))
+    in_list = ', '.join([ph] * len(names))
+    cursor.execute(f"UPDATE stats_counters SET value = value WHERE name IN ({in_list})", names)
+    cursor.execute(f"SELECT name, value FROM stats_counters WHERE name IN ({in_list})", names)
+    stored = {name: value for name, value in (_values(row) for row in cursor.fetchall())}
+
+    counters, drift = {}, {}
+    for name, query in COUNTER_QUERIES.items():
+        cursor.execute(query)
+        exact = int(_values(cursor.fetchone())[0] or 0)
+        counters[name] = exact
+        difference = exact - int(stored.get(name) or 0)
+        if difference:
+            drift[name] = difference
+            cursor.execute(f"UPDATE stats_counters SET value = {ph} WHERE name = {ph}", (exact, name))
+
+    # HyperLogLog reconstruido desde los machine_id distintos
+    registers = {}
+    cursor.execute("SELECT DISTINCT machine_id FROM scans WHERE machine_id IS NOT NULL AND machine_id <> ''")
+    while True:
+        rows = cursor.fetchmany(5000)
+        if not rows:
+            break
+        for row in rows:
+            bucket, rho = hll_register(str(_values(row)[0]))
+            if rho > registers.get(bucket, 0):
+                registers[bucket] = rho
+    cursor.execute("DELETE FROM stats_hll")
+    if registers:
+        cursor.executemany(f"INSERT INTO stats_hll (bucket, rho) VALUES ({ph}, {ph})", list(registers.items()))
+    counters['unique_machines'] = hll_estimate(registers)
+
+    cursor.execute(f"UPDATE stats_counters SET value = {ph} WHERE name = {ph}", (int(time.time()), RECONCILED_AT))
+    if drift:
+        print(f"🔧 Contadores de estadísticas corregidos: {drift}")
+    return {'counters': counters, 'drift': drift}
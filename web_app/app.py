@@ -153,10 +153,10 @@ def api_check_user():
     
     from auth import get_user_by_id
     import sqlite3
-    from auth import DATABASE
+    from auth import DATABASE, get_auth_connection
     
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT id, username, email, is_active, company_id FROM users WHERE username = ?', (username,))
         user = cursor.fetchone()
@@ -173,7 +173,7 @@ def api_check_user():
             })
         else:
             # Listar usuarios disponibles
-            conn = sqlite3.connect(DATABASE)
+            conn = get_auth_connection()
             cursor = conn.cursor()
             cursor.execute('SELECT username FROM users LIMIT 10')
             all_users = [u[0] for u in cursor.fetchall()]
@@ -392,6 +392,15 @@ def admin_subscriptions_logout():
 # ============================================================
 import sqlite3
 from contextlib import contextmanager
+from cache_backend import get_cache
+from db_pool import get_sqlite_pool, install_request_metrics
+import feedback_learning
+import model_feed
+import scan_listing
+import stats_counters
+
+# Métricas de préstamo de conexiones por petición (cabecera Server-Timing)
+install_request_metrics(app)
 
 # Usar la misma base de datos que la API
 # En desarrollo local: source/scanner_db.sqlite
@@ -410,29 +419,12 @@ def get_api_db_cursor():
     if not API_DB_AVAILABLE_LOCALLY:
         raise FileNotFoundError(f"Base de datos de API no disponible localmente en {API_DATABASE_PATH}. Usa HTTP para crear tokens.")
     
-    conn = sqlite3.connect(API_DATABASE_PATH, check_same_thread=False, timeout=10.0)
-    # Configurar SQLite para mejor persistencia
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA synchronous=NORMAL')
-    conn.execute('PRAGMA busy_timeout=5000')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    try:
+    # Conexión reutilizada del pool (los PRAGMA se aplican una vez al crearla, no por petición)
+    with get_sqlite_pool(API_DATABASE_PATH, row_factory=sqlite3.Row).cursor() as cursor:
         yield cursor
-        # Hacer commit explícitamente antes de cerrar
-        conn.commit()
-        # Verificar que el commit se hizo correctamente
-        conn.execute('SELECT 1')
-    except Exception as e:
-        conn.rollback()
-        raise
-    finally:
-        # Cerrar conexión explícitamente
-        conn.close()
 
-# Caché simple en memoria para estadísticas
-_stats_cache = {}
-_stats_cache_time = {}
+# Caché compartida para estadísticas (memoria o archivo común a los workers, según CACHE_BACKEND)
+_stats_cache = get_cache('web')
 
 @app.route('/api/statistics', methods=['GET'])
 @login_required
@@ -442,9 +434,9 @@ def get_statistics():
     
     # Verificar caché (30 segundos TTL)
     cache_key = 'statistics'
-    if cache_key in _stats_cache:
-        if time.time() - _stats_cache_time.get(cache_key, 0) < 30:
-            return jsonify(_stats_cache[cache_key]), 200
+    cached = _stats_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached), 200
     
     try:
         # Acceso directo a la base de datos (SIN HTTP - MUCHO MÁS RÁPIDO)
@@ -459,49 +451,58 @@ def get_statistics():
                 'total_bans': 0
             }
             
-            # Consulta optimizada: una sola query
+            # Contadores que mantiene la API con triggers (si la BD aún no los tiene, COUNT(*))
             try:
-                cursor.execute('''
-                    SELECT 
-                        (SELECT COUNT(*) FROM scans) as total_scans,
-                        (SELECT COUNT(*) FROM scans WHERE status = "running") as active_scans,
-                        (SELECT COUNT(DISTINCT machine_id) FROM scans WHERE machine_id IS NOT NULL AND machine_id != "") as unique_machines,
-                        (SELECT COUNT(*) FROM scan_results WHERE alert_level = "CRITICAL") as severe_detections,
-                        (SELECT COUNT(*) FROM scan_results) as total_results,
-                        (SELECT COUNT(*) FROM scan_tokens WHERE is_active = 1) as active_tokens,
-                        (SELECT COUNT(*) FROM ban_history) as total_bans
-                ''')
-                row = cursor.fetchone()
-                if row:
-                    stats['total_scans'] = row[0] or 0
-                    stats['active_scans'] = row[1] or 0
-                    stats['unique_machines'] = row[2] or 0
-                    stats['severe_detections'] = row[3] or 0
-                    stats['total_results'] = row[4] or 0
-                    stats['active_tokens'] = row[5] or 0
-                    stats['total_bans'] = row[6] or 0
+                counters = stats_counters.read_statistics(cursor)
             except sqlite3.OperationalError:
-                # Fallback: consultas individuales si alguna tabla no existe
-                for query, key in [
-                    ('SELECT COUNT(*) FROM scans', 'total_scans'),
-                    ('SELECT COUNT(*) FROM scans WHERE status = "running"', 'active_scans'),
-                    ('SELECT COUNT(DISTINCT machine_id) FROM scans WHERE machine_id IS NOT NULL AND machine_id != ""', 'unique_machines'),
-                    ('SELECT COUNT(*) FROM scan_results WHERE alert_level = "CRITICAL"', 'severe_detections'),
-                    ('SELECT COUNT(*) FROM scan_results', 'total_results'),
-                    ('SELECT COUNT(*) FROM scan_tokens WHERE is_active = 1', 'active_tokens'),
-                    ('SELECT COUNT(*) FROM ban_history', 'total_bans')
-                ]:
-                    try:
-                        cursor.execute(query)
-                        stats[key] = cursor.fetchone()[0] or 0
-                    except sqlite3.OperationalError:
-                        pass
+                counters = None
+            if counters:
+                # Solo los contadores públicos: reconciled_at es interno
+                stats.update({name: counters[name] for name in stats_counters.COUNTER_QUERIES})
+                stats['unique_machines'] = counters['unique_machines']
+            else:
+                # Consulta optimizada: una sola query
+                try:
+                    cursor.execute('''
+                        SELECT 
+                            (SELECT COUNT(*) FROM scans) as total_scans,
+                            (SELECT COUNT(*) FROM scans WHERE status = "running") as active_scans,
+                            (SELECT COUNT(DISTINCT machine_id) FROM scans WHERE machine_id IS NOT NULL AND machine_id != "") as unique_machines,
+                            (SELECT COUNT(*) FROM scan_results WHERE alert_level = "CRITICAL") as severe_detections,
+                            (SELECT COUNT(*) FROM scan_results) as total_results,
+                            (SELECT COUNT(*) FROM scan_tokens WHERE is_active = 1) as active_tokens,
+                            (SELECT COUNT(*) FROM ban_history) as total_bans
+                    ''')
+                    row = cursor.fetchone()
+                    if row:
+                        stats['total_scans'] = row[0] or 0
+                        stats['active_scans'] = row[1] or 0
+                        stats['unique_machines'] = row[2] or 0
+                        stats['severe_detections'] = row[3] or 0
+                        stats['total_results'] = row[4] or 0
+                        stats['active_tokens'] = row[5] or 0
+                        stats['total_bans'] = row[6] or 0
+                except sqlite3.OperationalError:
+                    # Fallback: consultas individuales si alguna tabla no existe
+                    for query, key in [
+                        ('SELECT COUNT(*) FROM scans', 'total_scans'),
+                        ('SELECT COUNT(*) FROM scans WHERE status = "running"', 'active_scans'),
+                        ('SELECT COUNT(DISTINCT machine_id) FROM scans WHERE machine_id IS NOT NULL AND machine_id != ""', 'unique_machines'),
+                        ('SELECT COUNT(*) FROM scan_results WHERE alert_level = "CRITICAL"', 'severe_detections'),
+                        ('SELECT COUNT(*) FROM scan_results', 'total_results'),
+                        ('SELECT COUNT(*) FROM scan_tokens WHERE is_active = 1', 'active_tokens'),
+                        ('SELECT COUNT(*) FROM ban_history', 'total_bans')
+                    ]:
+                        try:
+                            cursor.execute(query)
+                            stats[key] = cursor.fetchone()[0] or 0
+                        except sqlite3.OperationalError:
+                            pass
             
             stats['timestamp'] = datetime.datetime.now().isoformat()
             
             # Guardar en caché
-            _stats_cache[cache_key] = stats
-            _stats_cache_time[cache_key] = time.time()
+            _stats_cache.set(cache_key, stats, ttl=30)
             
             return jsonify(stats), 200
     except Exception as e:
@@ -800,8 +801,8 @@ def api_deactivate_company_user(user_id):
     
     try:
         import sqlite3
-        from auth import DATABASE
-        conn = sqlite3.connect(DATABASE)
+        from auth import DATABASE, get_auth_connection
+        conn = get_auth_connection()
         cursor = conn.cursor()
         cursor.execute('UPDATE users SET is_active = 0 WHERE id = ?', (user_id,))
         conn.commit()
@@ -829,8 +830,8 @@ def api_activate_company_user(user_id):
     
     try:
         import sqlite3
-        from auth import DATABASE
-        conn = sqlite3.connect(DATABASE)
+        from auth import DATABASE, get_auth_connection
+        conn = get_auth_connection()
         cursor = conn.cursor()
         cursor.execute('UPDATE users SET is_active = 1 WHERE id = ?', (user_id,))
         conn.commit()
@@ -862,8 +863,8 @@ def api_delete_company_user(user_id):
     
     try:
         import sqlite3
-        from auth import DATABASE
-        conn = sqlite3.connect(DATABASE)
+        from auth import DATABASE, get_auth_connection
+        conn = get_auth_connection()
         cursor = conn.cursor()
         cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
         conn.commit()
@@ -1353,14 +1354,14 @@ def create_token():
                 try:
                     import sqlite3
                     from datetime import datetime, timedelta
-                    from auth import DATABASE
+                    from auth import DATABASE, get_auth_connection
                     
                     download_token = secrets.token_urlsafe(32)
                     # El enlace expira cuando el token expira, o en 7 días si el token no expira
                     download_expires_hours = expires_days * 24 if expires_days > 0 else 168  # 7 días por defecto
                     download_expires_at = datetime.now() + timedelta(hours=download_expires_hours)
                     
-                    conn = sqlite3.connect(DATABASE)
+                    conn = get_auth_connection()
                     cursor = conn.cursor()
                     cursor.execute('''
                         INSERT INTO download_links (token, filename, created_by, expires_at, max_downloads, description)
@@ -1438,7 +1439,7 @@ def create_token():
                     try:
                         import sqlite3
                         from datetime import datetime, timedelta
-                        from auth import DATABASE
+                        from auth import DATABASE, get_auth_connection
                         
                         download_token = secrets.token_urlsafe(32)
                         # El enlace expira cuando el token expira, o en 7 días si el token no expira
@@ -1447,7 +1448,7 @@ def create_token():
                         download_expires_at = datetime.now() + timedelta(hours=download_expires_hours)
                         
                         user_id = session.get('user_id')
-                        conn = sqlite3.connect(DATABASE)
+                        conn = get_auth_connection()
                         cursor = conn.cursor()
                         cursor.execute('''
                             INSERT INTO download_links (token, filename, created_by, expires_at, max_downloads, description)
@@ -1554,92 +1555,28 @@ def delete_token(token_id):
 @app.route('/api/scans', methods=['GET'])
 @login_required
 def list_scans():
-    """Lista escaneos - Usa BD directa si está disponible, sino HTTP"""
-    import time
-    
-    limit = request.args.get('limit', 50, type=int)
-    offset = request.args.get('offset', 0, type=int)
+    """Lista escaneos - Usa BD directa si está disponible, sino HTTP (paginación por cursor con ?after=)"""
+    try:
+        params = scan_listing.parse_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'scans': []}), 400
     
-    # Caché por limit/offset (10 segundos TTL)
-    cache_key = f'scans_list_{limit}_{offset}'
-    if cache_key in _stats_cache:
-        if time.time() - _stats_cache_time.get(cache_key, 0) < 10:
-            return jsonify(_stats_cache[cache_key]), 200
+    # Caché por página y filtros (10 segundos TTL)
+    cache_key = scan_listing.cache_key(params)
+    cached = _stats_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached), 200
     
     # Intentar acceso directo a BD primero (más rápido) - SOLO si NO estamos en Render
     if API_DB_AVAILABLE_LOCALLY and not IS_RENDER:
         try:
             print(f"🔄 Intentando obtener escaneos directamente de la BD local...")
             with get_api_db_cursor() as cursor:
-                cursor.execute('''
-                    SELECT id, scan_token, started_at, completed_at, status,
-                           total_files_scanned, issues_found, scan_duration, machine_name
-                    FROM scans
-                    ORDER BY started_at DESC
-                    LIMIT ? OFFSET ?
-                ''', (limit, offset))
-                
-                scans = []
-                scan_ids = []
-                for row in cursor.fetchall():
-                    scan_id = row[0]
-                    scan_ids.append(scan_id)
-                    scans.append({
-                        'id': scan_id,
-                        'scan_token': row[1],
-                        'started_at': row[2],
-                        'completed_at': row[3],
-                        'status': row[4],
-                        'total_files_scanned': row[5],
-                        'issues_found': row[6],
-                        'scan_duration': row[7],
-                        'machine_name': row[8]
-                    })
-                
-                print(f"📊 Escaneos encontrados en BD local: {len(scans)}")
-                
-                # Calcular preview de severidad (una sola query optimizada)
-                if scan_ids:
-                    placeholders = ','.join(['?'] * len(scan_ids))
-                    cursor.execute(f'''
-                        SELECT scan_id, 
-                               SUM(CASE WHEN alert_level = 'CRITICAL' THEN 1 ELSE 0 END) as critical,
-                               SUM(CASE WHEN alert_level IN ('SOSPECHOSO', 'HACKS') THEN 1 ELSE 0 END) as suspicious,
-                               SUM(CASE WHEN alert_level = 'POCO_SOSPECHOSO' THEN 1 ELSE 0 END) as low,
-                               COUNT(*) as total
-                        FROM scan_results
-                        WHERE scan_id IN ({placeholders})
-                        GROUP BY scan_id
-                    ''', scan_ids)
-                    
-                    severity_map = {}
-                    for row in cursor.fetchall():
-                        scan_id, critical, suspicious, low, total = row
-                        if critical > 0:
-                            severity_map[scan_id] = {'summary': 'CRITICO', 'badge': 'danger'}
-                        elif suspicious > 0:
-                            severity_map[scan_id] = {'summary': 'SOSPECHOSO', 'badge': 'warning'}
-                        elif low > 0:
-                            severity_map[scan_id] = {'summary': 'POCO_SOSPECHOSO', 'badge': 'info'}
-                        elif total == 0:
-                            severity_map[scan_id] = {'summary': 'LIMPIO', 'badge': 'success'}
-                        else:
-                            severity_map[scan_id] = {'summary': 'NORMAL', 'badge': 'secondary'}
-                    
-                    # Agregar preview a cada scan
-                    for scan in scans:
-                        if scan['id'] in severity_map:
-                            scan['severity_summary'] = severity_map[scan['id']]['summary']
-                            scan['severity_badge'] = severity_map[scan['id']]['badge']
-                        else:
-                            scan['severity_summary'] = 'LIMPIO' if scan['issues_found'] == 0 else 'SOSPECHOSO'
-                            scan['severity_badge'] = 'success' if scan['issues_found'] == 0 else 'warning'
-                
-                result = {'scans': scans}
+                result = scan_listing.fetch_page(cursor, params)
+                scans = result['scans']
                 
                 # Guardar en caché
-                _stats_cache[cache_key] = result
-                _stats_cache_time[cache_key] = time.time()
+                _stats_cache.set(cache_key, result, ttl=10)
                 
                 print(f"✅ Escaneos obtenidos directamente de BD. Total: {len(scans)}")
                 return jsonify(result), 200
@@ -1661,7 +1598,7 @@ def list_scans():
     try:
         api_url = get_api_url('/api/scans')
         print(f"🌐 URL completa: {api_url}")
-        print(f"🌐 Parámetros: limit={limit}, offset={offset}")
+        print(f"🌐 Parámetros: {request.args.to_dict()}")
         
         headers = {}
         if API_KEY:
@@ -1672,7 +1609,7 @@ def list_scans():
         
         response = requests.get(
             api_url,
-            params={'limit': limit, 'offset': offset},
+            params=request.args.to_dict(),
             headers=headers,
             timeout=15  # Aumentado timeout para Render
         )
@@ -1695,8 +1632,7 @@ def list_scans():
                 print(f"📋 Respuesta completa: {result}")
             
             # Guardar en caché
-            _stats_cache[cache_key] = result
-            _stats_cache_time[cache_key] = time.time()
+            _stats_cache.set(cache_key, result, ttl=10)
             return jsonify(result), 200
         else:
             print(f"❌ Error obteniendo escaneos: {response.status_code}")
@@ -1723,9 +1659,9 @@ def get_scan(scan_id):
     
     # Caché por scan_id (5 segundos TTL)
     cache_key = f'scan_{scan_id}'
-    if cache_key in _stats_cache:
-        if time.time() - _stats_cache_time.get(cache_key, 0) < 5:
-            return jsonify(_stats_cache[cache_key]), 200
+    cached = _stats_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached), 200
     
     # Intentar acceso directo a BD primero (más rápido)
     if API_DB_AVAILABLE_LOCALLY:
@@ -1789,8 +1725,7 @@ def get_scan(scan_id):
                 scan['results'] = results
                 
                 # Guardar en caché
-                _stats_cache[cache_key] = scan
-                _stats_cache_time[cache_key] = time.time()
+                _stats_cache.set(cache_key, scan, ttl=5)
                 
                 return jsonify(scan), 200
         except Exception as e:
@@ -1819,8 +1754,7 @@ def get_scan(scan_id):
             results_count = len(scan.get('results', []))
             print(f"✅ Obtenido escaneo {scan_id} con {results_count} resultados desde la API")
             # Guardar en caché
-            _stats_cache[cache_key] = scan
-            _stats_cache_time[cache_key] = time.time()
+            _stats_cache.set(cache_key, scan, ttl=5)
             return jsonify(scan), 200
         else:
             print(f"❌ Error obteniendo escaneo {scan_id}: {response.status_code} - {response.text[:200]}")
@@ -1947,12 +1881,9 @@ def submit_feedback():
             ''', (json.dumps(extracted_patterns), json.dumps(extracted_features), feedback_id))
             
             # Limpiar caché relacionado
-            if f'scan_{scan_id}' in _stats_cache:
-                del _stats_cache[f'scan_{scan_id}']
-            if 'statistics' in _stats_cache:
-                del _stats_cache['statistics']
-            if 'learned_patterns' in _stats_cache:
-                del _stats_cache['learned_patterns']
+            _stats_cache.delete(f'scan_{scan_id}')
+            _stats_cache.delete('statistics')
+            _stats_cache.delete('learned_patterns')
         
         return jsonify({
             'success': True,
@@ -1971,8 +1902,6 @@ def submit_feedback():
 @login_required
 def submit_feedback_batch():
     """Envía feedback masivo del staff sobre múltiples resultados - OPTIMIZADO: Acceso directo a BD"""
-    import re
-    
     try:
         data = request.json or {}
         if not data:
@@ -1995,101 +1924,20 @@ def submit_feedback_batch():
         if staff_verification not in ['hack', 'legitimate']:
             return jsonify({'error': f'Verificación debe ser "hack" o "legitimate"'}), 400
         
-        # Acceso directo a BD (SIN HTTP - MUCHO MÁS RÁPIDO)
-        feedback_ids = []
-        all_extracted_patterns = []
-        
+        # Acceso directo a BD (SIN HTTP): el lote entero con una lectura, inserción multi-fila
+        # y un UPSERT por tabla, en lugar de varias sentencias por resultado
         with get_api_db_cursor() as cursor:
-            # Procesar cada resultado
-            for result_id in result_ids:
-                # Obtener información del resultado
-                cursor.execute('''
-                    SELECT scan_id, issue_name, issue_path, file_hash, detected_patterns, 
-                           obfuscation_detected, confidence
-                    FROM scan_results
-                    WHERE id = ?
-                ''', (result_id,))
-                
-                result = cursor.fetchone()
-                if not result:
-                    continue  # Saltar si no existe
-                
-                scan_id, issue_name, issue_path, file_hash, detected_patterns_json, obfuscation, confidence = result
-                
-                # Guardar feedback
-                cursor.execute('''
-                    INSERT INTO staff_feedback (
-                        result_id, scan_id, staff_verification, staff_notes, verified_by,
-                        file_hash, issue_name, issue_path
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (result_id, scan_id, staff_verification, staff_notes, verified_by,
-                      file_hash, issue_name, issue_path))
-                
-                feedback_id = cursor.lastrowid
-                feedback_ids.append(feedback_id)
-                
-                # Extraer patrones si es hack
-                extracted_patterns = []
-                extracted_features = {}
-                
-                if staff_verification == 'hack':
-                    name_lower = (issue_name or '').lower()
-                    path_lower = (issue_path or '').lower()
-                    hack_keywords = re.findall(r'\b(vape|entropy|inject|bypass|killaura|aimbot|reach|velocity|scaffold|fly|xray|ghost|stealth|undetected|sigma|flux|future|astolfo|whiteout|liquidbounce|wurst|impact)\w*\b', 
-                                              name_lower + ' ' + path_lower, re.IGNORECASE)
-                    extracted_patterns = list(set(hack_keywords))
-                    all_extracted_patterns.extend(extracted_patterns)
-                    
-                    # Guardar hash si existe
-                    if file_hash:
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO learned_hashes (
-                                file_hash, is_hack, confirmed_count, last_confirmed_at, source_feedback_id
-                            ) VALUES (?, 1, 
-                                COALESCE((SELECT confirmed_count FROM learned_hashes WHERE file_hash = ?), 0) + 1,
-                                CURRENT_TIMESTAMP, ?
-                            )
-                        ''', (file_hash, file_hash, feedback_id))
-                    
-                    # Guardar patrones aprendidos
-                    if extracted_patterns:
-                        pattern_data = [(pattern, feedback_id, pattern) for pattern in extracted_patterns]
-                        cursor.executemany('''
-                            INSERT OR REPLACE INTO learned_patterns (
-                                pattern_type, pattern_value, pattern_category, source_feedback_id,
-                                learned_from_count, last_updated_at, is_active
-                            ) VALUES ('keyword', ?, 'high_risk', ?, 
-                                COALESCE((SELECT learned_from_count FROM learned_patterns WHERE pattern_value = ?), 0) + 1,
-                                CURRENT_TIMESTAMP, 1
-                            )
-                        ''', pattern_data)
-                    
-                    extracted_features = {
-                        'obfuscation': bool(obfuscation),
-                        'confidence': confidence or 0
-                    }
-                elif staff_verification == 'legitimate' and file_hash:
-                    # Si es legítimo, guardar hash en whitelist
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO learned_hashes (
-                            file_hash, is_hack, confirmed_count, last_confirmed_at, source_feedback_id
-                        ) VALUES (?, 0, 
-                            COALESCE((SELECT confirmed_count FROM learned_hashes WHERE file_hash = ?), 0) + 1,
-                            CURRENT_TIMESTAMP, ?
-                        )
-                    ''', (file_hash, file_hash, feedback_id))
-                
-                # Actualizar feedback con características extraídas
-                cursor.execute('''
-                    UPDATE staff_feedback
-                    SET extracted_patterns = ?, extracted_features = ?
-                    WHERE id = ?
-                ''', (json.dumps(extracted_patterns), json.dumps(extracted_features), feedback_id))
+            batch = feedback_learning.apply_feedback_batch(
+                cursor, result_ids, staff_verification, staff_notes, verified_by,
+                learn_legitimate_words=False
+            )
+            feedback_ids = [feedback_id for _, feedback_id in batch['feedback']]
+            all_extracted_patterns = batch['patterns']
             
             # Limpiar caché relacionado
-            for key in list(_stats_cache.keys()):
-                if key.startswith('scan_') or key in ['statistics', 'learned_patterns']:
-                    del _stats_cache[key]
+            _stats_cache.invalidate_prefix('scan_')
+            _stats_cache.delete('statistics')
+            _stats_cache.delete('learned_patterns')
         
             return jsonify({
             'success': True,
@@ -2187,9 +2035,9 @@ def get_learned_patterns():
     
     # Caché (60 segundos TTL - los patrones no cambian tan frecuentemente)
     cache_key = 'learned_patterns'
-    if cache_key in _stats_cache:
-        if time.time() - _stats_cache_time.get(cache_key, 0) < 60:
-            return jsonify(_stats_cache[cache_key]), 200
+    cached = _stats_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached), 200
     
     try:
         # Acceso directo a BD (SIN HTTP - MUCHO MÁS RÁPIDO)
@@ -2215,8 +2063,7 @@ def get_learned_patterns():
                 except sqlite3.OperationalError:
                     # Si la tabla no existe, retornar vacío
                     result = {'patterns': [], 'total': 0}
-                    _stats_cache[cache_key] = result
-                    _stats_cache_time[cache_key] = time.time()
+                    _stats_cache.set(cache_key, result, ttl=60)
                     return jsonify(result), 200
             
             patterns = []
@@ -2234,8 +2081,7 @@ def get_learned_patterns():
             result = {'patterns': patterns, 'total': len(patterns)}
             
             # Guardar en caché
-            _stats_cache[cache_key] = result
-            _stats_cache_time[cache_key] = time.time()
+            _stats_cache.set(cache_key, result, ttl=60)
             
             return jsonify(result), 200
     except Exception as e:
@@ -2247,81 +2093,37 @@ def get_learned_patterns():
 
 @app.route('/api/ai-model/latest', methods=['GET'])
 def get_latest_ai_model():
-    """Obtiene el modelo de IA más reciente - OPTIMIZADO: Acceso directo a BD sin HTTP"""
-    import time
-    
-    # Caché (300 segundos TTL - el modelo no cambia tan frecuentemente)
-    cache_key = 'ai_model_latest'
-    if cache_key in _stats_cache:
-        if time.time() - _stats_cache_time.get(cache_key, 0) < 300:
-            return jsonify(_stats_cache[cache_key]), 200
+    """Obtiene el modelo de IA más reciente - OPTIMIZADO: Acceso directo a BD sin HTTP, deltas (?since=) y ETag"""
+    try:
+        params = model_feed.parse_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
         # Acceso directo a BD (SIN HTTP - MUCHO MÁS RÁPIDO)
         with get_api_db_cursor() as cursor:
-            # Obtener patrones aprendidos
-            try:
-                cursor.execute('''
-                    SELECT pattern_value, pattern_category, confidence, learned_from_count
-                    FROM learned_patterns
-                    WHERE is_active = 1
-                    ORDER BY learned_from_count DESC
-                ''')
-            except sqlite3.OperationalError:
-                cursor.execute('''
-                    SELECT pattern_value, pattern_category, confidence, learned_from_count
-                    FROM learned_patterns
-                    ORDER BY learned_from_count DESC
-                ''')
-            
-            patterns = {
-                'high_risk': [],
-                'medium_risk': [],
-                'low_risk': []
-            }
-            
-            for row in cursor.fetchall():
-                pattern_value, category, confidence, count = row
-                if category in patterns:
-                    patterns[category].append({
-                        'value': pattern_value,
-                        'confidence': confidence,
-                        'learned_from_count': count
-                    })
-            
-            # Obtener hashes aprendidos
+            # Versión del feed (None si la API aún no creó el registro de cambios)
             try:
-                cursor.execute('''
-                    SELECT file_hash, is_hack, confirmed_count
-                    FROM learned_hashes
-                    WHERE is_hack = 1
-                    ORDER BY confirmed_count DESC
-                ''')
+                version, oldest = model_feed.current_version(cursor)
             except sqlite3.OperationalError:
-                hashes = []
-            else:
-                hashes = []
-                for row in cursor.fetchall():
-                    hashes.append({
-                        'hash': row[0],
-                        'is_hack': bool(row[1]),
-                        'confirmed_count': row[2]
-                    })
+                version = oldest = None
             
-            result = {
-                'version': '1.0.0',
-                'updated_at': None,
-                'patterns': patterns,
-                'hashes': hashes,
-                'patterns_count': sum(len(p) for p in patterns.values()),
-                'hashes_count': len(hashes)
-            }
-            
-            # Guardar en caché
-            _stats_cache[cache_key] = result
-            _stats_cache_time[cache_key] = time.time()
-            
-            return jsonify(result), 200
+            headers = {}
+            if version is not None:
+                headers['ETag'] = model_feed.etag(version, params['format'])
+                if model_feed.etag_matches(request.headers.get('If-None-Match'), headers['ETag']):
+                    return '', 304, headers
+            
+            # Caché (300 segundos TTL - la clave incluye la versión del feed)
+            cache_key = model_feed.cache_key(params, version, oldest)
+            result = _stats_cache.get(cache_key)
+            if result is None:
+                result = model_feed.fetch_feed(cursor, params, version, oldest)
+                result['version'] = '1.0.0'
+                result['updated_at'] = None
+                _stats_cache.set(cache_key, result, ttl=300)
+            
+            return jsonify(result), 200, headers
     except Exception as e:
         import traceback
         print(f"Error en get_latest_ai_model: {str(e)}")
@@ -2566,11 +2368,11 @@ def download_with_token(token):
     import sqlite3
     from flask import send_file, jsonify, request
     from datetime import datetime
-    from auth import DATABASE
+    from auth import DATABASE, get_auth_connection
     
     try:
         # Buscar el enlace en la BD
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -3134,7 +2936,7 @@ def create_download_link():
     import secrets
     import sqlite3
     from datetime import datetime, timedelta
-    from auth import is_admin, DATABASE
+    from auth import is_admin, DATABASE, get_auth_connection
     
     print(f"🔗 Solicitud de creación de enlace de descarga recibida")
     print(f"📋 Datos recibidos: {request.json}")
@@ -3165,7 +2967,7 @@ def create_download_link():
     expires_at = datetime.now() + timedelta(hours=expires_hours)
     
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -3210,14 +3012,14 @@ def create_download_link():
 def list_download_links():
     """Lista todos los enlaces de descarga (solo para staff/admin)"""
     import sqlite3
-    from auth import is_admin
+    from auth import is_admin, get_auth_connection
     
     # Verificar permisos
     if not is_admin(session.get('user_id')):
         return jsonify({'error': 'No tienes permisos para ver enlaces de descarga'}), 403
     
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -3270,14 +3072,14 @@ def list_download_links():
 def delete_download_link(link_id):
     """Desactiva un enlace de descarga (solo para staff/admin)"""
     import sqlite3
-    from auth import is_admin
+    from auth import is_admin, get_auth_connection
     
     # Verificar permisos
     if not is_admin(session.get('user_id')):
         return jsonify({'error': 'No tienes permisos para eliminar enlaces'}), 403
     
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
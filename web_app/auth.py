@@ -53,6 +53,12 @@ except Exception as e:
     USE_POSTGRESQL = False
     USE_MYSQL = False
 
+from db_pool import get_sqlite_pool
+
+def get_auth_connection():
+    """Conexión SQLite de autenticación prestada por el pool (close() la devuelve al pool)"""
+    return get_sqlite_pool(DATABASE).acquire()
+
 def init_auth_db():
     """Inicializa las tablas de autenticación en la base de datos"""
     # Si está usando MySQL/PostgreSQL, usar ese módulo
@@ -66,7 +72,7 @@ def init_auth_db():
             print("⚠️ Intentando fallback a SQLite...")
     
     # Fallback a SQLite
-    conn = sqlite3.connect(DATABASE)
+    conn = get_auth_connection()
     cursor = conn.cursor()
     
     # Tabla de empresas
@@ -317,11 +323,8 @@ def create_user(username, password, email=None, roles=None, company_id=None, cre
     conn = None
     try:
         # Configurar SQLite para mejor persistencia
-        conn = sqlite3.connect(DATABASE, timeout=10.0)
-        # Configurar modo WAL para mejor concurrencia y persistencia
-        conn.execute('PRAGMA journal_mode=WAL')
-        conn.execute('PRAGMA synchronous=NORMAL')
-        conn.execute('PRAGMA busy_timeout=5000')
+        # Conexión del pool: WAL, synchronous=NORMAL y busy_timeout ya configurados
+        conn = get_auth_connection()
         cursor = conn.cursor()
         print(f"✅ Conectado a BD: {DATABASE}")
         
@@ -409,7 +412,7 @@ def create_user(username, password, email=None, roles=None, company_id=None, cre
         print(f"📊 Total de usuarios en BD: {total_users}")
         
         # Verificar con una nueva conexión para asegurar persistencia
-        conn2 = sqlite3.connect(DATABASE, timeout=10.0)
+        conn2 = get_auth_connection()
         cursor2 = conn2.cursor()
         cursor2.execute('SELECT COUNT(*) FROM users WHERE id = ?', (user_id,))
         count_after_commit = cursor2.fetchone()[0]
@@ -454,7 +457,7 @@ def authenticate_user(username, password):
         if not username:
             return {'success': False, 'error': 'Usuario no puede estar vacío'}
         
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -518,7 +521,7 @@ def authenticate_user(username, password):
 def create_registration_token(created_by, company_id=None, expires_hours=24, description=None, is_admin_token=False):
     """Crea un token de registro de un solo uso, opcionalmente vinculado a una empresa - OPTIMIZADO"""
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         # Si es token de empresa, validar límites en UNA SOLA consulta optimizada
@@ -569,7 +572,7 @@ def create_registration_token(created_by, company_id=None, expires_hours=24, des
 def verify_registration_token(token):
     """Verifica y marca como usado un token de registro, retorna información de empresa y tipo"""
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -629,7 +632,7 @@ def get_user_by_id(user_id):
     import json
     
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -702,7 +705,7 @@ def is_company_user(user):
 def list_registration_tokens(include_used=False, company_id=None):
     """Lista tokens de registro, opcionalmente filtrados por empresa"""
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         if company_id:
@@ -771,7 +774,7 @@ def list_users(company_id=None):
     print(f"{'='*60}\n")
     
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         print(f"✅ Conectado a BD")
         
@@ -836,7 +839,7 @@ def create_company(name, contact_email=None, contact_phone=None, subscription_ty
                    created_by=None, notes=None):
     """Crea una nueva empresa"""
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -860,7 +863,7 @@ def create_company(name, contact_email=None, contact_phone=None, subscription_ty
 def get_company_by_id(company_id):
     """Obtiene una empresa por ID"""
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -876,7 +879,7 @@ def get_company_by_id(company_id):
         
         if row:
             # Contar usuarios actuales
-            conn = sqlite3.connect(DATABASE)
+            conn = get_auth_connection()
             cursor = conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM users WHERE company_id = ? AND is_active = 1', (company_id,))
             current_users = cursor.fetchone()[0]
@@ -915,7 +918,7 @@ def get_company_by_id(company_id):
 def list_companies():
     """Lista todas las empresas"""
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -968,7 +971,7 @@ def update_company(company_id, name=None, contact_email=None, contact_phone=None
                    subscription_end_date=None, max_users=None, max_admins=None, is_active=None, notes=None):
     """Actualiza una empresa"""
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_auth_connection()
         cursor = conn.cursor()
         
         updates = []
@@ -5,8 +5,12 @@ import multiprocessing
 import os
 
 # Número de workers (procesos) - Optimizado para Render free tier
-# Usar solo 1 worker para evitar problemas de memoria y mejorar tiempo de respuesta
-workers = 1  # Render free tier funciona mejor con 1 worker
+# Por defecto 1 worker para evitar problemas de memoria; WEB_CONCURRENCY permite más
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Con varios workers la caché tiene que ser compartida: una invalidación hecha en un
+# worker debe verse en los demás (se lee al importar la app, después de este archivo)
+os.environ.setdefault('CACHE_BACKEND', 'sqlite' if workers > 1 else 'memory')
 
 # Timeout (reducido para respuestas más rápidas)
 timeout = 30  # 30 segundos es suficiente para la mayoría de requests